@@ -0,0 +1,90 @@
+"""Typed DATE/TIME columns for agenda_blocos and habitos_checkin.
+
+`date` was stored as 'dd/MM/YYYY' text and start/end times as 'HH:MM' text, so
+ORDER BY sorted lexicographically and range filters could not use an index.
+
+- Postgres: ALTER COLUMN ... TYPE DATE/TIME parsing the legacy format (ISO also accepted).
+- SQLite: rewrite stored strings to the ISO layout SQLAlchemy's Date/Time expect.
+- Both: composite (user_id, date) indexes for week/month range scans.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261019_0003'
+down_revision = '20250924_0002'
+branch_labels = None
+depends_on = None
+
+_PG_DATE_EXPR = (
+    "CASE WHEN {col} ~ '^\\d{{4}}-\\d{{2}}-\\d{{2}}' THEN {col}::date "
+    "ELSE to_date({col}, 'DD/MM/YYYY') END"
+)
+
+
+def _pg_column_type(bind, table: str, column: str):
+    return bind.execute(sa.text(
+        """
+        SELECT data_type
+        FROM information_schema.columns
+        WHERE table_schema = COALESCE(current_schema(), 'public')
+          AND table_name = :t AND column_name = :c
+        """
+    ), {"t": table, "c": column}).scalar()
+
+
+def _upgrade_postgres(bind):
+    for table in ('agenda_blocos', 'habitos_checkin'):
+        current = _pg_column_type(bind, table, 'date')
+        if current and current.lower() != 'date':
+            op.execute(
+                f"ALTER TABLE {table} ALTER COLUMN date TYPE DATE USING "
+                + _PG_DATE_EXPR.format(col='date')
+            )
+    for column in ('start_time', 'end_time'):
+        current = _pg_column_type(bind, 'agenda_blocos', column)
+        if current and not current.lower().startswith('time'):
+            op.execute(
+                f"ALTER TABLE agenda_blocos ALTER COLUMN {column} TYPE TIME USING NULLIF({column}, '')::time"
+            )
+
+
+def _upgrade_sqlite():
+    # SQLite has no column types to alter; normalize stored text instead.
+    for table in ('agenda_blocos', 'habitos_checkin'):
+        op.execute(
+            f"UPDATE {table} SET date = substr(date, 7, 4) || '-' || substr(date, 4, 2) || '-' || substr(date, 1, 2) "
+            "WHERE date LIKE '__/__/____'"
+        )
+    for column in ('start_time', 'end_time'):
+        op.execute(
+            # separate ':' literal so text() does not read ':00' as a bind param
+            f"UPDATE agenda_blocos SET {column} = {column} || ':' || '00.000000' WHERE length({column}) = 5"
+        )
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+    if not {'agenda_blocos', 'habitos_checkin'} <= tables:
+        # Fresh database: tables will come from create_all with the new types.
+        return
+    if bind.dialect.name == 'postgresql':
+        _upgrade_postgres(bind)
+    elif bind.dialect.name == 'sqlite':
+        _upgrade_sqlite()
+    op.execute("CREATE INDEX IF NOT EXISTS ix_agenda_blocos_user_date ON agenda_blocos (user_id, date)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_habitos_checkin_user_date ON habitos_checkin (user_id, date)")
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_habitos_checkin_user_date")
+    op.execute("DROP INDEX IF EXISTS ix_agenda_blocos_user_date")
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    for table in ('agenda_blocos', 'habitos_checkin'):
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN date TYPE VARCHAR(20) USING to_char(date, 'DD/MM/YYYY')")
+    for column in ('start_time', 'end_time'):
+        op.execute(f"ALTER TABLE agenda_blocos ALTER COLUMN {column} TYPE VARCHAR(5) USING to_char({column}, 'HH24:MI')")
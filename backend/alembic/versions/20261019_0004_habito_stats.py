@@ -0,0 +1,35 @@
+"""Incremental streak state per (user_id, habit).
+
+Rows are maintained on each check-in / Pomodoro log by servicos/streaks.py and
+can be rebuilt from history with scripts/rebuild_streaks.py.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261019_0004'
+down_revision = '20261019_0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'habito_stats' in inspector.get_table_names():
+        return
+    op.create_table(
+        'habito_stats',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('habit', sa.String(length=50), nullable=False),
+        sa.Column('current_streak', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('longest_streak', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_date', sa.Date(), nullable=True),
+        sa.Column('activity_mask', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('total_days', sa.Integer(), nullable=False, server_default='0'),
+        sa.UniqueConstraint('user_id', 'habit', name='uq_habito_stats_user_habit'),
+    )
+
+
+def downgrade():
+    op.drop_table('habito_stats')
@@ -0,0 +1,33 @@
+"""Daily/weekly focus-time rollups per user for Pomodoro analytics.
+
+Maintained on insert by servicos/pomodoro_rollups.py; existing sessions are
+folded in with scripts/rebuild_pomodoro_rollups.py.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261019_0005'
+down_revision = '20261019_0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'pomodoro_rollups' in inspector.get_table_names():
+        return
+    op.create_table(
+        'pomodoro_rollups',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('granularity', sa.String(length=8), nullable=False),
+        sa.Column('bucket_start', sa.Date(), nullable=False),
+        sa.Column('focus_seconds', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('sessions', sa.Integer(), nullable=False, server_default='0'),
+        sa.UniqueConstraint('user_id', 'granularity', 'bucket_start', name='uq_pomodoro_rollup_bucket'),
+    )
+
+
+def downgrade():
+    op.drop_table('pomodoro_rollups')
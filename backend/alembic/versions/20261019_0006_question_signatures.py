@@ -0,0 +1,48 @@
+"""MinHash signatures and LSH band keys of generated quiz questions.
+
+Used to skip near-duplicate questions within a weekly quiz and across a user's
+previous weeks (servicos/questoes_lsh.py). Existing WeeklyQuiz rows are indexed
+with scripts/rebuild_question_signatures.py.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261019_0006'
+down_revision = '20261019_0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    tabelas = inspector.get_table_names()
+    if 'question_signatures' not in tabelas:
+        op.create_table(
+            'question_signatures',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+            sa.Column('week_start', sa.Date(), nullable=False),
+            sa.Column('question_hash', sa.String(length=40), nullable=False),
+            sa.Column('signature', sa.LargeBinary(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.UniqueConstraint('user_id', 'week_start', 'question_hash', name='uq_question_signature_user_week_hash'),
+        )
+        op.create_index('ix_question_signatures_user_week', 'question_signatures', ['user_id', 'week_start'])
+    if 'question_lsh_bands' not in tabelas:
+        op.create_table(
+            'question_lsh_bands',
+            sa.Column('signature_id', sa.Integer(),
+                      sa.ForeignKey('question_signatures.id', ondelete='CASCADE'), primary_key=True),
+            sa.Column('band', sa.SmallInteger(), primary_key=True),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('band_key', sa.BigInteger(), nullable=False),
+        )
+        op.create_index('ix_question_lsh_bands_user_key', 'question_lsh_bands', ['user_id', 'band_key'])
+
+
+def downgrade():
+    op.drop_index('ix_question_lsh_bands_user_key', table_name='question_lsh_bands')
+    op.drop_table('question_lsh_bands')
+    op.drop_index('ix_question_signatures_user_week', table_name='question_signatures')
+    op.drop_table('question_signatures')
@@ -0,0 +1,38 @@
+"""Question bank shared by all users' weekly quizzes.
+
+Questions are generated once per (content_id, content_hash, generator) and
+weekly_quizzes.data stores {"ref": question_bank.id, "perm": [...]} entries
+instead of full copies (servicos/banco_questoes.py). Rows written before this
+revision keep their inline items and are still served as-is.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261019_0007'
+down_revision = '20261019_0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'question_bank' in inspector.get_table_names():
+        return
+    op.create_table(
+        'question_bank',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('content_id', sa.Integer(), nullable=False),
+        sa.Column('content_hash', sa.String(length=40), nullable=False),
+        sa.Column('generator', sa.String(length=32), nullable=False),
+        sa.Column('format', sa.String(length=16), nullable=False),
+        sa.Column('slot', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('item', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.UniqueConstraint('content_id', 'content_hash', 'generator', 'format', 'slot', name='uq_question_bank_key'),
+    )
+
+
+def downgrade():
+    op.drop_table('question_bank')
@@ -0,0 +1,38 @@
+"""Weekly quiz selections shared by content-set fingerprint.
+
+Users who completed the same contents in a week reuse one selection of
+question_bank items (and one Gemini polish); hits/misses per week feed
+GET /api/quizzes/weekly/cache-stats (servicos/quiz_fingerprint.py).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261019_0008'
+down_revision = '20261019_0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'weekly_quiz_fingerprints' in inspector.get_table_names():
+        return
+    op.create_table(
+        'weekly_quiz_fingerprints',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('fingerprint', sa.String(length=40), nullable=False),
+        sa.Column('week_start', sa.Date(), nullable=False),
+        sa.Column('groups', sa.JSON(), nullable=False),
+        sa.Column('polished', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('hits', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('history_misses', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.UniqueConstraint('fingerprint', 'week_start', name='uq_weekly_quiz_fingerprint_week'),
+    )
+    op.create_index('ix_weekly_quiz_fingerprints_week_start', 'weekly_quiz_fingerprints', ['week_start'])
+
+
+def downgrade():
+    op.drop_index('ix_weekly_quiz_fingerprints_week_start', table_name='weekly_quiz_fingerprints')
+    op.drop_table('weekly_quiz_fingerprints')
@@ -0,0 +1,47 @@
+"""Transactional outbox for domain events.
+
+Handlers write outbox_events in the same commit as the change; a relay moves
+them to a Redis Stream consumed by consumer groups (servicos/eventos.py).
+outbox_checkpoints keeps per-group progress when running without Redis.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261019_0009'
+down_revision = '20261019_0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    tabelas = inspector.get_table_names()
+    if 'outbox_events' not in tabelas:
+        op.create_table(
+            'outbox_events',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('event_type', sa.String(length=64), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=True),
+            sa.Column('payload', sa.JSON(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('relayed_at', sa.DateTime(), nullable=True),
+        )
+        op.create_index('ix_outbox_events_user_id', 'outbox_events', ['user_id'])
+        op.create_index('ix_outbox_events_created_at', 'outbox_events', ['created_at'])
+        op.create_index('ix_outbox_events_relayed_at', 'outbox_events', ['relayed_at'])
+    if 'outbox_checkpoints' not in tabelas:
+        op.create_table(
+            'outbox_checkpoints',
+            sa.Column('group_name', sa.String(length=64), primary_key=True),
+            sa.Column('last_event_id', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+        )
+
+
+def downgrade():
+    op.drop_table('outbox_checkpoints')
+    op.drop_index('ix_outbox_events_relayed_at', table_name='outbox_events')
+    op.drop_index('ix_outbox_events_created_at', table_name='outbox_events')
+    op.drop_index('ix_outbox_events_user_id', table_name='outbox_events')
+    op.drop_table('outbox_events')
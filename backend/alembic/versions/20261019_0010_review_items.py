@@ -0,0 +1,55 @@
+"""Spaced-repetition review queue (SM-2) and batch daily due lists.
+
+review_items is the per-user priority queue: ix_review_items_user_due serves
+GET /api/reviews/due as a single range scan. review_due_daily holds the lists
+computed by scripts/compute_due_reviews.py (servicos/revisoes.py).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261019_0010'
+down_revision = '20261019_0009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    tabelas = inspector.get_table_names()
+    if 'review_items' not in tabelas:
+        op.create_table(
+            'review_items',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+            sa.Column('content_id', sa.Integer(), nullable=False),
+            sa.Column('subject', sa.String(length=255), nullable=True),
+            sa.Column('topic', sa.String(length=255), nullable=True),
+            sa.Column('due_at', sa.DateTime(), nullable=False),
+            sa.Column('interval_days', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('ease', sa.Float(), nullable=False, server_default='2.5'),
+            sa.Column('repetitions', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('lapses', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('last_outcome', sa.String(length=16), nullable=True),
+            sa.Column('last_reviewed_at', sa.DateTime(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.UniqueConstraint('user_id', 'content_id', name='uq_review_items_user_content'),
+        )
+        op.create_index('ix_review_items_user_due', 'review_items', ['user_id', 'due_at'])
+        op.create_index('ix_review_items_due_at', 'review_items', ['due_at'])
+    if 'review_due_daily' not in tabelas:
+        op.create_table(
+            'review_due_daily',
+            sa.Column('user_id', sa.Integer(), primary_key=True),
+            sa.Column('day', sa.Date(), primary_key=True),
+            sa.Column('content_ids', sa.JSON(), nullable=False),
+            sa.Column('overflow', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('computed_at', sa.DateTime(), nullable=True),
+        )
+
+
+def downgrade():
+    op.drop_table('review_due_daily')
+    op.drop_index('ix_review_items_due_at', table_name='review_items')
+    op.drop_index('ix_review_items_user_due', table_name='review_items')
+    op.drop_table('review_items')
@@ -0,0 +1,46 @@
+"""Full-text search over subject_contents.
+
+Adds subject_contents.search_text (topic + HTML-stripped body, lowercased and
+accent-free; maintained on ORM flush by servicos/busca.py). Postgres gets a GIN
+expression index on to_tsvector('portuguese', search_text); SQLite gets an
+external-content FTS5 table kept in sync by triggers; that DDL is defined once in
+servicos/busca.py (DDL_SQLITE), which also creates it at runtime when missing.
+Run scripts/rebuild_search_index.py once afterwards to fill existing rows.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from servicos.busca import DDL_SQLITE, DDL_SQLITE_DROP, FTS_TABELA
+
+# revision identifiers, used by Alembic.
+revision = '20261019_0011'
+down_revision = '20261019_0010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    colunas = {c['name'] for c in inspector.get_columns('subject_contents')}
+    if 'search_text' not in colunas:
+        op.add_column('subject_contents', sa.Column('search_text', sa.Text(), nullable=True))
+    if bind.dialect.name == 'postgresql':
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS ix_subject_contents_search ON subject_contents "
+            "USING GIN (to_tsvector('portuguese', coalesce(search_text, '')))"
+        )
+    elif bind.dialect.name == 'sqlite':
+        for ddl in DDL_SQLITE:
+            op.execute(ddl)
+        op.execute(f"INSERT INTO {FTS_TABELA}({FTS_TABELA}) VALUES ('rebuild')")
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_subject_contents_search")
+    elif bind.dialect.name == 'sqlite':
+        for ddl in DDL_SQLITE_DROP:
+            op.execute(ddl)
+    op.drop_column('subject_contents', 'search_text')
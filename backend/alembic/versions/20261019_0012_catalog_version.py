@@ -0,0 +1,31 @@
+"""Catalog version stamp for the per-worker catalog snapshot.
+
+catalog_version is a single row (id=1) bumped in the same transaction as any ORM
+write to cursos, horarios_escolares, curso_materia or subject_contents
+(servicos/catalogo.py). Workers poll it, or get a Redis pub/sub nudge, to know
+when to reload their snapshot.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261019_0012'
+down_revision = '20261019_0011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'catalog_version' not in inspector.get_table_names():
+        tabela = op.create_table(
+            'catalog_version',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('version', sa.BigInteger(), nullable=False, server_default='1'),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+        )
+        op.bulk_insert(tabela, [{'id': 1, 'version': 1}])
+
+
+def downgrade():
+    op.drop_table('catalog_version')
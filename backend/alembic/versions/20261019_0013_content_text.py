@@ -0,0 +1,34 @@
+"""Plain text, section outline and word count precomputed per content.
+
+Adds subject_contents.content_text, content_outline (JSON list of
+{level, title, offset}, offsets in UTF-8 bytes of content_text) and
+word_count. They are filled on ORM flush by servicos/conteudos.py; run
+scripts/rebuild_search_index.py once afterwards to fill existing rows
+(it also refreshes search_text, now derived from content_text).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261019_0013'
+down_revision = '20261019_0012'
+branch_labels = None
+depends_on = None
+
+COLUNAS = [
+    sa.Column('content_text', sa.Text(), nullable=True),
+    sa.Column('content_outline', sa.JSON(), nullable=True),
+    sa.Column('word_count', sa.Integer(), nullable=True),
+]
+
+
+def upgrade():
+    existentes = {c['name'] for c in sa.inspect(op.get_bind()).get_columns('subject_contents')}
+    for coluna in COLUNAS:
+        if coluna.name not in existentes:
+            op.add_column('subject_contents', coluna)
+
+
+def downgrade():
+    for coluna in reversed(COLUNAS):
+        op.drop_column('subject_contents', coluna.name)
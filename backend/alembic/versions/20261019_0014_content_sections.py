@@ -0,0 +1,26 @@
+"""Precomputed HTML section boundaries per content.
+
+Adds subject_contents.content_sections: JSON list of {level, title, start,
+end, etag}, byte ranges of content_html split at the top-level headings.
+They back /api/conteudo_html/<id>?section=n and the /outline endpoint. Filled on
+ORM flush by servicos/conteudos.py; run scripts/rebuild_search_index.py once
+afterwards for existing rows.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261019_0014'
+down_revision = '20261019_0013'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    colunas = {c['name'] for c in sa.inspect(op.get_bind()).get_columns('subject_contents')}
+    if 'content_sections' not in colunas:
+        op.add_column('subject_contents', sa.Column('content_sections', sa.JSON(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('subject_contents', 'content_sections')
@@ -0,0 +1,38 @@
+"""Natural key and change hash for bulk content ingestion.
+
+Adds subject_contents.content_hash (sha1 of subject, topic and content_html,
+maintained on ORM flush by servicos/conteudos.py) and a unique index on
+(materia_id, topic), the key used by the bulk upsert in servicos/ingestao.py.
+Existing duplicates must be merged first; the upgrade stops and lists them.
+Run scripts/rebuild_search_index.py afterwards to fill content_hash.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261019_0015'
+down_revision = '20261019_0014'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    colunas = {c['name'] for c in sa.inspect(bind).get_columns('subject_contents')}
+    if 'content_hash' not in colunas:
+        op.add_column('subject_contents', sa.Column('content_hash', sa.String(length=40), nullable=True))
+    duplicados = bind.execute(sa.text(
+        "SELECT materia_id, topic, count(*) FROM subject_contents WHERE materia_id IS NOT NULL "
+        "GROUP BY materia_id, topic HAVING count(*) > 1 LIMIT 20"
+    )).all()
+    if duplicados:
+        raise RuntimeError(
+            "subject_contents has duplicated (materia_id, topic) rows; merge them before upgrading: "
+            + ', '.join(f"{m}/{t!r} x{n}" for m, t, n in duplicados)
+        )
+    op.create_index('uq_subject_contents_materia_topic', 'subject_contents', ['materia_id', 'topic'], unique=True)
+
+
+def downgrade():
+    op.drop_index('uq_subject_contents_materia_topic', table_name='subject_contents')
+    op.drop_column('subject_contents', 'content_hash')
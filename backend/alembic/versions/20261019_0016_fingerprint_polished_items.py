@@ -0,0 +1,27 @@
+"""Polished text of shared weekly quiz selections.
+
+Adds weekly_quiz_fingerprints.polished_items: the Gemini-polished items of the
+selection (canonical option order, keyed by question_bank id). Users who reuse
+the selection get this text; question_bank rows are no longer rewritten by a
+user's polish. Rows marked polished without the text are reset so the next
+user polishes them again (servicos/quiz_fingerprint.py).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261019_0016'
+down_revision = '20261019_0015'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    colunas = {c['name'] for c in sa.inspect(op.get_bind()).get_columns('weekly_quiz_fingerprints')}
+    if 'polished_items' not in colunas:
+        op.add_column('weekly_quiz_fingerprints', sa.Column('polished_items', sa.JSON(), nullable=True))
+    op.execute("UPDATE weekly_quiz_fingerprints SET polished = false WHERE polished_items IS NULL")
+
+
+def downgrade():
+    op.drop_column('weekly_quiz_fingerprints', 'polished_items')
@@ -0,0 +1,23 @@
+"""Balanced HTML sections.
+
+Section cuts can fall inside open elements (a wrapping <article> or <div>);
+content_sections entries now carry prefix/suffix that reopen and close them,
+and content_outline entries carry html_open. Stored sections are cleared so
+they are rebuilt: reads split the HTML on the fly until
+scripts/rebuild_search_index.py refills the rows (servicos/conteudos.py).
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '20261019_0017'
+down_revision = '20261019_0016'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("UPDATE subject_contents SET content_sections = NULL")
+
+
+def downgrade():
+    pass
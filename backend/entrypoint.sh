@@ -157,7 +157,22 @@ if [[ "${SEED_ON_START:-0}" == "1" && -f scripts/seed_data.py ]]; then
   python scripts/seed_data.py || echo "[entrypoint] Seed script failed (non-fatal)" >&2
 fi
 
-CMD_EXEC=(gunicorn --chdir /app/src -w ${WORKERS:-3} -k gthread --threads ${THREADS:-4} -b 0.0.0.0:5000 main:app --timeout ${GUNICORN_TIMEOUT:-120} --graceful-timeout ${GRACEFUL_TIMEOUT:-30})
+# One-time DB work (self-heal, create_all, dev seed) runs here, once per deploy;
+# gunicorn workers then boot with STARTUP_PROFILE=fast and skip it.
+if [[ "${RUN_INIT:-1}" == "1" ]]; then
+  echo "[entrypoint] Running init tasks..."
+  python scripts/init_app.py || echo "[entrypoint] Init tasks failed (non-fatal)" >&2
+fi
+export STARTUP_PROFILE="${STARTUP_PROFILE:-fast}"
+
+# APP_SERVER=asgi: serviço das rotas de IA (espera no Gemini via asyncio; ver src/servicos/asgi_ia.py)
+if [[ "${APP_SERVER:-wsgi}" == "asgi" ]]; then
+  CMD_EXEC=(uvicorn asgi:application --app-dir /app/src --host 0.0.0.0 --port ${ASGI_PORT:-5001} --workers ${ASGI_WORKERS:-1} --timeout-graceful-shutdown ${GRACEFUL_TIMEOUT:-30})
+  echo "[entrypoint] Exec: ${CMD_EXEC[*]}"
+  exec "${CMD_EXEC[@]}"
+fi
+
+CMD_EXEC=(gunicorn -c /app/src/gunicorn.conf.py --chdir /app/src -w ${WORKERS:-3} -k gthread --threads ${THREADS:-4} -b 0.0.0.0:5000 main:app --timeout ${GUNICORN_TIMEOUT:-120} --graceful-timeout ${GRACEFUL_TIMEOUT:-30})
 
 echo "[entrypoint] Exec: ${CMD_EXEC[*]}"
 exec "${CMD_EXEC[@]}"
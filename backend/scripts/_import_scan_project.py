@@ -0,0 +1,174 @@
+"""Perfil de custo de import (base de `check_imports.py --profile` e do teste de orçamento).
+
+Roda `python -X importtime -c "import <alvo>"` num processo limpo (cwd = src),
+interpreta a saída e monta, por módulo, tempo próprio, cumulativo, profundidade
+e quem o importou. Também aponta candidatos a import tardio: módulos caros
+importados no topo de arquivos de rotas mas usados por poucas funções.
+"""
+from __future__ import annotations
+import ast
+import os
+import re
+import subprocess
+import sys
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Optional
+
+SRC_ROOT = Path(__file__).resolve().parents[1] / "src"
+ROUTES_DIR = SRC_ROOT / "routes"
+
+# Bibliotecas pesadas acompanhadas individualmente (opcionais podem não estar instaladas)
+MODULOS_PESADOS = ("google.generativeai", "pydantic", "psycopg2")
+
+# Ambiente padrão para medir o boot sem banco/Redis reais
+AMBIENTE_PADRAO = {
+    "USE_SQLITE": "true",
+    "STARTUP_PROFILE": "fast",
+    "DEV_AUTOCREATE_DATA": "0",
+}
+
+_LINHA = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+@dataclass
+class RegistroImport:
+    modulo: str
+    self_us: int
+    cumulativo_us: int
+    profundidade: int
+    pai: Optional[str] = None
+
+    @property
+    def cumulativo_ms(self) -> float:
+        return self.cumulativo_us / 1000
+
+    def to_dict(self) -> dict:
+        d = asdict(self)
+        d["cumulativo_ms"] = round(self.cumulativo_ms, 2)
+        return d
+
+
+def parse_importtime(saida: str) -> list[RegistroImport]:
+    """Interpreta stderr de `-X importtime` (filhos aparecem antes do pai)."""
+    registros: list[RegistroImport] = []
+    pendentes: list[RegistroImport] = []
+    for linha in saida.splitlines():
+        m = _LINHA.match(linha)
+        if not m:
+            continue
+        reg = RegistroImport(
+            modulo=m.group(4),
+            self_us=int(m.group(1)),
+            cumulativo_us=int(m.group(2)),
+            profundidade=len(m.group(3)) // 2,
+        )
+        while pendentes and pendentes[-1].profundidade > reg.profundidade:
+            pendentes.pop().pai = reg.modulo
+        pendentes.append(reg)
+        registros.append(reg)
+    return registros
+
+
+def medir_imports(alvo: str = "main", env: Optional[dict] = None, python: str = sys.executable) -> list[RegistroImport]:
+    ambiente = dict(os.environ)
+    for k, v in AMBIENTE_PADRAO.items():
+        ambiente.setdefault(k, v)
+    ambiente.update(env or {})
+    ambiente["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SRC_ROOT), ambiente.get("PYTHONPATH")]))
+    proc = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {alvo}"],
+        cwd=str(SRC_ROOT), env=ambiente, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {alvo} falhou: {proc.stderr.strip().splitlines()[-1:]}")
+    return parse_importtime(proc.stderr)
+
+
+def total_ms(registros: list[RegistroImport], alvo: str = "main") -> float:
+    for reg in registros:
+        if reg.modulo == alvo:
+            return reg.cumulativo_ms
+    return sum(r.self_us for r in registros) / 1000
+
+
+def mais_caros(registros: list[RegistroImport], n: int = 15, sem_raiz: str = "main") -> list[RegistroImport]:
+    return sorted((r for r in registros if r.modulo != sem_raiz), key=lambda r: r.cumulativo_us, reverse=True)[:n]
+
+
+def medir_pesados(modulos=MODULOS_PESADOS) -> dict[str, Optional[float]]:
+    """Custo cumulativo (ms) de cada biblioteca pesada importada isoladamente; None se ausente."""
+    resultado: dict[str, Optional[float]] = {}
+    for nome in modulos:
+        try:
+            regs = medir_imports(nome)
+        except RuntimeError:
+            resultado[nome] = None
+            continue
+        resultado[nome] = round(total_ms(regs, nome), 2)
+    return resultado
+
+
+def _imports_de_topo(tree: ast.Module) -> dict[str, str]:
+    """nome local -> módulo, para imports no corpo do módulo (não dentro de funções)."""
+    nomes: dict[str, str] = {}
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            for n in node.names:
+                nomes[(n.asname or n.name).split(".")[0]] = n.name if n.asname else n.name.split(".")[0]
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            for n in node.names:
+                nomes[n.asname or n.name] = node.module
+    return nomes
+
+
+def _funcoes_que_usam(tree: ast.Module) -> tuple[dict[str, set[str]], set[str]]:
+    """(nome -> funções de topo que o usam no corpo, nomes usados já no import do módulo)."""
+    usos: dict[str, set[str]] = {}
+    no_import: set[str] = set()
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            # decorators e defaults rodam no import do módulo
+            for expr in [*node.decorator_list, *node.args.defaults, *node.args.kw_defaults]:
+                if expr is not None:
+                    no_import |= {n.id for n in ast.walk(expr) if isinstance(n, ast.Name)}
+            for stmt in node.body:
+                for sub in ast.walk(stmt):
+                    if isinstance(sub, ast.Name):
+                        usos.setdefault(sub.id, set()).add(node.name)
+        elif not isinstance(node, (ast.Import, ast.ImportFrom)):
+            no_import |= {n.id for n in ast.walk(node) if isinstance(n, ast.Name)}
+    return usos, no_import
+
+
+def candidatos_lazy(registros: list[RegistroImport], min_ms: float = 20.0, max_funcoes: int = 2,
+                    pasta: Path = ROUTES_DIR, pacote: str = "routes") -> list[dict]:
+    """Imports de topo em rotas que custam >= min_ms no boot e servem a <= max_funcoes funções.
+
+    Só conta o custo quando o próprio arquivo de rota foi o primeiro a importar o módulo
+    (pai no importtime); se outro módulo já o carregou, adiar o import não economiza nada.
+    """
+    custo: dict[tuple[str, str], float] = {}
+    for r in registros:
+        if r.pai:
+            custo[(r.modulo, r.pai)] = r.cumulativo_ms
+    agregados: dict[str, dict] = {}
+    for arquivo in sorted(pasta.glob("*.py")):
+        try:
+            tree = ast.parse(arquivo.read_text(encoding="utf-8"))
+        except Exception:
+            continue
+        dono = pacote if arquivo.stem == "__init__" else f"{pacote}.{arquivo.stem}"
+        usos, no_import = _funcoes_que_usam(tree)
+        for nome_local, modulo in _imports_de_topo(tree).items():
+            ms = custo.get((modulo, dono), 0.0)
+            if ms < min_ms or nome_local in no_import:
+                continue
+            info = agregados.setdefault(modulo, {"modulo": modulo, "custo_ms": round(ms, 2), "funcoes": set(), "arquivos": set()})
+            info["funcoes"] |= {f"{arquivo.stem}.{f}" for f in usos.get(nome_local, set())}
+            info["arquivos"].add(arquivo.name)
+    saida = []
+    for info in agregados.values():
+        if len(info["funcoes"]) <= max_funcoes:
+            saida.append({**info, "funcoes": sorted(info["funcoes"]), "arquivos": sorted(info["arquivos"])})
+    return sorted(saida, key=lambda d: d["custo_ms"], reverse=True)
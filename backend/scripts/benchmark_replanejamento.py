@@ -0,0 +1,71 @@
+"""Compara o tempo de replanejar: geração completa x replanejamento incremental.
+
+Mede só o planner (sem banco): a rota /api/plano-estudo/gerar ainda soma a
+carga de todo o SubjectContent do curso, que o incremental também evita.
+Uso (local):
+  cd backend/src
+  python ../scripts/benchmark_replanejamento.py [--conteudos 2000] [--repeticoes 5] [--json]
+"""
+from __future__ import annotations
+import os
+import sys
+import time
+
+# garantir que src esteja no path quando rodado de fora
+def _ensure_path():
+    base = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+    if base not in sys.path:
+        sys.path.insert(0, base)
+_ensure_path()
+
+from servicos.plano_estudo_avancado import (  # type: ignore  # noqa: E402
+    Conteudo, UserPreferences, generate_study_plan, replanejar_incremental,
+)
+
+
+def _melhor(fn, repeticoes: int) -> float:
+    tempos = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        fn()
+        tempos.append(time.perf_counter() - t0)
+    return min(tempos) * 1000
+
+
+def benchmark(n_conteudos: int = 2000, repeticoes: int = 5) -> dict:
+    dificuldades = ('easy', 'medium', 'hard')
+    conteudos = [
+        Conteudo(id=i, subject=f'Matéria {i % 12}', topic=f'Tópico {i}', difficulty=dificuldades[i % 3],
+                 dependencies=[i - 1] if i % 5 else [])
+        for i in range(1, n_conteudos + 1)
+    ]
+    prefs = UserPreferences()
+    plano, _ = generate_study_plan(prefs, conteudos)
+    hoje = plano['days'][0]['date']
+    amanha = plano['days'][1]
+    cenarios = {
+        'full': lambda: generate_study_plan(prefs, conteudos, semana_anterior=plano['days'], plano_dados_salvo=plano),
+        'incremental_concluido_hoje': lambda: replanejar_incremental(plano, prefs, concluidos=[plano['days'][0]['blocks'][0]['id']]),
+        'incremental_adiantado': lambda: replanejar_incremental(plano, prefs, concluidos=[{'id': amanha['blocks'][0]['id'], 'date': amanha['date']}]),
+        'incremental_dia_perdido': lambda: replanejar_incremental(plano, prefs, dias_perdidos=[hoje]),
+    }
+    resultado = {nome: round(_melhor(fn, repeticoes), 2) for nome, fn in cenarios.items()}
+    resultado.update(conteudos=n_conteudos, dias=len(plano['days']))
+    return resultado
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--json', action='store_true', help='Saída JSON')
+    ap.add_argument('--conteudos', type=int, default=2000, help='Tamanho do catálogo sintético')
+    ap.add_argument('--repeticoes', type=int, default=5, help='Execuções por cenário (usa o melhor tempo)')
+    args = ap.parse_args()
+    result = benchmark(args.conteudos, args.repeticoes)
+    if args.json:
+        print(json.dumps({"benchmark_replanejamento": result}, ensure_ascii=False))
+    else:
+        print(f"Catálogo: {result['conteudos']} conteúdos, {result['dias']} dias no plano (ms, melhor de {args.repeticoes})")
+        for nome in ('full', 'incremental_concluido_hoje', 'incremental_adiantado', 'incremental_dia_perdido'):
+            print(f"  {nome:<28} {result[nome]:>10.2f}")
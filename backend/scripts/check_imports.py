@@ -1,9 +1,15 @@
 """Script rápido para comparar imports reais vs requirements-core.
 Uso:
     python backend/scripts/check_imports.py
+    python backend/scripts/check_imports.py --profile [--budget-ms 1500] [--json]
+
+--profile mede o custo de import do boot (`import main` com -X importtime), lista os
+módulos mais caros, o custo isolado de libs pesadas (google.generativeai, pydantic,
+psycopg2) e candidatos a import tardio; com --budget-ms falha se o boot passar do limite.
 """
 from __future__ import annotations
 import ast
+import os
 import sys
 import json
 import hashlib
@@ -42,6 +48,8 @@ DEFAULT_WHITELIST_MISSING_CORE = {
     # Indirect runtime deps required by extensions, not imported explicitly in scanned dirs
     "limits",      # used internally by Flask-Limiter
     "psycopg2",    # SQLAlchemy engine / driver
+    "gunicorn",    # servidor WSGI (entrypoint / gunicorn.conf.py), não importado pela app
+    "uvicorn",     # servidor da sub-app ASGI (asgi.py), idem
 }
 
 @lru_cache(maxsize=1)
@@ -139,6 +147,48 @@ def save_external_whitelist(not_declared: set[str], missing_core: set[str]) -> N
     WHITELIST_FILE.write_text(json.dumps(payload, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
 
 
+def run_profile(args) -> int:
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    import _import_scan_project as scan  # type: ignore
+
+    registros = scan.medir_imports(args.target)
+    total = scan.total_ms(registros, args.target)
+    caros = scan.mais_caros(registros, args.top, sem_raiz=args.target)
+    pesados = scan.medir_pesados()
+    lazy = scan.candidatos_lazy(registros, min_ms=args.lazy_min_ms, max_funcoes=args.lazy_max_uses)
+    budget = args.budget_ms if args.budget_ms is not None else float(os.getenv('IMPORT_BUDGET_MS', '0') or 0)
+    estourou = bool(budget) and total > budget
+
+    if args.json:
+        print(json.dumps({
+            'target': args.target,
+            'total_ms': round(total, 2),
+            'budget_ms': budget or None,
+            'over_budget': estourou,
+            'top': [r.to_dict() for r in caros],
+            'heavy_libs_ms': pesados,
+            'lazy_candidates': lazy,
+        }, ensure_ascii=False))
+    else:
+        print(f"== IMPORT PROFILE ({args.target}) ==")
+        print(f"Total: {total:.1f} ms" + (f" (orçamento {budget:.0f} ms)" if budget else ""))
+        print("Mais caros (cumulativo):")
+        for r in caros:
+            print(f"  {r.cumulativo_ms:8.1f} ms  {r.modulo}  <- {r.pai or '-'}")
+        print("Libs pesadas (import isolado):")
+        for nome, ms in pesados.items():
+            print(f"  {nome}: {'ausente' if ms is None else f'{ms:.1f} ms'}")
+        print("Candidatos a import tardio:")
+        if lazy:
+            for c in lazy:
+                print(f"  - {c['modulo']} ({c['custo_ms']:.1f} ms) em {', '.join(c['arquivos'])}; usado por: {', '.join(c['funcoes']) or 'nenhuma função'}")
+        else:
+            print("  <nenhum>")
+        if estourou:
+            print(f"ORÇAMENTO EXCEDIDO: {total:.1f} ms > {budget:.0f} ms")
+    return 1 if estourou and not args.warn_only else 0
+
+
 def main():
     parser = argparse.ArgumentParser(description='Auditoria de imports vs core requirements')
     parser.add_argument('--json', action='store_true', help='Saída em JSON (machine-readable)')
@@ -148,8 +198,17 @@ def main():
     parser.add_argument('--fail-on-extra-only', action='store_true', help='Exit 1 apenas se houver not_declared (ignorando missing)')
     parser.add_argument('--warn-only', action='store_true', help='Nunca retorna exit!=0; apenas imprime resultado')
     parser.add_argument('--list-files', action='store_true', help='Lista arquivos escaneados (também em JSON)')
+    parser.add_argument('--profile', action='store_true', help='Perfil de custo de import do boot (-X importtime)')
+    parser.add_argument('--target', default='main', help='Módulo raiz do perfil (padrão: main)')
+    parser.add_argument('--top', type=int, default=15, help='Quantos módulos mais caros listar')
+    parser.add_argument('--budget-ms', type=float, default=None, help='Falha se o boot passar disso (padrão: env IMPORT_BUDGET_MS)')
+    parser.add_argument('--lazy-min-ms', type=float, default=20.0, help='Custo mínimo para sugerir import tardio')
+    parser.add_argument('--lazy-max-uses', type=int, default=2, help='Máx. de funções usuárias para sugerir import tardio')
     args = parser.parse_args()
 
+    if args.profile:
+        sys.exit(run_profile(args))
+
     ext_wl = load_external_whitelist()
     wl_not_declared = set(DEFAULT_WHITELIST_NOT_DECLARED) | ext_wl['not_declared']
     wl_missing_core = set(DEFAULT_WHITELIST_MISSING_CORE) | ext_wl['missing_core']
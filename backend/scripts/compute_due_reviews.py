@@ -0,0 +1,48 @@
+"""Calcula as listas diárias de revisões (review_due_daily) de todos os usuários.
+
+Uma única passada por review_items ordenada por (user_id, due_at); por usuário um
+heap escolhe até REVISOES_POR_DIA itens (ver servicos/revisoes.py).
+Uso (local, agendar diariamente):
+  cd backend/src
+  python ../scripts/compute_due_reviews.py [--date YYYY-MM-DD] [--por-dia N] [--json]
+"""
+from __future__ import annotations
+import os
+import sys
+
+# garantir que src esteja no path quando rodado de fora
+def _ensure_path():
+    base = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+    if base not in sys.path:
+        sys.path.insert(0, base)
+_ensure_path()
+
+from app_factory import create_app  # type: ignore  # noqa: E402
+from servicos.datas import parse_data  # type: ignore  # noqa: E402
+from servicos.revisoes import POR_DIA, calcular_listas_diarias  # type: ignore  # noqa: E402
+
+APP = create_app()
+
+
+def compute(dia, por_dia: int = POR_DIA) -> dict:
+    with APP.app_context():
+        return calcular_listas_diarias(dia, por_dia)
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    from datetime import datetime
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--json', action='store_true', help='Saída JSON')
+    ap.add_argument('--date', default=None, help='Dia (YYYY-MM-DD ou dd/MM/YYYY); padrão hoje (UTC)')
+    ap.add_argument('--por-dia', type=int, default=POR_DIA, help='Máximo de revisões por usuário no dia')
+    args = ap.parse_args()
+    dia = parse_data(args.date) if args.date else datetime.utcnow().date()
+    if dia is None:
+        raise SystemExit('--date inválido')
+    result = compute(dia, args.por_dia)
+    if args.json:
+        print(json.dumps({"compute_due_reviews": dict(result, date=dia.isoformat())}, ensure_ascii=False))
+    else:
+        print(f"Listas de {dia.isoformat()}: usuários={result['users']} itens={result['items']} excedente={result['overflow']}")
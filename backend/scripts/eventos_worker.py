@@ -0,0 +1,85 @@
+"""Worker dos eventos de domínio (outbox -> Redis Stream -> consumer groups).
+
+Ver servicos/eventos.py. Uso (local):
+  cd backend/src
+  python ../scripts/eventos_worker.py run [--grupo progresso --grupo quiz]   # relay + consumidores
+  python ../scripts/eventos_worker.py status [--json]
+  python ../scripts/eventos_worker.py reprocessar --grupo conquistas --desde 1 [--ate N]
+  python ../scripts/eventos_worker.py rebobinar --grupo quiz [--stream-id 0]
+  python ../scripts/eventos_worker.py local          # sem Redis: processa a outbox direto
+Várias réplicas de `run` dividem o trabalho de cada grupo (nome de consumidor = host-pid).
+"""
+from __future__ import annotations
+import os
+import sys
+
+# garantir que src esteja no path quando rodado de fora
+def _ensure_path():
+    base = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+    if base not in sys.path:
+        sys.path.insert(0, base)
+_ensure_path()
+
+from app_factory import create_app  # type: ignore  # noqa: E402
+from servicos import eventos  # type: ignore  # noqa: E402
+
+APP = create_app()
+
+
+def _redis():
+    r = getattr(APP, 'redis', None)
+    if r is None:
+        raise SystemExit("Redis indisponível (REDIS_URL); use o comando 'local'.")
+    return r
+
+
+def status() -> dict:
+    with APP.app_context():
+        from models.models import db, OutboxCheckpoint, OutboxEvent  # type: ignore
+        pendentes = db.session.query(OutboxEvent).filter(OutboxEvent.relayed_at.is_(None)).count()
+        checkpoints = {c.group_name: c.last_event_id for c in db.session.query(OutboxCheckpoint)}
+        ultimo = db.session.query(db.func.max(OutboxEvent.id)).scalar() or 0
+        saida = {'outbox_pending': pendentes, 'last_event_id': ultimo, 'local_checkpoints': checkpoints,
+                 'groups': sorted(eventos.carregar_consumidores())}
+        if APP.redis is not None:
+            saida['stream'] = eventos.estado_stream(APP.redis)
+        return saida
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import logging
+    logging.basicConfig(level=logging.INFO)
+    ap = argparse.ArgumentParser()
+    ap.add_argument('comando', choices=['run', 'status', 'reprocessar', 'rebobinar', 'local'])
+    ap.add_argument('--grupo', action='append', default=None, help='Grupo(s) de consumidores (padrão: todos)')
+    ap.add_argument('--desde', type=int, default=1, help='reprocessar: primeiro id da outbox')
+    ap.add_argument('--ate', type=int, default=None, help='reprocessar: último id da outbox')
+    ap.add_argument('--stream-id', default='0', help="rebobinar: id do stream ('0' = início)")
+    ap.add_argument('--intervalo', type=float, default=0.5, help='run: espera máxima por rodada (s)')
+    ap.add_argument('--json', action='store_true', help='Saída JSON')
+    args = ap.parse_args()
+
+    if args.comando == 'run':
+        with APP.app_context():
+            eventos.executar_worker(_redis(), args.grupo, args.intervalo)
+    elif args.comando == 'status':
+        result = status()
+        print(json.dumps(result, ensure_ascii=False) if args.json else json.dumps(result, ensure_ascii=False, indent=2))
+    elif args.comando == 'reprocessar':
+        if not args.grupo:
+            raise SystemExit('--grupo é obrigatório')
+        with APP.app_context():
+            result = {g: eventos.reprocessar(g, args.desde, args.ate) for g in args.grupo}
+        print(json.dumps({"reprocessar": result}) if args.json else f"Reprocessados: {result}")
+    elif args.comando == 'rebobinar':
+        if not args.grupo:
+            raise SystemExit('--grupo é obrigatório')
+        for g in args.grupo:
+            eventos.rebobinar_grupo(_redis(), g, args.stream_id)
+        print(f"Grupos {args.grupo} rebobinados para {args.stream_id}")
+    else:
+        with APP.app_context():
+            result = eventos.despachar_local()
+        print(json.dumps({"local": result}) if args.json else f"Processados: {result}")
@@ -0,0 +1,63 @@
+"""Importa conteúdos em lote (JSONL ou CSV) com upsert pela chave (matéria, tópico).
+
+Uma linha por conteúdo: materia, topic, content_html e, opcionais, subject e curso
+(ver servicos/ingestao.py). Reimportar o mesmo arquivo não regrava nada; só linhas
+novas ou com HTML/tópico/assunto alterado são escritas.
+Uso (local):
+  cd backend/src
+  python ../scripts/ingest_contents.py curriculo.jsonl [--format csv] [--batch 1000] [--workers 4] [--json]
+  (use '-' para ler da entrada padrão)
+"""
+from __future__ import annotations
+import os
+import sys
+
+# garantir que src esteja no path quando rodado de fora
+def _ensure_path():
+    base = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+    if base not in sys.path:
+        sys.path.insert(0, base)
+_ensure_path()
+
+from app_factory import create_app  # type: ignore  # noqa: E402
+from servicos import ingestao  # type: ignore  # noqa: E402
+
+APP = create_app()
+
+
+def ingest(caminho: str, formato: str, lote: int = 1000, processos: int = 0, copy: bool = True,
+           progresso=None) -> dict:
+    with APP.app_context(), ingestao.abrir(caminho) as arquivo:
+        return ingestao.ingerir(ingestao.ler(arquivo, formato), lote=lote, processos=processos,
+                                copy=copy, progresso=progresso)
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    ap = argparse.ArgumentParser()
+    ap.add_argument('path', help="Arquivo .jsonl/.csv ('-' = stdin)")
+    ap.add_argument('--format', choices=['jsonl', 'csv'], help='Padrão: pela extensão (jsonl)')
+    ap.add_argument('--batch', type=int, default=1000, help='Linhas por lote/transação')
+    ap.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                    help='Processos para os campos derivados (0 = no próprio processo)')
+    ap.add_argument('--no-copy', action='store_true', help='Postgres: usar executemany em vez de COPY')
+    ap.add_argument('--json', action='store_true', help='Saída JSON')
+    args = ap.parse_args()
+    formato = args.format or ('csv' if args.path.lower().endswith('.csv') else 'jsonl')
+
+    def progresso(r):
+        print(f"... {r['lidas']} linhas, {r['linhas_por_segundo']} linhas/s", file=sys.stderr)
+
+    result = ingest(args.path, formato, args.batch, max(0, args.workers), not args.no_copy,
+                    None if args.json else progresso)
+    if args.json:
+        print(json.dumps({"ingest_contents": result}, ensure_ascii=False))
+    else:
+        print(
+            f"Lidas={result['lidas']} Inseridas={result['inseridas']} Atualizadas={result['atualizadas']} "
+            f"Inalteradas={result['inalteradas']} Inválidas={result['invalidas']} "
+            f"Tempo={result['segundos']}s ({result['linhas_por_segundo']} linhas/s)"
+        )
+        for e in result['erros']:
+            print(f"  linha {e['linha']}: {e['erro']}")
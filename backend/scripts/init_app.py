@@ -0,0 +1,33 @@
+"""Trabalho de banco feito uma vez por deploy, antes de subir os workers.
+
+Self-heal de users.dias_disponiveis (JSONB), create_all (AUTO_DDL_ON_START) e
+seed de desenvolvimento (DEV_AUTOCREATE_DATA). Os workers então sobem com
+STARTUP_PROFILE=fast e não repetem nada disso.
+Uso (local):
+  cd backend/src
+  python ../scripts/init_app.py
+Equivalente: flask --app main init
+"""
+from __future__ import annotations
+import os
+import sys
+import time
+
+# garantir que src esteja no path quando rodado de fora
+def _ensure_path():
+    base = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+    if base not in sys.path:
+        sys.path.insert(0, base)
+_ensure_path()
+
+# o próprio create_app não deve repetir as tarefas que este script executa
+os.environ['STARTUP_PROFILE'] = 'fast'
+
+from app_factory import create_app, run_init_tasks  # type: ignore  # noqa: E402
+
+APP = create_app()
+
+if __name__ == "__main__":
+    t0 = time.perf_counter()
+    run_init_tasks(APP)
+    print(f"[init] concluído em {(time.perf_counter() - t0) * 1000:.0f} ms")
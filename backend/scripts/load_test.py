@@ -0,0 +1,96 @@
+"""Teste de carga local: app + Gemini/YouTube falsos + jornadas em paralelo (ver servicos/carga.py).
+
+Sem --url, tudo sobe neste processo numa máquina só: os fakes (latência, taxa de erro
+e streaming configuráveis), a app (servidor WSGI com threads, apontada para os fakes
+por GEMINI_API_BASE/YT_API_BASE), um catálogo de exemplo via ingestão em lote e os
+usuários virtuais com a senha de --password.
+Com --url, mede uma instância já rodando (ex.: gunicorn iniciado com
+GEMINI_API_BASE/YT_API_BASE de `python -m servicos.gemini_fake` / `python -m servicos.youtube_fake`).
+Uso (local):
+  cd backend/src
+  python ../scripts/load_test.py [--users 20] [--iterations 3 | --duration 60] [--gemini-latency 0.8]
+                                 [--error-rate 0.05] [--stream] [--url http://127.0.0.1:5000] [--json]
+"""
+from __future__ import annotations
+import logging
+import os
+import sys
+import threading
+
+# garantir que src esteja no path quando rodado de fora
+def _ensure_path():
+    base = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+    if base not in sys.path:
+        sys.path.insert(0, base)
+_ensure_path()
+
+from servicos import carga  # type: ignore  # noqa: E402
+from servicos.gemini_fake import ServidorGeminiFake  # type: ignore  # noqa: E402
+from servicos.youtube_fake import ServidorYouTubeFake  # type: ignore  # noqa: E402
+
+
+def subir_local(args):
+    """Fakes + app neste processo; devolve (base_url, função para parar tudo)."""
+    gemini = ServidorGeminiFake(atraso_inicial=args.gemini_latency, atraso_pedaco=args.gemini_chunk_delay,
+                                variacao=args.jitter, taxa_erro=args.error_rate).iniciar()
+    youtube = ServidorYouTubeFake(atraso=args.yt_latency, variacao=args.jitter, taxa_erro=args.error_rate).iniciar()
+    # a app lê essas variáveis por chamada; as chaves só precisam existir
+    os.environ['GEMINI_API_BASE'] = gemini.base_url
+    os.environ['YT_API_BASE'] = youtube.base_url
+    os.environ.setdefault('GOOGLE_API_KEY', 'chave-carga')
+    os.environ.setdefault('YT_API_KEY', 'chave-carga')
+
+    from werkzeug.serving import make_server
+    from app_factory import create_app  # type: ignore
+    from models.models import db  # type: ignore
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        carga.semear(args.seed_subjects, args.seed_contents, args.users, args.password)
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)  # sem log por requisição
+    servidor = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+
+    def parar():
+        servidor.shutdown()
+        gemini.parar()
+        youtube.parar()
+
+    return f'http://127.0.0.1:{servidor.server_port}', parar
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--url', help='Instância já rodando (sem fakes/seed locais)')
+    ap.add_argument('--users', type=int, default=10, help='Usuários virtuais simultâneos')
+    ap.add_argument('--iterations', type=int, default=1, help='Jornadas por usuário')
+    ap.add_argument('--duration', type=float, help='Segundos de carga (ignora --iterations)')
+    ap.add_argument('--password', default=os.getenv('DEV_MASTER_PASSWORD', carga.SENHA_PADRAO))
+    ap.add_argument('--gemini-latency', type=float, default=0.5, help='Atraso até o 1º pedaço do Gemini falso (s)')
+    ap.add_argument('--gemini-chunk-delay', type=float, default=0.02, help='Atraso entre pedaços do stream (s)')
+    ap.add_argument('--yt-latency', type=float, default=0.1, help='Atraso do YouTube falso (s)')
+    ap.add_argument('--jitter', type=float, default=0.0, help='Atraso extra aleatório nos fakes (0..N s)')
+    ap.add_argument('--stream', action='store_true', help='Quiz por IA via SSE (?stream=1)')
+    ap.add_argument('--error-rate', type=float, default=0.0, help='Fração de respostas com erro nos fakes')
+    ap.add_argument('--seed-subjects', type=int, default=4)
+    ap.add_argument('--seed-contents', type=int, default=25, help='Conteúdos por matéria')
+    ap.add_argument('--json', action='store_true', help='Saída JSON')
+    args = ap.parse_args()
+
+    parar = None
+    base_url = args.url
+    if not base_url:
+        base_url, parar = subir_local(args)
+    try:
+        result = carga.executar(base_url, args.users, args.iterations, args.duration, args.password,
+                                stream=args.stream)
+    finally:
+        if parar:
+            parar()
+    if args.json:
+        print(json.dumps({"load_test": result}, ensure_ascii=False))
+    else:
+        print(carga.formatar(result))
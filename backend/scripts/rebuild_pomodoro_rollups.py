@@ -0,0 +1,41 @@
+"""Recalcula pomodoro_rollups (buckets diários/semanais) a partir de pomodoro_sessions.
+
+Agregação feita no banco (GROUP BY usuário/dia) e gravada em lote.
+Uso (local):
+  cd backend/src
+  python ../scripts/rebuild_pomodoro_rollups.py [--user-id N] [--json]
+"""
+from __future__ import annotations
+import os
+import sys
+
+# garantir que src esteja no path quando rodado de fora
+def _ensure_path():
+    base = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+    if base not in sys.path:
+        sys.path.insert(0, base)
+_ensure_path()
+
+from app_factory import create_app  # type: ignore  # noqa: E402
+from servicos.pomodoro_rollups import recalcular  # type: ignore  # noqa: E402
+
+APP = create_app()
+
+
+def rebuild(user_id: int | None = None) -> dict:
+    with APP.app_context():
+        return recalcular(user_id)
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--json', action='store_true', help='Saída JSON')
+    ap.add_argument('--user-id', type=int, default=None, help='Recalcula apenas este usuário')
+    args = ap.parse_args()
+    result = rebuild(args.user_id)
+    if args.json:
+        print(json.dumps({"rebuild_pomodoro_rollups": result}, ensure_ascii=False))
+    else:
+        print(f"Rollups recalculados. Buckets={result['buckets']}")
@@ -0,0 +1,42 @@
+"""Recalcula question_signatures/question_lsh_bands a partir de weekly_quizzes.
+
+Necessário uma vez após a migração 20261019_0006 para que semanas antigas contem
+no histórico de questões já vistas (ver servicos/questoes_lsh.py).
+Uso (local):
+  cd backend/src
+  python ../scripts/rebuild_question_signatures.py [--user-id N] [--json]
+"""
+from __future__ import annotations
+import os
+import sys
+
+# garantir que src esteja no path quando rodado de fora
+def _ensure_path():
+    base = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+    if base not in sys.path:
+        sys.path.insert(0, base)
+_ensure_path()
+
+from app_factory import create_app  # type: ignore  # noqa: E402
+from servicos.questoes_lsh import reindexar  # type: ignore  # noqa: E402
+
+APP = create_app()
+
+
+def rebuild(user_id: int | None = None) -> dict:
+    with APP.app_context():
+        return reindexar(user_id)
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--json', action='store_true', help='Saída JSON')
+    ap.add_argument('--user-id', type=int, default=None, help='Recalcula apenas este usuário')
+    args = ap.parse_args()
+    result = rebuild(args.user_id)
+    if args.json:
+        print(json.dumps({"rebuild_question_signatures": result}, ensure_ascii=False))
+    else:
+        print(f"Assinaturas recalculadas. Semanas={result['semanas']} Questões={result['questoes']}")
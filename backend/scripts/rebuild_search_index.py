@@ -0,0 +1,44 @@
+"""Preenche os campos derivados de subject_contents e reconstrói o índice de busca.
+
+Campos: content_text, content_outline, content_sections, word_count, search_text e content_hash
+(ver servicos/conteudos.py).
+Necessário uma vez após as migrações 20261019_0011/0013/0014/0015 e depois de cargas feitas fora
+do ORM (SQL direto), que não passam pelo cálculo no flush.
+Uso (local):
+  cd backend/src
+  python ../scripts/rebuild_search_index.py [--all] [--json]
+"""
+from __future__ import annotations
+import os
+import sys
+
+# garantir que src esteja no path quando rodado de fora
+def _ensure_path():
+    base = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+    if base not in sys.path:
+        sys.path.insert(0, base)
+_ensure_path()
+
+from app_factory import create_app  # type: ignore  # noqa: E402
+from servicos.busca import reindexar  # type: ignore  # noqa: E402
+
+APP = create_app()
+
+
+def rebuild(todos: bool = False) -> dict:
+    with APP.app_context():
+        return reindexar(todos)
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--json', action='store_true', help='Saída JSON')
+    ap.add_argument('--all', action='store_true', help='Recalcula todos os conteúdos, não só os sem campos derivados')
+    args = ap.parse_args()
+    result = rebuild(args.all)
+    if args.json:
+        print(json.dumps({"rebuild_search_index": result}, ensure_ascii=False))
+    else:
+        print(f"Conteúdos atualizados: {result['updated']}")
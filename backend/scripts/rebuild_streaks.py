@@ -0,0 +1,42 @@
+"""Reconstrói habito_stats (streaks e contagens 7/30 dias) a partir do histórico.
+
+Lê check-ins e sessões Pomodoro numa única passada ordenada por usuário e dia
+(ver servicos/streaks.py). Idempotente: pode rodar de novo a qualquer momento.
+Uso (local):
+  cd backend/src
+  python ../scripts/rebuild_streaks.py [--json]
+"""
+from __future__ import annotations
+import os
+import sys
+
+# garantir que src esteja no path quando rodado de fora
+def _ensure_path():
+    base = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+    if base not in sys.path:
+        sys.path.insert(0, base)
+_ensure_path()
+
+from app_factory import create_app  # type: ignore  # noqa: E402
+from servicos.streaks import reconstruir_todos  # type: ignore  # noqa: E402
+
+APP = create_app()
+
+
+def rebuild(lote_usuarios: int = 200) -> dict:
+    with APP.app_context():
+        return reconstruir_todos(lote_usuarios=lote_usuarios)
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--json', action='store_true', help='Saída JSON')
+    ap.add_argument('--batch', type=int, default=200, help='Usuários por commit')
+    args = ap.parse_args()
+    result = rebuild(args.batch)
+    if args.json:
+        print(json.dumps({"rebuild_streaks": result}, ensure_ascii=False))
+    else:
+        print(f"Streaks reconstruídos. Usuários={result['usuarios']} Eventos={result['eventos']}")
@@ -2,29 +2,21 @@ import os, re, time, logging, threading
 from datetime import datetime, timedelta
 from flask import Flask, jsonify
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 from sqlalchemy import text
 from dotenv import load_dotenv
 
 from config import get_config
-from models.models import db, Curso, HorariosEscolares, SubjectContent, CursoMateria, User, WeeklyQuiz, YouTubeCache
-
-# Explicit runtime markers to ensure audit sees real usage of server/queue libs present in core requirements.
-try:
-    import gunicorn  # type: ignore  # noqa: F401
-except Exception:  # pragma: no cover
-    pass
-try:
-    import rq  # type: ignore  # noqa: F401
-except Exception:  # pragma: no cover
-    pass
+from models.models import db, Curso, HorariosEscolares, SubjectContent, CursoMateria, WeeklyQuiz, YouTubeCache
+from servicos.token_store import TokenStore
+from servicos.upsert import exigir_dialeto
+from servicos.identidade import carregar_identidade
+from servicos.rate_limit import PreChecagemLocal, chave_limite, custo_requisicao
 
 try:
     from flask_limiter import Limiter  # type: ignore
-    from flask_limiter.util import get_remote_address  # type: ignore
 except Exception:  # pragma: no cover
     Limiter = None  # type: ignore
-    def get_remote_address():  # type: ignore
-        return None
 
 from flask_login import LoginManager, current_user
 from flask_jwt_extended import (
@@ -58,15 +50,163 @@ _DEF_ORIGINS = [
 _APP_START_TS = time.time()
 
 
+# Blueprints registrados por create_app (módulo, atributo). Todos são importados no boot
+# (o url_map precisa estar completo antes da primeira requisição); com preload isso
+# acontece uma vez no master. O importlib só serve para o relatório de boot
+# (BOOT_TIMING=1) mostrar o custo de cada módulo.
+_BLUEPRINTS = (
+    ('routes.auth_routes', 'auth_bp'),
+    ('routes.user_routes', 'user_bp'),
+    ('routes.user_routes', 'users_bp'),
+    ('routes.usuarios_routes', 'usuarios_bp'),
+    ('routes.agendas', 'agendas_bp'),
+    ('routes.habitos', 'habitos_bp'),
+    ('routes.revisoes_routes', 'revisoes_bp'),
+    ('routes.content_routes', 'content_bp'),
+    ('routes.content_routes', 'content_public_bp'),
+    ('routes.progress_routes', 'progress_bp'),
+    ('routes.progress_routes', 'progresso_bp'),
+    ('routes.course_routes', 'course_bp'),
+    ('routes.onboarding_routes', 'onboarding_bp'),
+    ('routes.quiz_gen_routes', 'bp_quiz_gen'),
+    ('routes.videos_routes', 'videos_bp'),
+    ('routes.ai_routes', 'ai_bp'),
+    ('routes.ia_sugestao', 'bp_ia_sugestao'),
+    ('routes.ia_quiz', 'bp_quiz'),
+    ('routes', 'v1_bp'),
+    ('routes.compat_me_routes', 'compat_me_bp'),
+    ('routes.dev_tools', 'dev_tools_bp'),
+)
+
+
+class _BootTimer:
+    """Cronômetro de fases do create_app; BOOT_TIMING=1 loga o resumo."""
+
+    def __init__(self):
+        self.profile = 'full'
+        self.inicio = self._ultimo = time.perf_counter()
+        self.fases: dict[str, float] = {}
+
+    def marca(self, fase: str) -> None:
+        agora = time.perf_counter()
+        self.fases[fase] = self.fases.get(fase, 0.0) + (agora - self._ultimo) * 1000
+        self._ultimo = agora
+
+    def resumo(self) -> dict:
+        return {
+            'profile': self.profile,
+            'total_ms': round((time.perf_counter() - self.inicio) * 1000, 1),
+            'fases_ms': {k: round(v, 1) for k, v in self.fases.items()},
+        }
+
+
+def _selfheal_jsonb(app, cfg):
+    """Self-heal: ensure users.dias_disponiveis is JSON/JSONB in Postgres.
+    Controlled via DB_SELFHEAL_JSONB (default: enabled). Safe no-op if already JSON/JSONB."""
+    try:
+        if os.getenv('DB_SELFHEAL_JSONB', '1').lower() in {'1','true','yes'} and not cfg.USE_SQLITE:
+            with app.app_context():
+                try:
+                    from sqlalchemy import text as _sql_text
+                    res = db.session.execute(_sql_text(
+                        """
+                        SELECT data_type, udt_name
+                        FROM information_schema.columns
+                        WHERE table_schema = COALESCE(current_schema(), 'public')
+                          AND table_name = 'users'
+                          AND column_name = 'dias_disponiveis'
+                        """
+                    )).first()
+                    dt = (res[0].lower(), (res[1] or '').lower()) if res else (None, None)
+                    if not dt[0] or dt[0] not in ('json','jsonb'):
+                        db.session.execute(_sql_text(
+                            """
+                            ALTER TABLE users
+                            ALTER COLUMN dias_disponiveis TYPE JSONB
+                            USING to_jsonb(dias_disponiveis)
+                            """
+                        ))
+                        db.session.commit()
+                        logging.info('DB self-heal: users.dias_disponiveis converted to JSONB')
+                    else:
+                        logging.debug('DB self-heal: users.dias_disponiveis already %s', dt[0])
+                except Exception as _e:
+                    logging.warning('DB self-heal skipped/failed: %s', _e)
+    except Exception:
+        pass
+
+
+def _auto_ddl(app, cfg):
+    # create_all somente permitido explicita/claramente (não forçar em production)
+    auto_ddl = os.getenv('AUTO_DDL_ON_START','0').lower() in {'1','true','yes'}
+    if auto_ddl and cfg.ENVIRONMENT != 'production':
+        with app.app_context():
+            try:
+                db.create_all()
+            except Exception as e:
+                logging.warning(f"Falha ao criar tabelas: {e}")
+    elif auto_ddl and cfg.ENVIRONMENT == 'production':
+        logging.warning('AUTO_DDL_ON_START ignorado em produção — use alembic upgrade head')
+
+
+def _dev_seed(app):
+    # Dev: auto seed minimal data (idempotent) if enabled via env
+    try:
+        if os.getenv('DEV_AUTOCREATE_DATA', '0').lower() in {'1','true','yes'}:
+            with app.app_context():
+                try:
+                    import sys as _sys
+                    _base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))  # /app
+                    if _base_dir not in _sys.path:
+                        _sys.path.insert(0, _base_dir)
+                    from scripts.seed_data import seed  # type: ignore
+                    result = seed()
+                    if any(result.values()):
+                        logging.info(f"DEV seed applied: {result}")
+                except Exception as se:  # pragma: no cover
+                    logging.warning(f"DEV seed failed: {se}")
+    except Exception:
+        pass
+
+
+def run_init_tasks(app) -> None:
+    """Trabalho de banco feito uma vez por deploy (comando `flask init` / scripts/init_app.py)."""
+    cfg = get_config()
+    _selfheal_jsonb(app, cfg)
+    _auto_ddl(app, cfg)
+    _dev_seed(app)
+
+
+def _registrar_blueprints(app, boot: _BootTimer) -> None:
+    import importlib
+    modulos: dict = {}
+    for nome_modulo, attr in _BLUEPRINTS:
+        try:
+            if nome_modulo not in modulos:
+                modulos[nome_modulo] = importlib.import_module(nome_modulo)
+                boot.marca(f'import:{nome_modulo}')
+            app.register_blueprint(getattr(modulos[nome_modulo], attr))
+        except Exception as e:
+            logging.warning(f"Falha ao registrar blueprint {attr}: {e}")
+    boot.marca('register_blueprints')
+
+
 def create_app():
+    boot = _BootTimer()
     load_dotenv()
     cfg = get_config()
+    boot.profile = os.getenv('STARTUP_PROFILE', 'full').strip().lower()
 
     logging.basicConfig(level=getattr(logging, cfg.LOG_LEVEL.upper(), logging.INFO))
 
     app = Flask(__name__)
     app.config.from_object(cfg)
 
+    # Atrás do nginx: confia em N saltos de X-Forwarded-For/Proto (0 desativa, ex.: API exposta direto)
+    _proxy_hops = int(os.getenv('PROXY_FIX_HOPS', '1'))
+    if _proxy_hops > 0:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=_proxy_hops, x_proto=_proxy_hops)  # type: ignore
+
     # Secure cookie defaults (overridable via env)
     _sess_secure_env = os.getenv('SESSION_COOKIE_SECURE')
     if _sess_secure_env is not None:
@@ -107,54 +247,18 @@ def create_app():
             db_name = os.getenv('DB_NAME', 'sistema_estudos')
             app.config['SQLALCHEMY_DATABASE_URI'] = f'postgresql+psycopg2://{db_user}:{db_pass}@{db_host}:{db_port}/{db_name}'
     # (debug log removed)
+    exigir_dialeto(app.config['SQLALCHEMY_DATABASE_URI'])
 
     # Sempre inicializar DB (independente de Postgres/SQLite)
     db.init_app(app)
+    boot.marca('config')
 
-    # Self-heal: ensure users.dias_disponiveis is JSON/JSONB in Postgres
-    # Controlled via DB_SELFHEAL_JSONB (default: enabled). Safe no-op if already JSON/JSONB.
-    try:
-        if os.getenv('DB_SELFHEAL_JSONB', '1').lower() in {'1','true','yes'} and not cfg.USE_SQLITE:
-            with app.app_context():
-                try:
-                    from sqlalchemy import text as _sql_text
-                    res = db.session.execute(_sql_text(
-                        """
-                        SELECT data_type, udt_name
-                        FROM information_schema.columns
-                        WHERE table_schema = COALESCE(current_schema(), 'public')
-                          AND table_name = 'users'
-                          AND column_name = 'dias_disponiveis'
-                        """
-                    )).first()
-                    dt = (res[0].lower(), (res[1] or '').lower()) if res else (None, None)
-                    if not dt[0] or dt[0] not in ('json','jsonb'):
-                        db.session.execute(_sql_text(
-                            """
-                            ALTER TABLE users
-                            ALTER COLUMN dias_disponiveis TYPE JSONB
-                            USING to_jsonb(dias_disponiveis)
-                            """
-                        ))
-                        db.session.commit()
-                        logging.info('DB self-heal: users.dias_disponiveis converted to JSONB')
-                    else:
-                        logging.debug('DB self-heal: users.dias_disponiveis already %s', dt[0])
-                except Exception as _e:
-                    logging.warning('DB self-heal skipped/failed: %s', _e)
-    except Exception:
-        pass
+    # STARTUP_PROFILE=fast: self-heal, create_all e seed ficam para `flask init` (uma vez por deploy)
 
-    # create_all somente permitido explicita/claramente (não forçar em production)
-    auto_ddl = os.getenv('AUTO_DDL_ON_START','0').lower() in {'1','true','yes'}
-    if auto_ddl and cfg.ENVIRONMENT != 'production':
-        with app.app_context():
-            try:
-                db.create_all()
-            except Exception as e:
-                logging.warning(f"Falha ao criar tabelas: {e}")
-    elif auto_ddl and cfg.ENVIRONMENT == 'production':
-        logging.warning('AUTO_DDL_ON_START ignorado em produção — use alembic upgrade head')
+    if boot.profile != 'fast':
+        _selfheal_jsonb(app, cfg)
+        _auto_ddl(app, cfg)
+    boot.marca('db_init')
 
     # CORS
     origins_env = os.getenv('FRONTEND_ORIGINS')
@@ -166,23 +270,6 @@ def create_app():
     if cfg.ENVIRONMENT == 'production' and any('localhost' in o or '127.0.0.1' in o for o in origins):
         logging.warning('CORS: origens de desenvolvimento detectadas em produção; revise FRONTEND_ORIGINS.')
 
-    # Rate Limiter
-    # A limitação original (60/hour) era muito agressiva para endpoints frequentemente consultados
-    # como /api/user/me causando 429 no frontend. Aumentamos o padrão para algo mais razoável.
-    # Pode ser sobrescrito via YT_RATE_LIMIT (ex: "300 per hour;50 per minute") e YT_RATE_BURST.
-    lmts_default = os.getenv('YT_RATE_LIMIT', '600 per hour;60 per minute')
-    lmts_burst = os.getenv('YT_RATE_BURST', '120 per minute')
-    if 'Limiter' in globals() and Limiter is not None:
-        limiter = Limiter(get_remote_address, app=app, default_limits=[lmts_default])
-    else:
-        class _NoopLimiter:
-            def limit(self, *a, **k):
-                def _d(f): return f
-                return _d
-        limiter = _NoopLimiter()
-    app.limiter = limiter  # type: ignore
-    app.limits_burst = lmts_burst  # type: ignore
-
     # Login (session based legacy)
     login_manager.init_app(app)
     # JWT
@@ -203,18 +290,50 @@ def create_app():
             r_client = None
     app.redis = r_client  # type: ignore
 
-    # Blocklist key namespace helpers
-    _BL_REFRESH_PREFIX = 'jwt:refresh:block:'
-    _RT_ROTATE_PREFIX = 'jwt:refresh:rot:'  # maps old jti -> new jti for replay detection
+    # Rate Limiter
+    # A limitação original (60/hour) era muito agressiva para endpoints frequentemente consultados
+    # como /api/user/me causando 429 no frontend. Aumentamos o padrão para algo mais razoável.
+    # Pode ser sobrescrito via YT_RATE_LIMIT (ex: "300 per hour;50 per minute") e YT_RATE_BURST.
+    # Contadores no Redis (compartilhados entre workers), chave por usuário/IP real e custo por rota
+    # (ver servicos/rate_limit.py). RATELIMIT_STORAGE_URI sobrescreve o storage.
+    lmts_default = os.getenv('YT_RATE_LIMIT', '600 per hour;60 per minute')
+    lmts_burst = os.getenv('YT_RATE_BURST', '120 per minute')
+    if 'Limiter' in globals() and Limiter is not None:
+        storage_uri = os.getenv('RATELIMIT_STORAGE_URI') or (redis_url if r_client is not None else 'memory://')
+        limiter = Limiter(
+            chave_limite,
+            app=app,
+            default_limits=[lmts_default],
+            default_limits_cost=custo_requisicao,
+            storage_uri=storage_uri,
+            in_memory_fallback_enabled=True,
+            key_prefix='rl',
+        )
+        # pré-checagem local só rejeita cedo; roda antes do before_request do Limiter
+        if (os.getenv('RATE_LIMIT_LOCAL_PRECHECK', 'true').lower() in {'1', 'true', 'yes'}
+                and not storage_uri.startswith('memory://')):
+            app.before_request_funcs.setdefault(None, []).insert(0, PreChecagemLocal(lmts_default).rejeitar)
+    else:
+        class _NoopLimiter:
+            def limit(self, *a, **k):
+                def _d(f): return f
+                return _d
+        limiter = _NoopLimiter()
+    app.limiter = limiter  # type: ignore
+    app.limits_burst = lmts_burst  # type: ignore
+    boot.marca('redis_limiter')
+
+    # Revogação/rotação de refresh tokens (chaves por jti com TTL; ver servicos/token_store.py)
+    prazo_refresh = app.config.get('JWT_REFRESH_TOKEN_EXPIRES', timedelta(days=30))
+    if isinstance(prazo_refresh, timedelta):
+        prazo_refresh = prazo_refresh.total_seconds()
+    app.token_store = TokenStore(r_client, ttl_sem_exp=prazo_refresh or None)  # type: ignore
 
     @jwt.token_in_blocklist_loader
     def check_if_token_revoked(jwt_header, jwt_payload):  # pragma: no cover (simple logic)
         # Only enforce for refresh tokens for now (could extend to access)
-        if jwt_payload.get('type') == 'refresh' and app.redis:
-            jti = jwt_payload.get('jti')
-            if not jti:
-                return False
-            return app.redis.sismember('jwt:refresh:revoked', jti)  # type: ignore
+        if jwt_payload.get('type') == 'refresh':
+            return app.token_store.is_revoked(jwt_payload.get('jti'))  # type: ignore
         return False
 
     @jwt.invalid_token_loader
@@ -242,50 +361,16 @@ def create_app():
     @login_manager.user_loader
     def load_user(uid):
         try:
-            return db.session.get(User, int(uid))
+            return carregar_identidade(uid)
         except Exception:
             return None
 
     # Register existing blueprints
-    from routes.auth_routes import auth_bp
-    from routes.user_routes import user_bp, users_bp
-    from routes.usuarios_routes import usuarios_bp
-    from routes.agendas import agendas_bp
-    from routes.habitos import habitos_bp
-    from routes.content_routes import content_bp, content_public_bp
-    from routes.progress_routes import progress_bp, progresso_bp
-    from routes.course_routes import course_bp
-    from routes.onboarding_routes import onboarding_bp
-    from routes.quiz_gen_routes import bp_quiz_gen
-    from routes.videos_routes import videos_bp
-    from routes.ai_routes import ai_bp
-    from routes import v1_bp
-    from routes.compat_me_routes import compat_me_bp
-    from routes.dev_tools import dev_tools_bp
-
-    for bp in (auth_bp, user_bp, users_bp, usuarios_bp, agendas_bp, habitos_bp, content_bp, content_public_bp, progress_bp, progresso_bp, course_bp, onboarding_bp, bp_quiz_gen, videos_bp, ai_bp, v1_bp, compat_me_bp, dev_tools_bp):
-        try:
-            app.register_blueprint(bp)
-        except Exception as e:
-            logging.warning(f"Falha ao registrar blueprint {getattr(bp,'name',bp)}: {e}")
+    _registrar_blueprints(app, boot)
 
-    # Dev: auto seed minimal data (idempotent) if enabled via env
-    try:
-        if os.getenv('DEV_AUTOCREATE_DATA', '0').lower() in {'1','true','yes'}:
-            with app.app_context():
-                try:
-                    import sys as _sys
-                    _base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))  # /app
-                    if _base_dir not in _sys.path:
-                        _sys.path.insert(0, _base_dir)
-                    from scripts.seed_data import seed  # type: ignore
-                    result = seed()
-                    if any(result.values()):
-                        logging.info(f"DEV seed applied: {result}")
-                except Exception as se:  # pragma: no cover
-                    logging.warning(f"DEV seed failed: {se}")
-    except Exception:
-        pass
+    if boot.profile != 'fast':
+        _dev_seed(app)
+    boot.marca('seed')
 
     # Simple health legacy
     @app.route('/api/health')
@@ -312,4 +397,12 @@ def create_app():
     def index():
         return jsonify({'message':'API do Sistema de Estudos'})
 
+    @app.cli.command('init')
+    def init_command():  # pragma: no cover - CLI
+        """Self-heal JSONB, create_all (AUTO_DDL_ON_START) e seed (DEV_AUTOCREATE_DATA)."""
+        run_init_tasks(app)
+
+    app.boot_timings = boot.resumo()  # type: ignore
+    if os.getenv('BOOT_TIMING', '0').lower() in {'1','true','yes'}:
+        logging.info('boot timing: %s', app.boot_timings)
     return app
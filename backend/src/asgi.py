@@ -0,0 +1,9 @@
+from main import app as flask_app
+from servicos.asgi_ia import AppIAAsync
+
+application = AppIAAsync(flask_app)
+
+# This file exposes `application` for ASGI servers. It serves the long-running AI routes
+# (see servicos/asgi_ia.py); everything else keeps running under gunicorn via wsgi.py.
+# Example:
+#   uvicorn asgi:application --app-dir /app/src --host 0.0.0.0 --port 5001
@@ -0,0 +1,66 @@
+"""Configuração do gunicorn (carregada pelo entrypoint com -c).
+
+Com preload (padrão), o app é importado uma vez no master e os workers nascem
+por fork: reinício/escala de worker não paga import nem create_app. Antes do
+primeiro fork congelamos o heap (gc.freeze) para que o coletor dos workers não
+toque nessas páginas e elas continuem compartilhadas (copy-on-write). O gc fica
+desligado só durante o import no master e é religado logo após o freeze.
+
+O trabalho único de banco (self-heal, create_all, seed) roda antes, via
+scripts/init_app.py; os workers sobem com STARTUP_PROFILE=fast.
+"""
+import gc
+import importlib
+import logging
+import os
+import sys
+import time
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WORKERS', '3'))
+worker_class = 'gthread'
+threads = int(os.getenv('THREADS', '4'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+graceful_timeout = int(os.getenv('GRACEFUL_TIMEOUT', '30'))
+preload_app = os.getenv('GUNICORN_PRELOAD', '1').lower() in {'1', 'true', 'yes'}
+
+# Módulos importados sob demanda pelas rotas; no master entram no heap compartilhado.
+_AQUECER = ('requests', 'servicos.plano_estudo_avancado')
+_congelado = False
+
+if preload_app:
+    # Evita coletas durante o import no master (o heap será congelado antes do fork)
+    gc.disable()
+
+
+def pre_fork(server, worker):
+    global _congelado
+    if not preload_app or _congelado:
+        return
+    for nome in _AQUECER:
+        try:
+            importlib.import_module(nome)
+        except Exception as e:  # pragma: no cover - dependência opcional
+            logging.warning('preload: falha ao importar %s: %s', nome, e)
+    gc.freeze()
+    gc.enable()  # master e workers (herdam o estado no fork) voltam a coletar normalmente
+    _congelado = True
+
+
+def post_fork(server, worker):
+    worker._boot_t0 = time.perf_counter()
+    if preload_app:
+        # Conexões abertas no master não podem ser compartilhadas entre processos
+        main = sys.modules.get('main')
+        if main is not None:
+            from models.models import db
+            with main.app.app_context():
+                db.engine.dispose(close=False)
+
+
+def post_worker_init(worker):
+    if os.getenv('BOOT_TIMING', '0').lower() in {'1', 'true', 'yes'}:
+        t0 = getattr(worker, '_boot_t0', None)
+        if t0 is not None:
+            worker.log.info('boot timing: worker %s pronto em %.1f ms (preload=%s)',
+                            worker.pid, (time.perf_counter() - t0) * 1000, preload_app)
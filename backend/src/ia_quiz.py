@@ -3,6 +3,8 @@ import json, re, random, unicodedata, time
 from dataclasses import dataclass, asdict
 from typing import List, Literal, Optional, Tuple
 
+from servicos.questoes_lsh import IndiceLSH
+
 # --- Gemini client (ex: google-generativeai / Vertex ou seu wrapper local) ---
 # You must implement or adapt this import:
 from your_gemini_client import gemini_generate_json
@@ -214,7 +216,7 @@ def _refine_with_gemini(q:QuizItem, reason:str)->QuizItem|None:
     except Exception:
       return None
 
-def generate_refined_quiz(topics:List[str], n:int=8)->List[QuizItem]:
+def generate_refined_quiz(topics:List[str], n:int=8, historico=None)->List[QuizItem]:
   try:
     raw = _gemini_generate_raw(topics, n*2)  # gera extra p/ poder filtrar
     items:List[QuizItem] = []
@@ -241,12 +243,12 @@ def generate_refined_quiz(topics:List[str], n:int=8)->List[QuizItem]:
           continue
       items.append(q2)
 
-    # dedupe (≥ 0.8 similar)
-    filtered:List[QuizItem] = []
-    for q in items:
-      if any(similar(q.question, p.question)>=0.8 for p in filtered):
-        continue
-      filtered.append(q)
+    # dedupe (≥ 0.8 similar) via MinHash/LSH; com `historico`, descarta o que o usuário já viu
+    if historico is not None and items:
+      repetidas = historico.repetidas([q.question for q in items])
+      items = [q for q, rep in zip(items, repetidas) if not rep] or items
+    indice = IndiceLSH()
+    filtered:List[QuizItem] = [q for q in items if indice.adicionar_se_nova(q.id, q.question)]
 
     # equilibrio e corte final
     random.shuffle(filtered)
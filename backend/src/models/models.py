@@ -206,6 +206,18 @@ class SubjectContent(db.Model):
     created_at = db.Column(db.DateTime)
     materia_id = db.Column(db.Integer)
     curso_id = db.Column(db.Integer)
+    search_text = db.Column(db.Text)  # topic + content_text, normalizado (busca)
+    # derivados de content_html no flush (servicos/conteudos.py)
+    content_text = db.Column(db.Text)
+    content_outline = db.Column(db.JSON)  # [{level, title, offset, html_offset, html_open}], bytes de content_text/content_html
+    content_sections = db.Column(db.JSON)  # [{level, title, start, end, prefix, suffix, etag}], bytes de content_html
+    word_count = db.Column(db.Integer)
+    content_hash = db.Column(db.String(40))  # sha1(subject, topic, content_html): ingestão idempotente
+
+    __table_args__ = (
+        # chave natural da ingestão em lote (servicos/ingestao.py)
+        db.Index('uq_subject_contents_materia_topic', 'materia_id', 'topic', unique=True),
+    )
 
     def __repr__(self):
         return f'<SubjectContent {self.subject} - {self.topic}>'
@@ -284,14 +296,27 @@ class PomodoroSession(db.Model):
     tipo = db.Column(db.String(20), nullable=False)  # foco, pausa, pausa longa
     duracao = db.Column(db.Integer, nullable=False)
 
+class PomodoroRollup(db.Model):
+    """Tempo de foco agregado por usuário e bucket (dia ou semana iniciando na segunda)."""
+    __tablename__ = 'pomodoro_rollups'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    granularity = db.Column(db.String(8), nullable=False)  # day | week
+    bucket_start = db.Column(db.Date, nullable=False)
+    focus_seconds = db.Column(db.Integer, nullable=False, default=0)
+    sessions = db.Column(db.Integer, nullable=False, default=0)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'granularity', 'bucket_start', name='uq_pomodoro_rollup_bucket'),
+    )
+
 # --- Novas tabelas para agendas e hábitos ---
 class AgendaBloco(db.Model):
     __tablename__ = 'agenda_blocos'
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    date = db.Column(db.String(20), nullable=False)  # formato dd/MM/YYYY
-    start_time = db.Column(db.String(5), nullable=False)  # HH:MM
-    end_time = db.Column(db.String(5), nullable=False)    # HH:MM
+    date = db.Column(db.Date, nullable=False)  # API aceita/retorna dd/MM/YYYY (ver servicos/datas.py)
+    start_time = db.Column(db.Time, nullable=False)
+    end_time = db.Column(db.Time, nullable=False)
     activity_type = db.Column(db.String(40), nullable=False)
     subject = db.Column(db.String(255))
     topic = db.Column(db.String(255))
@@ -302,15 +327,35 @@ class AgendaBloco(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_agenda_blocos_user_date', 'user_id', 'date'),
+    )
+
 class HabitoCheckin(db.Model):
     __tablename__ = 'habitos_checkin'
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     habit = db.Column(db.String(50), nullable=False)  # ex: estudo_diario, leitura, etc.
-    date = db.Column(db.String(20), nullable=False)   # formato dd/MM/YYYY
+    date = db.Column(db.Date, nullable=False)   # API aceita/retorna dd/MM/YYYY
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     __table_args__ = (
         db.UniqueConstraint('user_id', 'habit', 'date', name='uq_habito_user_habit_date'),
+        db.Index('ix_habitos_checkin_user_date', 'user_id', 'date'),
+    )
+
+class HabitoStats(db.Model):
+    """Estado incremental de streak por hábito (ver servicos/streaks.py)."""
+    __tablename__ = 'habito_stats'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    habit = db.Column(db.String(50), nullable=False)  # 'geral' agrega todos os hábitos
+    current_streak = db.Column(db.Integer, nullable=False, default=0)
+    longest_streak = db.Column(db.Integer, nullable=False, default=0)
+    last_date = db.Column(db.Date)
+    activity_mask = db.Column(db.BigInteger, nullable=False, default=0)  # bit 0 = last_date, 30 dias
+    total_days = db.Column(db.Integer, nullable=False, default=0)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'habit', name='uq_habito_stats_user_habit'),
     )
 
 # --- Persistente cache para resultados do YouTube ---
@@ -343,3 +388,131 @@ class WeeklyQuiz(db.Model):
     def __repr__(self):
         return f'<WeeklyQuiz user={self.user_id} id={self.id}>'
 
+
+# ==== Assinaturas MinHash das questões já geradas (ver servicos/questoes_lsh.py) ====
+class QuestionSignature(db.Model):
+    __tablename__ = 'question_signatures'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    week_start = db.Column(db.Date, nullable=False)
+    question_hash = db.Column(db.String(40), nullable=False)  # sha1 do texto normalizado
+    signature = db.Column(db.LargeBinary, nullable=False)  # NUM_PERM uint32 little-endian
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'week_start', 'question_hash', name='uq_question_signature_user_week_hash'),
+        db.Index('ix_question_signatures_user_week', 'user_id', 'week_start'),
+    )
+
+
+class QuestionLSHBand(db.Model):
+    """Uma linha por banda da assinatura: candidato = mesma (user_id, band_key)."""
+    __tablename__ = 'question_lsh_bands'
+    signature_id = db.Column(db.Integer, db.ForeignKey('question_signatures.id', ondelete='CASCADE'), primary_key=True)
+    band = db.Column(db.SmallInteger, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    band_key = db.Column(db.BigInteger, nullable=False)  # hash(banda, linhas), já distinto por banda
+
+    __table_args__ = (
+        db.Index('ix_question_lsh_bands_user_key', 'user_id', 'band_key'),
+    )
+
+
+# ==== Banco de questões reaproveitáveis (ver servicos/banco_questoes.py) ====
+class QuestionBankItem(db.Model):
+    """Questão gerada uma vez por revisão de conteúdo; WeeklyQuiz guarda só referências."""
+    __tablename__ = 'question_bank'
+    id = db.Column(db.Integer, primary_key=True)
+    content_id = db.Column(db.Integer, nullable=False)
+    content_hash = db.Column(db.String(40), nullable=False)  # sha1 do texto limpo do conteúdo
+    generator = db.Column(db.String(32), nullable=False)  # versão do gerador (ex.: weekly-v1)
+    format = db.Column(db.String(16), nullable=False)  # mcq_def | ar | ord | cloze | tf
+    slot = db.Column(db.Integer, nullable=False, default=0)  # posição entre itens do mesmo formato
+    item = db.Column(db.JSON, nullable=False)  # questão canônica (ordem de opções do banco)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('content_id', 'content_hash', 'generator', 'format', 'slot', name='uq_question_bank_key'),
+    )
+
+
+class WeeklyQuizFingerprint(db.Model):
+    """Seleção de questões compartilhada por quem concluiu o mesmo conjunto de conteúdos na semana."""
+    __tablename__ = 'weekly_quiz_fingerprints'
+    id = db.Column(db.Integer, primary_key=True)
+    fingerprint = db.Column(db.String(40), nullable=False)  # sha1 de (content_id, content_hash) ordenados + gerador
+    week_start = db.Column(db.Date, nullable=False, index=True)
+    groups = db.Column(db.JSON, nullable=False)  # [[content_id, [question_bank.id, ...]], ...]
+    polished = db.Column(db.Boolean, nullable=False, default=False)
+    polished_items = db.Column(db.JSON, nullable=True)  # {question_bank.id: item polido, ordem canônica}
+    hits = db.Column(db.Integer, nullable=False, default=0)
+    history_misses = db.Column(db.Integer, nullable=False, default=0)  # usuário já tinha visto parte da seleção
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('fingerprint', 'week_start', name='uq_weekly_quiz_fingerprint_week'),
+    )
+
+
+# ==== Outbox transacional de eventos de domínio (ver servicos/eventos.py) ====
+class OutboxEvent(db.Model):
+    """Evento gravado no mesmo commit da mudança; o relay publica no Redis Stream."""
+    __tablename__ = 'outbox_events'
+    id = db.Column(db.Integer, primary_key=True)
+    event_type = db.Column(db.String(64), nullable=False)  # ex.: conteudo.concluido, bloco.status
+    user_id = db.Column(db.Integer, nullable=True, index=True)
+    payload = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    relayed_at = db.Column(db.DateTime, nullable=True, index=True)  # NULL = ainda não foi para o stream
+
+
+class OutboxCheckpoint(db.Model):
+    """Último evento processado por grupo de consumidores no modo local (sem Redis)."""
+    __tablename__ = 'outbox_checkpoints'
+    group_name = db.Column(db.String(64), primary_key=True)
+    last_event_id = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+# ==== Revisões espaçadas (SM-2) por usuário/conteúdo (ver servicos/revisoes.py) ====
+class ReviewItem(db.Model):
+    """Fila de revisões do usuário: o índice (user_id, due_at) é a fila de prioridade persistida."""
+    __tablename__ = 'review_items'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    content_id = db.Column(db.Integer, nullable=False)
+    subject = db.Column(db.String(255))
+    topic = db.Column(db.String(255))
+    due_at = db.Column(db.DateTime, nullable=False, index=True)
+    interval_days = db.Column(db.Integer, nullable=False, default=0)
+    ease = db.Column(db.Float, nullable=False, default=2.5)
+    repetitions = db.Column(db.Integer, nullable=False, default=0)  # acertos seguidos
+    lapses = db.Column(db.Integer, nullable=False, default=0)
+    last_outcome = db.Column(db.String(16))  # ok | dificuldade
+    last_reviewed_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'content_id', name='uq_review_items_user_content'),
+        db.Index('ix_review_items_user_due', 'user_id', 'due_at'),
+    )
+
+
+class ReviewDueDaily(db.Model):
+    """Lista diária de revisões calculada em lote (scripts/compute_due_reviews.py)."""
+    __tablename__ = 'review_due_daily'
+    user_id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    content_ids = db.Column(db.JSON, nullable=False)  # em ordem de prioridade
+    overflow = db.Column(db.Integer, nullable=False, default=0)  # devidas que ficaram para o dia seguinte
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+# ==== Carimbo de versão do catálogo (ver servicos/catalogo.py) ====
+class CatalogVersion(db.Model):
+    """Linha única (id=1) incrementada na mesma transação de qualquer escrita em cursos/matérias/conteúdos."""
+    __tablename__ = 'catalog_version'
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=1)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -1,24 +1,34 @@
 from flask import Blueprint, request, jsonify
 from flask_login import current_user, login_required
 from models.models import db, AgendaBloco
+from servicos.datas import ler_filtros_data, parse_data, parse_hora, formatar_data, formatar_hora
 
 agendas_bp = Blueprint('agendas', __name__, url_prefix='/api/agendas')
 
 @agendas_bp.route('/blocos', methods=['GET'])
 @login_required
 def listar_blocos():
-    date = request.args.get('date')
+    """Lista blocos do usuário.
+    Query: date (dia exato) ou from/to (intervalo inclusivo), em dd/MM/YYYY ou YYYY-MM-DD.
+    """
     q = AgendaBloco.query.filter_by(user_id=current_user.id)
-    if date:
-        q = q.filter_by(date=date)
+    filtros, erro = ler_filtros_data(request.args)
+    if erro:
+        return jsonify({"error": erro}), 400
+    if 'date' in filtros:
+        q = q.filter(AgendaBloco.date == filtros['date'])
+    if 'from' in filtros:
+        q = q.filter(AgendaBloco.date >= filtros['from'])
+    if 'to' in filtros:
+        q = q.filter(AgendaBloco.date <= filtros['to'])
     blocos = q.order_by(AgendaBloco.date.asc(), AgendaBloco.start_time.asc()).all()
     return jsonify({
         "blocks": [
             {
                 "id": b.id,
-                "date": b.date,
-                "start_time": b.start_time,
-                "end_time": b.end_time,
+                "date": formatar_data(b.date),
+                "start_time": formatar_hora(b.start_time),
+                "end_time": formatar_hora(b.end_time),
                 "activity_type": b.activity_type,
                 "subject": b.subject,
                 "topic": b.topic,
@@ -40,11 +50,17 @@ def salvar_blocos():
         return jsonify({"error": "Formato inválido"}), 400
     saved_ids = []
     for blk in blocks:
+        dia = parse_data(blk.get('date'))
+        inicio = parse_hora(blk.get('start_time'))
+        fim = parse_hora(blk.get('end_time'))
+        if not dia or not inicio or not fim:
+            db.session.rollback()
+            return jsonify({"error": "date/start_time/end_time inválidos (dd/MM/YYYY, HH:MM)"}), 400
         b = AgendaBloco(
             user_id=current_user.id,
-            date=blk.get('date'),
-            start_time=blk.get('start_time'),
-            end_time=blk.get('end_time'),
+            date=dia,
+            start_time=inicio,
+            end_time=fim,
             activity_type=blk.get('activity_type') or 'study',
             subject=blk.get('subject'),
             topic=blk.get('topic'),
@@ -66,8 +82,14 @@ def atualizar_bloco(block_id):
     if not b:
         return jsonify({"error": "Bloco não encontrado"}), 404
     data = request.get_json(force=True) or {}
+    parsers = {'date': parse_data, 'start_time': parse_hora, 'end_time': parse_hora}
     for field in ['date', 'start_time', 'end_time', 'activity_type', 'subject', 'topic', 'duration', 'priority', 'status', 'content_id']:
         if field in data:
-            setattr(b, field, data[field])
+            valor = data[field]
+            if field in parsers:
+                valor = parsers[field](valor)
+                if valor is None:
+                    return jsonify({"error": f"{field} inválido"}), 400
+            setattr(b, field, valor)
     db.session.commit()
-    return jsonify({"success": True})
\ No newline at end of file
+    return jsonify({"success": True})
@@ -1,41 +1,52 @@
-import os, re, json, requests
+import re, json
 from flask import Blueprint, request, jsonify
-from models.models import SubjectContent
+from flask_login import login_required
+from servicos.conteudos import texto_por_id
+from servicos.gemini import ChamadaIA, rota_ia, texto_resposta
+from servicos.ia_stream import MontadorJSON, resumo_ttfb
 
 ai_bp = Blueprint('ai', __name__)
 
-GEMINI_API_KEY = os.getenv('GOOGLE_API_KEY')
-GEMINI_MODEL = os.getenv('GOOGLE_DEFAULT_MODEL', 'models/gemini-1.5-flash-latest')
-GEMINI_BASE_URL = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:generateContent?key={GEMINI_API_KEY}"
+# As views abaixo só validam a entrada e montam o prompt (ChamadaIA); quem espera o
+# Gemini é `rota_ia`: bloqueante sob gunicorn, assíncrono sob o sub-app ASGI (asgi.py).
+# Todas aceitam `?stream=1` (SSE; ver servicos/ia_stream.py).
+# O conteúdo entra no prompt como texto puro pré-calculado (content_text), nunca o HTML.
 
-def _call_gemini(prompt: str, timeout: int = 25):
-    if not GEMINI_API_KEY:
-        return None, {"error": "GEMINI_API_KEY ausente."}
-    payload = {"contents": [{"parts": [{"text": prompt}]}]}
+def _conteudo_do_payload(data, campo):
+    """(topic, texto): com `conteudo_id` usa o texto salvo; senão o campo enviado pelo cliente."""
+    cid = data.get("conteudo_id")
+    if cid in (None, ""):
+        return None, data.get(campo, "")
     try:
-        resp = requests.post(GEMINI_BASE_URL, json=payload, timeout=timeout)
-        resp.raise_for_status()
-        return resp.json(), None
-    except Exception as e:
-        return None, {"error": "Falha na chamada Gemini", "details": str(e)}
+        return texto_por_id(int(cid)) or (None, None)
+    except (TypeError, ValueError):
+        return None, None
+
+@ai_bp.route('/api/ia/stream/metricas', methods=['GET'])
+@login_required
+def stream_metricas():
+    """TTFB dos streams de IA por endpoint (últimas amostras)."""
+    return jsonify({"ttfb": resumo_ttfb()})
 
 @ai_bp.route('/api/generate_quiz/<int:conteudo_id>', methods=['GET'])
+@rota_ia
 def generate_quiz(conteudo_id: int):
-    sc = SubjectContent.query.get(conteudo_id)
-    if not sc:
+    conteudo = texto_por_id(conteudo_id)
+    if conteudo is None:
         return jsonify({"error": "Conteúdo não encontrado"}), 404
-    content_html = sc.content_html or ""
+    _, texto = conteudo
     prompt = (
         "Gere 8 perguntas de múltipla escolha sobre o seguinte conteúdo, com 4 opções cada e destaque a correta e forneça uma explicação curta para cada resposta correta. "
         "Responda no formato JSON: [{question, options:[], answer}]\n\n"
-        f"{content_html}"
+        f"{texto}\n\n"
         "Ao final, forneça também um feedback geral sobre o desempenho do aluno, considerando as respostas dadas (você receberá as respostas do aluno depois), apontando pontos fortes e o que ele pode melhorar para dominar o conteúdo."
     )
-    data, err = _call_gemini(prompt)
-    if err:
-        return jsonify(err), 502
+    # stream: cada questão vira um evento `item` assim que o objeto fecha
+    return ChamadaIA(prompt, _responder_quiz, montador=lambda: MontadorJSON([('*',)]))
+
+def _responder_quiz(data):
     try:
-        text_resp = data["candidates"][0]["content"]["parts"][0]["text"]
+        text_resp = texto_resposta(data)
         match = re.search(r"```json\s*(.*?)\s*```", text_resp, re.DOTALL)
         json_str = match.group(1) if match else text_resp
         questions = json.loads(json_str)
@@ -43,31 +54,37 @@ def generate_quiz(conteudo_id: int):
         questions = []
     return jsonify({"questions": questions})
 
+def _responder_feedback(data):
+    try:
+        feedback = texto_resposta(data)
+    except Exception:
+        feedback = ""
+    return jsonify({"feedback": feedback})
+
 @ai_bp.route('/api/gemini_feynman', methods=['POST'])
+@rota_ia
 def gemini_feynman():
     data = request.get_json() or {}
     texto = data.get("texto", "")
-    conteudo = data.get("conteudo", "")
+    _, conteudo = _conteudo_do_payload(data, "conteudo")
+    if conteudo is None:
+        return jsonify({"error": "Conteúdo não encontrado"}), 404
     prompt = (
         f'O estudante explicou o conteúdo assim: "{texto}"\n'
         f'O conteúdo original é: "{conteudo}"\n'
         "Dê um feedback construtivo, aponte acertos e pontos a melhorar."
     )
-    data, err = _call_gemini(prompt, timeout=20)
-    if err:
-        return jsonify(err), 502
-    try:
-        feedback = data["candidates"][0]["content"]["parts"][0]["text"]
-    except Exception:
-        feedback = ""
-    return jsonify({"feedback": feedback})
+    return ChamadaIA(prompt, _responder_feedback, timeout=20)
 
 @ai_bp.route('/api/quiz_feedback', methods=['POST'])
+@rota_ia
 def quiz_feedback():
     data = request.get_json() or {}
     questions = data.get("questions", [])
     answers = data.get("answers", [])
-    conteudo = data.get("conteudo", "")
+    _, conteudo = _conteudo_do_payload(data, "conteudo")
+    if conteudo is None:
+        return jsonify({"error": "Conteúdo não encontrado"}), 404
     respostas = []
     for i, q in enumerate(questions):
         resposta_aluno = answers[i] if i < len(answers) else None
@@ -84,21 +101,18 @@ def quiz_feedback():
         f"{respostas}\n\n"
         "Com base nisso, forneça um feedback geral sobre o desempenho do aluno, destacando acertos, erros, pontos fortes e o que ele pode melhorar para dominar o conteúdo."
     )
-    data, err = _call_gemini(prompt, timeout=25)
-    if err:
-        return jsonify(err), 502
-    try:
-        feedback = data["candidates"][0]["content"]["parts"][0]["text"]
-    except Exception:
-        feedback = ""
-    return jsonify({"feedback": feedback})
+    return ChamadaIA(prompt, _responder_feedback, timeout=25)
 
 @ai_bp.route('/api/generate_mindmap', methods=['POST'])
+@rota_ia
 def generate_mindmap():
     try:
         payload = request.get_json(force=True) or {}
-        content = (payload.get("content") or "").strip()
-        topic = (payload.get("topic") or "").strip()
+        topico_salvo, content = _conteudo_do_payload(payload, "content")
+        if content is None:
+            return jsonify({"error": "Conteúdo não encontrado"}), 404
+        content = content.strip()
+        topic = (payload.get("topic") or topico_salvo or "").strip()
         if not content or not topic:
             return jsonify({"error": "Campos 'content' e 'topic' são obrigatórios."}), 400
         prompt = f"""
@@ -116,35 +130,44 @@ Formato de resposta:
   }}
 }}
 Apenas arrays de strings curtas, sem objetos aninhados, sem frases longas, sem explicações.
+
+Texto:
+{content}
 """
-        data, err = _call_gemini(prompt)
-        if err:
-            return jsonify(err), 502
-        try:
-            response_text = data["candidates"][0]["content"]["parts"][0]["text"]
-            match = re.search(r"\{[\s\S]+\}", response_text)
-            if not match:
-                return jsonify({"error": "Resposta da IA não contém JSON válido."}), 500
-            mindmap = json.loads(match.group(0))
-        except Exception:
-            return jsonify({"error": "Falha ao interpretar resposta da IA"}), 500
-        def is_short_term(s):
-            return (
-                isinstance(s, str)
-                and 2 < len(s) < 40
-                and len(s.split()) <= 4
-                and not any(p in s for p in ".!?;:,")
-                and not s.lower().startswith(("resumo", "conclusão", "em resumo", "em síntese", "em suma"))
-            )
+        return ChamadaIA(prompt, _responder_mindmap, montador=_montador_mindmap)
+    except Exception as e:
+        return jsonify({"error": "Erro interno no servidor", "details": str(e)}), 500
+
+def _montador_mindmap():
+    return MontadorJSON([('topic',), ('related_topics',), ('subtopics', '*')])
+
+def _termo_curto(s):
+    return (
+        isinstance(s, str)
+        and 2 < len(s) < 40
+        and len(s.split()) <= 4
+        and not any(p in s for p in ".!?;:,")
+        and not s.lower().startswith(("resumo", "conclusão", "em resumo", "em síntese", "em suma"))
+    )
+
+def _responder_mindmap(data):
+    try:
+        response_text = texto_resposta(data)
+        match = re.search(r"\{[\s\S]+\}", response_text)
+        if not match:
+            return jsonify({"error": "Resposta da IA não contém JSON válido."}), 500
+        mindmap = json.loads(match.group(0))
+    except Exception:
+        return jsonify({"error": "Falha ao interpretar resposta da IA"}), 500
+    try:
         for key, items in (mindmap.get("subtopics") or {}).items():
-            mindmap["subtopics"][key] = [str(s).strip() for s in items if is_short_term(s)]
+            mindmap["subtopics"][key] = [str(s).strip() for s in items if _termo_curto(s)]
         return jsonify(mindmap)
-    except requests.exceptions.RequestException as req_err:
-        return jsonify({"error": "Erro na comunicação com a API Gemini", "details": str(req_err)}), 502
     except Exception as e:
         return jsonify({"error": "Erro interno no servidor", "details": str(e)}), 500
 
 @ai_bp.route('/api/gemini', methods=['POST'])
+@rota_ia
 def gemini_schedule():
     data = request.json or {}
     materias = data.get('materias', [])
@@ -168,11 +191,10 @@ def gemini_schedule():
     prompt += f"\nDias disponíveis: {', '.join(dias)}\n"
     prompt += f"Horários disponíveis: {', '.join(horarios)}\n"
     prompt += "Não escreva nada além do JSON."
-    data, err = _call_gemini(prompt)
-    if err:
-        return jsonify(err), 502
+    return ChamadaIA(prompt, _responder_cronograma)
+
+def _responder_cronograma(data):
     try:
-        text_resp = data["candidates"][0]["content"]["parts"][0]["text"]
-        return jsonify({"resultado": text_resp})
+        return jsonify({"resultado": texto_resposta(data)})
     except Exception:
         return jsonify({"resultado": ""})
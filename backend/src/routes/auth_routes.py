@@ -1,4 +1,4 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from flask_login import login_user, logout_user
 from flask_jwt_extended import (
     create_access_token,
@@ -7,16 +7,16 @@ from flask_jwt_extended import (
     get_jwt_identity,
     verify_jwt_in_request,
     get_jwt,
+    decode_token,
 )  # type: ignore
 from sqlalchemy import select, func
 from werkzeug.security import check_password_hash
 from models.models import db, User
+from servicos.token_store import REPLAY, REVOGADO
+from servicos.identidade import carregar_identidade, invalidar_identidade
 import os
 import logging
 
-# In-memory fallback for refresh rotation when Redis indisponível (dev/tests)
-_INMEM_ROTATED: set[str] = set()
-
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 
 @auth_bp.route('/register', methods=['POST'])
@@ -157,7 +157,7 @@ def logout():
     except Exception:
         pass
     if token and token.get('type') == 'refresh':
-        r_client = getattr(auth_bp, 'redis', None) or getattr(auth_bp, 'app', None)
+        current_app.token_store.revoke(token.get('jti'), token.get('exp'))
     return jsonify({'success': True, 'message': 'Logout realizado com sucesso'})
 
 @auth_bp.route('/refresh', methods=['POST'])
@@ -168,29 +168,18 @@ def refresh_token():
         payload = get_jwt()
         uid = payload.get('sub') or get_jwt_identity()
         jti = payload.get('jti')
-        app = auth_bp._get_current_object().app  # type: ignore
-        r_client = getattr(app, 'redis', None)
-        # Rotation: if this refresh was already used, deny (replay)
-        if jti and (
-            (r_client and r_client.sismember('jwt:refresh:rotated', jti)) or
-            (not r_client and jti in _INMEM_ROTATED)
-        ):
-            return jsonify({'error': 'Refresh token reutilizado (replay)'}), 401
         # Issue new tokens
         uid_str = str(uid) if uid is not None else None
         new_access = create_access_token(identity=uid_str)
         new_refresh = create_refresh_token(identity=uid_str)
+        # Rotation: marca o refresh atual como usado de forma atômica; reuso = replay
+        if jti:
+            status = current_app.token_store.rotate(jti, decode_token(new_refresh).get('jti'), payload.get('exp'))
+            if status == REPLAY:
+                return jsonify({'error': 'Refresh token reutilizado (replay)'}), 401
+            if status == REVOGADO:
+                return jsonify({'error': 'Token revogado'}), 401
         new_payload = {'access_token': new_access, 'refresh_token': new_refresh}
-        # Mark old refresh as rotated and store revoke list (TTL ~ original exp approximation)
-        if r_client and jti:
-            try:
-                r_client.sadd('jwt:refresh:rotated', jti)
-                # Also add to revoked set for explicit blocklist (defense-in-depth)
-                r_client.sadd('jwt:refresh:revoked', jti)
-            except Exception:
-                pass
-        elif jti:
-            _INMEM_ROTATED.add(jti)
         return jsonify(new_payload)
     except Exception as e:
         return jsonify({'error': 'Refresh token inválido', 'details': str(e)}), 401
@@ -221,6 +210,7 @@ def reset_password():
         if user:
             user.set_password(new_password)
             db.session.commit()
+            invalidar_identidade(user.id)
             return jsonify({'success': True, 'message': 'Senha redefinida com sucesso'})
         return jsonify({'success': False, 'message': 'Usuário não encontrado'}), 404
     return jsonify({'success': False, 'message': 'Dados inválidos para redefinição de senha'}), 400
@@ -238,6 +228,7 @@ def update_profile():
         return jsonify({'success': False, 'message': 'Usuário não encontrado'}), 404
     user.name = name
     db.session.commit()
+    invalidar_identidade(user.id)
     return jsonify({'success': True, 'message': 'Perfil atualizado com sucesso'})
 
 @auth_bp.route('/delete-account', methods=['DELETE'])
@@ -250,8 +241,10 @@ def delete_account():
     user = User.query.filter_by(email=email).first()
     if not user:
         return jsonify({'success': False, 'message': 'Usuário não encontrado'}), 404
+    user_id = user.id
     db.session.delete(user)
     db.session.commit()
+    invalidar_identidade(user_id)
     return jsonify({'success': True, 'message': 'Conta excluída com sucesso'})
 
 @auth_bp.route('/get-user', methods=['GET'])
@@ -281,7 +274,7 @@ def user_me():
         uid_int = int(uid) if uid is not None else None
     except Exception:
         uid_int = None
-    user = User.query.get(uid_int)
+    user = carregar_identidade(uid_int)
     if not user:
         return jsonify({'success': False, 'message': 'Usuário não encontrado'}), 404
     return jsonify({
@@ -318,6 +311,7 @@ def onboarding():
         return jsonify({'success': False, 'message': 'Usuário não encontrado'}), 404
     user.has_onboarding = True  # <-- padronize aqui!
     db.session.commit()
+    invalidar_identidade(user.id)
     return jsonify({'success': True, 'message': 'Onboarding concluído'})
 
 @auth_bp.route('/debug/users', methods=['GET'])
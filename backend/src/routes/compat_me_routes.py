@@ -1,7 +1,7 @@
 from flask import Blueprint, jsonify
 from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
 from flask_login import current_user
-from models.models import User, db
+from servicos.identidade import carregar_identidade
 
 compat_me_bp = Blueprint('compat_me', __name__, url_prefix='/api')
 
@@ -16,14 +16,7 @@ def compat_me():
     except Exception:
         uid = None
 
-    user = None
-    if uid is not None:
-        try:
-            uid_int = int(uid)
-        except Exception:
-            uid_int = None
-        if uid_int is not None:
-            user = db.session.get(User, uid_int)
+    user = carregar_identidade(uid) if uid is not None else None
     if not user and getattr(current_user, 'is_authenticated', False):
         user = current_user  # type: ignore
     if not user:
@@ -33,6 +26,7 @@ def compat_me():
         'name': getattr(user, 'name', ''),
         'nome': getattr(user, 'name', ''),
         'email': user.email,
+        'curso_id': getattr(user, 'curso_id', None),
         'has_onboarding': getattr(user, 'has_onboarding', False),
         'onboardingDone': getattr(user, 'has_onboarding', False),
         'avatar_url': getattr(user, 'avatar_url', None),
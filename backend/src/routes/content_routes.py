@@ -1,13 +1,22 @@
-from flask import Blueprint, request, jsonify
+from datetime import datetime
+
+from flask import Blueprint, Response, request, jsonify
+from flask_login import current_user, login_required
 from models.models import db, CompletedContent, SubjectContent, HorariosEscolares
+from servicos import catalogo, conteudos
+from servicos.busca import buscar
+from servicos.eventos import publicar
 
 content_bp = Blueprint('content', __name__, url_prefix='/api/conteudos')
 content_public_bp = Blueprint('content_public', __name__)
 
+# Seções e sumário mudam só quando o conteúdo é reescrito; a ETag revalida depois disso.
+CACHE_SECOES = 'public, max-age=300'
+
 # Listar conteúdos de uma matéria por ID
 @content_bp.route('/materia/<int:materia_id>', methods=['GET'])
 def listar_conteudos_por_materia(materia_id):
-    conteudos = SubjectContent.query.filter_by(materia_id=materia_id).all()
+    conteudos = catalogo.atual().conteudos_de([materia_id])
     return jsonify({
         "conteudos": [
             {
@@ -21,44 +30,58 @@ def listar_conteudos_por_materia(materia_id):
     })
 
 @content_bp.route('/concluir', methods=['POST'])
+@login_required
 def concluir_conteudo():
-    data = request.json
-    user_id = data.get('user_id')
-    content_id = data.get('content_id')
-    # Checagem extra para evitar 'undefined' ou None
-    if not user_id or user_id == "undefined" or not content_id:
+    data = request.get_json(silent=True) or {}
+    user_id = current_user.id
+    # user_id no corpo é legado: aceito só se for o próprio usuário logado
+    enviado = data.get('user_id')
+    if enviado not in (None, '', 'undefined') and str(enviado) != str(user_id):
+        return jsonify({"success": False, "message": "Usuário não corresponde à sessão"}), 403
+    try:
+        content_id = int(data.get('content_id'))
+    except (TypeError, ValueError):
         return jsonify({"success": False, "message": "Dados incompletos"}), 400
     if not CompletedContent.query.filter_by(user_id=user_id, content_id=content_id).first():
-        cc = CompletedContent(user_id=user_id, content_id=content_id)
+        cc = CompletedContent(user_id=user_id, content_id=content_id, completed_at=datetime.utcnow())
         db.session.add(cc)
+        # progresso, streaks, micro-quiz e conquistas saem dos consumidores do evento
+        publicar('conteudo.concluido', user_id, content_id=content_id, completed_at=cc.completed_at.isoformat())
         db.session.commit()
     return jsonify({"success": True})
 
 # Lista simplificada de conteúdos (id, subject, topic, materia) para UI descobrir IDs válidos
 @content_bp.route('/list', methods=['GET'])
 def listar_conteudos_basico():
-    rows = (
-        db.session.query(
-            SubjectContent.id,
-            SubjectContent.subject,
-            SubjectContent.topic,
-            HorariosEscolares.materia,
-        )
-        .join(HorariosEscolares, SubjectContent.materia_id == HorariosEscolares.id, isouter=True)
-        .order_by(SubjectContent.id.asc())
-        .limit(500)
-        .all()
-    )
+    cat = catalogo.atual()
+    rows = cat.conteudos[:500]
     return jsonify({
         "conteudos": [
-            {"id": r[0], "subject": r[1], "topic": r[2], "materia": r[3]} for r in rows
+            {"id": c.id, "subject": c.subject, "topic": c.topic, "materia": cat.materias.get(c.materia_id)} for c in rows
         ],
         "total": len(rows)
     })
 
+# Busca full-text por tópico e texto (sem acento/caixa), com relevância e trecho destacado
+@content_bp.route('/search', methods=['GET'])
+def buscar_conteudos():
+    q = (request.args.get('q') or '').strip()
+    if not q:
+        return jsonify({"error": "Parâmetro q obrigatório"}), 400
+    try:
+        pagina = max(1, int(request.args.get('page', 1)))
+        por_pagina = max(1, min(50, int(request.args.get('per_page', 20))))
+    except (TypeError, ValueError):
+        return jsonify({"error": "page/per_page inválidos"}), 400
+    total, resultados = buscar(q, pagina, por_pagina)
+    return jsonify({"q": q, "page": pagina, "per_page": por_pagina, "total": total, "results": resultados})
+
 # Public endpoint to fetch full HTML content by id (compat with existing frontend)
 @content_public_bp.route('/api/conteudo_html/<int:conteudo_id>', methods=['GET'])
 def get_conteudo_html(conteudo_id: int):
+    """Documento inteiro; com `?section=n` só a n-ésima seção (ver /outline)."""
+    if 'section' in request.args:
+        return _secao_conteudo(conteudo_id, request.args.get('section'))
     try:
         row = (
             db.session.query(
@@ -67,6 +90,8 @@ def get_conteudo_html(conteudo_id: int):
                 SubjectContent.topic,
                 SubjectContent.content_html,
                 HorariosEscolares.materia,
+                SubjectContent.content_outline,
+                SubjectContent.word_count,
             )
             .join(HorariosEscolares, SubjectContent.materia_id == HorariosEscolares.id)
             .filter(SubjectContent.id == conteudo_id)
@@ -79,8 +104,89 @@ def get_conteudo_html(conteudo_id: int):
                 "topic": row[2],
                 "content_html": row[3],
                 "materia": row[4],
+                "outline": _sumario(row[5]),
+                "word_count": row[6],
             })
         else:
             return jsonify({"error": "Conteúdo não encontrado"}), 404
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
+
+
+def _sumario(outline):
+    return [{k: s[k] for k in ('level', 'title', 'offset')} for s in outline or []]
+
+
+def _trecho(html: str, parte) -> str:
+    # prefix/suffix reabrem e fecham os elementos divididos pelo corte (servicos/texto.partes_html)
+    meio = html.encode('utf-8')[parte['start']:parte['end']].decode('utf-8')
+    return parte.get('prefix', '') + meio + parte.get('suffix', '')
+
+
+def _bytes_secao(parte) -> int:
+    return (parte['end'] - parte['start'] + len(parte.get('prefix', '').encode('utf-8'))
+            + len(parte.get('suffix', '').encode('utf-8')))
+
+
+def _cacheavel(resp, etag: str):
+    resp.set_etag(etag)
+    resp.headers['Cache-Control'] = CACHE_SECOES
+    return resp
+
+
+def _secao_conteudo(conteudo_id: int, valor):
+    try:
+        n = int(valor)
+    except (TypeError, ValueError):
+        return jsonify({"error": "section inválida"}), 400
+    estrutura = conteudos.estrutura_por_id(conteudo_id)
+    if estrutura is None:
+        return jsonify({"error": "Conteúdo não encontrado"}), 404
+    secoes, _, html = estrutura
+    if not 0 <= n < len(secoes):
+        return jsonify({"error": "Seção não encontrada", "total_sections": len(secoes)}), 404
+    parte = secoes[n]
+    if parte['etag'] in request.if_none_match:
+        # revalidação sem ler o HTML do banco
+        return _cacheavel(Response(status=304), parte['etag'])
+    if html is None:
+        html = db.session.query(SubjectContent.content_html).filter(SubjectContent.id == conteudo_id).scalar() or ''
+    trecho = _trecho(html, parte)
+    return _cacheavel(jsonify({
+        "id": conteudo_id,
+        "section": n,
+        "total_sections": len(secoes),
+        "level": parte['level'],
+        "title": parte['title'],
+        "content_html": trecho,
+    }), parte['etag'])
+
+
+@content_public_bp.route('/api/conteudo_html/<int:conteudo_id>/outline', methods=['GET'])
+def get_conteudo_outline(conteudo_id: int):
+    """Sumário e lista de seções (com tamanho e ETag) para carregar o conteúdo sob demanda."""
+    row = (
+        db.session.query(SubjectContent.subject, SubjectContent.topic, SubjectContent.word_count,
+                         HorariosEscolares.materia)
+        .outerjoin(HorariosEscolares, SubjectContent.materia_id == HorariosEscolares.id)
+        .filter(SubjectContent.id == conteudo_id)
+        .first()
+    )
+    if row is None:
+        return jsonify({"error": "Conteúdo não encontrado"}), 404
+    secoes, outline, _ = conteudos.estrutura_por_id(conteudo_id)
+    resp = jsonify({
+        "id": conteudo_id,
+        "subject": row[0],
+        "topic": row[1],
+        "materia": row[3],
+        "word_count": row[2],
+        "outline": _sumario(outline),
+        "sections": [
+            {"index": i, "level": p['level'], "title": p['title'], "bytes": _bytes_secao(p), "etag": p['etag']}
+            for i, p in enumerate(secoes)
+        ],
+    })
+    resp.add_etag()
+    resp.headers['Cache-Control'] = CACHE_SECOES
+    return resp.make_conditional(request)
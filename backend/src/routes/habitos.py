@@ -1,8 +1,12 @@
+from datetime import datetime
+
 from flask import Blueprint, request, jsonify
 from flask_login import current_user, login_required
-from datetime import datetime
-from db import get_db_connection
 from models.models import db, HabitoCheckin
+from servicos.datas import ler_filtros_data, parse_data, formatar_data
+from servicos.eventos import publicar
+from servicos.streaks import estatisticas_usuario, registrar_atividade
+from servicos.upsert import insert_upsert
 
 habitos_bp = Blueprint('habitos', __name__, url_prefix='/api/habitos')
 
@@ -11,32 +15,54 @@ habitos_bp = Blueprint('habitos', __name__, url_prefix='/api/habitos')
 def registrar_checkin():
     data = request.get_json(force=True)
     habit = data.get('habit') or 'estudo_diario'
-    date = data.get('date')  # dd/MM/YYYY
-    if not date:
+    dia = parse_data(data.get('date'))  # dd/MM/YYYY (legado) ou YYYY-MM-DD
+    if not dia:
         return jsonify({"error": "date é obrigatório (dd/MM/YYYY)"}), 400
-    # Evita duplicidade por UniqueConstraint
-    existente = HabitoCheckin.query.filter_by(user_id=current_user.id, habit=habit, date=date).first()
-    if existente:
-        return jsonify({"success": True, "id": existente.id, "message": "Já registrado"})
-    reg = HabitoCheckin(user_id=current_user.id, habit=habit, date=date)
-    db.session.add(reg)
+    # INSERT ... ON CONFLICT DO NOTHING: sem corrida entre select e insert
+    novo_id = db.session.execute(
+        insert_upsert(HabitoCheckin)
+        .values(user_id=current_user.id, habit=habit, date=dia, created_at=datetime.utcnow())
+        .on_conflict_do_nothing(index_elements=['user_id', 'habit', 'date'])
+        .returning(HabitoCheckin.id)
+    ).scalar()
+    if novo_id is None:
+        existente_id = db.session.query(HabitoCheckin.id).filter_by(
+            user_id=current_user.id, habit=habit, date=dia
+        ).scalar()
+        db.session.rollback()
+        return jsonify({"success": True, "id": existente_id, "message": "Já registrado"})
+    registrar_atividade(current_user.id, habit, dia)
+    publicar('habito.checkin', current_user.id, habit=habit, date=dia.isoformat(), checkin_id=novo_id)
     db.session.commit()
-    return jsonify({"success": True, "id": reg.id})
+    return jsonify({"success": True, "id": novo_id})
+
+@habitos_bp.route('/stats', methods=['GET'])
+@login_required
+def estatisticas():
+    """Streak atual/maior e contagens de 7/30 dias por hábito (query opcional: habit)."""
+    return jsonify({"stats": estatisticas_usuario(current_user.id, request.args.get('habit'))})
 
 @habitos_bp.route('/checkin', methods=['GET'])
 @login_required
 def listar_checkins():
-    date = request.args.get('date')
+    """Query: habit, date (dia exato) ou from/to (intervalo inclusivo)."""
     habit = request.args.get('habit')
     q = HabitoCheckin.query.filter_by(user_id=current_user.id)
     if habit:
         q = q.filter_by(habit=habit)
-    if date:
-        q = q.filter_by(date=date)
+    filtros, erro = ler_filtros_data(request.args)
+    if erro:
+        return jsonify({"error": erro}), 400
+    if 'date' in filtros:
+        q = q.filter(HabitoCheckin.date == filtros['date'])
+    if 'from' in filtros:
+        q = q.filter(HabitoCheckin.date >= filtros['from'])
+    if 'to' in filtros:
+        q = q.filter(HabitoCheckin.date <= filtros['to'])
     items = q.order_by(HabitoCheckin.date.desc()).all()
     return jsonify({
         "checkins": [
-            {"id": i.id, "habit": i.habit, "date": i.date}
+            {"id": i.id, "habit": i.habit, "date": formatar_data(i.date)}
             for i in items
         ]
-    })
\ No newline at end of file
+    })
@@ -1,10 +1,12 @@
 from flask import Blueprint, request, jsonify
-import importlib
 import os
 
+from servicos.gemini import ChamadaIA, api_key, rota_ia, texto_resposta
+
 bp_quiz = Blueprint('ia_quiz', __name__)
 
 @bp_quiz.route('/api/ia/quiz-feedback', methods=['POST'])
+@rota_ia
 def quiz_feedback():
     dados = request.json or {}
     perguntas = dados.get("questions")
@@ -14,16 +16,21 @@ def quiz_feedback():
     Perguntas: {perguntas}
     Respostas do aluno: {respostas}
     """
-    try:
-        genai = importlib.import_module("google.generativeai")
-    except Exception:
-        return jsonify({"error": "IA não disponível (dependência ausente)"}), 503
+    if not api_key():
+        return jsonify({"error": "IA não disponível (GOOGLE_API_KEY ausente)"}), 503
+    # REST (servicos/gemini.py) em vez do SDK: aceita ?stream=1 e o sub-app ASGI
+    return ChamadaIA(
+        prompt,
+        _responder_feedback,
+        modelo=os.environ.get("GOOGLE_DEFAULT_MODEL", "gemini-1.5-flash"),
+        falha=_falha_feedback,
+    )
 
+def _responder_feedback(data):
     try:
-        genai.configure(api_key=os.environ.get("GOOGLE_API_KEY"))
-        model = genai.GenerativeModel(model_name=os.environ.get("GOOGLE_DEFAULT_MODEL", "gemini-1.5-flash"))
-        response = model.generate_content(prompt)
-        text = getattr(response, 'text', '')
-        return jsonify({"feedback": (text or '').strip()})
+        return jsonify({"feedback": (texto_resposta(data) or '').strip()})
     except Exception as e:
-        return jsonify({"error": "Falha ao gerar feedback", "details": str(e)}), 500
\ No newline at end of file
+        return _falha_feedback({"details": str(e)})
+
+def _falha_feedback(err):
+    return jsonify({"error": "Falha ao gerar feedback", "details": err.get("details") or err.get("error")}), 500
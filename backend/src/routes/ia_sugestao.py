@@ -2,10 +2,7 @@ from flask import Blueprint, request, jsonify
 import os
 import logging
 
-try:  # optional dependency
-    import google.generativeai as genai  # type: ignore
-except Exception:  # pragma: no cover - fallback path
-    genai = None  # type: ignore
+from servicos.gemini import ChamadaIA, api_key, rota_ia, texto_resposta
 
 bp_ia_sugestao = Blueprint('ia_sugestao', __name__)
 
@@ -16,9 +13,10 @@ def resumir_lista(lista, max_itens=3):
     return lista
 
 @bp_ia_sugestao.route('/api/ia/sugestao-estudo', methods=['POST'])
+@rota_ia
 def sugestao_estudo():
-    if genai is None:
-        return jsonify({"error": "IA desativada (biblioteca ausente). Ative instalando google-generativeai e configure GOOGLE_API_KEY."}), 503
+    if not api_key():
+        return jsonify({"error": "IA desativada (GOOGLE_API_KEY ausente)."}), 503
     try:
         dados = request.get_json()
         progresso = resumir_lista(dados.get("progresso", ""))
@@ -52,23 +50,35 @@ Pendências: {pendencias}
 Dúvidas: {duvidas}
 """
 
-        genai.configure(api_key=os.environ.get("GOOGLE_API_KEY"))
-        model_name = os.environ.get("GOOGLE_DEFAULT_MODEL", "gemini-1.5-flash")
-        max_tokens = int(os.environ.get("GOOGLE_DEFAULT_MAX_TOKENS", 2048))
-        temperature = float(os.environ.get("GOOGLE_DEFAULT_TEMPERATURE", 0.3))
-        model = genai.GenerativeModel(model_name=model_name)
-        response = model.generate_content(
+        # REST (servicos/gemini.py) em vez do SDK google-generativeai: mesmo modelo/config,
+        # sem import pesado no boot e aguardável pelo sub-app ASGI
+        return ChamadaIA(
             prompt,
+            _responder_sugestao,
+            timeout=25,
+            modelo=os.environ.get("GOOGLE_DEFAULT_MODEL", "gemini-1.5-flash"),
             generation_config={
-                "max_output_tokens": max_tokens,
-                "temperature": temperature
-            }
+                "maxOutputTokens": int(os.environ.get("GOOGLE_DEFAULT_MAX_TOKENS", 2048)),
+                "temperature": float(os.environ.get("GOOGLE_DEFAULT_TEMPERATURE", 0.3)),
+            },
+            falha=_falha_sugestao,
         )
 
-        return jsonify({"sugestao": response.text.strip()})
+    except Exception as e:
+        logging.exception("Erro ao montar prompt de sugestão")
+        return _falha_sugestao({"details": str(e)})
+
 
+def _responder_sugestao(data):
+    try:
+        return jsonify({"sugestao": texto_resposta(data).strip()})
     except Exception as e:
-        logging.exception("Erro ao gerar conteúdo com IA")
-        if "429" in str(e) or "Too Many Requests" in str(e):
-            return jsonify({"error": "Limite diário da IA atingido. Tente novamente amanhã ou revise seu plano da API Gemini."}), 429
-        return jsonify({"error": "Falha ao gerar conteúdo com IA.", "detalhe": str(e)}), 500
\ No newline at end of file
+        return _falha_sugestao({"details": str(e)})
+
+
+def _falha_sugestao(err):
+    detalhe = str(err.get("details") or err.get("error") or "")
+    logging.error("Erro ao gerar conteúdo com IA: %s", detalhe)
+    if "429" in detalhe or "Too Many Requests" in detalhe:
+        return jsonify({"error": "Limite diário da IA atingido. Tente novamente amanhã ou revise seu plano da API Gemini."}), 429
+    return jsonify({"error": "Falha ao gerar conteúdo com IA.", "detalhe": detalhe}), 500
@@ -1,9 +1,12 @@
 from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
-from models.models import db, User, PlanoEstudo, SubjectContent, HorariosEscolares, CursoMateria
+from models.models import db, User, PlanoEstudo, SubjectContent, HorariosEscolares
 from datetime import datetime, timedelta, time as dt_time
 import random
-from servicos.plano_estudo_avancado import generate_study_plan, Conteudo as ConteudoModel, UserPreferences
+from servicos import catalogo
+from servicos.datas import parse_data, parse_hora
+from servicos.eventos import publicar
+from servicos.identidade import invalidar_identidade
 import json
 from sqlalchemy.dialects.postgresql import ARRAY, TEXT
 
@@ -15,6 +18,11 @@ def _cap(s: str | None, n: int) -> str | None:
     s = str(s).strip()
     return s[:n] if len(s) > n else s
 
+# Ritmo aceito no onboarding/replanejamento -> valor gravado em User.ritmo
+MAPA_RITMO = {"leve": "leve", "moderado": "moderado", "medio": "moderado", "desafiador": "desafiador", "alto": "desafiador"}
+# User.ritmo -> UserPreferences.pace (servicos/plano_estudo_avancado.py)
+_PACE_POR_RITMO = {"leve": "slow", "moderado": "moderate", "desafiador": "intensive"}
+
 # --- Rota para salvar os dados do Onboarding ---
 @onboarding_bp.route('/api/onboarding', methods=['POST'])
 @login_required
@@ -59,9 +67,8 @@ def onboarding():
     estilo = (data.get("estilo_aprendizagem") or "").strip().lower()
     ritmo = (data.get("ritmo") or "").strip().lower()
     mapa_estilo = {"pratica": "pratica", "teorica": "teorica", "visual": "visual", "auditiva": "auditiva", "mista": "mista"}
-    mapa_ritmo = {"leve": "leve", "moderado": "moderado", "medio": "moderado", "desafiador": "desafiador", "alto": "desafiador"}
     user.estilo_aprendizagem = _cap(mapa_estilo.get(estilo, estilo or None), 32)
-    user.ritmo = _cap(mapa_ritmo.get(ritmo, ritmo or None), 16)
+    user.ritmo = _cap(MAPA_RITMO.get(ritmo, ritmo or None), 16)
 
     user.dias_disponiveis = parse_array(data.get("dias_disponiveis") or data.get("dias"))
 
@@ -79,6 +86,7 @@ def onboarding():
 
     db.session.add(user)
     db.session.commit()
+    invalidar_identidade(user.id)
 
     return jsonify({"ok": True})
 
@@ -198,10 +206,24 @@ def gerar_plano_estudo_script(user, conteudos):
         "metas_semanais": metas_semanais
     }
 
+def _preferencias_usuario(user):
+    from servicos.plano_estudo_avancado import UserPreferences
+    return UserPreferences(
+        available_days=user.dias_disponiveis or ["Segunda", "Terça", "Quarta", "Quinta", "Sexta"],
+        daily_study_time=int(user.tempo_diario or 120),
+        learning_style=user.estilo_aprendizagem or "balanced",
+        pace=_PACE_POR_RITMO.get(user.ritmo or "", "moderate"),
+        start_time=(user.horario_inicio.strftime("%H:%M") if getattr(user, "horario_inicio", None) else "08:00"),
+        focus_areas=user.focus_areas if hasattr(user, "focus_areas") else None
+    )
+
 # --- Rota para gerar plano de estudo com script ---
 @onboarding_bp.route('/api/plano-estudo/gerar', methods=['POST'])
 @login_required
 def gerar_plano_estudo():
+    # import tardio: pydantic + modelos do planner custam ~70 ms no boot
+    from servicos.plano_estudo_avancado import generate_study_plan, Conteudo as ConteudoModel
+    from servicos import plano_template
     user = User.query.get(current_user.id)
     if not user or not user.has_onboarding:
         return jsonify({"error": "Onboarding não encontrado."}), 400
@@ -209,39 +231,17 @@ def gerar_plano_estudo():
     # Determina curso do usuário
     curso_id = getattr(user, 'curso_id', None)
 
-    # Filtra conteúdos do DB apenas pelas matérias vinculadas ao curso, quando curso_id existir
-    conteudos_db_query = SubjectContent.query
-    if curso_id:
-        try:
-            # Buscar materias vinculadas ao curso
-            materia_ids = [row[0] for row in db.session.query(CursoMateria.materia_id).filter_by(curso_id=curso_id).all()]
-            if materia_ids:
-                conteudos_db_query = conteudos_db_query.filter(SubjectContent.materia_id.in_(materia_ids))
-            else:
-                conteudos_db_query = conteudos_db_query.filter(False)  # nenhum conteúdo
-        except Exception:
-            pass
-    conteudos_db = conteudos_db_query.all()
-
-    conteudos = [
-        ConteudoModel(
-            id=c.id,
-            subject=c.subject,
-            topic=c.topic,
-            difficulty=getattr(c, "difficulty", "medium"),
-            estimated_time=getattr(c, "estimated_time", 45),
-            dependencies=getattr(c, "dependencies", [])
-        ) for c in conteudos_db
-    ]
+    # Matérias vinculadas ao curso (None = sem filtro; [] = nenhum conteúdo), do snapshot do catálogo
+    cat = catalogo.atual()
+    materia_ids = list(cat.materias_por_curso.get(curso_id, ())) if curso_id else None
 
-    user_prefs = UserPreferences(
-        available_days=user.dias_disponiveis or ["Segunda", "Terça", "Quarta", "Quinta", "Sexta"],
-        daily_study_time=int(user.tempo_diario or 120),
-        learning_style=user.estilo_aprendizagem or "balanced",
-        pace=user.ritmo or "moderate",
-        start_time=(user.horario_inicio.strftime("%H:%M") if getattr(user, "horario_inicio", None) else "08:00"),
-        focus_areas=user.focus_areas if hasattr(user, "focus_areas") else None
-    )
+    def carregar_conteudos():
+        return [
+            ConteudoModel(id=c.id, subject=c.subject or "", topic=c.topic or "")
+            for c in cat.conteudos_de(materia_ids)
+        ]
+
+    user_prefs = _preferencias_usuario(user)
 
     # Carrega último plano salvo para reaproveitar revisões agendadas e pendências
     plano_salvo = PlanoEstudo.query.filter_by(email=user.email).order_by(PlanoEstudo.id.desc()).first()
@@ -252,14 +252,94 @@ def gerar_plano_estudo():
         except Exception:
             plano_dados_salvo = None
 
-    plano_semanal, plano_cards = generate_study_plan(user_prefs, conteudos, semana_anterior=(plano_dados_salvo or {}).get('days'), plano_dados_salvo=plano_dados_salvo)
+    if plano_template.plano_pessoal(plano_dados_salvo):
+        # pendências/revisões herdadas: geração própria, fora do cache de templates
+        origem = "bypass"
+        plano_semanal, plano_cards = generate_study_plan(user_prefs, carregar_conteudos(), semana_anterior=(plano_dados_salvo or {}).get('days'), plano_dados_salvo=plano_dados_salvo)
+    else:
+        fp = plano_template.fingerprint(curso_id, user_prefs, cat.versao, datetime.now().date())
+        template = plano_template.buscar(fp)
+        origem = "hit" if template else "miss"
+        if template is None:
+            conteudos = carregar_conteudos()
+            plano_base, _ = generate_study_plan(user_prefs, conteudos, rng=plano_template.rng_template(fp))
+            template = plano_template.registrar(fp, plano_base, conteudos)
+        if template is not None:
+            plano_semanal, plano_cards = plano_template.derivar(template, user.id, user_prefs.focus_areas)
+        else:
+            plano_semanal, plano_cards = {}, {}
 
     # Persiste novo plano
     plano_estudo = PlanoEstudo(email=user.email, dados=plano_semanal)
     db.session.add(plano_estudo)
     db.session.commit()
 
-    return jsonify({"plano_estudo": plano_semanal, "plano_cards": plano_cards})
+    return jsonify({"plano_estudo": plano_semanal, "plano_cards": plano_cards, "template": origem})
+
+def _validar_preferencias(prefs: dict):
+    """Valida as preferências enviadas no replanejamento.
+    Retorna (campos de User a gravar, None) ou (None, mensagem de erro); nada é aplicado aqui."""
+    campos = {}
+    if 'available_days' in prefs:
+        dias = prefs['available_days']
+        if not isinstance(dias, list) or not dias or not all(isinstance(d, str) for d in dias):
+            return None, "available_days inválido"
+        campos['dias_disponiveis'] = dias
+    if 'daily_study_time' in prefs:
+        try:
+            campos['tempo_diario'] = max(15, min(600, int(prefs['daily_study_time'])))
+        except (TypeError, ValueError):
+            return None, "daily_study_time inválido"
+    if 'pace' in prefs:
+        ritmo = MAPA_RITMO.get(str(prefs['pace'] or '').strip().lower())
+        if ritmo is None:
+            return None, f"pace inválido (use {', '.join(sorted(set(MAPA_RITMO.values())))})"
+        campos['ritmo'] = _cap(ritmo, 16)
+    if 'start_time' in prefs:
+        hora = parse_hora(prefs['start_time'])
+        if hora is None:
+            return None, "start_time inválido (use HH:MM)"
+        campos['horario_inicio'] = hora
+    return campos, None
+
+# --- Replanejamento incremental: ajusta o plano salvo sem regenerar do catálogo ---
+@onboarding_bp.route('/api/plano-estudo/replanejar', methods=['POST'])
+@login_required
+def replanejar_plano_estudo():
+    """Aplica mudanças ao último plano e recalcula só os dias afetados (substitui o plano no lugar).
+    Body: { completed?: [id | {id, date}], missed_days?: ['dd/MM/YYYY'],
+            preferences?: {available_days, daily_study_time, pace, start_time} }
+    """
+    from servicos.plano_estudo_avancado import replanejar_incremental
+    body = request.get_json(silent=True) or {}
+    concluidos = body.get('completed') or []
+    perdidos = body.get('missed_days') or []
+    prefs = body.get('preferences') or {}
+    if not isinstance(concluidos, list) or not isinstance(perdidos, list) or not isinstance(prefs, dict):
+        return jsonify({"error": "completed/missed_days devem ser listas e preferences um objeto"}), 400
+    if not all(parse_data(d) for d in perdidos):
+        return jsonify({"error": "missed_days inválido (use dd/MM/YYYY)"}), 400
+
+    user = db.session.get(User, current_user.id)
+    plano = PlanoEstudo.query.filter_by(email=user.email).order_by(PlanoEstudo.id.desc()).first()
+    if not plano:
+        return jsonify({"error": "Plano não encontrado"}), 404
+    dados = _coerce_json(plano.dados) or {}
+    if not isinstance(dados, dict) or not isinstance(dados.get('days'), list):
+        return jsonify({"error": "Formato de plano inválido"}), 400
+    campos, erro = _validar_preferencias(prefs)
+    if erro:
+        return jsonify({"error": erro}), 400
+    for nome, valor in campos.items():
+        setattr(user, nome, valor)
+
+    perdidos = [parse_data(d).strftime('%d/%m/%Y') for d in perdidos]
+    novo, diff = replanejar_incremental(dados, _preferencias_usuario(user), concluidos, perdidos,
+                                        preferencias_mudaram=bool(prefs))
+    # no lugar: ajustes frequentes não empilham linhas de histórico em planos_estudo
+    plano.dados = novo
+    db.session.commit()
+    return jsonify({"plano_estudo": novo, "diff": diff})
 
 # --- Rota opcional: buscar plano do usuário logado ---
 # Removida a rota '/api/planos/me' deste blueprint para evitar conflito com main.py
@@ -388,22 +468,22 @@ def atualizar_status_bloco():
     if not isinstance(blocks, list) or not blocks:
         return jsonify({"error": "Blocos não encontrados"}), 404
 
-    updated = False
+    bloco = None
     if isinstance(block_index, int) and 0 <= block_index < len(blocks):
-        blocks[block_index]['status'] = status
-        updated = True
+        bloco = blocks[block_index]
     elif block_id is not None:
-        for b in blocks:
-            if str(b.get('id')) == str(block_id):
-                b['status'] = status
-                updated = True
-                break
+        bloco = next((b for b in blocks if str(b.get('id')) == str(block_id)), None)
 
-    if not updated:
+    if bloco is None:
         return jsonify({"error": "Bloco não encontrado"}), 404
+    anterior = (bloco.get('status') or '').lower()
+    bloco['status'] = status
 
     # Persiste alterações
     plano.dados = dados
+    publicar('bloco.status', current_user.id, plano_id=plano.id, date=date, block_id=bloco.get('id'),
+             activity_type=bloco.get('activity_type'), subject=bloco.get('subject'), topic=bloco.get('topic'),
+             status=status, previous_status=anterior)
     try:
         db.session.commit()
         return jsonify({"success": True})
@@ -528,6 +608,8 @@ def marcar_revisao():
     dia['total_study_time'] = int(dia.get('total_study_time') or 0) + duration
 
     plano.dados = dados
+    publicar('bloco.revisao', current_user.id, plano_id=plano.id, date=date, conteudo_id=conteudo.id,
+             start_time=bloco['start_time'], duration=duration)
     try:
         db.session.commit()
         return jsonify({"success": True})
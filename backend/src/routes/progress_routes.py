@@ -1,10 +1,14 @@
 from flask import Blueprint, jsonify, request
 from db import get_db_connection
 from models.models import db, HorariosEscolares, CursoMateria, Module, Lesson, CompletedLesson, CompletedContent, User, Curso
-from sqlalchemy import text
 from flask_login import login_required, current_user
-from datetime import datetime
+from datetime import datetime, timedelta
 from models.models import PomodoroSession
+from servicos.streaks import HABITO_GERAL, estatisticas_usuario, registrar_pomodoro
+from servicos.pomodoro_rollups import GRANULARIDADES, consultar, registrar_sessao
+from servicos.datas import ler_filtros_data, formatar_data
+from servicos import catalogo
+from servicos.eventos import publicar
 
 progress_bp = Blueprint('progress', __name__, url_prefix='/api/progress')
 
@@ -29,40 +33,24 @@ def progresso_materias(user_id, curso_id):
     Retorna o progresso do usuário por matéria dentro de um curso.
     Cada matéria é associada a módulos via campo materia_id em modules.
     """
-    # Busque apenas as matérias associadas ao curso_id
-    materias = db.session.execute(
-        text("""
-            SELECT m.id, m.materia
-            FROM curso_materia cm
-            JOIN horarios_escolares m ON cm.materia_id = m.id
-            WHERE cm.curso_id = :curso_id
-        """),
-        {"curso_id": curso_id}
-    ).fetchall()
-
-    # Monte o progresso só para essas matérias
-    progresso = []
-    for row in materias:
-        materia_id, nome = row
-        # Total de conteúdos da matéria
-        total = db.session.execute(
-            text("SELECT COUNT(*) FROM subject_contents WHERE materia_id = :materia_id"),
-            {"materia_id": materia_id}
-        ).scalar()
-
-        # Quantos conteúdos o usuário concluiu nessa matéria
-        concluidos = db.session.execute(
-            text("""
-                SELECT COUNT(*) FROM completed_content cc
-                JOIN subject_contents sc ON cc.content_id = sc.id
-                WHERE cc.user_id = :user_id AND sc.materia_id = :materia_id
-            """),
-            {"user_id": user_id, "materia_id": materia_id}
-        ).scalar()
+    # Matérias do curso e totais saem do snapshot do catálogo; do banco só as conclusões do usuário
+    cat = catalogo.atual()
+    materia_ids = cat.materias_por_curso.get(curso_id, ())
+    materia_do_conteudo = {c.id: mid for mid in materia_ids for c in cat.conteudos_por_materia.get(mid, ())}
+    concluidos_por_materia = {}
+    if materia_do_conteudo:
+        for (content_id,) in db.session.query(CompletedContent.content_id).filter(CompletedContent.user_id == user_id):
+            mid = materia_do_conteudo.get(content_id)
+            if mid is not None:
+                concluidos_por_materia[mid] = concluidos_por_materia.get(mid, 0) + 1
 
+    progresso = []
+    for materia_id in materia_ids:
+        total = len(cat.conteudos_por_materia.get(materia_id, ()))
+        concluidos = concluidos_por_materia.get(materia_id, 0)
         percent = int((concluidos / total) * 100) if total > 0 else 0
         progresso.append({
-            "materia": nome,
+            "materia": cat.materias.get(materia_id),
             "percent": percent,
             "total_lessons": total,
             "completed_lessons": concluidos
@@ -119,12 +107,16 @@ def get_user_progress_alias(user_id):
 
 @progress_bp.route('/user/<int:user_id>/xp', methods=['GET'])
 def get_user_xp(user_id):
-    # Exemplo: retorne XP e streak do usuário
     from models.models import XPStreak
     xp = XPStreak.query.filter_by(user_id=user_id).first()
+    # Streak vem do estado incremental (zera se o último dia ativo ficou para trás)
+    geral = estatisticas_usuario(user_id, HABITO_GERAL).get(HABITO_GERAL)
     return jsonify({
         "xp": xp.xp if xp else 0,
-        "streak": xp.streak if xp else 0
+        "streak": geral['current_streak'] if geral else (xp.streak if xp else 0),
+        "longest_streak": geral['longest_streak'] if geral else 0,
+        "active_days_7d": geral['count_7d'] if geral else 0,
+        "active_days_30d": geral['count_30d'] if geral else 0,
     })
 
 @progresso_bp.route('/user/<int:user_id>/xp', methods=['GET'])
@@ -180,8 +172,51 @@ def log_pomodoro_session():
             duracao=duracao
         )
         db.session.add(sess)
+        db.session.flush()
+        registrar_pomodoro(current_user.id, sess.tipo, inicio_dt)
+        registrar_sessao(current_user.id, sess.tipo, inicio_dt, duracao)
+        publicar('pomodoro.registrado', current_user.id, session_id=sess.id, tipo=sess.tipo,
+                 inicio=inicio_dt.isoformat(), duracao=duracao)
         db.session.commit()
         return jsonify({"success": True, "id": sess.id}), 201
     except Exception as e:
         db.session.rollback()
-        return jsonify({"success": False, "error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@progress_bp.route('/pomodoro/stats', methods=['GET'])
+@login_required
+def pomodoro_stats():
+    """Minutos de foco por bucket (lidos dos rollups).
+    Query: granularity=day|week (padrão day), from/to (dd/MM/YYYY ou ISO).
+    Sem intervalo: últimos 30 dias (day) ou 12 semanas (week).
+    """
+    granularity = (request.args.get('granularity') or 'day').lower()
+    if granularity not in GRANULARIDADES:
+        return jsonify({"error": "granularity deve ser day ou week"}), 400
+    filtros, erro = ler_filtros_data(request.args, nomes=('from', 'to'))
+    if erro:
+        return jsonify({"error": erro}), 400
+    fim = filtros.get('to') or datetime.utcnow().date()
+    inicio = filtros.get('from') or fim - timedelta(days=29 if granularity == 'day' else 7 * 11)
+    if inicio > fim:
+        return jsonify({"error": "from deve ser anterior a to"}), 400
+    rows = consultar(current_user.id, granularity, inicio, fim)
+    return jsonify({
+        "granularity": granularity,
+        "from": formatar_data(inicio),
+        "to": formatar_data(fim),
+        "buckets": [
+            {
+                "start": formatar_data(r.bucket_start),
+                "focus_minutes": round(r.focus_seconds / 60, 1),
+                "sessions": r.sessions,
+            }
+            for r in rows
+        ],
+        "total_minutes": round(sum(r.focus_seconds for r in rows) / 60, 1),
+    })
+
+@progresso_bp.route('/pomodoro/stats', methods=['GET'])
+@login_required
+def pomodoro_stats_alias():
+    return pomodoro_stats()
@@ -2,19 +2,22 @@ import re
 import os
 import json
 import logging
-import unicodedata
 from datetime import datetime, timedelta, date
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, Tuple
 import hashlib
 import random
 from dataclasses import asdict
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 from flask_login import login_required, current_user
 from sqlalchemy import and_
+from sqlalchemy.orm import defer
 
 from models.models import db, SubjectContent, CompletedContent, WeeklyQuiz
 from ia_quiz import generate_refined_quiz, QuizItem, fallback_vf_from_topics
+from servicos import banco_questoes, conteudos, micro_quiz, quiz_fingerprint
+from servicos.questoes_lsh import HistoricoQuestoes, IndiceLSH, registrar_questoes
+from servicos.texto import normalize, strip_html, tokenize
 
 bp_quiz_gen = Blueprint('quiz_gen', __name__)
 
@@ -26,22 +29,6 @@ PT_STOPWORDS = {
     "pela","pelo","pelas","pelos","também","até","após","antes","porque","pois","onde","quando","qual","quais",
 }
 
-def strip_html(s: str) -> str:
-    return re.sub(r"<[^>]*>", " ", s or " ")
-
-def normalize(s: str) -> str:
-    s = s or ""
-    s = s.lower()
-    s = unicodedata.normalize("NFD", s)
-    s = "".join(ch for ch in s if unicodedata.category(ch) != 'Mn')
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
-
-def tokenize(s: str) -> List[str]:
-    s = normalize(s)
-    s = re.sub(r"[^a-z0-9\s-]", " ", s)
-    return [w for w in s.split() if w]
-
 def split_sentences(s: str) -> List[str]:
     s = re.sub(r"\s+", " ", s or "").strip()
     m = re.findall(r"[^.!?]+[.!?]", s)
@@ -344,7 +331,7 @@ def perturb_orders(items: List[str], k: int = 3, rng: Optional[random.Random] =
 
 # ---- Question generators ----
 
-def make_cloze(sent: str, terms: List[str], source: int) -> Optional[Dict[str, Any]]:
+def make_cloze(sent: str, terms: List[str], source: int, rng: Optional[random.Random] = None) -> Optional[Dict[str, Any]]:
     if not sent:
         return None
     s = clean_text(sent)
@@ -359,7 +346,7 @@ def make_cloze(sent: str, terms: List[str], source: int) -> Optional[Dict[str, A
     options = build_term_distractors(term, terms, 3)
     if options:
         opt = dedupe_options_casefold([term] + options)
-        rng = rng_for_user_week(current_user.id if current_user and getattr(current_user, 'id', None) else 0)
+        rng = rng or rng_for_user_week(current_user.id if current_user and getattr(current_user, 'id', None) else 0)
         rng.shuffle(opt)
         # termo pode ter acentuação distinta; substitui pela forma original detectada
         orig = find_original_cased_term(s, normalize(term)) or term
@@ -391,7 +378,7 @@ def make_cloze(sent: str, terms: List[str], source: int) -> Optional[Dict[str, A
         "explanation": f"Sentença original: “{s}”",
     }
 
-def make_mcq_definition(text: str, terms: List[str], source: int) -> Optional[Dict[str, Any]]:
+def make_mcq_definition(text: str, terms: List[str], source: int, rng: Optional[random.Random] = None) -> Optional[Dict[str, Any]]:
     sentences = split_sentences(text)
     norm_sentences = [normalize(s) for s in sentences]
     phrases = extract_key_phrases(text, 6)
@@ -420,7 +407,7 @@ def make_mcq_definition(text: str, terms: List[str], source: int) -> Optional[Di
                         filler = "Nenhuma das alternativas."
                     options.append(filler)
 
-                rng = rng_for_user_week(current_user.id if current_user and getattr(current_user, 'id', None) else 0)
+                rng = rng or rng_for_user_week(current_user.id if current_user and getattr(current_user, 'id', None) else 0)
                 rng.shuffle(options)
                 answer_idx = options.index(answer_text)
 
@@ -491,12 +478,12 @@ def make_assertion_reason(text: str, source: int) -> Optional[Dict[str, Any]]:
         }
     return None
 
-def make_ordering_mcq(text: str, source: int) -> Optional[Dict[str, Any]]:
+def make_ordering_mcq(text: str, source: int, rng: Optional[random.Random] = None) -> Optional[Dict[str, Any]]:
     """
     Detecta uma enumeração e pede a ordem correta.
     Sai como MCQ com 4 alternativas (1 correta + 3 variações plausíveis).
     """
-    rng = rng_for_user_week(current_user.id if current_user and getattr(current_user, 'id', None) else 0)
+    rng = rng or rng_for_user_week(current_user.id if current_user and getattr(current_user, 'id', None) else 0)
     enums = extract_enumerations(text, 4, 6)
     if not enums:
         return None
@@ -522,10 +509,10 @@ def make_ordering_mcq(text: str, source: int) -> Optional[Dict[str, Any]]:
         "explanation": f"Itens detectados: {', '.join(items)}.",
     }
 
-def make_tf(text: str, terms: List[str], source: int) -> List[Dict[str, Any]]:
+def make_tf(text: str, terms: List[str], source: int, rng: Optional[random.Random] = None) -> List[Dict[str, Any]]:
     out: List[Dict[str, Any]] = []
     sentences = filter_sentences(text)[:2]
-    rng = rng_for_user_week(current_user.id if current_user and getattr(current_user, 'id', None) else 0)
+    rng = rng or rng_for_user_week(current_user.id if current_user and getattr(current_user, 'id', None) else 0)
 
     for s in sentences:
         has_num = bool(re.search(r"\d", s))
@@ -578,106 +565,179 @@ def make_tf(text: str, terms: List[str], source: int) -> List[Dict[str, Any]]:
 
 # ---- Main generator ----
 
-def generate_weekly_quiz(contents: List[Dict[str, Any]], per_content: int = 5) -> List[Dict[str, Any]]:
+# Versão do gerador de questões: mudar aqui (ou a lógica dos make_*) gera o banco de novo
+WEEKLY_GENERATOR = 'weekly-v1'
+_PRIO_FORMATO = {"mcq_def": 0, "ar": 1, "ord": 2, "cloze": 3, "tf": 4}
+
+def question_format(q: Dict[str, Any]) -> str:
+    if q.get("format") == "assertion_reason":
+        return "ar"
+    if q.get("format") == "ordering":
+        return "ord"
+    if q["type"] == "cloze":
+        return "cloze"
+    if q["type"] == "tf":
+        return "tf"
+    return "mcq_def"
+
+def generate_content_candidates(c: Dict[str, Any], rng: Optional[random.Random] = None) -> List[Tuple[str, Dict[str, Any]]]:
     """
-    Blueprint por conteúdo (prioridade):
+    Todas as questões candidatas de um conteúdo, como (formato, item). Blueprint:
       1) MCQ de definição (se existir)
       2) Asserção–Razão (se existir)
       3) Ordem correta (se enumeração for detectada)
       4) Cloze (com alternativas se possível)
       5) V/F (1–2 itens)
-    Ajusta automaticamente se per_content < ou > 5.
     """
-    quiz: List[Dict[str, Any]] = []
-    seen = set()
+    raw_text = c.get('text') or ''
+    text = clean_text(raw_text)
+    sentences = filter_sentences(text)
+    if not sentences:
+        # pula conteúdos com frases inválidas (títulos/listas/artefatos)
+        return []
+    terms = extract_key_terms(text, 12)
+
+    bucket: List[Dict[str, Any]] = []
+
+    # 1) Definição
+    mcq_def = make_mcq_definition(text, terms, c['id'], rng)
+    if mcq_def:
+        bucket.append(mcq_def)
+
+    # 2) Asserção–Razão
+    ar = make_assertion_reason(text, c['id'])
+    if ar:
+        bucket.append(ar)
+
+    # 3) Ordem correta
+    ordq = make_ordering_mcq(text, c['id'], rng)
+    if ordq:
+        bucket.append(ordq)
+
+    # 4) Cloze
+    sent = pick_good_sentence(sentences)
+    cloze = make_cloze(sent, terms, c['id'], rng) if sent else None
+    if cloze:
+        bucket.append(cloze)
+
+    # 5) V/F (até 2)
+    tfs = make_tf(text, terms, c['id'], rng)[:2]
+    bucket.extend(tfs)
+    return [(question_format(q), q) for q in bucket]
+
+def select_content_bucket(
+    c: Dict[str, Any],
+    per_content: int = 5,
+    historico: Optional[HistoricoQuestoes] = None,
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    Questões escolhidas para um conteúdo (itens do banco, alternativas ainda na ordem
+    canônica) e se o histórico do usuário removeu alguma candidata.
+    """
+    bucket = banco_questoes.itens_do_conteudo(
+        c['id'], clean_text(c.get('text') or ''), WEEKLY_GENERATOR,
+        lambda rng_conteudo: generate_content_candidates(c, rng_conteudo),
+    )
+    if not bucket:
+        return [], False
+
+    repetiu = False
+    if historico is not None:
+        repetidas = historico.repetidas([q.get("question", "") for q in bucket])
+        frescas = [q for q, rep in zip(bucket, repetidas) if not rep]
+        repetiu = len(frescas) != len(bucket)
+        bucket = frescas or bucket
+
+    # Seleção conforme per_content, preservando diversidade e prioridade
+    # ordena pela prioridade + dificuldade (mistura easy/medium/hard)
+    bucket_sorted = sorted(
+        bucket,
+        key=lambda q: (_PRIO_FORMATO[question_format(q)], {"easy": 0, "medium": 1, "hard": 2}.get(q.get("difficulty", "medium"), 1)),
+    )
+    chosen: List[Dict[str, Any]] = []
+
+    for q in bucket_sorted:
+        if len(chosen) >= per_content:
+            break
+        # garante diversidade mínima
+        kinds = {question_format(x) for x in chosen}
+        if question_format(q) not in kinds or len(chosen) < per_content:
+            chosen.append(q)
+
+    # fallback se ficou curto
+    i = 0
+    while len(chosen) < per_content and i < len(bucket_sorted):
+        if bucket_sorted[i] not in chosen:
+            chosen.append(bucket_sorted[i])
+        i += 1
+    return chosen, repetiu
+
+def iter_weekly_quiz_buckets(
+    contents: List[Dict[str, Any]],
+    per_content: int = 5,
+    historico: Optional[HistoricoQuestoes] = None,
+    compartilhado: Optional[quiz_fingerprint.Compartilhamento] = None,
+) -> Iterator[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+    """
+    Gera (conteúdo, questões) assim que cada conteúdo é processado, já sem perguntas
+    quase duplicadas (MinHash/LSH) entre conteúdos. As candidatas vêm do banco de
+    questões (geradas uma vez por revisão do conteúdo, ver servicos/banco_questoes.py)
+    e recebem aqui a ordem de alternativas do usuário. Com `historico`, questões que
+    o usuário já recebeu em outras semanas só entram se o conteúdo não tiver nenhuma
+    nova. Prioridade: def > ar > ord > cloze > tf; ajusta se per_content < ou > 5.
+    Com `compartilhado`, reaproveita/grava a seleção da semana para o mesmo conjunto
+    de conteúdos (servicos/quiz_fingerprint.py).
+    """
+    indice = IndiceLSH()
+    rng = rng_for_user_week(current_user.id if current_user and getattr(current_user, 'id', None) else 0)
 
-    def add(q):
-        key = normalize(q.get("question",""))
-        if not key or key in seen:
-            return
-        seen.add(key)
-        quiz.append(q)
+    if compartilhado is not None:
+        grupos = quiz_fingerprint.buscar(compartilhado)
+        if grupos is not None:
+            textos = [q.get("question", "") for _, itens in grupos for q in itens]
+            if historico is None or not any(historico.repetidas(textos)):
+                quiz_fingerprint.contar_hit(compartilhado)
+                por_id = {c['id']: c for c in contents}
+                for content_id, itens in grupos:
+                    yield por_id[content_id], [banco_questoes.embaralhar_opcoes(q, rng) for q in itens]
+                return
+            quiz_fingerprint.contar_miss_historico(compartilhado)
+            compartilhado = None  # seleção deste usuário é pessoal: não substitui a gravada
+    pessoal = False
 
     for c in contents:
-        raw_text = c.get('text') or ''
-        text = clean_text(raw_text)
-        sentences = filter_sentences(text)
-        if not sentences:
-            # pula conteúdos com frases inválidas (títulos/listas/artefatos)
+        chosen, repetiu = select_content_bucket(c, per_content, historico)
+        if not chosen:
             continue
-        terms = extract_key_terms(text, 12)
-
-        bucket: List[Dict[str, Any]] = []
-
-        # 1) Definição
-        mcq_def = make_mcq_definition(text, terms, c['id'])
-        if mcq_def:
-            bucket.append(mcq_def)
-
-        # 2) Asserção–Razão
-        ar = make_assertion_reason(text, c['id'])
-        if ar:
-            bucket.append(ar)
-
-        # 3) Ordem correta
-        ordq = make_ordering_mcq(text, c['id'])
-        if ordq:
-            bucket.append(ordq)
-
-        # 4) Cloze
-        sent = pick_good_sentence(sentences)
-        cloze = make_cloze(sent, terms, c['id']) if sent else None
-        if cloze:
-            bucket.append(cloze)
-
-        # 5) V/F (até 2)
-        tfs = make_tf(text, terms, c['id'])[:2]
-        bucket.extend(tfs)
-
-        # Seleção conforme per_content, preservando diversidade e prioridade
-        # prioridade: def > ar > ord > cloze > tf
-        prio = {"mcq_def": 0, "ar": 1, "ord": 2, "cloze": 3, "tf": 4}
-        def tag(q):
-            if q.get("format") == "assertion_reason":
-                return "ar"
-            if q.get("format") == "ordering":
-                return "ord"
-            if q["type"] == "cloze":
-                return "cloze"
-            if q["type"] == "tf":
-                return "tf"
-            return "mcq_def"
-
-        # ordena pela prioridade + dificuldade (mistura easy/medium/hard)
-        bucket_sorted = sorted(
-            bucket,
-            key=lambda q: (prio[tag(q)], {"easy": 0, "medium": 1, "hard": 2}.get(q.get("difficulty", "medium"), 1)),
-        )
-        chosen: List[Dict[str, Any]] = []
-
-        for q in bucket_sorted:
-            if len(chosen) >= per_content:
-                break
-            # garante diversidade mínima
-            kinds = {tag(x) for x in chosen}
-            if tag(q) not in kinds or len(chosen) < per_content:
-                chosen.append(q)
-
-        # fallback se ficou curto
-        i = 0
-        while len(chosen) < per_content and i < len(bucket_sorted):
-            if bucket_sorted[i] not in chosen:
-                chosen.append(bucket_sorted[i])
-            i += 1
+        pessoal = pessoal or repetiu
 
+        novos: List[Dict[str, Any]] = []
         for q in chosen:
-            add(q)
+            if indice.adicionar_se_nova(len(indice), q.get("question", "")):
+                novos.append(q)
+        if compartilhado is not None and novos:
+            compartilhado.grupos.append([c['id'], [q['ref'] for q in novos]])
+        yield c, [banco_questoes.embaralhar_opcoes(q, rng) for q in novos]
+
+    if compartilhado is not None and not pessoal:
+        quiz_fingerprint.registrar(compartilhado)
 
-    # Embaralha globalmente (determinístico por usuário/semana)
+def shuffle_weekly_quiz(quiz: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Embaralha globalmente (determinístico por usuário/semana)."""
     rng = rng_for_user_week(current_user.id if current_user and getattr(current_user, 'id', None) else 0)
     rng.shuffle(quiz)
     return quiz
 
+def generate_weekly_quiz(
+    contents: List[Dict[str, Any]],
+    per_content: int = 5,
+    historico: Optional[HistoricoQuestoes] = None,
+    compartilhado: Optional[quiz_fingerprint.Compartilhamento] = None,
+) -> List[Dict[str, Any]]:
+    """Quiz completo: todos os buckets de `iter_weekly_quiz_buckets`, embaralhados."""
+    quiz = [q for _, bucket in iter_weekly_quiz_buckets(contents, per_content, historico, compartilhado) for q in bucket]
+    return shuffle_weekly_quiz(quiz)
+
 # ---- Optional polishing with Gemini (AI assist) ----
 
 def polish_quiz_with_gemini(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -687,19 +747,32 @@ def polish_quiz_with_gemini(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]
     preserving structure, options length, and the correct answer mapping.
     Fallback to original items on any failure.
     """
+    result = list(items)
+    try:
+        for idx, item in iter_polish_patches(items):
+            result[idx] = item
+    except Exception:
+        return items
+    return result
+
+def iter_polish_patches(items: List[Dict[str, Any]]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Same policy as `polish_quiz_with_gemini`, but yields (index, polished item) as each
+    chunk comes back from Gemini. Yields nothing when polishing is disabled or fails.
+    """
     try:
         enabled = (os.getenv('QUIZ_POLISH_WITH_GEMINI', 'false').lower() in {'1','true','yes'})
         api_key = os.getenv('GOOGLE_API_KEY')
         model_name = os.getenv('GOOGLE_DEFAULT_MODEL', 'gemini-1.5-flash')
         if not (enabled and api_key):
-            return items
+            return
 
         # dynamic import to avoid hard dependency
         try:
             import importlib
             genai = importlib.import_module('google.generativeai')  # type: ignore
         except Exception:
-            return items
+            return
 
         import json as _json
 
@@ -771,9 +844,8 @@ def polish_quiz_with_gemini(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]
         # Seleciona apenas itens que precisam de polimento
         candidates = [it for it in items if needs_polish(it)]
         if not candidates:
-            return items
+            return
         indices = [i for i, it in enumerate(items) if it in candidates]
-        result = list(items)
 
         for i in range(0, len(candidates), chunk_size):
             chunk = candidates[i:i+chunk_size]
@@ -796,13 +868,12 @@ def polish_quiz_with_gemini(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]
                 if not isinstance(new_list, list) or len(new_list) != len(chunk):
                     continue
                 polished_block: List[Dict[str, Any]] = [merge_one(o, n) for o, n in zip(chunk, new_list)]
-                for j, it in enumerate(polished_block):
-                    result[indices[i+j]] = it
             except Exception:
                 continue
-        return result
+            for j, it in enumerate(polished_block):
+                yield indices[i+j], it
     except Exception:
-        return items
+        return
 
 # ---- Data fetch helpers ----
 
@@ -823,6 +894,7 @@ def fetch_weekly_contents_for_user(user_id: int, limit_fallback: int = 6) -> Lis
     start, end = get_week_range()
     rows = (
         db.session.query(SubjectContent)
+        .options(defer(SubjectContent.content_html))  # texto já vem pronto em content_text
         .join(CompletedContent, CompletedContent.content_id == SubjectContent.id)
         .filter(and_(CompletedContent.user_id == user_id, CompletedContent.completed_at >= start, CompletedContent.completed_at < end))
         .order_by(CompletedContent.completed_at.desc())
@@ -834,13 +906,14 @@ def fetch_weekly_contents_for_user(user_id: int, limit_fallback: int = 6) -> Lis
             'id': sc.id,
             'subject': sc.subject or '',
             'title': sc.topic or '',
-            'text': strip_html(sc.content_html or ''),
+            'text': conteudos.texto_de(sc),
         })
     if contents:
         return contents
     # Fallback: recent SubjectContent by created_at
     rows2 = (
         db.session.query(SubjectContent)
+        .options(defer(SubjectContent.content_html))
         .filter(SubjectContent.created_at != None)
         .order_by(SubjectContent.created_at.desc())
         .limit(limit_fallback)
@@ -851,7 +924,7 @@ def fetch_weekly_contents_for_user(user_id: int, limit_fallback: int = 6) -> Lis
             'id': sc.id,
             'subject': sc.subject or '',
             'title': sc.topic or '',
-            'text': strip_html(sc.content_html or ''),
+            'text': conteudos.texto_de(sc),
         })
     return contents
 
@@ -882,6 +955,86 @@ def ai_health():
     except Exception as e:
         return jsonify({'status': 'error', 'error': str(e)}), 500
 
+def _weekly_fingerprint(contents: List[Dict[str, Any]], wk: date, per_content: int) -> quiz_fingerprint.Compartilhamento:
+    fp = quiz_fingerprint.fingerprint(
+        [(c['id'], clean_text(c.get('text') or '')) for c in contents], WEEKLY_GENERATOR, per_content)
+    return quiz_fingerprint.Compartilhamento(fp, wk)
+
+def _save_weekly_quiz(existing: Optional[WeeklyQuiz], wk: date, quiz: List[Dict[str, Any]]) -> WeeklyQuiz:
+    data = banco_questoes.referencias(quiz)
+    if existing:
+        existing.data = data
+        existing.status = 'ready'
+        existing.version = (existing.version or 1)
+        record = existing
+    else:
+        record = WeeklyQuiz(user_id=current_user.id, week_start=wk, status='ready', version=1, data=data)
+        db.session.add(record)
+    registrar_questoes(current_user.id, wk, [q.get('question', '') for q in quiz])
+    db.session.commit()
+    return record
+
+def _ndjson(evento: Dict[str, Any]) -> str:
+    return json.dumps(evento, ensure_ascii=False) + "\n"
+
+def _stream_weekly_quiz(existing_id: Optional[int], wk: date, per_content: int, force_regen: bool) -> Response:
+    """
+    Variante NDJSON de POST /api/quizzes/weekly (?stream=1). Uma linha JSON por evento:
+      meta   -> semana/usuário (sai antes de qualquer geração)
+      bucket -> questões de um conteúdo, assim que `iter_weekly_quiz_buckets` as produz
+      order  -> ids na ordem final (embaralhada por usuário/semana, igual ao modo normal)
+      patch  -> item polido pelo Gemini substituindo o de mesmo id
+      done   -> WeeklyQuiz persistido (status/versão/total)
+      error  -> falha no meio do caminho (nada é persistido)
+    """
+    def gerar():
+        # o gerador roda em outro app context (outra sessão): recarrega a linha aqui
+        existing = db.session.get(WeeklyQuiz, existing_id) if existing_id else None
+        yield _ndjson({'type': 'meta', 'user_id': current_user.id, 'week_start': wk.isoformat(), 'per_content': per_content})
+        if existing and existing.status == 'ready' and not force_regen:
+            items = banco_questoes.materializar(existing.data)
+            yield _ndjson({'type': 'bucket', 'content_id': None, 'items': items})
+            yield _ndjson({'type': 'done', 'status': existing.status, 'version': existing.version, 'count': len(items), 'cached': True})
+            return
+        try:
+            quiz: List[Dict[str, Any]] = []
+            historico = HistoricoQuestoes(current_user.id, excluir_semana=wk)
+            contents = fetch_weekly_contents_for_user(current_user.id)
+            compartilhado = _weekly_fingerprint(contents, wk, per_content)
+            for content, bucket in iter_weekly_quiz_buckets(contents, per_content, historico, compartilhado):
+                if not bucket:
+                    continue
+                quiz.extend(bucket)
+                yield _ndjson({
+                    'type': 'bucket',
+                    'content_id': content.get('id'),
+                    'subject': content.get('subject'),
+                    'title': content.get('title'),
+                    'items': bucket,
+                })
+            quiz = shuffle_weekly_quiz(quiz)
+            yield _ndjson({'type': 'order', 'ids': [q.get('id') for q in quiz]})
+            if is_polish_enabled() and not compartilhado.polished:
+                for idx, item in iter_polish_patches(quiz):
+                    quiz[idx] = item
+                    yield _ndjson({'type': 'patch', 'id': item.get('id'), 'item': item})
+                quiz_fingerprint.marcar_polido(compartilhado, quiz)
+            record = _save_weekly_quiz(existing, wk, quiz)
+            yield _ndjson({
+                'type': 'done',
+                'status': record.status,
+                'version': record.version,
+                'count': len(quiz),
+                'created_at': record.created_at.isoformat() if record.created_at else None,
+            })
+        except Exception as e:
+            db.session.rollback()
+            logging.exception(f"/api/quizzes/weekly stream error: {e}")
+            yield _ndjson({'type': 'error', 'error': str(e)})
+
+    return Response(stream_with_context(gerar()), mimetype='application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @bp_quiz_gen.route('/api/quizzes/weekly', methods=['POST'])
 @login_required
 def post_weekly_quiz():
@@ -896,30 +1049,27 @@ def post_weekly_quiz():
             .filter(WeeklyQuiz.user_id == current_user.id, WeeklyQuiz.week_start == wk)
             .first()
         )
+        if _is_truthy(request.args.get('stream')):
+            return _stream_weekly_quiz(existing.id if existing else None, wk, per_content, force_regen)
         if existing and existing.status == 'ready' and not force_regen:
             return jsonify({
                 'user_id': current_user.id,
                 'week_start': existing.week_start.isoformat(),
                 'status': existing.status,
                 'version': existing.version,
-                'items': existing.data or [],
+                'items': banco_questoes.materializar(existing.data),
             })
 
         contents = fetch_weekly_contents_for_user(current_user.id)
-        quiz = generate_weekly_quiz(contents, per_content=per_content)
-        # Optional Gemini polish
-        if is_polish_enabled():
+        historico = HistoricoQuestoes(current_user.id, excluir_semana=wk)
+        compartilhado = _weekly_fingerprint(contents, wk, per_content)
+        quiz = generate_weekly_quiz(contents, per_content, historico, compartilhado)
+        # Optional Gemini polish (uma vez por seleção compartilhada)
+        if is_polish_enabled() and not compartilhado.polished:
             quiz = polish_quiz_with_gemini(quiz)
+            quiz_fingerprint.marcar_polido(compartilhado, quiz)
 
-        if existing:
-            existing.data = quiz
-            existing.status = 'ready'
-            existing.version = (existing.version or 1)
-            record = existing
-        else:
-            record = WeeklyQuiz(user_id=current_user.id, week_start=wk, status='ready', version=1, data=quiz)
-            db.session.add(record)
-        db.session.commit()
+        record = _save_weekly_quiz(existing, wk, quiz)
         return jsonify({
             'user_id': current_user.id,
             'week_start': record.week_start.isoformat() if record.week_start else None,
@@ -932,6 +1082,16 @@ def post_weekly_quiz():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@bp_quiz_gen.route('/api/quizzes/weekly/cache-stats', methods=['GET'])
+@login_required
+def weekly_quiz_cache_stats():
+    """Hit rate semanal das seleções compartilhadas por fingerprint de conteúdos."""
+    try:
+        semanas = max(1, min(52, int(request.args.get('weeks', 8))))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'weeks inválido'}), 400
+    return jsonify({'weeks': quiz_fingerprint.estatisticas(semanas)})
+
 @bp_quiz_gen.route('/api/quizzes/weekly/latest', methods=['GET'])
 @login_required
 def get_latest_weekly_quiz():
@@ -953,7 +1113,7 @@ def get_latest_weekly_quiz():
             'status': row.status,
             'version': row.version,
             'created_at': row.created_at.isoformat() if row.created_at else None,
-            'items': row.data or []
+            'items': banco_questoes.materializar(row.data)
         })
     except Exception as e:
         # If the table doesn't exist yet, treat as missing instead of 500
@@ -987,7 +1147,7 @@ def get_or_enqueue_weekly_quiz():
                 'week_start': row.week_start.isoformat(),
                 'status': row.status,
                 'version': row.version,
-                'items': row.data or []
+                'items': banco_questoes.materializar(row.data)
             })
         if row and row.status == 'pending':
             return jsonify({'status': 'pending'}), 202
@@ -998,7 +1158,8 @@ def get_or_enqueue_weekly_quiz():
             return jsonify({'status': 'missing', 'items': []}), 200
 
         # Generate and refine quiz items
-        items = [asdict(q) for q in generate_refined_quiz(topics, n=8)]
+        historico = HistoricoQuestoes(current_user.id, excluir_semana=wk)
+        items = [asdict(q) for q in generate_refined_quiz(topics, n=8, historico=historico)]
         if not items:
             # fallback: generate 2-4 simple TF items
             items = [
@@ -1031,6 +1192,7 @@ def get_or_enqueue_weekly_quiz():
         else:
             record = WeeklyQuiz(user_id=current_user.id, week_start=wk, status='ready', version=1, data=items)
             db.session.add(record)
+        registrar_questoes(current_user.id, wk, [q.get('question', '') for q in items])
         db.session.commit()
         return jsonify({
             'user_id': current_user.id,
@@ -1051,19 +1213,25 @@ def get_or_enqueue_weekly_quiz():
         return jsonify({'error': str(e)}), 500
 
 
-# Event hook: content completion (micro-quiz placeholder)
+# Event hook: content completion -> micro-quiz anexado ao quiz da semana (servicos/micro_quiz.py)
 @bp_quiz_gen.route('/api/events/content-completed', methods=['POST'])
 @login_required
 def on_content_completed_event():
+    body = request.get_json(silent=True) or {}
     try:
-        body = request.get_json(silent=True) or {}
         content_id = int(body.get('content_id'))
-        if not content_id:
-            return jsonify({'error': 'content_id required'}), 400
-        # Could create 3-5 micro questions and append to current week quiz
-        # Keeping as a no-op stub for now
-        return jsonify({'status': 'ok'})
+    except (TypeError, ValueError):
+        content_id = 0
+    if content_id <= 0:
+        return jsonify({'error': 'content_id required'}), 400
+    try:
+        if db.session.get(SubjectContent, content_id) is None:
+            return jsonify({'error': 'content not found'}), 404
+        wk = get_week_start_date()
+        modo = micro_quiz.enfileirar(current_user.id, content_id, wk)
+        return jsonify({'status': 'queued', 'mode': modo, 'content_id': content_id, 'week_start': wk.isoformat()}), 202
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 # Optional debug endpoint to test quiz generation without auth (uses fallback)
@@ -0,0 +1,39 @@
+from datetime import datetime
+
+from flask import Blueprint, request, jsonify
+from flask_login import current_user, login_required
+from models.models import db, ReviewDueDaily
+from servicos.datas import parse_data
+from servicos.revisoes import devidas, serializar
+
+revisoes_bp = Blueprint('revisoes', __name__, url_prefix='/api/reviews')
+
+@revisoes_bp.route('/due', methods=['GET'])
+@login_required
+def revisoes_devidas():
+    """Revisões vencidas do usuário (query: until=ISO datetime, limit <= 200)."""
+    try:
+        ate = datetime.fromisoformat(request.args['until']) if request.args.get('until') else datetime.utcnow()
+        limite = max(1, min(200, int(request.args.get('limit', 50))))
+    except (TypeError, ValueError):
+        return jsonify({"error": "until/limit inválidos"}), 400
+    itens = devidas(current_user.id, ate, limite)
+    return jsonify({"until": ate.isoformat(), "reviews": [serializar(r) for r in itens]})
+
+@revisoes_bp.route('/daily', methods=['GET'])
+@login_required
+def revisoes_do_dia():
+    """Lista do dia calculada em lote (scripts/compute_due_reviews.py). Query: date (padrão hoje)."""
+    dia = parse_data(request.args.get('date')) if request.args.get('date') else datetime.utcnow().date()
+    if not dia:
+        return jsonify({"error": "date inválido (use dd/MM/YYYY)"}), 400
+    row = db.session.get(ReviewDueDaily, (current_user.id, dia))
+    if row is None:
+        return jsonify({"date": dia.isoformat(), "status": "missing", "content_ids": [], "overflow": 0})
+    return jsonify({
+        "date": dia.isoformat(),
+        "status": "ready",
+        "content_ids": row.content_ids,
+        "overflow": row.overflow,
+        "computed_at": row.computed_at.isoformat() if row.computed_at else None,
+    })
@@ -1,4 +1,4 @@
-import os, time, threading, requests
+import os, time, threading
 from datetime import datetime, timedelta
 from flask import Blueprint, request, jsonify, current_app
 from models.models import db, YouTubeCache
@@ -9,6 +9,11 @@ videos_bp = Blueprint('videos', __name__)
 _YT_CACHE: dict[str, tuple[float, list[dict]]] = {}
 _YT_CACHE_TTL = int(os.getenv('YT_CACHE_TTL', '600'))
 _YT_CACHE_MAX_ROWS = int(os.getenv('YT_CACHE_MAX_ROWS', '2000'))
+_YT_API_BASE_PADRAO = 'https://www.googleapis.com/youtube/v3'
+
+def _url_busca() -> str:
+    # YT_API_BASE aponta para outro host (proxy, fake local em servicos/youtube_fake.py)
+    return (os.getenv('YT_API_BASE') or _YT_API_BASE_PADRAO).rstrip('/') + '/search'
 
 def _prune_youtube_cache(max_rows: int = _YT_CACHE_MAX_ROWS):
     try:
@@ -27,12 +32,13 @@ def _prune_youtube_cache(max_rows: int = _YT_CACHE_MAX_ROWS):
 
 def _refresh_yt_cache_async(query: str, max_results: int):
     """Atualiza o cache persistente + memória em thread separada."""
+    import requests  # import tardio: fora do boot dos workers
     try:
         api_key = os.getenv('YT_API_KEY')
         if not api_key or not query:
             return
         resp = requests.get(
-            'https://www.googleapis.com/youtube/v3/search',
+            _url_busca(),
             params={
                 'key': api_key,
                 'part': 'snippet',
@@ -72,6 +78,7 @@ def _refresh_yt_cache_async(query: str, max_results: int):
 
 @videos_bp.route('/api/videos', methods=['GET'])
 def get_videos():
+    import requests  # import tardio: fora do boot dos workers
     query = request.args.get('q') or request.args.get('query') or ''
     max_results = request.args.get('maxResults') or 6
     try:
@@ -108,7 +115,7 @@ def get_videos():
     # Fetch externo
     try:
         resp = requests.get(
-            'https://www.googleapis.com/youtube/v3/search',
+            _url_busca(),
             params={
                 'key': api_key,
                 'part': 'snippet',
@@ -188,6 +195,7 @@ def yt_cache_purge():
 
 @videos_bp.route('/api/videos/batch', methods=['POST'])
 def get_videos_batch():
+    import requests  # import tardio: fora do boot dos workers
     try:
         payload = request.get_json(force=True) or {}
     except Exception:
@@ -237,7 +245,7 @@ def get_videos_batch():
             except Exception:
                 pass
             resp = requests.get(
-                'https://www.googleapis.com/youtube/v3/search',
+                _url_busca(),
                 params={
                     'key': api_key,
                     'part': 'snippet',
@@ -0,0 +1,201 @@
+"""Sub-app ASGI para as rotas de IA (esperas longas no Gemini sem prender threads).
+
+Sob gunicorn gthread cada chamada ao modelo segura uma thread por até 25 s; com
+WORKERS=3/THREADS=4, doze chamadas simultâneas travam a API inteira. Aqui:
+
+  1. a requisição passa pelo app Flask inteiro numa thread do pool (ProxyFix,
+     rate limit, JWT/sessão, validação, CORS) — milissegundos;
+  2. views marcadas com `rota_ia` não chamam o modelo: deixam a `ChamadaIA` no
+     environ e devolvem uma resposta provisória (só os cabeçalhos são aproveitados);
+  3. o upstream é aguardado no event loop (`ClienteGemini`), sem thread;
+  4. `responder`/`falha` montam o corpo final dentro de um app context; com
+     `?stream=1` os pedaços viram eventos SSE enviados assim que chegam
+     (servicos/ia_stream.py).
+
+Qualquer outra rota roda como WSGI comum no pool, então o sub-app pode receber
+tráfego misto; em produção o nginx só encaminha para cá os caminhos de IA.
+"""
+import asyncio
+import io
+import logging
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from flask import jsonify
+
+from servicos.gemini import CHAVE_ASYNC, ChamadaIA, ClienteGemini, api_key
+from servicos.ia_stream import SSE_HEADERS, FluxoSSE, registrar_ttfb
+
+_SEM_CORPO = {'content-type', 'content-length'}
+
+
+def montar_environ(scope: dict, corpo: bytes) -> dict:
+    """Environ WSGI (PEP 3333) a partir do scope HTTP do ASGI."""
+    servidor = scope.get('server') or ('localhost', 80)
+    cliente = scope.get('client') or ('127.0.0.1', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': str(servidor[0]),
+        'SERVER_PORT': str(servidor[1] or 80),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': cliente[0],
+        'CONTENT_LENGTH': str(len(corpo)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(corpo),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for nome, valor in scope.get('headers', []):
+        nome = nome.decode('latin-1').upper().replace('-', '_')
+        valor = valor.decode('latin-1')
+        if nome == 'CONTENT_LENGTH':
+            continue
+        chave = nome if nome == 'CONTENT_TYPE' else f'HTTP_{nome}'
+        environ[chave] = f'{environ[chave]},{valor}' if chave in environ else valor
+    return environ
+
+
+def _rodar_wsgi(wsgi_app, environ: dict):
+    resultado: dict = {}
+
+    def start_response(status, headers, exc_info=None):
+        resultado['status'] = int(status.split(' ', 1)[0])
+        resultado['headers'] = list(headers)
+        return lambda _dados: None
+
+    iteravel = wsgi_app(environ, start_response)
+    try:
+        partes = list(iteravel)
+    finally:
+        if hasattr(iteravel, 'close'):
+            iteravel.close()
+    return resultado['status'], resultado['headers'], partes
+
+
+async def _ler_corpo(receive) -> bytes:
+    partes = []
+    while True:
+        msg = await receive()
+        partes.append(msg.get('body', b''))
+        if not msg.get('more_body'):
+            return b''.join(partes)
+
+
+async def _iniciar(send, status: int, headers) -> None:
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(k.encode('latin-1'), v.encode('latin-1')) for k, v in headers],
+    })
+
+
+async def _enviar(send, status: int, headers, partes) -> None:
+    await _iniciar(send, status, headers)
+    await send({'type': 'http.response.body', 'body': b''.join(partes)})
+
+
+def _mesclar(headers_previos, finais):
+    """Cabeçalhos dos after_request (CORS, Set-Cookie, rate limit) + os da resposta final."""
+    nomes = {k.lower() for k, _ in finais}
+    return [(k, v) for k, v in headers_previos if k.lower() not in _SEM_CORPO | nomes] + list(finais)
+
+
+class AppIAAsync:
+    """Aplicação ASGI que envolve o app Flask (ver docstring do módulo)."""
+
+    def __init__(self, flask_app, threads: Optional[int] = None, cliente: Optional[ClienteGemini] = None):
+        self.flask = flask_app
+        self.cliente = cliente or ClienteGemini()
+        self._pool = ThreadPoolExecutor(
+            max_workers=threads or int(os.getenv('ASGI_SYNC_THREADS', '16')),
+            thread_name_prefix='asgi-wsgi',
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] != 'http':
+            return
+        corpo = await _ler_corpo(receive)
+        environ = montar_environ(scope, corpo)
+        pendentes: list = []
+        environ[CHAVE_ASYNC] = pendentes
+        loop = asyncio.get_running_loop()
+        status, headers, partes = await loop.run_in_executor(self._pool, _rodar_wsgi, self.flask, environ)
+        if pendentes and pendentes[0].stream:
+            return await self._transmitir(pendentes[0], headers, send)
+        if pendentes:
+            status, headers, partes = await self._concluir(pendentes[0], headers)
+        await _enviar(send, status, headers, partes)
+
+    def _resposta(self, montar):
+        """Chama `montar()` (responder/falha da rota) num app context e serializa."""
+        with self.flask.app_context():
+            try:
+                rv = montar()
+            except Exception as e:  # pragma: no cover - responders já tratam os próprios erros
+                logging.exception('Falha ao montar resposta de IA')
+                rv = jsonify({"error": "Erro interno no servidor", "details": str(e)}), 500
+            resp = self.flask.make_response(rv)
+        return resp.status_code, list(resp.headers.items()), [resp.get_data()]
+
+    def _registrar_ttfb(self, endpoint: str, ms: float) -> None:
+        # Redis é bloqueante: registra no pool para não parar o event loop
+        def _tarefa():
+            with self.flask.app_context():
+                registrar_ttfb(endpoint, ms)
+        self._pool.submit(_tarefa)
+
+    async def _transmitir(self, chamada: ChamadaIA, headers_previos, send) -> None:
+        erro = None
+        if not api_key():
+            erro = {"error": "GOOGLE_API_KEY ausente."}
+        else:
+            try:
+                textos = await self.cliente.abrir_fluxo(
+                    chamada.prompt, chamada.timeout, chamada.modelo, chamada.generation_config)
+            except Exception as e:
+                erro = {"error": "Falha na chamada Gemini", "details": str(e)}
+        if erro is not None:
+            status, headers, partes = self._resposta(lambda: chamada.falha(erro))
+            return await _enviar(send, status, _mesclar(headers_previos, headers), partes)
+
+        fluxo = FluxoSSE(chamada, registrar=self._registrar_ttfb)
+        finais = [('Content-Type', 'text/event-stream; charset=utf-8'), *SSE_HEADERS.items()]
+        await _iniciar(send, 200, _mesclar(headers_previos, finais))
+        try:
+            async for texto in textos:
+                await send({'type': 'http.response.body', 'body': fluxo.pedaco(texto), 'more_body': True})
+            with self.flask.app_context():
+                ultimo = fluxo.fim()
+        except Exception as e:
+            ultimo = fluxo.erro(e)
+        finally:
+            await textos.aclose()
+        await send({'type': 'http.response.body', 'body': ultimo})
+
+    async def _concluir(self, chamada: ChamadaIA, headers_previos):
+        dados, err = await self.cliente.chamar(
+            chamada.prompt, chamada.timeout, chamada.modelo, chamada.generation_config)
+        status, headers, partes = self._resposta(
+            lambda: chamada.falha(err) if err else chamada.responder(dados))
+        return status, _mesclar(headers_previos, headers), partes
+
+    async def _lifespan(self, receive, send):
+        while True:
+            msg = await receive()
+            if msg['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif msg['type'] == 'lifespan.shutdown':
+                await self.cliente.aclose()
+                self._pool.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
@@ -0,0 +1,160 @@
+"""Banco de questões reaproveitáveis entre usuários e semanas.
+
+- Chave: (content_id, content_hash, generator, format, slot). Enquanto o texto do
+  conteúdo e a versão do gerador não mudam, as questões são geradas uma única vez
+  (rng derivado do próprio conteúdo) e servidas a todos os usuários.
+- Por usuário fica só a referência: `{"ref": <id>, "perm": [...]}` em
+  WeeklyQuiz.data, onde `perm` é a ordem das alternativas sorteada com
+  `rng_for_user_week` (opcoes_usuario[i] = opcoes_banco[perm[i]]).
+- `materializar` expande as referências com uma consulta; entradas antigas com a
+  questão inteira (ou itens que não vêm do banco, ex.: Gemini) passam intactas.
+- `referencias` faz o caminho inverso ao salvar. Item cujo texto difere do banco
+  (polimento do Gemini) é gravado inteiro na entrada do usuário, com `ref` para o
+  histórico: a linha compartilhada do banco nunca é alterada por um usuário.
+"""
+import hashlib
+import random
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from models.models import db, QuestionBankItem
+from servicos.upsert import insert_upsert
+
+PREFIXO_ID = 'qb-'
+
+
+def hash_conteudo(texto: str) -> str:
+    return hashlib.sha1((texto or '').encode('utf-8')).hexdigest()
+
+
+def rng_conteudo(content_id: int, content_hash: str, generator: str) -> random.Random:
+    seed = hashlib.sha256(f'{content_id}-{content_hash}-{generator}'.encode()).hexdigest()
+    return random.Random(int(seed, 16) % (2 ** 32))
+
+
+def _tem_opcoes(item: Dict[str, Any]) -> bool:
+    return isinstance(item.get('options'), list) and isinstance(item.get('answer'), int)
+
+
+def _aplicar_perm(item: Dict[str, Any], perm: Optional[List[int]]) -> Dict[str, Any]:
+    if not perm or not _tem_opcoes(item) or len(perm) != len(item['options']):
+        return item
+    opcoes = item['options']
+    return dict(item, options=[opcoes[j] for j in perm], answer=perm.index(item['answer']))
+
+
+def _desfazer_perm(item: Dict[str, Any], perm: Optional[List[int]]) -> Dict[str, Any]:
+    if not perm or not _tem_opcoes(item) or len(perm) != len(item['options']):
+        return item
+    opcoes: List[Any] = [None] * len(perm)
+    for i, j in enumerate(perm):
+        opcoes[j] = item['options'][i]
+    return dict(item, options=opcoes, answer=perm[item['answer']])
+
+
+def _para_usuario(row_id: int, canonico: Dict[str, Any], perm: Optional[List[int]]) -> Dict[str, Any]:
+    item = _aplicar_perm(dict(canonico), perm)
+    item['id'] = f'{PREFIXO_ID}{row_id}'
+    item['ref'] = row_id
+    if perm:
+        item['perm'] = perm
+    return item
+
+
+def itens_do_conteudo(
+    content_id: int,
+    texto: str,
+    generator: str,
+    gerar: Callable[[random.Random], Sequence[Tuple[str, Dict[str, Any]]]],
+) -> List[Dict[str, Any]]:
+    """Itens canônicos do conteúdo (gera e grava só na primeira vez desta revisão).
+
+    `gerar(rng)` devolve [(formato, item)]. Devolve dicts com `id`/`ref` do banco,
+    ainda na ordem canônica das alternativas (ver `embaralhar_opcoes`).
+    """
+    content_hash = hash_conteudo(texto)
+    chave = (
+        QuestionBankItem.content_id == content_id,
+        QuestionBankItem.content_hash == content_hash,
+        QuestionBankItem.generator == generator,
+    )
+    rows = db.session.query(QuestionBankItem).filter(*chave).order_by(QuestionBankItem.id).all()
+    if not rows:
+        slots: Dict[str, int] = {}
+        valores = []
+        for formato, item in gerar(rng_conteudo(content_id, content_hash, generator)):
+            canonico = {k: v for k, v in item.items() if k != 'id'}
+            valores.append({
+                'content_id': content_id, 'content_hash': content_hash, 'generator': generator,
+                'format': formato, 'slot': slots.get(formato, 0), 'item': canonico,
+            })
+            slots[formato] = slots.get(formato, 0) + 1
+        if not valores:
+            return []
+        # outro worker pode ter gerado o mesmo conteúdo ao mesmo tempo: a chave única decide
+        db.session.execute(insert_upsert(QuestionBankItem).values(valores).on_conflict_do_nothing(
+            index_elements=['content_id', 'content_hash', 'generator', 'format', 'slot']))
+        rows = db.session.query(QuestionBankItem).filter(*chave).order_by(QuestionBankItem.id).all()
+    return [_para_usuario(r.id, r.item, None) for r in rows]
+
+
+def embaralhar_opcoes(item: Dict[str, Any], rng: random.Random) -> Dict[str, Any]:
+    """Ordem das alternativas própria do usuário (item do banco, ainda canônico)."""
+    if 'ref' not in item or not _tem_opcoes(item):
+        return item
+    perm = list(range(len(item['options'])))
+    rng.shuffle(perm)
+    return _para_usuario(item['ref'], {k: v for k, v in item.items() if k not in ('id', 'ref', 'perm')}, perm)
+
+
+def materializar(data: Optional[List[Any]]) -> List[Dict[str, Any]]:
+    """WeeklyQuiz.data -> itens completos na ordem do usuário (uma consulta ao banco)."""
+    entradas = [e for e in (data or []) if isinstance(e, dict)]
+    ids = {e['ref'] for e in entradas if 'ref' in e and 'question' not in e}
+    rows = {}
+    if ids:
+        rows = {r.id: r.item for r in db.session.query(QuestionBankItem).filter(QuestionBankItem.id.in_(ids))}
+    itens = []
+    for e in entradas:
+        if 'ref' not in e or 'question' in e:
+            itens.append(e)
+        elif e['ref'] in rows:  # referência a item removido do banco é descartada
+            itens.append(_para_usuario(e['ref'], rows[e['ref']], e.get('perm')))
+    return itens
+
+
+def canonico(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Item do usuário de volta à ordem canônica das alternativas, sem id/ref/perm.
+
+    Se o polimento mudou o número de alternativas, a ordem do usuário vira a canônica.
+    """
+    perm = item.get('perm')
+    if perm and not (_tem_opcoes(item) and len(item['options']) == len(perm)):
+        perm = None
+    return _desfazer_perm({k: v for k, v in item.items() if k not in ('id', 'ref', 'perm')}, perm)
+
+
+def do_banco(row_id: int, item: Dict[str, Any]) -> Dict[str, Any]:
+    """Item canônico com `id`/`ref` do banco (como em `itens_do_conteudo`)."""
+    return _para_usuario(row_id, item, None)
+
+
+def referencias(quiz: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Itens do usuário -> entradas para WeeklyQuiz.data (sem commit).
+
+    Itens iguais ao banco viram `{"ref", "perm"}`; os que mudaram (polimento) ficam
+    inteiros na entrada do usuário e `materializar` os devolve como estão.
+    """
+    ids = {q['ref'] for q in quiz if 'ref' in q}
+    rows = {}
+    if ids:
+        rows = {r.id: r.item for r in db.session.query(QuestionBankItem).filter(QuestionBankItem.id.in_(ids))}
+    saida: List[Dict[str, Any]] = []
+    for q in quiz:
+        ref = q.get('ref')
+        if ref not in rows:
+            saida.append({k: v for k, v in q.items() if k not in ('ref', 'perm')})
+        elif q == _para_usuario(ref, rows[ref], q.get('perm')):
+            saida.append({'ref': ref, 'perm': q['perm']} if q.get('perm') else {'ref': ref})
+        else:
+            saida.append(dict(q))
+    return saida
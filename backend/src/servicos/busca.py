@@ -0,0 +1,137 @@
+"""Busca full-text nos conteúdos (subject_contents).
+
+- `search_text` = normalize(topic + content_text): sem acento e sem caixa, como
+  o resto do backend compara texto. É recalculado no flush do ORM junto com os
+  demais campos derivados (servicos/conteudos.py); linhas gravadas fora do ORM são
+  preenchidas por scripts/rebuild_search_index.py.
+- Postgres: índice GIN em to_tsvector('portuguese', search_text) (migração 0011);
+  ranking ts_rank_cd.
+- SQLite (USE_SQLITE): tabela FTS5 de conteúdo externo `subject_contents_fts`
+  sincronizada por triggers (DDL_SQLITE, usada também pela migração 0011); ranking bm25.
+- O destaque (`destacar`) sai do `content_text` original, com acento e caixa; a
+  casa do termo usa o mesmo normalize, então 'quelonios' marca 'Quelônios'.
+- A consulta passa pelo mesmo `tokenize`; cada termo casa por prefixo e todos
+  precisam aparecer (AND).
+"""
+import html
+import re
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import text
+
+from models.models import db
+from servicos import conteudos  # noqa: F401  (registra o cálculo de search_text no flush)
+from servicos.texto import normalize, tokenize
+
+FTS_TABELA = 'subject_contents_fts'
+MAX_POR_PAGINA = 50
+MARCA_INICIO, MARCA_FIM = '<mark>', '</mark>'
+PALAVRAS_DESTAQUE = 24
+_PALAVRA = re.compile(r'[^\W_]+')
+
+DDL_SQLITE = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABELA} USING fts5("
+    "search_text, content='subject_contents', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABELA}_ai AFTER INSERT ON subject_contents BEGIN "
+    f"INSERT INTO {FTS_TABELA}(rowid, search_text) VALUES (new.id, new.search_text); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABELA}_ad AFTER DELETE ON subject_contents BEGIN "
+    f"INSERT INTO {FTS_TABELA}({FTS_TABELA}, rowid, search_text) VALUES ('delete', old.id, old.search_text); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABELA}_au AFTER UPDATE OF search_text ON subject_contents BEGIN "
+    f"INSERT INTO {FTS_TABELA}({FTS_TABELA}, rowid, search_text) VALUES ('delete', old.id, old.search_text); "
+    f"INSERT INTO {FTS_TABELA}(rowid, search_text) VALUES (new.id, new.search_text); END",
+]
+
+DDL_SQLITE_DROP = [f"DROP TRIGGER IF EXISTS {FTS_TABELA}_{sufixo}" for sufixo in ('ai', 'ad', 'au')] + [
+    f"DROP TABLE IF EXISTS {FTS_TABELA}",
+]
+
+_prontos = set()  # engines (url) com o índice SQLite garantido neste processo
+
+
+def _sqlite() -> bool:
+    return db.engine.dialect.name == 'sqlite'
+
+
+def garantir_indice_sqlite() -> bool:
+    """Cria a tabela FTS5 e os triggers se faltarem (reconstruindo o índice). True se criou."""
+    url = str(db.engine.url)
+    if url in _prontos:
+        return False
+    with db.engine.begin() as conn:
+        existe = conn.execute(text("SELECT 1 FROM sqlite_master WHERE type='table' AND name=:n"),
+                              {'n': FTS_TABELA}).first() is not None
+        for ddl in DDL_SQLITE:
+            conn.execute(text(ddl))
+        if not existe:
+            conn.execute(text(f"INSERT INTO {FTS_TABELA}({FTS_TABELA}) VALUES ('rebuild')"))
+    _prontos.add(url)
+    return not existe
+
+
+def termos(q: str) -> List[str]:
+    # hífen separa termos: 'pós-guerra' vira 'pos' e 'guerra'
+    return [t for t in re.split(r'[\s-]+', ' '.join(tokenize(q))) if t][:8]
+
+
+def destacar(texto: str, ts: List[str], palavras: int = PALAVRAS_DESTAQUE) -> str:
+    """Trecho de `texto` (HTML escapado) em volta do primeiro termo, com as palavras que casam marcadas."""
+    achadas = list(_PALAVRA.finditer(texto or ''))
+    if not achadas:
+        return ''
+    casa = [any(normalize(m.group()).startswith(t) for t in ts) for m in achadas]
+    primeira = casa.index(True) if any(casa) else 0
+    ini = max(0, min(primeira - palavras // 4, len(achadas) - palavras))
+    fim = min(len(achadas), ini + palavras)
+    partes, pos = [], achadas[ini].start()
+    for m, marcar in zip(achadas[ini:fim], casa[ini:fim]):
+        if marcar:
+            partes += [html.escape(texto[pos:m.start()]), MARCA_INICIO, html.escape(m.group()), MARCA_FIM]
+            pos = m.end()
+    partes.append(html.escape(texto[pos:achadas[fim - 1].end()]))
+    trecho = re.sub(r'\s+', ' ', ''.join(partes))
+    return ('…' if ini > 0 else '') + trecho + ('…' if fim < len(achadas) else '')
+
+
+def buscar(q: str, pagina: int = 1, por_pagina: int = 20) -> Tuple[int, List[Dict[str, Any]]]:
+    """(total, resultados da página) ordenados por relevância."""
+    ts = termos(q)
+    if not ts:
+        return 0, []
+    por_pagina = max(1, min(MAX_POR_PAGINA, por_pagina))
+    params = {'lim': por_pagina, 'off': (max(1, pagina) - 1) * por_pagina}
+    if _sqlite():
+        garantir_indice_sqlite()
+        params['q'] = ' '.join(f'"{t}"*' for t in ts)
+        total = db.session.execute(
+            text(f"SELECT count(*) FROM {FTS_TABELA} WHERE {FTS_TABELA} MATCH :q"), params).scalar()
+        linhas = db.session.execute(text(
+            f"SELECT sc.id, sc.subject, sc.topic, sc.materia_id, -bm25({FTS_TABELA}) AS score, sc.content_text "
+            f"FROM {FTS_TABELA} JOIN subject_contents sc ON sc.id = {FTS_TABELA}.rowid "
+            f"WHERE {FTS_TABELA} MATCH :q ORDER BY bm25({FTS_TABELA}), sc.id LIMIT :lim OFFSET :off"
+        ), params).all()
+    else:
+        params['q'] = ' & '.join(f'{t}:*' for t in ts)
+        vetor = "to_tsvector('portuguese', coalesce(search_text, ''))"
+        total = db.session.execute(text(
+            f"SELECT count(*) FROM subject_contents WHERE {vetor} @@ to_tsquery('portuguese', :q)"), params).scalar()
+        linhas = db.session.execute(text(
+            f"SELECT id, subject, topic, materia_id, ts_rank_cd({vetor}, to_tsquery('portuguese', :q)) AS score, "
+            f"content_text FROM subject_contents WHERE {vetor} @@ to_tsquery('portuguese', :q) "
+            "ORDER BY score DESC, id LIMIT :lim OFFSET :off"
+        ), params).all()
+    return int(total or 0), [
+        {'id': r[0], 'subject': r[1], 'topic': r[2], 'materia_id': r[3],
+         'score': round(float(r[4] or 0), 4), 'highlight': destacar(r[5], ts)}
+        for r in linhas
+    ]
+
+
+def reindexar(todos: bool = False) -> Dict[str, int]:
+    """Preenche os campos derivados (só das linhas pendentes, ou de todas) e, no SQLite, reconstrói o FTS5 (com commit)."""
+    atualizados = conteudos.reprocessar(todos)
+    db.session.commit()
+    if _sqlite():
+        garantir_indice_sqlite()
+        with db.engine.begin() as conn:
+            conn.execute(text(f"INSERT INTO {FTS_TABELA}({FTS_TABELA}) VALUES ('rebuild')"))
+    return {'updated': atualizados}
@@ -0,0 +1,187 @@
+"""Teste de carga: jornadas de usuário em paralelo e relatório de latência por rota.
+
+Cada usuário virtual repete a jornada
+  login → onboarding → plano → conteúdo (sumário + 1ª seção) → conclusão →
+  quiz semanal → vídeos → quiz por IA
+com sua própria sessão HTTP; cada chamada é medida sob o nome da rota (template,
+não a URL concreta), e o relatório traz n, erros, p50/p95/p99 e máximo por rota.
+
+IA e vídeos devem apontar para os fakes locais (servicos/gemini_fake.py,
+servicos/youtube_fake.py via GEMINI_API_BASE / YT_API_BASE) — ver scripts/load_test.py,
+que sobe app, fakes e dados de exemplo numa máquina só.
+"""
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+CURSO_CARGA = 'Curso de carga'
+SENHA_PADRAO = 'senhadev'
+ONBOARDING = {'dias_disponiveis': ['Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado', 'Domingo'],
+              'tempo_diario': 90, 'ritmo': 'moderado', 'estilo_aprendizagem': 'visual', 'horario_inicio': '07:30'}
+
+
+def percentil(ordenados: List[float], p: float) -> Optional[float]:
+    """Percentil por posto mais próximo (nearest-rank) de uma lista já ordenada."""
+    if not ordenados:
+        return None
+    return ordenados[max(0, math.ceil(p / 100 * len(ordenados)) - 1)]
+
+
+class Registro:
+    """Amostras (ms, status) por rota, de várias threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.amostras: Dict[str, List[tuple]] = {}
+
+    def anotar(self, rota: str, ms: float, status: int) -> None:
+        with self._lock:
+            self.amostras.setdefault(rota, []).append((ms, status))
+
+    def relatorio(self, segundos: float) -> Dict[str, Any]:
+        rotas = {}
+        total = erros = 0
+        with self._lock:
+            itens = sorted(self.amostras.items())
+        for rota, amostras in itens:
+            ms = sorted(a[0] for a in amostras)
+            falhas = sum(1 for a in amostras if not 200 <= a[1] < 400)
+            total += len(amostras)
+            erros += falhas
+            rotas[rota] = {
+                'n': len(amostras), 'erros': falhas,
+                'p50_ms': round(percentil(ms, 50), 1), 'p95_ms': round(percentil(ms, 95), 1),
+                'p99_ms': round(percentil(ms, 99), 1), 'max_ms': round(ms[-1], 1),
+            }
+        return {'segundos': round(segundos, 2), 'requisicoes': total, 'erros': erros,
+                'rps': round(total / segundos, 1) if segundos > 0 else None, 'rotas': rotas}
+
+
+def formatar(relatorio: Dict[str, Any]) -> str:
+    linhas = [f"{'rota':<48} {'n':>6} {'erros':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}"]
+    for rota, r in relatorio['rotas'].items():
+        linhas.append(f"{rota:<48} {r['n']:>6} {r['erros']:>6} {r['p50_ms']:>8} {r['p95_ms']:>8} "
+                      f"{r['p99_ms']:>8} {r['max_ms']:>8}")
+    linhas.append(f"total: {relatorio['requisicoes']} requisições, {relatorio['erros']} erros, "
+                  f"{relatorio['rps']} req/s em {relatorio['segundos']} s (latências em ms)")
+    return '\n'.join(linhas)
+
+
+class Jornada:
+    """Uma sessão de usuário virtual contra `base_url`."""
+
+    def __init__(self, base_url: str, registro: Registro, email: str, senha: str = SENHA_PADRAO,
+                 timeout: float = 30, rng: Optional[random.Random] = None, stream: bool = False):
+        import requests  # import tardio: só o harness usa
+        self.base = base_url.rstrip('/')
+        self.registro = registro
+        self.email = email
+        self.senha = senha
+        self.timeout = timeout
+        self.rng = rng or random.Random(email)
+        self.stream = stream  # quiz por IA via SSE (?stream=1), lido até o fim
+        self.http = requests.Session()
+
+    def chamar(self, rota: str, metodo: str, caminho: str, **kwargs):
+        """Faz a chamada e anota a latência em `rota`; devolve o JSON (ou None se falhou)."""
+        inicio = time.perf_counter()
+        status, dados = 0, None
+        try:
+            resp = self.http.request(metodo, self.base + caminho, timeout=self.timeout, **kwargs)
+            status = resp.status_code
+            if 200 <= status < 300 and resp.content:
+                try:
+                    dados = resp.json()
+                except ValueError:
+                    dados = None
+        except Exception:
+            status = 0
+        finally:
+            self.registro.anotar(rota, (time.perf_counter() - inicio) * 1000, status)
+        return dados
+
+    def executar(self) -> None:
+        usuario = self.chamar('POST /api/auth/login', 'POST', '/api/auth/login',
+                              json={'email': self.email, 'password': self.senha})
+        if not usuario:
+            return
+        cursos = self.chamar('GET /api/cursos', 'GET', '/api/cursos') or []
+        curso = next((c for c in cursos if c.get('nome') == CURSO_CARGA), cursos[0] if cursos else None)
+        if not curso:
+            return
+        self.chamar('POST /api/onboarding', 'POST', '/api/onboarding', json=dict(ONBOARDING, curso_id=curso['id']))
+        self.chamar('POST /api/plano-estudo/gerar', 'POST', '/api/plano-estudo/gerar')
+
+        materias = (self.chamar('GET /api/materias', 'GET', f"/api/materias?course_id={curso['id']}") or {}).get('materias') or []
+        if not materias:
+            return
+        materia = self.rng.choice(materias)
+        conteudos = (self.chamar('GET /api/materias/<id>/conteudos', 'GET',
+                                 f"/api/materias/{materia['id']}/conteudos") or {}).get('conteudos') or []
+        if not conteudos:
+            return
+        conteudo = self.rng.choice(conteudos)
+        cid = conteudo['id']
+        self.chamar('GET /api/conteudo_html/<id>/outline', 'GET', f'/api/conteudo_html/{cid}/outline')
+        self.chamar('GET /api/conteudo_html/<id>?section', 'GET', f'/api/conteudo_html/{cid}?section=0')
+        self.chamar('POST /api/conteudos/concluir', 'POST', '/api/conteudos/concluir',
+                    json={'user_id': usuario.get('id'), 'content_id': cid})
+        self.chamar('POST /api/quizzes/weekly', 'POST', '/api/quizzes/weekly', json={})
+        self.chamar('GET /api/videos', 'GET', '/api/videos', params={'q': conteudo.get('topic') or 'aula'})
+        if self.stream:
+            self.chamar('GET /api/generate_quiz/<id>?stream', 'GET', f'/api/generate_quiz/{cid}', params={'stream': 1})
+        else:
+            self.chamar('GET /api/generate_quiz/<id>', 'GET', f'/api/generate_quiz/{cid}')
+
+
+def executar(base_url: str, usuarios: int = 10, iteracoes: int = 1, duracao: Optional[float] = None,
+             senha: str = SENHA_PADRAO, prefixo_email: str = 'carga', stream: bool = False) -> Dict[str, Any]:
+    """Roda `usuarios` jornadas em paralelo, `iteracoes` vezes cada (ou até `duracao` segundos)."""
+    registro = Registro()
+    fim = time.monotonic() + duracao if duracao else None
+
+    def usuario(i: int) -> None:
+        feitas = 0
+        while (fim is not None and time.monotonic() < fim) or (fim is None and feitas < iteracoes):
+            Jornada(base_url, registro, f'{prefixo_email}{i}@example.com', senha, stream=stream).executar()
+            feitas += 1
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, usuarios)) as pool:
+        list(pool.map(usuario, range(usuarios)))
+    return registro.relatorio(time.perf_counter() - inicio)
+
+
+def semear(materias: int = 4, conteudos_por_materia: int = 25, usuarios: int = 0,
+           senha: str = SENHA_PADRAO, prefixo_email: str = 'carga') -> Dict[str, Any]:
+    """Catálogo de exemplo (CURSO_CARGA) via ingestão em lote e os `usuarios` de `executar`
+    com `senha` (login não depende de DEV_MASTER_PASSWORD); idempotente. Exige app context."""
+    from models.models import db, User
+    from servicos import ingestao
+
+    corpo = ''.join(f'<h2>Parte {j}</h2><p>' + 'Texto de exemplo para leitura. ' * 40 + '</p>' for j in range(1, 5))
+    registros = (
+        (n, {'curso': CURSO_CARGA, 'materia': f'Matéria de carga {m}', 'topic': f'Tópico {m}.{t}',
+             'content_html': f'<h1>Tópico {m}.{t}</h1>{corpo}'})
+        for n, (m, t) in enumerate(((m, t) for m in range(1, materias + 1) for t in range(1, conteudos_por_materia + 1)), 1)
+    )
+    resumo = ingestao.ingerir(registros)
+
+    emails = [f'{prefixo_email}{i}@example.com' for i in range(usuarios)]
+    existentes = {u.email: u for u in User.query.filter(User.email.in_(emails))} if emails else {}
+    criados = 0
+    for email in emails:
+        user = existentes.get(email)
+        if user is None:
+            user = User(name=email.split('@')[0], email=email)
+            db.session.add(user)
+            criados += 1
+        elif user.check_password(senha):
+            continue
+        user.set_password(senha)
+    db.session.commit()
+    resumo['usuarios_criados'] = criados
+    return resumo
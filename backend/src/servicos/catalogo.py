@@ -0,0 +1,199 @@
+"""Snapshot imutável do catálogo (cursos, matérias, vínculos e metadados de conteúdo) por worker.
+
+O catálogo muda raramente, mas é lido em quase toda página (listar cursos/matérias,
+progresso por matéria, geração de plano). Cada worker guarda um `Catalogo` congelado
+com a versão de `catalog_version` em que foi carregado:
+
+- Escritas via ORM em Curso/HorariosEscolares/CursoMateria/SubjectContent incrementam
+  `catalog_version` no próprio flush (mesma transação). Após o commit o worker local
+  marca o snapshot como velho e publica em Redis `catalogo:invalidar`.
+- Leituras dentro do intervalo de verificação não tocam no banco. Vencido o intervalo
+  (CATALOGO_POLL_SECONDS, padrão 5 s; 60 s com a assinatura Redis ativa), um
+  `SELECT version` barato decide se recarrega.
+- Escritas fora do ORM (SQL direto) devem chamar `incrementar_versao()`.
+"""
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from types import MappingProxyType
+from typing import Iterable, Mapping, NamedTuple, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models.models import db, CatalogVersion, Curso, CursoMateria, HorariosEscolares, SubjectContent
+from servicos.upsert import insert_upsert
+
+CANAL = 'catalogo:invalidar'
+POLL = float(os.getenv('CATALOGO_POLL_SECONDS', '5'))
+POLL_COM_PUBSUB = float(os.getenv('CATALOGO_POLL_SECONDS_PUBSUB', '60'))
+MODELOS = (Curso, HorariosEscolares, CursoMateria, SubjectContent)
+
+log = logging.getLogger(__name__)
+
+
+class ConteudoMeta(NamedTuple):
+    id: int
+    subject: Optional[str]
+    topic: Optional[str]
+    materia_id: Optional[int]
+    created_at: Optional[datetime]
+
+
+@dataclass(frozen=True)
+class Catalogo:
+    versao: int
+    cursos: Tuple[Tuple[int, Optional[str]], ...]
+    materias: Mapping[int, Optional[str]]
+    materias_por_curso: Mapping[int, Tuple[int, ...]]
+    conteudos: Tuple[ConteudoMeta, ...]
+    conteudos_por_materia: Mapping[int, Tuple[ConteudoMeta, ...]]
+
+    def curso(self, curso_id: int) -> Optional[str]:
+        return next((nome for cid, nome in self.cursos if cid == curso_id), None)
+
+    def conteudos_de(self, materia_ids: Optional[Iterable[int]]) -> Tuple[ConteudoMeta, ...]:
+        """None = todos; [] = nenhum."""
+        if materia_ids is None:
+            return self.conteudos
+        return tuple(c for mid in materia_ids for c in self.conteudos_por_materia.get(mid, ()))
+
+
+_lock = threading.Lock()
+_snapshot: Optional[Catalogo] = None
+_verificado_em = 0.0
+_velho = False
+_assinante_pid: Optional[int] = None
+
+
+def _versao_banco() -> int:
+    return int(db.session.query(CatalogVersion.version).filter_by(id=1).scalar() or 0)
+
+
+def _carregar(versao: int) -> Catalogo:
+    cursos = tuple((cid, nome) for cid, nome in db.session.query(Curso.id, Curso.nome).order_by(Curso.id))
+    materias = {mid: nome for mid, nome in db.session.query(HorariosEscolares.id, HorariosEscolares.materia)
+                .order_by(HorariosEscolares.id)}
+    por_curso = {}
+    for curso_id, materia_id in db.session.query(CursoMateria.curso_id, CursoMateria.materia_id).order_by(CursoMateria.id):
+        por_curso.setdefault(curso_id, []).append(materia_id)
+    conteudos = tuple(ConteudoMeta(*row) for row in db.session.query(
+        SubjectContent.id, SubjectContent.subject, SubjectContent.topic, SubjectContent.materia_id,
+        SubjectContent.created_at).order_by(SubjectContent.id))
+    por_materia = {}
+    for c in conteudos:
+        por_materia.setdefault(c.materia_id, []).append(c)
+    return Catalogo(
+        versao=versao,
+        cursos=cursos,
+        materias=MappingProxyType(materias),
+        materias_por_curso=MappingProxyType({k: tuple(v) for k, v in por_curso.items()}),
+        conteudos=conteudos,
+        conteudos_por_materia=MappingProxyType({k: tuple(v) for k, v in por_materia.items()}),
+    )
+
+
+def atual() -> Catalogo:
+    """Snapshot vigente (recarrega só quando a versão no banco mudou)."""
+    global _snapshot, _verificado_em, _velho
+    intervalo = POLL_COM_PUBSUB if _assinante_pid == os.getpid() else POLL
+    snap = _snapshot
+    if snap is not None and not _velho and time.monotonic() - _verificado_em < intervalo:
+        return snap
+    with _lock:
+        _velho = False
+        versao = _versao_banco()
+        if _snapshot is None or _snapshot.versao != versao:
+            _snapshot = _carregar(versao)
+        _verificado_em = time.monotonic()
+        snap = _snapshot
+    _garantir_assinatura()
+    return snap
+
+
+def invalidar_local() -> None:
+    global _velho
+    _velho = True
+
+
+def _incremento():
+    agora = datetime.utcnow()
+    return (
+        insert_upsert(CatalogVersion)
+        .values(id=1, version=1, updated_at=agora)
+        .on_conflict_do_update(index_elements=['id'], set_={'version': CatalogVersion.version + 1, 'updated_at': agora})
+    )
+
+
+def incrementar_versao() -> None:
+    """Incrementa catalog_version na transação corrente (sem commit)."""
+    db.session.execute(_incremento())
+    db.session.info['catalogo_alterado'] = True
+
+
+def _alterou_catalogo(session) -> bool:
+    if any(isinstance(o, MODELOS) for o in session.new) or any(isinstance(o, MODELOS) for o in session.deleted):
+        return True
+    return any(isinstance(o, MODELOS) and session.is_modified(o, include_collections=False) for o in session.dirty)
+
+
+@event.listens_for(Session, 'after_flush')
+def _apos_flush(session, contexto):
+    if session.info.get('catalogo_alterado') or not _alterou_catalogo(session):
+        return
+    session.info['catalogo_alterado'] = True
+    session.connection().execute(_incremento())
+
+
+@event.listens_for(Session, 'after_commit')
+def _apos_commit(session):
+    if not session.info.pop('catalogo_alterado', False):
+        return
+    invalidar_local()
+    try:
+        r = getattr(current_app, 'redis', None)
+        if r is not None:
+            r.publish(CANAL, str(os.getpid()))
+    except RuntimeError:
+        pass  # fora de app context (scripts): os workers percebem no próximo poll
+    except Exception:
+        log.warning('catalogo: falha ao publicar invalidação', exc_info=True)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _apos_rollback(session):
+    session.info.pop('catalogo_alterado', None)
+
+
+def _garantir_assinatura() -> None:
+    """Uma thread por processo assina CANAL (pid muda após fork do gunicorn)."""
+    global _assinante_pid
+    if _assinante_pid == os.getpid():
+        return
+    try:
+        r = getattr(current_app, 'redis', None)
+    except RuntimeError:
+        return
+    if r is None:
+        return
+    _assinante_pid = os.getpid()
+    threading.Thread(target=_assinar, args=(r,), name='catalogo-pubsub', daemon=True).start()
+
+
+def _assinar(r) -> None:
+    global _assinante_pid
+    try:
+        ps = r.pubsub(ignore_subscribe_messages=True)
+        ps.subscribe(CANAL)
+        for msg in ps.listen():
+            if msg and msg.get('type') == 'message':
+                invalidar_local()
+    except Exception:
+        log.warning('catalogo: assinatura Redis encerrada; voltando ao poll', exc_info=True)
+    finally:
+        _assinante_pid = None
+        invalidar_local()
@@ -0,0 +1,119 @@
+"""Campos derivados de subject_contents, calculados uma vez na escrita.
+
+Cada insert/update que mexe em topic/content_html passa o HTML uma única vez pelo
+parser incremental (servicos/texto.extrair) e grava:
+
+- content_text: texto puro (script/style removidos, entidades decodificadas,
+  espaços colapsados, '\\n' entre blocos);
+- content_outline: [{level, title, offset, html_offset, html_open}] dos títulos h1–h6,
+  offsets em bytes UTF-8 de content_text (ver texto.secao) e de content_html, e as
+  tags abertas no ponto do título;
+- content_sections: partes do HTML para entrega seção a seção
+  (/api/conteudo_html/<id>?section=n): [{level, title, start, end, prefix, suffix, etag}],
+  cortes nos títulos do nível mais alto, bytes de content_html; prefix/suffix
+  reabrem e fecham os elementos que o corte divide (ver texto.partes_html);
+- word_count;
+- search_text: normalize(topic + content_text), usado pela busca (servicos/busca.py);
+- content_hash: sha1 de (subject, topic, content_html); a ingestão em lote
+  (servicos/ingestao.py) compara com ele para só regravar linhas alteradas.
+
+Leitores (quiz semanal, micro-quiz, prompts de IA, busca) usam essas colunas em vez
+de reprocessar o HTML a cada requisição. Linhas gravadas fora do ORM ficam com
+content_text nulo até scripts/rebuild_search_index.py; até lá `texto_de` extrai na hora.
+"""
+import hashlib
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event, inspect, or_
+
+from models.models import db, SubjectContent
+from servicos.texto import extrair, normalize, partes_html
+
+
+def secoes_html(html: str, outline: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Partes do HTML com ETag própria (hash do trecho e da posição no documento)."""
+    bruto = html.encode('utf-8')
+    partes = partes_html(html, outline)
+    for i, p in enumerate(partes):
+        h = hashlib.sha1(f"{i}/{len(partes)}|{p['level']}|{p['title']}|".encode('utf-8'))
+        h.update(p['prefix'].encode('utf-8') + bruto[p['start']:p['end']] + p['suffix'].encode('utf-8'))
+        p['etag'] = h.hexdigest()[:24]
+    return partes
+
+
+def hash_conteudo(subject: Optional[str], topic: Optional[str], content_html: Optional[str]) -> str:
+    return hashlib.sha1('\x1f'.join((subject or '', topic or '', content_html or '')).encode('utf-8')).hexdigest()
+
+
+def derivar(topic: Optional[str], content_html: Optional[str]) -> Dict[str, Any]:
+    html = content_html or ''
+    ex = extrair(html)
+    return {
+        'content_text': ex.texto,
+        'content_outline': ex.secoes,
+        'content_sections': secoes_html(html, ex.secoes),
+        'word_count': ex.palavras,
+        'search_text': normalize(f"{topic or ''} {ex.texto}"),
+    }
+
+
+@event.listens_for(SubjectContent, 'before_insert')
+@event.listens_for(SubjectContent, 'before_update')
+def _manter_campos_derivados(mapper, connection, target) -> None:
+    estado = inspect(target)
+    html_mudou = estado.attrs.content_html.history.has_changes()
+    if target.content_text is None or target.content_sections is None or html_mudou:
+        for campo, valor in derivar(target.topic, target.content_html).items():
+            setattr(target, campo, valor)
+    elif target.search_text is None or estado.attrs.topic.history.has_changes():
+        target.search_text = normalize(f"{target.topic or ''} {target.content_text}")
+    if (target.content_hash is None or html_mudou or estado.attrs.topic.history.has_changes()
+            or estado.attrs.subject.history.has_changes()):
+        target.content_hash = hash_conteudo(target.subject, target.topic, target.content_html)
+
+
+def texto_de(sc: SubjectContent) -> str:
+    """Texto puro do conteúdo; só extrai do HTML em linha ainda não reprocessada."""
+    if sc.content_text is not None:
+        return sc.content_text
+    return extrair(sc.content_html or '').texto
+
+
+def texto_por_id(conteudo_id: int) -> Optional[Tuple[str, str]]:
+    """(topic, texto) sem carregar content_html quando o texto já foi calculado."""
+    linha = (db.session.query(SubjectContent.topic, SubjectContent.content_text)
+             .filter(SubjectContent.id == conteudo_id).first())
+    if linha is None:
+        return None
+    if linha[1] is not None:
+        return linha[0] or '', linha[1]
+    html = db.session.query(SubjectContent.content_html).filter(SubjectContent.id == conteudo_id).scalar()
+    return linha[0] or '', extrair(html or '').texto
+
+
+def estrutura_por_id(conteudo_id: int) -> Optional[Tuple[List[Dict[str, Any]], List[Dict[str, Any]], Optional[str]]]:
+    """(seções, sumário, HTML ou None): o HTML só é lido (e devolvido) em linha ainda não reprocessada."""
+    linha = (db.session.query(SubjectContent.content_sections, SubjectContent.content_outline)
+             .filter(SubjectContent.id == conteudo_id).first())
+    if linha is None:
+        return None
+    if linha[0] is not None:
+        return linha[0], linha[1] or [], None
+    html = db.session.query(SubjectContent.content_html).filter(SubjectContent.id == conteudo_id).scalar() or ''
+    outline = extrair(html).secoes
+    return secoes_html(html, outline), outline, html
+
+
+def reprocessar(todos: bool = False) -> int:
+    """Recalcula os campos derivados (só das linhas sem content_text, ou de todas). Não faz commit."""
+    q = db.session.query(SubjectContent.id, SubjectContent.subject, SubjectContent.topic, SubjectContent.content_html)
+    if not todos:
+        q = q.filter(or_(SubjectContent.content_text.is_(None), SubjectContent.content_sections.is_(None),
+                         SubjectContent.search_text.is_(None), SubjectContent.content_hash.is_(None)))
+    atualizados = 0
+    for cid, subject, topic, html in q.all():
+        campos = dict(derivar(topic, html), content_hash=hash_conteudo(subject, topic, html))
+        valores = {getattr(SubjectContent, k): v for k, v in campos.items()}
+        db.session.query(SubjectContent).filter_by(id=cid).update(valores, synchronize_session=False)
+        atualizados += 1
+    return atualizados
@@ -0,0 +1,67 @@
+"""Conversão de datas/horários na borda da API.
+
+O frontend historicamente envia datas como 'dd/MM/YYYY' e horários como 'HH:MM'.
+As colunas agora são DATE/TIME reais; estes helpers aceitam o formato legado
+(e ISO 'YYYY-MM-DD') na entrada e reproduzem o formato legado na saída.
+"""
+from datetime import date, datetime, time as dt_time
+from typing import Optional
+
+FORMATO_DATA_LEGADO = '%d/%m/%Y'
+FORMATO_HORA = '%H:%M'
+
+
+def parse_data(valor) -> Optional[date]:
+    """Converte 'dd/MM/YYYY' ou 'YYYY-MM-DD' em date. Retorna None se inválido."""
+    if valor is None:
+        return None
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    s = str(valor).strip()
+    if not s:
+        return None
+    for fmt in (FORMATO_DATA_LEGADO, '%Y-%m-%d'):
+        try:
+            return datetime.strptime(s[:10], fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_hora(valor) -> Optional[dt_time]:
+    """Converte 'HH:MM' (ou 'HH:MM:SS') em time. Retorna None se inválido."""
+    if valor is None:
+        return None
+    if isinstance(valor, dt_time):
+        return valor
+    s = str(valor).strip()
+    try:
+        h, m = map(int, s.split(':')[:2])
+        return dt_time(h, m)
+    except Exception:
+        return None
+
+
+def formatar_data(d: Optional[date]) -> Optional[str]:
+    return d.strftime(FORMATO_DATA_LEGADO) if d else None
+
+
+def formatar_hora(t: Optional[dt_time]) -> Optional[str]:
+    return t.strftime(FORMATO_HORA) if t else None
+
+
+def ler_filtros_data(args, nomes=('date', 'from', 'to')):
+    """Lê filtros de data da query string.
+    Retorna (filtros, erro): filtros é dict nome->date; erro é mensagem quando algum valor é inválido.
+    """
+    filtros = {}
+    for nome in nomes:
+        bruto = args.get(nome)
+        if bruto:
+            valor = parse_data(bruto)
+            if not valor:
+                return {}, f"{nome} inválido (use dd/MM/YYYY)"
+            filtros[nome] = valor
+    return filtros, None
@@ -0,0 +1,399 @@
+"""Eventos de domínio com outbox transacional + Redis Stream.
+
+Fluxo:
+  1. O handler chama `publicar(tipo, user_id, **dados)` antes do commit: o evento
+     vai para `outbox_events` na mesma transação da mudança (ou os dois, ou nenhum).
+  2. `relay` move os eventos pendentes (relayed_at NULL) para o stream
+     `EVENTOS_STREAM` com XADD e marca relayed_at. Entrega ao-menos-uma-vez.
+  3. Cada consumidor registrado com `@consumidor(grupo, *tipos)` é um consumer
+     group do stream (XREADGROUP/XACK). O checkpoint é o próprio grupo: o que não
+     recebeu ACK fica pendente e é reivindicado (XCLAIM) por outro worker após
+     `EVENTOS_IDLE_MS`; depois de `EVENTOS_MAX_TENTATIVAS` vai para `<stream>:dlq`.
+  4. `reprocessar(grupo, desde_id)` refaz um grupo a partir da outbox (fonte da
+     verdade, mantida por `EVENTOS_RETENCAO_DIAS`); `rebobinar_grupo` move o
+     cursor do grupo no stream.
+
+Sem Redis (dev/SQLite) o transporte é local: o commit acorda uma única thread
+daemon por processo (`despachante_local`), que processa a outbox direto, com
+checkpoint por grupo em `outbox_checkpoints`. Rajadas de commits viram uma passada.
+
+Handlers rodam em app context, devem ser idempotentes (o mesmo evento pode chegar
+mais de uma vez) e não fazem commit; o commit é por evento, antes do ACK.
+Worker: `python ../scripts/eventos_worker.py run` (serviço `eventos` do compose).
+"""
+import importlib
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, FrozenSet, List, Optional
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models.models import db, OutboxCheckpoint, OutboxEvent
+
+STREAM = os.getenv('EVENTOS_STREAM', 'evolutiva:eventos')
+STREAM_DLQ = f'{STREAM}:dlq'
+MAXLEN = int(os.getenv('EVENTOS_STREAM_MAXLEN', '100000'))
+IDLE_MS = int(os.getenv('EVENTOS_IDLE_MS', '60000'))
+MAX_TENTATIVAS = int(os.getenv('EVENTOS_MAX_TENTATIVAS', '5'))
+RETENCAO_DIAS = int(os.getenv('EVENTOS_RETENCAO_DIAS', '30'))
+LOTE = int(os.getenv('EVENTOS_LOTE', '200'))
+MODULOS = [m.strip() for m in os.getenv('EVENTOS_CONSUMIDORES', 'servicos.eventos_consumidores').split(',') if m.strip()]
+
+
+@dataclass
+class Evento:
+    id: int
+    tipo: str
+    user_id: Optional[int]
+    dados: Dict[str, Any]
+    criado_em: Optional[datetime] = None
+
+    @classmethod
+    def de_linha(cls, row: OutboxEvent) -> 'Evento':
+        return cls(row.id, row.event_type, row.user_id, dict(row.payload or {}), row.created_at)
+
+    def campos(self) -> Dict[str, str]:
+        """Campos da entrada no stream (strings)."""
+        return {
+            'id': str(self.id),
+            'type': self.tipo,
+            'user_id': '' if self.user_id is None else str(self.user_id),
+            'payload': json.dumps(self.dados, ensure_ascii=False, default=str),
+            'created_at': self.criado_em.isoformat() if self.criado_em else '',
+        }
+
+    @classmethod
+    def de_campos(cls, campos: Dict[str, str]) -> 'Evento':
+        return cls(
+            int(campos['id']),
+            campos['type'],
+            int(campos['user_id']) if campos.get('user_id') else None,
+            json.loads(campos.get('payload') or '{}'),
+            datetime.fromisoformat(campos['created_at']) if campos.get('created_at') else None,
+        )
+
+
+@dataclass
+class Consumidor:
+    grupo: str
+    tipos: FrozenSet[str]
+    tratar: Callable[[Evento], None]
+
+    def aceita(self, ev: Evento) -> bool:
+        return not self.tipos or ev.tipo in self.tipos
+
+
+CONSUMIDORES: Dict[str, Consumidor] = {}
+_carregados = False
+
+
+def consumidor(grupo: str, *tipos: str):
+    """Registra `fn(evento)` como grupo de consumidores (sem tipos = todos)."""
+    def registrar(fn: Callable[[Evento], None]) -> Callable[[Evento], None]:
+        CONSUMIDORES[grupo] = Consumidor(grupo, frozenset(tipos), fn)
+        return fn
+    return registrar
+
+
+def carregar_consumidores() -> Dict[str, Consumidor]:
+    """Importa os módulos de `EVENTOS_CONSUMIDORES` (registram-se no import)."""
+    global _carregados
+    if not _carregados:
+        for nome in MODULOS:
+            importlib.import_module(nome)
+        _carregados = True
+    return CONSUMIDORES
+
+
+# ---------------------------------------------------------------------------
+# Publicação (mesma transação do handler)
+# ---------------------------------------------------------------------------
+
+def publicar(tipo: str, user_id: Optional[int], /, **dados: Any) -> OutboxEvent:
+    """Grava o evento na outbox da transação corrente (sem commit)."""
+    row = OutboxEvent(event_type=tipo, user_id=user_id, payload=json.loads(json.dumps(dados, default=str)),
+                      created_at=datetime.utcnow())
+    db.session.add(row)
+    db.session.info['eventos_pendentes'] = True
+    return row
+
+
+@event.listens_for(Session, 'after_commit')
+def _apos_commit(session):
+    if not session.info.pop('eventos_pendentes', False):
+        return
+    try:
+        if transporte() == 'local':
+            despachante_local.acordar(current_app._get_current_object())
+    except RuntimeError:
+        pass  # fora de app context (scripts): o worker/`despachar_local` processa depois
+
+
+@event.listens_for(Session, 'after_rollback')
+def _apos_rollback(session):
+    session.info.pop('eventos_pendentes', None)
+
+
+def transporte() -> str:
+    """'redis' | 'local' (EVENTOS_TRANSPORTE=auto usa redis quando a app tem conexão)."""
+    modo = os.getenv('EVENTOS_TRANSPORTE', 'auto').strip().lower()
+    if modo in ('redis', 'local'):
+        return modo
+    return 'redis' if getattr(current_app, 'redis', None) is not None else 'local'
+
+
+# ---------------------------------------------------------------------------
+# Transporte Redis Stream
+# ---------------------------------------------------------------------------
+
+def relay(r, lote: int = LOTE) -> int:
+    """Outbox -> stream. Devolve quantos eventos foram publicados."""
+    rows = (
+        db.session.query(OutboxEvent)
+        .filter(OutboxEvent.relayed_at.is_(None))
+        .order_by(OutboxEvent.id)
+        .limit(lote)
+        .with_for_update(skip_locked=True)  # relays concorrentes pegam lotes disjuntos
+        .all()
+    )
+    if not rows:
+        db.session.rollback()
+        return 0
+    pipe = r.pipeline(transaction=False)
+    for row in rows:
+        pipe.xadd(STREAM, Evento.de_linha(row).campos(), maxlen=MAXLEN, approximate=True)
+    pipe.execute()
+    agora = datetime.utcnow()
+    for row in rows:
+        row.relayed_at = agora
+    db.session.commit()  # se falhar, o lote sai de novo: consumidores são idempotentes
+    return len(rows)
+
+
+def garantir_grupo(r, grupo: str) -> None:
+    try:
+        r.xgroup_create(STREAM, grupo, id='0', mkstream=True)
+    except Exception as e:
+        if 'BUSYGROUP' not in str(e):
+            raise
+
+
+def _tratar(c: Consumidor, ev: Evento) -> None:
+    try:
+        if c.aceita(ev):
+            c.tratar(ev)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def _reivindicar(r, c: Consumidor, nome: str, lote: int) -> List[Any]:
+    """Pendentes de workers parados: reprocessa ou manda para a DLQ."""
+    pendentes = r.xpending_range(STREAM, c.grupo, min='-', max='+', count=lote, idle=IDLE_MS)
+    if not pendentes:
+        return []
+    mortos = [p['message_id'] for p in pendentes if p['times_delivered'] >= MAX_TENTATIVAS]
+    if mortos:
+        for msg_id, campos in r.xclaim(STREAM, c.grupo, nome, IDLE_MS, mortos):
+            r.xadd(STREAM_DLQ, dict(campos, group=c.grupo, stream_id=msg_id), maxlen=MAXLEN, approximate=True)
+            r.xack(STREAM, c.grupo, msg_id)
+        logging.error(f"eventos: {len(mortos)} evento(s) do grupo {c.grupo} foram para {STREAM_DLQ}")
+    vivos = [p['message_id'] for p in pendentes if p['times_delivered'] < MAX_TENTATIVAS]
+    return r.xclaim(STREAM, c.grupo, nome, IDLE_MS, vivos) if vivos else []
+
+
+def consumir(r, grupo: str, nome: Optional[str] = None, bloco_ms: int = 1000, lote: int = 100) -> int:
+    """Uma rodada do grupo: pendentes reivindicados + novos. Devolve quantos tiveram ACK."""
+    c = carregar_consumidores()[grupo]
+    nome = nome or f'{socket.gethostname()}-{os.getpid()}'
+    garantir_grupo(r, grupo)
+    mensagens = _reivindicar(r, c, nome, lote)
+    if not mensagens:
+        resp = r.xreadgroup(grupo, nome, {STREAM: '>'}, count=lote, block=bloco_ms)
+        mensagens = resp[0][1] if resp else []
+    feitos = 0
+    for msg_id, campos in mensagens:
+        if not campos:  # entrada já cortada pelo MAXLEN
+            r.xack(STREAM, grupo, msg_id)
+            continue
+        try:
+            _tratar(c, Evento.de_campos(campos))
+        except Exception:
+            logging.exception(f"eventos: grupo {grupo} falhou em {msg_id}; fica pendente para nova tentativa")
+            continue
+        r.xack(STREAM, grupo, msg_id)
+        feitos += 1
+    return feitos
+
+
+def rebobinar_grupo(r, grupo: str, stream_id: str = '0') -> None:
+    """Move o cursor do grupo no stream ('0' = tudo que ainda está no stream)."""
+    garantir_grupo(r, grupo)
+    r.xgroup_setid(STREAM, grupo, stream_id)
+
+
+def estado_stream(r) -> Dict[str, Any]:
+    if not r.exists(STREAM):
+        return {'stream': STREAM, 'length': 0, 'dlq': r.xlen(STREAM_DLQ), 'groups': {}}
+    grupos = {g['name']: {'pending': g['pending'], 'last_delivered_id': g['last-delivered-id'], 'lag': g.get('lag')}
+              for g in r.xinfo_groups(STREAM)}
+    return {'stream': STREAM, 'length': r.xlen(STREAM), 'dlq': r.xlen(STREAM_DLQ), 'groups': grupos}
+
+
+# ---------------------------------------------------------------------------
+# Transporte local (sem Redis) e replay a partir da outbox
+# ---------------------------------------------------------------------------
+
+_trava_local = threading.Lock()
+
+
+def _checkpoint(grupo: str) -> OutboxCheckpoint:
+    row = db.session.query(OutboxCheckpoint).filter_by(group_name=grupo).with_for_update().first()
+    if row is None:
+        row = OutboxCheckpoint(group_name=grupo, last_event_id=0)
+        db.session.add(row)
+        db.session.flush()
+    return row
+
+
+def _despachar_grupo(c: Consumidor, lote: int) -> int:
+    n = 0
+    while True:
+        desde = _checkpoint(c.grupo).last_event_id
+        rows = (
+            db.session.query(OutboxEvent)
+            .filter(OutboxEvent.id > desde)
+            .order_by(OutboxEvent.id)
+            .limit(lote)
+            .all()
+        )
+        if not rows:
+            db.session.commit()
+            return n
+        for row in rows:
+            try:
+                ev = Evento.de_linha(row)
+                if c.aceita(ev):
+                    c.tratar(ev)
+                _checkpoint(c.grupo).last_event_id = ev.id
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                logging.exception(f"eventos: grupo {c.grupo} falhou no evento {row.id}; para no checkpoint")
+                return n
+            n += 1
+
+
+def despachar_local(lote: int = LOTE) -> Dict[str, int]:
+    """Processa a outbox direto em cada grupo, a partir do checkpoint salvo."""
+    with _trava_local:
+        return {grupo: _despachar_grupo(c, lote) for grupo, c in carregar_consumidores().items()}
+
+
+class DespachanteLocal:
+    """Uma thread daemon por processo que roda `despachar_local` quando acordada.
+
+    `acordar` só sinaliza um Event: commits feitos durante uma passada coalescem em
+    uma nova passada, em vez de uma thread por commit. Com `pausado` (testes) nada
+    roda sozinho e quem quiser chama `despachar_local` direto; `parar` encerra a
+    thread depois da passada em curso.
+    """
+
+    def __init__(self):
+        self.pausado = False
+        self._parando = False
+        self._sinal = threading.Event()
+        self._trava = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._app = None
+
+    def acordar(self, app) -> None:
+        if self.pausado:
+            return
+        self._app = app
+        self._sinal.set()
+        with self._trava:
+            # após fork (gunicorn preload) a thread do master não existe no worker
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._rodar, name='eventos-local', daemon=True)
+                self._thread.start()
+
+    def parar(self, timeout: Optional[float] = None) -> None:
+        self.pausado = self._parando = True
+        self._sinal.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _rodar(self) -> None:
+        while True:
+            self._sinal.wait()
+            self._sinal.clear()
+            if self._parando:
+                return
+            with self._app.app_context():
+                try:
+                    despachar_local()
+                except Exception:
+                    db.session.rollback()
+                    logging.exception("eventos: despacho local falhou")
+
+
+despachante_local = DespachanteLocal()
+
+
+def reprocessar(grupo: str, desde_id: int, ate_id: Optional[int] = None, lote: int = LOTE) -> int:
+    """Replay de um grupo direto da outbox (eventos com id em [desde_id, ate_id])."""
+    c = carregar_consumidores()[grupo]
+    ultimo, total = desde_id - 1, 0
+    while True:
+        q = db.session.query(OutboxEvent).filter(OutboxEvent.id > ultimo)
+        if ate_id is not None:
+            q = q.filter(OutboxEvent.id <= ate_id)
+        rows = q.order_by(OutboxEvent.id).limit(lote).all()
+        if not rows:
+            return total
+        for row in rows:
+            _tratar(c, Evento.de_linha(row))
+            total += 1
+        ultimo = rows[-1].id
+
+
+def limpar(dias: int = RETENCAO_DIAS) -> int:
+    """Remove da outbox eventos já publicados há mais de `dias` dias."""
+    limite = datetime.utcnow() - timedelta(days=dias)
+    n = (
+        db.session.query(OutboxEvent)
+        .filter(OutboxEvent.relayed_at.isnot(None), OutboxEvent.created_at < limite)
+        .delete(synchronize_session=False)
+    )
+    db.session.commit()
+    return n
+
+
+def executar_worker(r, grupos: Optional[List[str]] = None, intervalo: float = 0.5, parar: Callable[[], bool] = lambda: False) -> None:
+    """Laço do worker: relay + uma rodada de cada grupo; limpeza a cada hora."""
+    grupos = grupos or list(carregar_consumidores())
+    nome = f'{socket.gethostname()}-{os.getpid()}'
+    proxima_limpeza = 0.0
+    while not parar():
+        try:
+            publicados = relay(r)
+            tratados = sum(consumir(r, g, nome, bloco_ms=int(intervalo * 1000) // max(1, len(grupos))) for g in grupos)
+            if time.monotonic() >= proxima_limpeza:
+                limpar()
+                proxima_limpeza = time.monotonic() + 3600
+            if not publicados and not tratados:
+                time.sleep(intervalo / 10)
+        except Exception:
+            db.session.rollback()
+            logging.exception("eventos: erro no laço do worker")
+            time.sleep(intervalo)
@@ -0,0 +1,153 @@
+"""Consumidores padrão dos eventos de domínio (ver servicos/eventos.py).
+
+  progresso   conteudo.concluido        -> percentual da matéria em progresso_materia
+  streaks     conteudo.concluido,
+              bloco.status (ok)         -> hábitos `conteudos` e `plano` (e o agregado `geral`)
+  quiz        conteudo.concluido        -> micro-quiz anexado ao quiz da semana
+  revisoes    conteudo.concluido,
+              bloco.revisao, bloco.status -> fila SM-2 de revisões (servicos/revisoes.py)
+  conquistas  todos                     -> achievements por marcos atingidos
+
+Check-ins e Pomodoros continuam atualizando streaks/rollups na própria transação
+(upserts O(1) que a UI relê logo em seguida); aqui só entram efeitos derivados.
+Todos são idempotentes: reprocessar o mesmo evento não muda o resultado.
+"""
+from datetime import datetime, timedelta
+from typing import Callable, List, Tuple
+
+from sqlalchemy import func
+
+from models.models import db, Achievement, CompletedContent, HabitoStats, HorariosEscolares, ProgressoMateria, SubjectContent
+from servicos import revisoes
+from servicos.datas import parse_data
+from servicos.eventos import Evento, consumidor
+from servicos.streaks import HABITO_GERAL, TIPOS_POMODORO_PAUSA, registrar_atividade
+
+HABITO_CONTEUDOS = 'conteudos'
+HABITO_PLANO = 'plano'
+
+
+def _dia(ev: Evento, campo: str):
+    return parse_data(ev.dados.get(campo)) or (ev.criado_em or datetime.utcnow()).date()
+
+
+@consumidor('progresso', 'conteudo.concluido')
+def atualizar_progresso(ev: Evento) -> None:
+    sc = db.session.get(SubjectContent, ev.dados.get('content_id'))
+    if sc is None or ev.user_id is None:
+        return
+    if sc.materia_id:
+        filtro = SubjectContent.materia_id == sc.materia_id
+        nome = db.session.query(HorariosEscolares.materia).filter_by(id=sc.materia_id).scalar() or sc.subject
+    else:
+        filtro = SubjectContent.subject == sc.subject
+        nome = sc.subject
+    if not nome:
+        return
+    total = db.session.query(func.count(SubjectContent.id)).filter(filtro).scalar() or 0
+    concluidos = (
+        db.session.query(func.count(func.distinct(CompletedContent.content_id)))
+        .join(SubjectContent, SubjectContent.id == CompletedContent.content_id)
+        .filter(CompletedContent.user_id == ev.user_id, filtro)
+        .scalar() or 0
+    )
+    row = db.session.query(ProgressoMateria).filter_by(user_id=ev.user_id, subject=nome).first()
+    if row is None:
+        row = ProgressoMateria(user_id=ev.user_id, subject=nome)
+        db.session.add(row)
+    row.percent = round(100.0 * concluidos / total, 1) if total else 0.0
+
+
+@consumidor('streaks', 'conteudo.concluido', 'bloco.status')
+def atualizar_streaks(ev: Evento) -> None:
+    if ev.user_id is None:
+        return
+    if ev.tipo == 'conteudo.concluido':
+        registrar_atividade(ev.user_id, HABITO_CONTEUDOS, _dia(ev, 'completed_at'), registrado=False)
+    elif (ev.dados.get('status') or '').lower() == 'ok':
+        # o dia do bloco no plano pode ser futuro/passado: conta o dia em que foi concluído
+        registrar_atividade(ev.user_id, HABITO_PLANO, (ev.criado_em or datetime.utcnow()).date(), registrado=False)
+
+
+@consumidor('quiz', 'conteudo.concluido')
+def atualizar_quiz(ev: Evento) -> None:
+    from servicos import micro_quiz  # import tardio: micro_quiz importa as rotas do quiz
+    if ev.user_id is None or not ev.dados.get('content_id'):
+        return
+    dia = _dia(ev, 'completed_at')
+    semana = dia - timedelta(days=dia.weekday())
+    hoje = datetime.now().date()
+    if semana != hoje - timedelta(days=hoje.weekday()):
+        return  # replay de semanas passadas não recria quizzes antigos
+    micro_quiz.anexar_conteudo(ev.user_id, int(ev.dados['content_id']), semana)
+
+
+TIPOS_REVISAO = {'revisão', 'review'}
+
+
+@consumidor('revisoes', 'conteudo.concluido', 'bloco.revisao', 'bloco.status')
+def atualizar_revisoes(ev: Evento) -> None:
+    if ev.user_id is None:
+        return
+    quando = ev.criado_em or datetime.utcnow()
+    if ev.tipo == 'bloco.status':
+        content_id, status = ev.dados.get('block_id'), (ev.dados.get('status') or '').lower()
+        if not isinstance(content_id, int) or content_id <= 0:
+            return  # blocos sintéticos (ex.: "Revisão Geral", id -1)
+        if (ev.dados.get('activity_type') or '').lower() in TIPOS_REVISAO:
+            revisoes.registrar_resultado(ev.user_id, content_id, status, quando,
+                                         ev.dados.get('subject'), ev.dados.get('topic'))
+        elif status == 'dificuldade':
+            revisoes.agendar(ev.user_id, content_id, quando + timedelta(days=1),
+                             ev.dados.get('subject'), ev.dados.get('topic'))
+        return
+    content_id = ev.dados.get('content_id') if ev.tipo == 'conteudo.concluido' else ev.dados.get('conteudo_id')
+    sc = db.session.get(SubjectContent, content_id) if content_id else None
+    if sc is None:
+        return
+    if ev.tipo == 'conteudo.concluido':
+        # primeira revisão no dia seguinte à conclusão
+        dia = _dia(ev, 'completed_at') + timedelta(days=1)
+    else:
+        dia = parse_data(ev.dados.get('date')) or quando.date()
+    revisoes.agendar(ev.user_id, sc.id, datetime.combine(dia, datetime.min.time()), sc.subject, sc.topic)
+
+
+def _streak_geral(user_id: int) -> int:
+    return db.session.query(HabitoStats.current_streak).filter_by(user_id=user_id, habit=HABITO_GERAL).scalar() or 0
+
+
+def _dias_plano(user_id: int) -> int:
+    return db.session.query(HabitoStats.total_days).filter_by(user_id=user_id, habit=HABITO_PLANO).scalar() or 0
+
+
+def _conteudos(user_id: int) -> int:
+    return (db.session.query(func.count(func.distinct(CompletedContent.content_id)))
+            .filter(CompletedContent.user_id == user_id).scalar() or 0)
+
+
+# (tipos que podem disparar, título, descrição, condição)
+CONQUISTAS: List[Tuple[frozenset, str, str, Callable[[Evento], bool]]] = [
+    (frozenset({'pomodoro.registrado'}), 'Primeiro foco', 'Concluiu a primeira sessão Pomodoro de foco.',
+     lambda ev: (ev.dados.get('tipo') or '').lower() not in TIPOS_POMODORO_PAUSA),
+    (frozenset({'habito.checkin', 'pomodoro.registrado', 'conteudo.concluido', 'bloco.status'}),
+     'Sequência de 7 dias', 'Estudou 7 dias seguidos.', lambda ev: _streak_geral(ev.user_id) >= 7),
+    (frozenset({'conteudo.concluido'}), '10 conteúdos concluídos', 'Concluiu 10 conteúdos.',
+     lambda ev: _conteudos(ev.user_id) >= 10),
+    (frozenset({'bloco.status'}), 'Plano em dia', 'Concluiu blocos do plano de estudos em 7 dias diferentes.',
+     lambda ev: _dias_plano(ev.user_id) >= 7),
+]
+
+
+@consumidor('conquistas')
+def conceder_conquistas(ev: Evento) -> None:
+    if ev.user_id is None:
+        return
+    candidatas = [(t, d, cond) for tipos, t, d, cond in CONQUISTAS if ev.tipo in tipos]
+    if not candidatas:
+        return
+    ja_tem = {t for (t,) in db.session.query(Achievement.title).filter_by(user_id=ev.user_id)}
+    for titulo, descricao, cond in candidatas:
+        if titulo not in ja_tem and cond(ev):
+            db.session.add(Achievement(user_id=ev.user_id, title=titulo, description=descricao,
+                                       earned_at=ev.criado_em or datetime.utcnow()))
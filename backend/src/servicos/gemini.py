@@ -0,0 +1,217 @@
+"""Chamadas REST ao Gemini (generateContent / streamGenerateContent), síncronas e assíncronas.
+
+As rotas de IA descrevem o trabalho como uma `ChamadaIA` (prompt + como montar a
+resposta) em vez de chamar o modelo direto. Assim a mesma rota roda:
+
+  - no Flask (gunicorn gthread): `executar(chamada)` bloqueia a thread até o fim;
+  - no sub-app ASGI (`servicos/asgi_ia.py`, servido por `asgi.py`): `ClienteGemini`
+    aguarda o upstream no event loop, sem ocupar thread durante os ~20 s do modelo.
+
+Com `?stream=1` a mesma `ChamadaIA` vira um fluxo SSE (ver servicos/ia_stream.py).
+GEMINI_API_BASE permite apontar para outro host (proxy, fake local de testes em
+servicos/gemini_fake.py).
+"""
+import functools
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+from flask import current_app, jsonify, request
+
+# Chave do environ WSGI onde o sub-app ASGI recebe as chamadas pendentes
+CHAVE_ASYNC = 'evolutiva.chamadas_ia'
+
+API_BASE_PADRAO = 'https://generativelanguage.googleapis.com/v1beta'
+MODELO_PADRAO = 'models/gemini-1.5-flash-latest'
+
+
+def _falha_padrao(err: dict):
+    return jsonify(err), 502
+
+
+@dataclass
+class ChamadaIA:
+    """Uma ida ao modelo: `responder(dados)` e `falha(err)` devolvem o retorno da view."""
+    prompt: str
+    responder: Callable[[dict], Any]
+    timeout: float = 25
+    modelo: Optional[str] = None
+    generation_config: Optional[dict] = None
+    falha: Callable[[dict], Any] = field(default=_falha_padrao)
+    # Streaming (?stream=1): fábrica de MontadorJSON para respostas em JSON (mindmap, quiz)
+    montador: Optional[Callable[[], Any]] = None
+    stream: bool = False
+    endpoint: Optional[str] = None
+    inicio: float = field(default_factory=time.perf_counter)
+
+
+def api_key() -> Optional[str]:
+    return os.getenv('GOOGLE_API_KEY')
+
+
+def url_gemini(modelo: Optional[str] = None, metodo: str = 'generateContent') -> str:
+    base = (os.getenv('GEMINI_API_BASE') or API_BASE_PADRAO).rstrip('/')
+    modelo = modelo or os.getenv('GOOGLE_DEFAULT_MODEL', MODELO_PADRAO)
+    if not modelo.startswith('models/'):
+        modelo = f'models/{modelo}'
+    url = f'{base}/{modelo}:{metodo}?key={api_key()}'
+    return url + '&alt=sse' if metodo == 'streamGenerateContent' else url
+
+
+def payload(prompt: str, generation_config: Optional[dict] = None) -> dict:
+    corpo: dict = {"contents": [{"parts": [{"text": prompt}]}]}
+    if generation_config:
+        corpo["generationConfig"] = generation_config
+    return corpo
+
+
+def texto_resposta(dados: dict) -> str:
+    """Primeiro texto candidato; levanta KeyError/IndexError se a resposta vier vazia."""
+    return dados["candidates"][0]["content"]["parts"][0]["text"]
+
+
+def dados_de_texto(texto: str) -> dict:
+    """Resposta no formato do generateContent a partir do texto acumulado de um stream."""
+    return {"candidates": [{"content": {"parts": [{"text": texto}]}}]}
+
+
+def texto_evento_sse(linha: str) -> str:
+    """Texto de uma linha `data: {...}` do streamGenerateContent (vazio se não houver)."""
+    if not linha.startswith('data:'):
+        return ''
+    try:
+        partes = json.loads(linha[5:].strip())["candidates"][0]["content"]["parts"]
+    except Exception:
+        return ''
+    return ''.join(p.get("text", "") for p in partes)
+
+
+def _sem_chave():
+    return None, {"error": "GOOGLE_API_KEY ausente."}
+
+
+def chamar(prompt: str, timeout: float = 25, modelo: Optional[str] = None,
+           generation_config: Optional[dict] = None):
+    """Chamada bloqueante. Retorna (dados, None) ou (None, erro)."""
+    import requests  # import tardio: fora do boot dos workers
+    if not api_key():
+        return _sem_chave()
+    try:
+        resp = requests.post(url_gemini(modelo), json=payload(prompt, generation_config), timeout=timeout)
+        resp.raise_for_status()
+        return resp.json(), None
+    except Exception as e:
+        return None, {"error": "Falha na chamada Gemini", "details": str(e)}
+
+
+def abrir_fluxo(prompt: str, timeout: float = 25, modelo: Optional[str] = None,
+                generation_config: Optional[dict] = None):
+    """Abre o streamGenerateContent (bloqueante). Erros de conexão/HTTP sobem antes do
+    primeiro pedaço, então a view ainda pode responder com status de erro normal.
+    Retorna (gerador de textos, fechar)."""
+    import requests  # import tardio: fora do boot dos workers
+    resp = requests.post(url_gemini(modelo, 'streamGenerateContent'),
+                         json=payload(prompt, generation_config), timeout=timeout, stream=True)
+    try:
+        resp.raise_for_status()
+    except Exception:
+        resp.close()
+        raise
+
+    resp.encoding = 'utf-8'  # SSE é sempre UTF-8; sem charset o requests assumiria latin-1
+
+    def _textos():
+        for linha in resp.iter_lines(chunk_size=None, decode_unicode=True):
+            texto = texto_evento_sse(linha or '')
+            if texto:
+                yield texto
+    return _textos(), resp.close
+
+
+def executar(rv):
+    """Resolve uma `ChamadaIA` de forma síncrona; qualquer outro retorno passa direto."""
+    if not isinstance(rv, ChamadaIA):
+        return rv
+    if rv.stream:
+        from servicos.ia_stream import responder_sse  # evita import circular
+        return responder_sse(rv)
+    dados, err = chamar(rv.prompt, rv.timeout, rv.modelo, rv.generation_config)
+    return rv.falha(err) if err else rv.responder(dados)
+
+
+def rota_ia(view):
+    """Decorator para views que devolvem `ChamadaIA`.
+
+    Sob gunicorn a chamada é resolvida na hora (bloqueante). Sob o sub-app ASGI a view
+    só valida/monta o prompt: a chamada vai para o environ e a resposta provisória
+    passa pelos after_request (CORS, cookies) antes de o upstream ser aguardado.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        rv = view(*args, **kwargs)
+        if isinstance(rv, ChamadaIA):
+            rv.endpoint = rv.endpoint or request.endpoint
+            rv.stream = rv.stream or request.args.get('stream', '').lower() in {'1', 'true', 'yes'}
+        pendentes = request.environ.get(CHAVE_ASYNC)
+        if isinstance(rv, ChamadaIA) and pendentes is not None:
+            pendentes.append(rv)
+            return current_app.response_class(status=200)
+        return executar(rv)
+    return wrapper
+
+
+class ClienteGemini:
+    """Cliente assíncrono compartilhado pelo sub-app ASGI (um por event loop)."""
+
+    def __init__(self, max_conexoes: Optional[int] = None):
+        self.max_conexoes = max_conexoes or int(os.getenv('GEMINI_ASYNC_MAX_CONN', '1000'))
+        self._http = None
+
+    def _cliente(self):
+        if self._http is None:
+            import httpx  # import tardio: só o sub-app ASGI usa
+            self._http = httpx.AsyncClient(limits=httpx.Limits(
+                max_connections=self.max_conexoes, max_keepalive_connections=min(100, self.max_conexoes)))
+        return self._http
+
+    async def post_json(self, url: str, corpo: dict, timeout: float) -> dict:
+        http = self._cliente()
+        resp = await http.post(url, json=corpo, timeout=timeout)
+        resp.raise_for_status()
+        return resp.json()
+
+    async def chamar(self, prompt: str, timeout: float = 25, modelo: Optional[str] = None,
+                     generation_config: Optional[dict] = None):
+        if not api_key():
+            return _sem_chave()
+        try:
+            return await self.post_json(url_gemini(modelo), payload(prompt, generation_config), timeout), None
+        except Exception as e:
+            return None, {"error": "Falha na chamada Gemini", "details": str(e)}
+
+    async def abrir_fluxo(self, prompt: str, timeout: float = 25, modelo: Optional[str] = None,
+                          generation_config: Optional[dict] = None):
+        """Como `abrir_fluxo`, mas assíncrono: levanta antes do primeiro pedaço; retorna async iterator."""
+        url, corpo = url_gemini(modelo, 'streamGenerateContent'), payload(prompt, generation_config)
+        http = self._cliente()
+        resp = await http.send(http.build_request('POST', url, json=corpo, timeout=timeout), stream=True)
+        if resp.status_code >= 400:
+            await resp.aclose()
+            resp.raise_for_status()
+
+        async def _textos():
+            try:
+                async for linha in resp.aiter_lines():
+                    texto = texto_evento_sse(linha.strip())
+                    if texto:
+                        yield texto
+            finally:
+                await resp.aclose()
+        return _textos()
+
+    async def aclose(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
@@ -0,0 +1,176 @@
+"""Gemini falso local (generateContent + streamGenerateContent?alt=sse) para testes offline.
+
+Responde de forma determinística conforme o prompt: mapa mental em JSON, lista de
+questões de quiz em JSON ou texto de feedback. O texto sai em pedaços de
+`tamanho_pedaco` caracteres, com `atraso_inicial` (+ até `variacao` segundos
+aleatórios) antes do primeiro e `atraso_pedaco` entre eles, simulando o tempo de
+geração do modelo. `taxa_erro` é a fração de chamadas respondidas com
+`status_erro` (sobrecarga do upstream), para testes de carga (scripts/load_test.py).
+
+Uso:
+    servidor = ServidorGeminiFake(atraso_inicial=0.2).iniciar()
+    os.environ['GEMINI_API_BASE'] = servidor.base_url
+    ...
+    servidor.parar()
+
+ou, fora dos testes: `python -m servicos.gemini_fake --porta 8089` (de backend/src).
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+
+MINDMAP_FAKE = {
+    "topic": "Conjuntos",
+    "related_topics": ["Operações", "Propriedades"],
+    "subtopics": {
+        "Operações": ["União", "Interseção", "Diferença"],
+        "Propriedades": ["Comutativa", "Associativa"],
+    },
+}
+
+QUIZ_FAKE = [
+    {"question": "Quanto é 2 + 2?", "options": ["3", "4", "5", "6"], "answer": "4", "explanation": "Soma simples."},
+    {"question": "Capital do Brasil?", "options": ["Rio", "Brasília", "Salvador", "Recife"], "answer": "Brasília",
+     "explanation": "Capital desde 1960."},
+]
+
+
+def texto_padrao(prompt: str) -> str:
+    baixo = prompt.lower()
+    if 'mapa mental' in baixo:
+        return json.dumps(MINDMAP_FAKE, ensure_ascii=False, indent=2)
+    if 'múltipla escolha' in baixo:
+        return '```json\n' + json.dumps(QUIZ_FAKE, ensure_ascii=False, indent=2) + '\n```'
+    return ('Bom trabalho! Você explicou a ideia central com clareza. '
+            'Revise os exemplos e tente reformular com suas palavras. Continue assim!')
+
+
+def _candidato(texto: str) -> dict:
+    return {"candidates": [{"content": {"parts": [{"text": texto}], "role": "model"}}]}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    servidor_fake: 'ServidorGeminiFake'
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        fake = self.servidor_fake
+        corpo = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+        try:
+            prompt = corpo["contents"][0]["parts"][0]["text"]
+        except Exception:
+            prompt = ''
+        fake.chamadas += 1
+        texto = fake.responder(prompt)
+        time.sleep(fake.atraso())
+        if fake.sortear_erro():
+            return self._erro()
+        if ':streamGenerateContent' in self.path:
+            return self._stream(texto)
+        dados = json.dumps(_candidato(texto)).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _erro(self):
+        fake = self.servidor_fake
+        fake.erros += 1
+        dados = json.dumps({"error": {"code": fake.status_erro, "message": "falha simulada (gemini_fake)",
+                                      "status": "UNAVAILABLE"}}).encode('utf-8')
+        self.send_response(fake.status_erro)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _stream(self, texto: str):
+        fake = self.servidor_fake
+        chunked = self.request_version != 'HTTP/1.0'
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        if chunked:
+            self.send_header('Transfer-Encoding', 'chunked')
+        else:
+            self.send_header('Connection', 'close')
+            self.close_connection = True
+        self.end_headers()
+        passo = max(1, fake.tamanho_pedaco)
+        for i in range(0, len(texto), passo):
+            if i:
+                time.sleep(fake.atraso_pedaco)
+            evento = f'data: {json.dumps(_candidato(texto[i:i + passo]), ensure_ascii=False)}\r\n\r\n'.encode('utf-8')
+            self.wfile.write(b'%x\r\n%s\r\n' % (len(evento), evento) if chunked else evento)
+            self.wfile.flush()
+        if chunked:
+            self.wfile.write(b'0\r\n\r\n')
+
+
+class ServidorGeminiFake:
+    def __init__(self, host: str = '127.0.0.1', porta: int = 0, atraso_inicial: float = 0.0,
+                 atraso_pedaco: float = 0.0, tamanho_pedaco: int = 16,
+                 responder: Optional[Callable[[str], str]] = None, variacao: float = 0.0,
+                 taxa_erro: float = 0.0, status_erro: int = 503, semente: Optional[int] = None):
+        self.atraso_inicial = atraso_inicial
+        self.atraso_pedaco = atraso_pedaco
+        self.tamanho_pedaco = tamanho_pedaco
+        self.responder = responder or texto_padrao
+        self.variacao = variacao
+        self.taxa_erro = taxa_erro
+        self.status_erro = status_erro
+        self.chamadas = 0
+        self.erros = 0
+        self._rng = random.Random(semente)
+        handler = type('Handler', (_Handler,), {'servidor_fake': self})
+        self._http = ThreadingHTTPServer((host, porta), handler)
+        self._http.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, porta = self._http.server_address[:2]
+        return f'http://{host}:{porta}/v1beta'
+
+    def atraso(self) -> float:
+        return self.atraso_inicial + (self._rng.uniform(0, self.variacao) if self.variacao else 0.0)
+
+    def sortear_erro(self) -> bool:
+        return bool(self.taxa_erro) and self._rng.random() < self.taxa_erro
+
+    def iniciar(self) -> 'ServidorGeminiFake':
+        self._thread = threading.Thread(target=self._http.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def parar(self) -> None:
+        self._http.shutdown()
+        self._http.server_close()
+
+
+def main(argv=None):  # pragma: no cover - CLI
+    ap = argparse.ArgumentParser(description='Gemini falso local (use GEMINI_API_BASE=<url impressa>)')
+    ap.add_argument('--host', default='127.0.0.1')
+    ap.add_argument('--porta', type=int, default=8089)
+    ap.add_argument('--atraso-inicial', type=float, default=0.5)
+    ap.add_argument('--atraso-pedaco', type=float, default=0.05)
+    ap.add_argument('--tamanho-pedaco', type=int, default=16)
+    ap.add_argument('--variacao', type=float, default=0.0, help='Atraso extra aleatório (0..N s)')
+    ap.add_argument('--taxa-erro', type=float, default=0.0, help='Fração de respostas com erro (0..1)')
+    ap.add_argument('--status-erro', type=int, default=503)
+    args = ap.parse_args(argv)
+    servidor = ServidorGeminiFake(args.host, args.porta, args.atraso_inicial, args.atraso_pedaco, args.tamanho_pedaco,
+                                  variacao=args.variacao, taxa_erro=args.taxa_erro, status_erro=args.status_erro)
+    print(f'GEMINI_API_BASE={servidor.base_url}')
+    servidor._http.serve_forever()
+
+
+if __name__ == '__main__':  # pragma: no cover
+    main()
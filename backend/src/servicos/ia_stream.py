@@ -0,0 +1,242 @@
+"""Streaming SSE das rotas de IA (`?stream=1`).
+
+Eventos enviados (cada um é `event: <nome>` + `data: <json>`):
+  - `delta`: pedaço de texto do modelo, na ordem em que chega (`{"texto": ...}`);
+  - `item`:  valor JSON já completo dentro da resposta (`{"caminho": [...], "valor": ...}`),
+             só para rotas que respondem JSON (mapa mental, quiz) — ver `MontadorJSON`;
+  - `fim`:   o mesmo corpo/status da resposta sem stream (`{"status": ..., "resultado": ...}`);
+  - `erro`:  falha depois que o stream começou (o status HTTP já foi enviado).
+
+TTFB (do início da view até o primeiro `delta`) é registrado por endpoint em
+`registrar_ttfb`: log, janela local e lista em Redis `ia:ttfb:<endpoint>`.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from flask import Response, current_app, stream_with_context
+
+from servicos.gemini import ChamadaIA, abrir_fluxo, api_key, dados_de_texto
+
+SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no',  # nginx não segura os eventos em buffer
+}
+PREFIXO_TTFB = 'ia:ttfb:'
+JANELA_TTFB = int(os.getenv('IA_TTFB_WINDOW', '500'))
+
+_ttfb_local: dict[str, deque] = {}
+_ttfb_lock = threading.Lock()
+
+
+class MontadorJSON:
+    """Monta incrementalmente o JSON que o modelo escreve em pedaços.
+
+    `alimentar(pedaco)` devolve os valores que acabaram de ficar completos e cujo
+    caminho casa com um dos padrões (`'*'` casa qualquer chave/índice). Texto antes
+    do primeiro `{`/`[` (ex.: cerca ```json) é ignorado; `final` guarda a raiz.
+    """
+
+    def __init__(self, caminhos):
+        self.caminhos = [tuple(c) for c in caminhos]
+        self.final = None
+        self._buf = ''
+        self._pos = 0
+        self._pilha: list[dict] = []
+        self._fim_raiz = False
+        self._em_string = False
+        self._escape = False
+        self._inicio_string = 0
+        self._inicio_literal: Optional[int] = None
+
+    def _casa(self, caminho: tuple) -> bool:
+        return any(
+            len(p) == len(caminho) and all(a == '*' or a == b for a, b in zip(p, caminho))
+            for p in self.caminhos
+        )
+
+    def _caminho(self) -> tuple:
+        return tuple(e['chave'] if e['tipo'] == '{' else e['indice'] for e in self._pilha)
+
+    def _completar(self, trecho: str, saida: list) -> None:
+        try:
+            valor = json.loads(trecho)
+        except ValueError:
+            return
+        if not self._pilha:
+            self.final = valor
+            self._fim_raiz = True
+            return
+        caminho = self._caminho()
+        if self._casa(caminho):
+            saida.append((list(caminho), valor))
+
+    def _fechar_literal(self, i: int, saida: list) -> None:
+        if self._inicio_literal is not None:
+            self._completar(self._buf[self._inicio_literal:i].strip(), saida)
+            self._inicio_literal = None
+
+    def alimentar(self, pedaco: str) -> list:
+        saida: list = []
+        self._buf += pedaco
+        buf = self._buf
+        for i in range(self._pos, len(buf)):
+            if self._fim_raiz:
+                break
+            c = buf[i]
+            if self._em_string:
+                if self._escape:
+                    self._escape = False
+                elif c == '\\':
+                    self._escape = True
+                elif c == '"':
+                    self._em_string = False
+                    topo = self._pilha[-1]
+                    trecho = buf[self._inicio_string:i + 1]
+                    if topo['tipo'] == '{' and topo['esperando_chave']:
+                        topo['chave'] = json.loads(trecho)
+                    else:
+                        self._completar(trecho, saida)
+                continue
+            if not self._pilha:
+                if c in '{[':
+                    self._pilha.append({'tipo': c, 'inicio': i, 'chave': None, 'indice': 0, 'esperando_chave': c == '{'})
+                continue
+            if c == '"':
+                self._em_string = True
+                self._inicio_string = i
+            elif c in '{[':
+                self._pilha.append({'tipo': c, 'inicio': i, 'chave': None, 'indice': 0, 'esperando_chave': c == '{'})
+            elif c in '}]':
+                self._fechar_literal(i, saida)
+                inicio = self._pilha.pop()['inicio']
+                self._completar(buf[inicio:i + 1], saida)
+            elif c == ',':
+                self._fechar_literal(i, saida)
+                topo = self._pilha[-1]
+                if topo['tipo'] == '{':
+                    topo['esperando_chave'] = True
+                else:
+                    topo['indice'] += 1
+            elif c == ':':
+                self._pilha[-1]['esperando_chave'] = False
+            elif not c.isspace() and self._inicio_literal is None:
+                self._inicio_literal = i
+        self._pos = len(buf)
+        return saida
+
+
+def evento(nome: str, dados) -> bytes:
+    return f'event: {nome}\ndata: {json.dumps(dados, ensure_ascii=False)}\n\n'.encode('utf-8')
+
+
+def _redis():
+    try:
+        return getattr(current_app, 'redis', None)
+    except RuntimeError:
+        return None
+
+
+def registrar_ttfb(endpoint: str, ms: float) -> None:
+    logging.info('ia.stream ttfb endpoint=%s ms=%.1f', endpoint, ms)
+    with _ttfb_lock:
+        _ttfb_local.setdefault(endpoint, deque(maxlen=JANELA_TTFB)).append(ms)
+    r = _redis()
+    if r is not None:
+        try:
+            pipe = r.pipeline(transaction=False)
+            pipe.lpush(PREFIXO_TTFB + endpoint, round(ms, 1))
+            pipe.ltrim(PREFIXO_TTFB + endpoint, 0, JANELA_TTFB - 1)
+            pipe.execute()
+        except Exception:
+            pass
+
+
+def _percentil(ordenados: list, p: float) -> float:
+    return ordenados[min(len(ordenados) - 1, int(round(p * (len(ordenados) - 1))))]
+
+
+def resumo_ttfb() -> dict:
+    """{endpoint: {n, p50_ms, p95_ms, max_ms}} das últimas JANELA_TTFB amostras."""
+    amostras: dict[str, list] = {}
+    r = _redis()
+    if r is not None:
+        try:
+            for chave in r.scan_iter(match=PREFIXO_TTFB + '*', count=100):
+                chave = chave.decode() if isinstance(chave, bytes) else chave
+                amostras[chave[len(PREFIXO_TTFB):]] = [float(v) for v in r.lrange(chave, 0, -1)]
+        except Exception:
+            amostras = {}
+    if not amostras:
+        with _ttfb_lock:
+            amostras = {k: list(v) for k, v in _ttfb_local.items()}
+    resumo = {}
+    for endpoint, valores in amostras.items():
+        if not valores:
+            continue
+        ordenados = sorted(valores)
+        resumo[endpoint] = {
+            'n': len(ordenados),
+            'p50_ms': round(_percentil(ordenados, 0.5), 1),
+            'p95_ms': round(_percentil(ordenados, 0.95), 1),
+            'max_ms': round(ordenados[-1], 1),
+        }
+    return resumo
+
+
+class FluxoSSE:
+    """Converte pedaços de texto em eventos SSE (sem I/O; usado no Flask e no ASGI)."""
+
+    def __init__(self, chamada: ChamadaIA, registrar=registrar_ttfb):
+        self.chamada = chamada
+        self.montador = chamada.montador() if chamada.montador else None
+        self.registrar = registrar
+        self.ttfb_ms: Optional[float] = None
+        self._textos: list[str] = []
+
+    def pedaco(self, texto: str) -> bytes:
+        if self.ttfb_ms is None:
+            self.ttfb_ms = (time.perf_counter() - self.chamada.inicio) * 1000
+            self.registrar(self.chamada.endpoint or 'desconhecido', self.ttfb_ms)
+        self._textos.append(texto)
+        saida = evento('delta', {'texto': texto})
+        if self.montador is not None:
+            for caminho, valor in self.montador.alimentar(texto):
+                saida += evento('item', {'caminho': caminho, 'valor': valor})
+        return saida
+
+    def fim(self) -> bytes:
+        """Precisa de app context: reaproveita `responder` da rota sobre o texto acumulado."""
+        resp = current_app.make_response(self.chamada.responder(dados_de_texto(''.join(self._textos))))
+        return evento('fim', {'status': resp.status_code, 'resultado': resp.get_json(silent=True)})
+
+    def erro(self, exc: Exception) -> bytes:
+        logging.warning('ia.stream interrompido endpoint=%s: %s', self.chamada.endpoint, exc)
+        return evento('erro', {'error': 'Falha na chamada Gemini', 'details': str(exc)})
+
+
+def responder_sse(chamada: ChamadaIA):
+    """Caminho síncrono (gunicorn): abre o stream e devolve uma Response text/event-stream."""
+    if not api_key():
+        return chamada.falha({"error": "GOOGLE_API_KEY ausente."})
+    try:
+        textos, fechar = abrir_fluxo(chamada.prompt, chamada.timeout, chamada.modelo, chamada.generation_config)
+    except Exception as e:
+        return chamada.falha({"error": "Falha na chamada Gemini", "details": str(e)})
+    fluxo = FluxoSSE(chamada)
+
+    def gerar():
+        try:
+            for texto in textos:
+                yield fluxo.pedaco(texto)
+            yield fluxo.fim()
+        except Exception as e:
+            yield fluxo.erro(e)
+        finally:
+            fechar()
+
+    return Response(stream_with_context(gerar()), mimetype='text/event-stream', headers=SSE_HEADERS)
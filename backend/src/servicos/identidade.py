@@ -0,0 +1,116 @@
+"""Cache de identidade do usuário autenticado (Flask-Login e JWT).
+
+Quase toda rota só lê id/email/name/curso_id/has_onboarding de `current_user`,
+então não precisamos de um `User` ORM completo a cada request:
+
+  1. memo por request em `g` (várias leituras no mesmo request = 1 busca);
+  2. snapshot em Redis `user:ident:<id>` com TTL curto (compartilhado entre workers);
+  3. sem Redis: LRU local com TTL bem curto (limita o atraso entre workers);
+  4. só então `db.session.get(User, id)`.
+
+Toda escrita nesses campos deve chamar `invalidar_identidade(user_id)` depois do commit.
+Quem precisa alterar o usuário deve carregar o ORM (`db.session.get(User, current_user.id)`).
+"""
+import json
+import os
+from typing import Optional
+
+from flask import current_app, g, has_request_context
+from flask_login import UserMixin
+
+from models.models import db, User
+from servicos.ttl_cache import TTLCache
+
+CAMPOS = ('id', 'email', 'name', 'curso_id', 'has_onboarding', 'avatar_url', 'role')
+PREFIXO = 'user:ident:'
+REDIS_TTL = int(os.getenv('IDENTITY_CACHE_TTL', '60'))
+
+_local = TTLCache(
+    maxsize=int(os.getenv('IDENTITY_CACHE_LOCAL_MAX', '5000')),
+    ttl=float(os.getenv('IDENTITY_CACHE_LOCAL_TTL', '5')),
+)
+
+
+class UsuarioIdentidade(UserMixin):
+    """Snapshot somente-leitura de `User` com a interface que o Flask-Login espera."""
+
+    def __init__(self, **campos):
+        for campo in CAMPOS:
+            setattr(self, campo, campos.get(campo))
+        self.has_onboarding = bool(self.has_onboarding)
+        self.role = self.role or 'student'
+
+    def __repr__(self):
+        return f'<UsuarioIdentidade {self.id} {self.email}>'
+
+
+def _snapshot(user: User) -> dict:
+    return {campo: getattr(user, campo, None) for campo in CAMPOS}
+
+
+def _redis():
+    try:
+        return getattr(current_app, 'redis', None)
+    except RuntimeError:
+        return None
+
+
+def _memo() -> dict:
+    if not has_request_context():
+        return {}
+    if not hasattr(g, '_identidades'):
+        g._identidades = {}
+    return g._identidades
+
+
+def carregar_identidade(user_id) -> Optional[UsuarioIdentidade]:
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+    memo = _memo()
+    if user_id in memo:
+        return memo[user_id]
+
+    r = _redis()
+    snap = None
+    if r is not None:
+        try:
+            bruto = r.get(PREFIXO + str(user_id))
+            snap = json.loads(bruto) if bruto else None
+        except Exception:
+            snap = None
+    else:
+        snap = _local.get(user_id)
+
+    if snap is None:
+        user = db.session.get(User, user_id)
+        if user is None:
+            memo[user_id] = None
+            return None
+        snap = _snapshot(user)
+        if r is not None:
+            try:
+                r.set(PREFIXO + str(user_id), json.dumps(snap), ex=REDIS_TTL)
+            except Exception:
+                pass
+        else:
+            _local.set(user_id, snap)
+
+    ident = UsuarioIdentidade(**snap)
+    memo[user_id] = ident
+    return ident
+
+
+def invalidar_identidade(user_id) -> None:
+    if user_id is None:
+        return
+    user_id = int(user_id)
+    _local.pop(user_id)
+    _memo().pop(user_id, None)
+    r = _redis()
+    if r is not None:
+        try:
+            r.delete(PREFIXO + str(user_id))
+        except Exception:
+            pass
@@ -0,0 +1,246 @@
+"""Ingestão em lote de conteúdos (currículo com dezenas de milhares de linhas).
+
+Entrada em JSONL ou CSV, lida em streaming, uma linha por conteúdo:
+  {"materia": "Biologia", "topic": "Célula", "content_html": "<h1>…</h1>", "subject": opcional, "curso": opcional}
+
+Por lote (`lote` linhas):
+1. valida (campos obrigatórios, tamanhos); linhas inválidas são contadas e puladas;
+2. resolve matéria/curso pelo nome (criando os que faltam) e o vínculo curso_materia;
+3. calcula os campos derivados (servicos/conteudos.derivar + content_hash) num pool
+   de processos — é a parte cara (parser HTML);
+4. compara content_hash com o banco pela chave natural (materia_id, topic) e só
+   grava linhas novas ou alteradas: reimportar o mesmo arquivo não escreve nada;
+5. upsert na chave natural: Postgres via COPY para tabela temporária + INSERT … SELECT
+   ON CONFLICT; SQLite via executemany de INSERT … ON CONFLICT (servicos/upsert.py).
+
+Como não passa pelo flush do ORM, incrementa catalog_version explicitamente
+(servicos/catalogo.py) quando o lote gravou algo. Uso: scripts/ingest_contents.py.
+"""
+import csv
+import io
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from models.models import db, Curso, CursoMateria, HorariosEscolares, SubjectContent
+from servicos import catalogo
+from servicos.conteudos import derivar, hash_conteudo
+from servicos.upsert import insert_upsert
+
+MAX_TOPIC = 255
+MAX_ERROS = 20
+TABELA_TEMP = 'tmp_ingestao_conteudos'
+CHAVE = ('materia_id', 'topic')
+# colunas gravadas; created_at só na inserção
+COLUNAS = ('subject', 'topic', 'materia_id', 'content_html', 'content_text', 'content_outline',
+           'content_sections', 'word_count', 'search_text', 'content_hash', 'created_at')
+ATUALIZAVEIS = tuple(c for c in COLUNAS if c not in CHAVE + ('created_at',))
+JSON = ('content_outline', 'content_sections')
+
+
+def ler(arquivo, formato: str) -> Iterator[Tuple[int, Any]]:
+    """(nº da linha, registro) em streaming; JSON inválido vira registro None."""
+    if formato == 'csv':
+        for n, registro in enumerate(csv.DictReader(arquivo), start=2):
+            yield n, registro
+        return
+    for n, linha in enumerate(arquivo, start=1):
+        if not linha.strip():
+            continue
+        try:
+            yield n, json.loads(linha)
+        except ValueError:
+            yield n, None
+
+
+def validar(registro: Any) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    if not isinstance(registro, dict):
+        return None, 'registro inválido'
+    materia = str(registro.get('materia') or '').strip()
+    topic = str(registro.get('topic') or '').strip()
+    html = registro.get('content_html')
+    if not materia or not topic:
+        return None, 'materia e topic são obrigatórios'
+    if not isinstance(html, str) or not html.strip():
+        return None, 'content_html vazio'
+    if len(topic) > MAX_TOPIC:
+        return None, f'topic com mais de {MAX_TOPIC} caracteres'
+    return {
+        'materia': materia,
+        'curso': str(registro.get('curso') or '').strip() or None,
+        'subject': str(registro.get('subject') or '').strip() or materia,
+        'topic': topic,
+        'content_html': html,
+    }, None
+
+
+def preparar(linha: Dict[str, Any]) -> Dict[str, Any]:
+    """Campos derivados de uma linha validada (roda nos processos do pool)."""
+    return dict(derivar(linha['topic'], linha['content_html']),
+                content_hash=hash_conteudo(linha['subject'], linha['topic'], linha['content_html']))
+
+
+class _Nomes:
+    """Matérias, cursos e vínculos por nome, criados sob demanda (tabelas pequenas: carregadas uma vez).
+
+    Matéria criada aqui fica sem horário (NULL): a grade é definida fora da ingestão."""
+
+    def __init__(self):
+        self.materias = {m: i for i, m in db.session.query(HorariosEscolares.id, HorariosEscolares.materia)
+                         .order_by(HorariosEscolares.id.desc())}
+        self.cursos = {n: i for i, n in db.session.query(Curso.id, Curso.nome).order_by(Curso.id.desc())}
+        self.vinculos = set(db.session.query(CursoMateria.curso_id, CursoMateria.materia_id))
+        self.criados = {'materias': 0, 'cursos': 0, 'vinculos': 0}
+
+    def resolver(self, linhas: List[Dict[str, Any]]) -> None:
+        novas = {linha['materia'] for linha in linhas} - self.materias.keys()
+        novos = {linha['curso'] for linha in linhas if linha['curso']} - self.cursos.keys()
+        objetos = [HorariosEscolares(materia=m) for m in sorted(novas)]
+        objetos += [Curso(nome=c) for c in sorted(novos)]
+        if objetos:
+            db.session.add_all(objetos)
+            db.session.flush()
+            for o in objetos:
+                if isinstance(o, Curso):
+                    self.cursos[o.nome] = o.id
+                else:
+                    self.materias[o.materia] = o.id
+            self.criados['materias'] += len(novas)
+            self.criados['cursos'] += len(novos)
+        vinculos = {(self.cursos[linha['curso']], self.materias[linha['materia']])
+                    for linha in linhas if linha['curso']} - self.vinculos
+        if vinculos:
+            db.session.add_all([CursoMateria(curso_id=c, materia_id=m) for c, m in sorted(vinculos)])
+            self.vinculos |= vinculos
+            self.criados['vinculos'] += len(vinculos)
+        for linha in linhas:
+            linha['materia_id'] = self.materias[linha['materia']]
+
+
+def _hashes_existentes(linhas: List[Dict[str, Any]]) -> Dict[Tuple[int, str], Optional[str]]:
+    # IN por coluna (portável) e o par exato conferido aqui
+    chaves = {(linha['materia_id'], linha['topic']) for linha in linhas}
+    q = (db.session.query(SubjectContent.materia_id, SubjectContent.topic, SubjectContent.content_hash)
+         .filter(SubjectContent.materia_id.in_({m for m, _ in chaves}), SubjectContent.topic.in_({t for _, t in chaves})))
+    return {(m, t): h for m, t, h in q if (m, t) in chaves}
+
+
+def _upsert_executemany(linhas: List[Dict[str, Any]]) -> None:
+    stmt = insert_upsert(SubjectContent)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(CHAVE),
+        set_={c: stmt.excluded[c] for c in ATUALIZAVEIS},
+        where=SubjectContent.content_hash.is_distinct_from(stmt.excluded.content_hash),
+    )
+    db.session.execute(stmt, [{c: linha[c] for c in COLUNAS} for linha in linhas])
+
+
+def _valor_copy(coluna: str, valor: Any) -> Any:
+    if valor is None:
+        return r'\N'
+    if coluna in JSON:
+        return json.dumps(valor, ensure_ascii=False)
+    if isinstance(valor, datetime):
+        return valor.isoformat()
+    return valor
+
+
+def _upsert_copy(linhas: List[Dict[str, Any]]) -> None:
+    """Postgres: COPY para uma tabela temporária e um único INSERT … SELECT … ON CONFLICT."""
+    conn = db.session.connection()
+    colunas = ', '.join(COLUNAS)
+    conn.exec_driver_sql(
+        f"CREATE TEMP TABLE IF NOT EXISTS {TABELA_TEMP} AS SELECT {colunas} FROM subject_contents WITH NO DATA")
+    buf = io.StringIO()
+    escritor = csv.writer(buf)
+    for linha in linhas:
+        escritor.writerow([_valor_copy(c, linha[c]) for c in COLUNAS])
+    buf.seek(0)
+    cursor = conn.connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {TABELA_TEMP} ({colunas}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buf)
+    finally:
+        cursor.close()
+    atualizar = ', '.join(f"{c} = EXCLUDED.{c}" for c in ATUALIZAVEIS)
+    conn.exec_driver_sql(
+        f"INSERT INTO subject_contents ({colunas}) SELECT {colunas} FROM {TABELA_TEMP} "
+        f"ON CONFLICT ({', '.join(CHAVE)}) DO UPDATE SET {atualizar} "
+        "WHERE subject_contents.content_hash IS DISTINCT FROM EXCLUDED.content_hash")
+    conn.exec_driver_sql(f"TRUNCATE {TABELA_TEMP}")
+
+
+def ingerir(registros: Iterable[Tuple[int, Any]], lote: int = 1000, processos: int = 0,
+            copy: bool = True, progresso: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """Importa os registros de `ler` (com commit por lote). `processos=0` calcula no próprio processo."""
+    inicio = time.perf_counter()
+    stats = {'lidas': 0, 'invalidas': 0, 'inseridas': 0, 'atualizadas': 0, 'inalteradas': 0, 'erros': []}
+    nomes = _Nomes()
+    usar_copy = copy and db.engine.dialect.name == 'postgresql'
+    pool = ProcessPoolExecutor(max_workers=processos) if processos > 0 else None
+    try:
+        pendentes: List[Dict[str, Any]] = []
+        for n, registro in registros:
+            stats['lidas'] += 1
+            linha, erro = validar(registro)
+            if erro:
+                stats['invalidas'] += 1
+                if len(stats['erros']) < MAX_ERROS:
+                    stats['erros'].append({'linha': n, 'erro': erro})
+                continue
+            pendentes.append(linha)
+            if len(pendentes) >= lote:
+                _gravar_lote(pendentes, nomes, pool, processos, usar_copy, stats)
+                pendentes = []
+                if progresso:
+                    progresso(_resumo(stats, inicio, nomes))
+        if pendentes:
+            _gravar_lote(pendentes, nomes, pool, processos, usar_copy, stats)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return _resumo(stats, inicio, nomes)
+
+
+def _gravar_lote(linhas, nomes: _Nomes, pool, processos: int, usar_copy: bool, stats: Dict[str, Any]) -> None:
+    # repetição da chave no mesmo lote: vale a última
+    linhas = list({(linha['materia'], linha['topic']): linha for linha in linhas}.values())
+    nomes.resolver(linhas)
+    if pool is not None:
+        derivados = pool.map(preparar, linhas, chunksize=max(1, len(linhas) // (processos * 4)))
+    else:
+        derivados = map(preparar, linhas)
+    agora = datetime.now()
+    for linha, d in zip(linhas, derivados):
+        linha.update(d, created_at=agora)
+
+    existentes = _hashes_existentes(linhas)
+    gravar = []
+    for linha in linhas:
+        chave = (linha['materia_id'], linha['topic'])
+        if chave not in existentes:
+            stats['inseridas'] += 1
+        elif existentes[chave] != linha['content_hash']:
+            stats['atualizadas'] += 1
+        else:
+            stats['inalteradas'] += 1
+            continue
+        gravar.append(linha)
+    if gravar:
+        (_upsert_copy if usar_copy else _upsert_executemany)(gravar)
+        # matérias/cursos/vínculos novos já incrementam no flush do ORM
+        if not db.session.info.get('catalogo_alterado'):
+            catalogo.incrementar_versao()
+    db.session.commit()
+
+
+def _resumo(stats: Dict[str, Any], inicio: float, nomes: _Nomes) -> Dict[str, Any]:
+    segundos = time.perf_counter() - inicio
+    return dict(stats, criados=dict(nomes.criados), segundos=round(segundos, 3),
+                linhas_por_segundo=round(stats['lidas'] / segundos, 1) if segundos > 0 else None)
+
+
+def abrir(caminho: str):
+    return sys.stdin if caminho == '-' else open(caminho, encoding='utf-8', newline='')
@@ -0,0 +1,150 @@
+"""Micro-quiz incremental: conteúdo concluído -> questões anexadas ao quiz da semana.
+
+Ao concluir um conteúdo, só ele é analisado (candidatas do banco de questões,
+seleção igual à do quiz semanal, sem repetir o histórico do usuário nem o que já
+está no quiz) e o bucket é anexado ao WeeklyQuiz da semana com `version + 1`.
+Assim o quiz fica sempre em dia e não depende da reconstrução completa.
+
+O trabalho roda fora da requisição: na fila `evolutiva` do rq (serviço `worker`
+do docker-compose) quando há Redis; senão numa thread daemon do próprio processo.
+A execução é idempotente: conteúdo já presente no quiz da semana não é reanexado.
+"""
+import hashlib
+import logging
+import os
+import random
+import threading
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Optional
+
+from flask import current_app, has_app_context
+
+from models.models import db, SubjectContent, WeeklyQuiz
+from servicos import banco_questoes, conteudos
+from servicos.questoes_lsh import HistoricoQuestoes, IndiceLSH, registrar_questoes
+
+FILA = os.getenv('QUIZ_MICRO_QUEUE', 'evolutiva')
+POR_CONTEUDO = max(3, min(5, int(os.getenv('QUIZ_MICRO_PER_CONTENT', '4'))))
+
+_APP = None  # app do worker rq (fora de requisição não há app context)
+_RQ_REDIS = None
+
+
+def _rng(user_id: int, content_id: int, week_start: date) -> random.Random:
+    seed = hashlib.sha256(f'{user_id}-{week_start.isoformat()}-{content_id}'.encode()).hexdigest()
+    return random.Random(int(seed, 16) % (2 ** 32))
+
+
+def anexar_conteudo(user_id: int, content_id: int, week_start: date, per_content: int = POR_CONTEUDO) -> Dict[str, Any]:
+    """Anexa ao quiz da semana as questões de um conteúdo (com commit)."""
+    from routes.quiz_gen_routes import select_content_bucket  # import tardio: rotas importam serviços
+
+    sc = db.session.get(SubjectContent, content_id)
+    if sc is None:
+        return {'status': 'missing_content', 'added': 0}
+    row = (
+        db.session.query(WeeklyQuiz)
+        .filter(WeeklyQuiz.user_id == user_id, WeeklyQuiz.week_start == week_start)
+        .with_for_update()
+        .first()
+    )
+    existentes = banco_questoes.materializar(row.data) if row else []
+    if any(q.get('source') == content_id for q in existentes):
+        return {'status': 'already_present', 'added': 0, 'version': row.version}
+
+    conteudo = {'id': sc.id, 'subject': sc.subject or '', 'title': sc.topic or '', 'text': conteudos.texto_de(sc)}
+    historico = HistoricoQuestoes(user_id, excluir_semana=week_start)
+    escolhidas, _ = select_content_bucket(conteudo, per_content, historico)
+
+    indice = IndiceLSH()
+    for q in existentes:
+        indice.adicionar_se_nova(len(indice), q.get('question', ''))
+    rng = _rng(user_id, content_id, week_start)
+    novos = [
+        banco_questoes.embaralhar_opcoes(q, rng)
+        for q in escolhidas
+        if indice.adicionar_se_nova(len(indice), q.get('question', ''))
+    ]
+    if not novos:
+        return {'status': 'empty', 'added': 0, 'version': row.version if row else None}
+
+    entradas = banco_questoes.referencias(novos)
+    if row:
+        row.data = list(row.data or []) + entradas
+        row.version = (row.version or 1) + 1
+    else:
+        row = WeeklyQuiz(user_id=user_id, week_start=week_start, status='ready', version=1, data=entradas)
+        db.session.add(row)
+    registrar_questoes(user_id, week_start, [q.get('question', '') for q in existentes + novos])
+    db.session.commit()
+    return {'status': 'appended', 'added': len(novos), 'version': row.version}
+
+
+def executar(user_id: int, content_id: int, week_start: str) -> Dict[str, Any]:
+    """Ponto de entrada do job (rq ou thread)."""
+    global _APP
+    if has_app_context():
+        return _executar(user_id, content_id, date.fromisoformat(week_start))
+    if _APP is None:
+        from app_factory import create_app  # worker rq: cria a app uma vez por processo
+        _APP = create_app()
+    with _APP.app_context():
+        return _executar(user_id, content_id, date.fromisoformat(week_start))
+
+
+def _executar(user_id: int, content_id: int, week_start: date) -> Dict[str, Any]:
+    try:
+        return anexar_conteudo(user_id, content_id, week_start)
+    except Exception:
+        db.session.rollback()
+        logging.exception(f"micro-quiz user={user_id} content={content_id} falhou")
+        raise
+
+
+def _em_thread(app, user_id: int, content_id: int, week_start: str) -> None:
+    with app.app_context():
+        try:
+            _executar(user_id, content_id, date.fromisoformat(week_start))
+        except Exception:
+            pass  # já logado
+
+
+def _fila_rq():
+    """Fila rq quando o Redis da app está disponível (rq precisa de conexão sem decode)."""
+    global _RQ_REDIS
+    if getattr(current_app, 'redis', None) is None:
+        return None
+    try:
+        from redis import Redis  # type: ignore
+        from rq import Queue  # type: ignore
+        if _RQ_REDIS is None:
+            _RQ_REDIS = Redis(**{
+                k: v for k, v in current_app.redis.connection_pool.connection_kwargs.items()
+                if k not in ('decode_responses', 'encoding', 'encoding_errors')
+            })
+        return Queue(FILA, connection=_RQ_REDIS)
+    except Exception as e:
+        logging.warning(f"micro-quiz: rq indisponível ({e}); usando thread")
+        return None
+
+
+def enfileirar(user_id: int, content_id: int, week_start: Optional[date] = None) -> str:
+    """Agenda `executar` fora da requisição (semana corrente por padrão); devolve 'rq' ou 'thread'."""
+    if week_start is None:
+        hoje = datetime.now()
+        week_start = (hoje - timedelta(days=hoje.weekday())).date()  # mesma segunda de get_week_start_date
+    semana = week_start.isoformat()
+    fila = _fila_rq()
+    if fila is not None:
+        try:
+            # job_id fixo: conclusões repetidas do mesmo conteúdo não duplicam trabalho na fila
+            fila.enqueue(executar, user_id, content_id, semana,
+                         job_id=f'micro-quiz-{user_id}-{content_id}-{semana}', result_ttl=3600, failure_ttl=86400)
+            return 'rq'
+        except Exception as e:
+            logging.warning(f"micro-quiz: falha ao enfileirar ({e}); usando thread")
+    threading.Thread(
+        target=_em_thread, args=(current_app._get_current_object(), user_id, content_id, semana), daemon=True,
+    ).start()
+    return 'thread'
+
@@ -137,16 +137,18 @@ def _generate_schedule_covering_all(
     user: UserPreferences,
     revisoes_agendadas: Optional[Dict[str, List[StudyBlock]]] = None,
     max_days: int = 365,
+    rng: Optional[random.Random] = None,
 ) -> List[DailyPlan]:
     """Gera dias sucessivos seguindo os dias disponíveis do usuário até alocar todo o conteúdo.
 
     - Sábado: mantém a regra original (inclui somente revisões agendadas, se houver).
     - Domingo: trata como dia normal, se configurado em available_days.
     - Limite de segurança: max_days para evitar loop infinito em configurações inválidas.
+    - rng: embaralhamento com semente (templates de plano); padrão o `random` global.
     """
     days: List[DailyPlan] = []
     content_list = list(conteudos_pendentes + novos_conteudos)
-    random.shuffle(content_list)
+    (rng or random).shuffle(content_list)
     content_queue = deque(content_list)
 
     revisoes_agendadas = revisoes_agendadas or {}
@@ -221,7 +223,7 @@ def _generate_schedule_covering_all(
 
     return days
 
-def allocate_contents(conteudos_pendentes, novos_conteudos, daily_structure, user, revisoes_agendadas=None):
+def allocate_contents(conteudos_pendentes, novos_conteudos, daily_structure, user, revisoes_agendadas=None, rng=None):
     """Compat: mantém a assinatura, mas agora gera até cobrir todo o conteúdo.
 
     Continua respeitando available_days e a regra de sábado.
@@ -232,6 +234,7 @@ def allocate_contents(conteudos_pendentes, novos_conteudos, daily_structure, use
         daily_structure=daily_structure,
         user=user,
         revisoes_agendadas=revisoes_agendadas,
+        rng=rng,
     )
 
 def create_smart_goals(schedule: List[DailyPlan], user: UserPreferences) -> List[str]:
@@ -302,14 +305,14 @@ def _coerce_semana_anterior(semana):
         return None
 
 
-def generate_study_plan(user: UserPreferences, contents: List[Conteudo], semana_anterior: Optional[List[DailyPlan]] = None, plano_dados_salvo: Optional[dict] = None):
+def generate_study_plan(user: UserPreferences, contents: List[Conteudo], semana_anterior: Optional[List[DailyPlan]] = None, plano_dados_salvo: Optional[dict] = None, rng: Optional[random.Random] = None):
     try:
         prioritized_contents = prioritize_contents(contents, user)
         daily_structure = create_daily_structure(user)
         semana_prev = _coerce_semana_anterior(semana_anterior)
         conteudos_pendentes = get_pending_blocks(semana_prev) if semana_prev else []
         revisoes_agendadas = extrair_revisoes_agendadas(plano_dados_salvo)
-        weekly_schedule = allocate_contents(conteudos_pendentes, prioritized_contents, daily_structure, user, revisoes_agendadas)
+        weekly_schedule = allocate_contents(conteudos_pendentes, prioritized_contents, daily_structure, user, revisoes_agendadas, rng)
         if conteudos_pendentes:
             bloco_revisao = StudyBlock(
                 id=-1,
@@ -421,4 +424,129 @@ def extrair_revisoes_agendadas(plano_dados):
             # Pega revisões marcadas pelo usuário (id > 0 e activity_type revisão/review)
             if bloco.get("activity_type") in ["revisão", "review"] and bloco.get("id", 0) > 0:
                 revisoes.setdefault(data, []).append(StudyBlock(**bloco))
-    return revisoes
\ No newline at end of file
+    return revisoes
+
+# --- Replanejamento incremental ---
+# Em vez de recarregar o catálogo e gerar tudo de novo, parte do plano salvo e
+# de um conjunto de mudanças; só os dias a partir do primeiro dia afetado são
+# reempacotados. Dias anteriores (histórico) ficam intactos.
+
+TIPOS_REVISAO = ("revisão", "review")
+FORMATO_DATA = "%d/%m/%Y"
+
+
+def _data(valor: str):
+    return datetime.strptime(valor, FORMATO_DATA).date()
+
+
+def _fixo(bloco: dict) -> bool:
+    # revisões (marcadas pelo usuário ou a "Revisão Geral") ficam presas ao seu dia
+    return bloco.get("activity_type") in TIPOS_REVISAO
+
+
+def replanejar_incremental(plano_dados: dict, user: UserPreferences, concluidos=(), dias_perdidos=(),
+                           preferencias_mudaram: bool = False, hoje=None, max_days: int = 365):
+    """Aplica um conjunto de mudanças ao plano salvo e recalcula só os dias afetados.
+
+    - concluidos: ids de conteúdo ou {"id", "date"}; no passado/hoje o bloco vira "ok",
+      num dia futuro ele sai do plano (estudado adiantado) e os dias seguintes se ajustam.
+    - dias_perdidos: datas 'dd/MM/YYYY'; os blocos do dia voltam para a fila como pendentes
+      (com prioridade) a partir de hoje, e dias futuros perdidos ficam sem conteúdo.
+    - preferencias_mudaram: nova estrutura diária/dias disponíveis a partir de hoje.
+
+    Retorna (novo_plano, diff), onde diff lista as datas alteradas/adicionadas/removidas.
+    """
+    hoje = hoje or datetime.now().date()
+    antigos = {d["date"]: d for d in (plano_dados or {}).get("days") or []}
+    dias = sorted((dict(d, blocks=[dict(b) for b in d.get("blocks") or []]) for d in antigos.values()),
+                  key=lambda d: _data(d["date"]))
+    por_data = {d["date"]: d for d in dias}
+    inicio = hoje if preferencias_mudaram else None
+
+    def antecipar(dia):
+        nonlocal inicio
+        inicio = dia if inicio is None else min(inicio, dia)
+
+    for item in concluidos or ():
+        cid, data = (item.get("id"), item.get("date")) if isinstance(item, dict) else (item, None)
+        candidatos = [por_data[data]] if data in por_data else dias
+        achados = [(d, b) for d in candidatos for b in d["blocks"] if str(b.get("id")) == str(cid)]
+        # blocos nascem "ok"; prefere o que estava pendente/com dificuldade
+        alvo = next((a for a in achados if a[1].get("status") != "ok"), achados[0] if achados else None)
+        if alvo is None:
+            continue
+        dia, bloco = alvo
+        if _data(dia["date"]) > hoje:
+            dia["blocks"].remove(bloco)
+            antecipar(_data(dia["date"]))
+        else:
+            bloco["status"] = "ok"
+
+    bloqueados = set()
+    atrasados: List[dict] = []
+    for data in dias_perdidos or ():
+        dia = por_data.get(data)
+        if dia is None:
+            continue
+        bloqueados.add(data)
+        atrasados.extend(dict(b, status="pendente") for b in dia["blocks"])
+        dia["blocks"] = []
+        antecipar(max(hoje, _data(data)))
+
+    if inicio is not None:
+        mantidos = [d for d in dias if _data(d["date"]) < inicio]
+        fixos: Dict[str, List[dict]] = {}
+        fila = deque(atrasados)
+        for d in dias:
+            if _data(d["date"]) < inicio:
+                continue
+            for b in d["blocks"]:
+                if _fixo(b):
+                    fixos.setdefault(d["date"], []).append(b)
+                elif d["date"] not in bloqueados:
+                    fila.append(b)
+        refeitos = _reempacotar(fila, fixos, bloqueados, inicio, user, max_days)
+        dias = mantidos + [dict(antigos.get(d["date"]) or {"focus_area": None}, **d) for d in refeitos]
+        for d in mantidos:
+            if d["date"] in bloqueados:
+                d["total_study_time"] = sum(int(b.get("duration") or 0) for b in d["blocks"])
+
+    novos = {d["date"]: d for d in dias}
+    diff = {
+        "from": inicio.strftime(FORMATO_DATA) if inicio else None,
+        "added": [k for k in novos if k not in antigos],
+        "removed": [k for k in antigos if k not in novos],
+        "changed": [k for k in novos if k in antigos and novos[k] != antigos[k]],
+    }
+    novo_plano = dict(plano_dados or {}, days=dias)
+    novo_plano["total_hours"] = sum(int(d.get("total_study_time") or 0) for d in dias) // 60
+    return novo_plano, diff
+
+
+def _reempacotar(fila, fixos, bloqueados, inicio, user: UserPreferences, max_days: int) -> List[dict]:
+    """Redistribui a fila nos slots da estrutura diária a partir de `inicio` (mesmas regras de
+    _generate_schedule_covering_all: dias disponíveis e sábado só com revisões)."""
+    estrutura = create_daily_structure(user)
+    disponiveis = set(_available_weekday_indices(user.available_days))
+    saturday_only = disponiveis == {5}
+    ultimo_fixo = max((_data(k) for k in fixos), default=inicio)
+    dias: List[dict] = []
+    for offset in range(max_days):
+        atual = inicio + timedelta(days=offset)
+        if not fila and atual > ultimo_fixo:
+            break
+        data = atual.strftime(FORMATO_DATA)
+        blocos = list(fixos.get(data, []))
+        livre = atual.weekday() in disponiveis and data not in bloqueados
+        if livre and fila and (atual.weekday() != 5 or saturday_only):
+            for slot in estrutura:
+                if not fila:
+                    break
+                bloco = fila.popleft()
+                blocos.append(dict(bloco, start_time=slot["start_time"], end_time=slot["end_time"],
+                                   activity_type=bloco["activity_type"] if _fixo(bloco) else slot["activity_type"],
+                                   duration=slot["duration"]))
+        if blocos:
+            dias.append({"date": data, "blocks": blocos,
+                         "total_study_time": sum(int(b.get("duration") or 0) for b in blocos)})
+    return dias
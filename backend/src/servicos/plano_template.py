@@ -0,0 +1,143 @@
+"""Templates de plano de estudo compartilhados por fingerprint de preferências.
+
+`generate_study_plan` só depende de (curso, dias disponíveis, tempo diário, ritmo,
+estilo, horário de início, áreas de foco, catálogo do curso e o dia de hoje) além
+do embaralhamento. Em ondas de onboarding milhares de alunos caem no mesmo
+fingerprint: o primeiro gera o template (embaralhado com semente = fingerprint) e
+os demais só derivam o seu plano permutando os conteúdos entre os slots com a
+semente (fingerprint, user_id) — mesma distribuição do shuffle original, sem
+recarregar o catálogo.
+
+- Cache: LRU local por worker (acerto em microssegundos) e Redis `plano:tpl:<fp>`
+  compartilhado entre workers, expirando no fim do dia (as datas do plano partem de hoje).
+- Versão do catálogo (catalog_version, ver servicos/catalogo.py) entra no fingerprint:
+  qualquer escrita no catálogo gera outra chave e o template antigo expira.
+- Planos com pendências ou revisões herdadas do plano anterior são pessoais: não usam cache.
+"""
+import hashlib
+import json
+import os
+import random
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import current_app
+
+from servicos.ttl_cache import TTLCache
+
+PREFIXO = 'plano:tpl:'
+TIPOS_REVISAO = ('revisão', 'review')
+CAMPOS_CONTEUDO = ('id', 'subject', 'topic', 'status')
+
+_local = TTLCache(
+    maxsize=int(os.getenv('PLANO_TEMPLATE_LOCAL_MAX', '64')),
+    ttl=float(os.getenv('PLANO_TEMPLATE_LOCAL_TTL', '600')),
+)
+
+
+def fingerprint(curso_id: Optional[int], prefs, versao_catalogo: int, dia: date) -> str:
+    """`prefs` = UserPreferences do planner; `versao_catalogo` = servicos.catalogo.atual().versao."""
+    partes = [
+        str(curso_id or ''),
+        ','.join(sorted(d.strip().lower() for d in prefs.available_days or [])),
+        str(prefs.daily_study_time),
+        prefs.pace or '',
+        prefs.learning_style or '',
+        prefs.start_time or '',
+        ','.join(prefs.focus_areas or []),
+        str(versao_catalogo),
+        dia.isoformat(),
+    ]
+    return hashlib.sha1('|'.join(partes).encode()).hexdigest()
+
+
+def plano_pessoal(plano_dados_salvo: Optional[dict]) -> bool:
+    """Pendências (pendente/dificuldade) ou revisões marcadas no plano anterior mudam a geração."""
+    for dia in (plano_dados_salvo or {}).get('days') or []:
+        for b in dia.get('blocks') or []:
+            if (b.get('status') or 'ok') in ('pendente', 'dificuldade'):
+                return True
+            if b.get('activity_type') in TIPOS_REVISAO and (b.get('id') or 0) > 0:
+                return True
+    return False
+
+
+def rng_template(fp: str) -> random.Random:
+    return random.Random(fp)
+
+
+def _redis():
+    try:
+        return getattr(current_app, 'redis', None)
+    except RuntimeError:
+        return None
+
+
+def _segundos_ate_fim_do_dia() -> int:
+    agora = datetime.now()
+    return max(60, int((datetime.combine(agora.date() + timedelta(days=1), time.min) - agora).total_seconds()))
+
+
+def buscar(fp: str) -> Optional[Dict[str, Any]]:
+    template = _local.get(fp)
+    if template is not None:
+        return template
+    r = _redis()
+    if r is None:
+        return None
+    try:
+        bruto = r.get(PREFIXO + fp)
+    except Exception:
+        return None
+    if not bruto:
+        return None
+    template = json.loads(bruto)
+    _local.set(fp, template)
+    return template
+
+
+def registrar(fp: str, plano: dict, contents) -> Optional[Dict[str, Any]]:
+    """Guarda o plano recém-gerado (com rng_template(fp)) como template do fingerprint."""
+    if not plano or not plano.get('days'):
+        return None
+    template = {
+        'fingerprint': fp,
+        'plano': plano,
+        'tarefas_rapidas': [f"{c.subject} - {c.topic}" for c in contents if c.difficulty == "easy"],
+        'tarefas_basicas': [f"{c.subject} - {c.topic}" for c in contents if c.difficulty != "hard"],
+    }
+    ttl = _segundos_ate_fim_do_dia()
+    _local.set(fp, template, ttl=min(ttl, _local.ttl))
+    r = _redis()
+    if r is not None:
+        try:
+            r.set(PREFIXO + fp, json.dumps(template, ensure_ascii=False), ex=ttl)
+        except Exception:
+            pass
+    return template
+
+
+def derivar(template: Dict[str, Any], user_id: int, focus_areas: Optional[List[str]] = None) -> Tuple[dict, dict]:
+    """Plano do usuário a partir do template: conteúdos permutados entre os slots com semente por usuário."""
+    plano = template['plano']
+    dias = [dict(d, blocks=list(d['blocks'])) for d in plano['days']]
+    slots = [(i, j) for i, d in enumerate(dias) for j, b in enumerate(d['blocks'])
+             if b.get('activity_type') not in TIPOS_REVISAO]
+    conteudos = [{k: dias[i]['blocks'][j].get(k) for k in CAMPOS_CONTEUDO} for i, j in slots]
+    random.Random(f"{template['fingerprint']}:{user_id}").shuffle(conteudos)
+    for (i, j), c in zip(slots, conteudos):
+        dias[i]['blocks'][j] = dict(dias[i]['blocks'][j], **c)
+    novo = dict(plano, days=dias)
+
+    hoje = datetime.now().strftime('%d/%m/%Y')
+    dia_hoje = next((d for d in dias if d['date'] == hoje), None)
+    cards = {
+        "foco_do_dia": dia_hoje['blocks'][0]['subject'] if dia_hoje and dia_hoje['blocks'] else None,
+        "tarefas_do_dia": [f"{b['subject']} - {b['topic']}" for b in dia_hoje['blocks']] if dia_hoje else [],
+        "tarefas_da_semana": [f"{b['subject']} - {b['topic']}" for d in dias for b in d['blocks']],
+        "tarefas_pendentes": [],
+        "foco_principal": (focus_areas[0] if focus_areas else None),
+        "tarefas_rapidas": template['tarefas_rapidas'],
+        "tarefas_basicas": template['tarefas_basicas'],
+    }
+    return novo, cards
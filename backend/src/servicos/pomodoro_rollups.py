@@ -0,0 +1,102 @@
+"""Rollups de tempo de foco do Pomodoro (buckets diários e semanais por usuário).
+
+- Escrita: cada sessão de foco soma sua duração nos buckets do dia e da semana
+  com um único UPSERT (`focus_seconds = focus_seconds + excluded.focus_seconds`).
+- Leitura: gráficos consultam só `pomodoro_rollups` — ~30 linhas por mês no
+  modo diário, independentemente de quantas sessões o usuário registrou.
+- Recompute: um GROUP BY (user_id, dia) no banco e a dobra dia -> semana em
+  memória, com inserção em lote; usado por scripts/rebuild_pomodoro_rollups.py.
+"""
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import func
+
+from models.models import db, PomodoroRollup, PomodoroSession
+from servicos.streaks import TIPOS_POMODORO_PAUSA
+from servicos.upsert import insert_upsert
+
+GRANULARIDADES = ('day', 'week')
+
+
+def inicio_bucket(dia: date, granularity: str) -> date:
+    if granularity == 'week':
+        return dia - timedelta(days=dia.weekday())
+    return dia
+
+
+def eh_foco(tipo: str) -> bool:
+    return (tipo or '').strip().lower() not in TIPOS_POMODORO_PAUSA
+
+
+def registrar_sessao(user_id: int, tipo: str, inicio: datetime, duracao: int) -> None:
+    """Soma a sessão nos buckets dia/semana (na transação corrente, sem commit)."""
+    if not eh_foco(tipo):
+        return
+    for granularity in GRANULARIDADES:
+        stmt = insert_upsert(PomodoroRollup).values(
+            user_id=user_id,
+            granularity=granularity,
+            bucket_start=inicio_bucket(inicio.date(), granularity),
+            focus_seconds=int(duracao or 0),
+            sessions=1,
+        )
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=['user_id', 'granularity', 'bucket_start'],
+            set_={
+                'focus_seconds': PomodoroRollup.focus_seconds + stmt.excluded.focus_seconds,
+                'sessions': PomodoroRollup.sessions + 1,
+            },
+        ))
+
+
+def consultar(user_id: int, granularity: str, inicio: date, fim: date) -> list:
+    return (
+        db.session.query(PomodoroRollup)
+        .filter(
+            PomodoroRollup.user_id == user_id,
+            PomodoroRollup.granularity == granularity,
+            PomodoroRollup.bucket_start >= inicio_bucket(inicio, granularity),
+            PomodoroRollup.bucket_start <= fim,
+        )
+        .order_by(PomodoroRollup.bucket_start)
+        .all()
+    )
+
+
+def recalcular(user_id: Optional[int] = None) -> dict:
+    """Reconstrói os rollups a partir de `pomodoro_sessions` (todos ou de um usuário)."""
+    dia = func.date(PomodoroSession.inicio, type_=db.Date)
+    q = (
+        db.session.query(
+            PomodoroSession.user_id,
+            dia,
+            func.sum(PomodoroSession.duracao),
+            func.count(PomodoroSession.id),
+        )
+        .filter(func.lower(PomodoroSession.tipo).notin_(sorted(TIPOS_POMODORO_PAUSA)))
+        .group_by(PomodoroSession.user_id, dia)
+    )
+    apagar = db.session.query(PomodoroRollup)
+    if user_id is not None:
+        q = q.filter(PomodoroSession.user_id == user_id)
+        apagar = apagar.filter(PomodoroRollup.user_id == user_id)
+
+    buckets: dict = {}
+    for uid, d, segundos, sessoes in q:
+        if d is None:
+            continue
+        for granularity in GRANULARIDADES:
+            chave = (uid, granularity, inicio_bucket(d, granularity))
+            acc = buckets.setdefault(chave, [0, 0])
+            acc[0] += int(segundos or 0)
+            acc[1] += int(sessoes or 0)
+
+    apagar.delete(synchronize_session=False)
+    if buckets:
+        db.session.execute(PomodoroRollup.__table__.insert(), [
+            {'user_id': uid, 'granularity': g, 'bucket_start': b, 'focus_seconds': s, 'sessions': n}
+            for (uid, g, b), (s, n) in buckets.items()
+        ])
+    db.session.commit()
+    return {'buckets': len(buckets)}
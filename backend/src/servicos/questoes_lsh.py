@@ -0,0 +1,217 @@
+"""Índice de questões quase duplicadas (MinHash + LSH).
+
+- Texto -> shingles: bigramas de palavras do enunciado normalizado (sem acento,
+  HTML, pontuação). Trocar uma palavra muda só dois bigramas, então o par V/F
+  "verdadeira/adulterada" da mesma frase continua abaixo do limiar.
+- Assinatura: NUM_PERM mínimos de hashes universais (a*x + b mod 2^61-1); a
+  fração de posições iguais estima a similaridade de Jaccard dos shingles.
+- LSH: BANDAS bandas de LINHAS posições; duas questões viram candidatas se
+  coincidirem em alguma banda. Com 16x6, Jaccard 0.8 vira candidato com
+  probabilidade > 99% e trechos fixos de template ("Complete a lacuna.",
+  "Verdadeiro ou falso:") não empilham questões no mesmo balde; candidatos são
+  confirmados pela assinatura (LIMIAR).
+
+Em memória (`IndiceLSH`) serve para deduplicar dentro de um quiz. Persistido
+(`question_signatures` + `question_lsh_bands`) serve para o histórico do usuário:
+a busca é um `band_key IN (...)` no índice (user_id, band_key), custo que não
+cresce com o número de semanas já geradas.
+"""
+import hashlib
+import os
+import random
+import re
+import struct
+from datetime import date
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+from models.models import db, QuestionLSHBand, QuestionSignature, WeeklyQuiz
+from servicos.banco_questoes import materializar
+from servicos.texto import normalize, strip_html
+
+NUM_PERM = 96
+BANDAS = 16
+LINHAS = NUM_PERM // BANDAS
+LIMIAR = float(os.getenv('QUIZ_DEDUPE_THRESHOLD', '0.8'))
+
+_PRIMO = (1 << 61) - 1
+_MASCARA = 0xFFFFFFFF
+_rng = random.Random(0x5EED)  # fixo: assinaturas persistidas precisam ser estáveis entre processos
+_PERMUTACOES = [(_rng.randrange(1, _PRIMO), _rng.randrange(0, _PRIMO)) for _ in range(NUM_PERM)]
+_FORMATO = f'<{NUM_PERM}I'
+
+Assinatura = Tuple[int, ...]
+
+
+def normalizar(texto: str) -> str:
+    """Mesma normalização da busca (servicos/texto.py), reduzida às palavras."""
+    return ' '.join(re.findall(r'\w+', normalize(strip_html(texto))))
+
+
+def shingles(texto: str) -> set:
+    palavras = normalizar(texto).split()
+    if len(palavras) < 2:
+        return set(palavras)
+    return {f'{a} {b}' for a, b in zip(palavras, palavras[1:])}
+
+
+def _hash64(s: str) -> int:
+    return int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def assinatura(texto: str) -> Optional[Assinatura]:
+    """None para texto sem palavras (não entra no índice)."""
+    valores = [_hash64(s) for s in shingles(texto)]
+    if not valores:
+        return None
+    return tuple(min(((a * x + b) % _PRIMO) & _MASCARA for x in valores) for a, b in _PERMUTACOES)
+
+
+def chaves_bandas(assin: Assinatura) -> List[int]:
+    """Uma chave int64 com sinal por banda (cabe em BIGINT); a banda entra no hash."""
+    chaves = []
+    for banda in range(BANDAS):
+        linhas = assin[banda * LINHAS:(banda + 1) * LINHAS]
+        digest = hashlib.blake2b(struct.pack(f'<B{LINHAS}I', banda, *linhas), digest_size=8).digest()
+        chaves.append(int.from_bytes(digest, 'little', signed=True))
+    return chaves
+
+
+def similaridade(a: Assinatura, b: Assinatura) -> float:
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_PERM
+
+
+def hash_questao(texto: str) -> str:
+    return hashlib.sha1(normalizar(texto).encode('utf-8')).hexdigest()
+
+
+def empacotar(assin: Assinatura) -> bytes:
+    return struct.pack(_FORMATO, *assin)
+
+
+def desempacotar(dados: bytes) -> Assinatura:
+    return struct.unpack(_FORMATO, bytes(dados))
+
+
+class IndiceLSH:
+    """Índice em memória: `duplicata` olha só os baldes das BANDAS chaves da assinatura."""
+
+    def __init__(self, limiar: float = LIMIAR):
+        self.limiar = limiar
+        self._baldes: Dict[int, List[Hashable]] = {}
+        self._assinaturas: Dict[Hashable, Assinatura] = {}
+
+    def __len__(self) -> int:
+        return len(self._assinaturas)
+
+    def adicionar(self, chave: Hashable, assin: Assinatura) -> None:
+        self._assinaturas[chave] = assin
+        for k in chaves_bandas(assin):
+            self._baldes.setdefault(k, []).append(chave)
+
+    def duplicata(self, assin: Assinatura) -> Optional[Hashable]:
+        """Chave de uma entrada com similaridade >= limiar, ou None."""
+        vistos = set()
+        for k in chaves_bandas(assin):
+            for chave in self._baldes.get(k, ()):
+                if chave in vistos:
+                    continue
+                vistos.add(chave)
+                if similaridade(assin, self._assinaturas[chave]) >= self.limiar:
+                    return chave
+        return None
+
+    def adicionar_se_nova(self, chave: Hashable, texto: str) -> bool:
+        """Indexa `texto` se não houver quase-duplicata; False para repetida ou vazia."""
+        assin = assinatura(texto)
+        if assin is None or self.duplicata(assin) is not None:
+            return False
+        self.adicionar(chave, assin)
+        return True
+
+
+class HistoricoQuestoes:
+    """Questões que o usuário já recebeu em outras semanas (tabelas persistidas).
+
+    `repetidas(textos)` faz uma consulta por chamada: candidatos pelas chaves de
+    banda de todos os textos de uma vez, confirmação pela assinatura em memória.
+    """
+
+    def __init__(self, user_id: int, excluir_semana: Optional[date] = None, limiar: float = LIMIAR):
+        self.user_id = user_id
+        self.excluir_semana = excluir_semana
+        self.limiar = limiar
+
+    def _candidatos(self, chaves: Iterable[int]) -> IndiceLSH:
+        indice = IndiceLSH(self.limiar)
+        q = (
+            db.session.query(QuestionSignature.id, QuestionSignature.signature)
+            .join(QuestionLSHBand, QuestionLSHBand.signature_id == QuestionSignature.id)
+            .filter(QuestionLSHBand.user_id == self.user_id, QuestionLSHBand.band_key.in_(sorted(set(chaves))))
+        )
+        if self.excluir_semana is not None:
+            q = q.filter(QuestionSignature.week_start != self.excluir_semana)
+        for sig_id, dados in q.distinct():
+            indice.adicionar(sig_id, desempacotar(dados))
+        return indice
+
+    def repetidas(self, textos: Sequence[str]) -> List[bool]:
+        assinaturas = [assinatura(t) for t in textos]
+        chaves = [k for a in assinaturas if a is not None for k in chaves_bandas(a)]
+        if not chaves:
+            return [False] * len(textos)
+        indice = self._candidatos(chaves)
+        return [a is not None and indice.duplicata(a) is not None for a in assinaturas]
+
+
+def registrar_questoes(user_id: int, week_start: date, textos: Iterable[str]) -> int:
+    """Substitui as assinaturas de (usuário, semana) na transação corrente (sem commit)."""
+    da_semana = (QuestionSignature.user_id == user_id, QuestionSignature.week_start == week_start)
+    ids_semana = db.session.query(QuestionSignature.id).filter(*da_semana).scalar_subquery()
+    db.session.query(QuestionLSHBand).filter(
+        QuestionLSHBand.signature_id.in_(ids_semana)).delete(synchronize_session=False)
+    db.session.query(QuestionSignature).filter(*da_semana).delete(synchronize_session=False)
+
+    linhas: Dict[str, Assinatura] = {}
+    for texto in textos:
+        assin = assinatura(texto)
+        if assin is not None:
+            linhas.setdefault(hash_questao(texto), assin)
+    if not linhas:
+        return 0
+    registros = [
+        QuestionSignature(user_id=user_id, week_start=week_start, question_hash=h, signature=empacotar(a))
+        for h, a in linhas.items()
+    ]
+    db.session.add_all(registros)
+    db.session.flush()
+    db.session.execute(QuestionLSHBand.__table__.insert(), [
+        {'signature_id': r.id, 'band': banda, 'user_id': user_id, 'band_key': k}
+        for r, a in zip(registros, linhas.values())
+        for banda, k in enumerate(chaves_bandas(a))
+    ])
+    return len(registros)
+
+
+def reindexar(user_id: Optional[int] = None, lote: int = 200) -> dict:
+    """Reconstrói as assinaturas a partir de `weekly_quizzes` (todos ou de um usuário).
+
+    Páginas de `lote` semanas por keyset (id > último), lidas inteiras e com commit
+    entre elas: um cursor de servidor (yield_per) não sobrevive ao commit no Postgres.
+    """
+    q = db.session.query(WeeklyQuiz.id, WeeklyQuiz.user_id, WeeklyQuiz.week_start, WeeklyQuiz.data)
+    if user_id is not None:
+        q = q.filter(WeeklyQuiz.user_id == user_id)
+    semanas = questoes = 0
+    ultimo = 0
+    while True:
+        pagina = q.filter(WeeklyQuiz.id > ultimo).order_by(WeeklyQuiz.id).limit(lote).all()
+        if not pagina:
+            break
+        for _, uid, week_start, data in pagina:
+            questoes += registrar_questoes(uid, week_start, [
+                str(item.get('question') or '') for item in materializar(data)
+            ])
+        semanas += len(pagina)
+        ultimo = pagina[-1][0]
+        db.session.commit()
+    return {'semanas': semanas, 'questoes': questoes}
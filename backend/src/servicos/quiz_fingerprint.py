@@ -0,0 +1,135 @@
+"""Quiz semanal compartilhado por fingerprint do conjunto de conteúdos.
+
+Alunos da mesma turma que concluíram os mesmos conteúdos na semana recebem as
+mesmas candidatas; só a ordem (questões e alternativas) muda por usuário. A
+seleção feita para o primeiro deles fica em `weekly_quiz_fingerprints`, chaveada
+por sha1 dos (content_id, content_hash) ordenados + gerador + per_content e pela
+semana; os demais pulam geração/seleção/deduplicação (e o polimento, se já feito)
+e pagam só o embaralhamento determinístico. O texto polido da seleção fica na
+própria linha (`polished_items`), nunca no banco de questões compartilhado.
+
+Seleções afetadas pelo histórico do usuário (questões já vistas em outras
+semanas) são pessoais: não são gravadas, e um usuário que já viu parte de uma
+seleção gravada gera a sua própria (`history_misses`).
+"""
+import hashlib
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+
+from models.models import db, WeeklyQuizFingerprint
+from servicos.banco_questoes import canonico, do_banco, hash_conteudo, materializar
+from servicos.upsert import insert_upsert
+
+
+def fingerprint(contents: List[Tuple[int, str]], generator: str, per_content: int) -> str:
+    """`contents` = [(content_id, texto)]; a ordem de conclusão não importa."""
+    partes = sorted(f'{cid}:{hash_conteudo(texto)}' for cid, texto in contents)
+    return hashlib.sha1(f'{generator}|{per_content}|{",".join(partes)}'.encode()).hexdigest()
+
+
+@dataclass
+class Compartilhamento:
+    """Estado da geração de um usuário em relação ao cache da semana."""
+    fingerprint: str
+    week_start: date
+    hit: bool = False        # usou a seleção gravada
+    gravado: bool = False    # gravou a própria seleção para os próximos
+    polished: bool = False   # seleção usada já passou pelo polimento
+    grupos: List[List[Any]] = field(default_factory=list)
+    _polido_gravado: bool = False
+
+    @property
+    def compartilhada(self) -> bool:
+        return self.hit or self.gravado
+
+
+def buscar(comp: Compartilhamento) -> Optional[List[Tuple[int, List[Dict[str, Any]]]]]:
+    """Grupos (content_id, itens canônicos do banco) da seleção gravada, ou None."""
+    row = db.session.query(WeeklyQuizFingerprint).filter_by(
+        fingerprint=comp.fingerprint, week_start=comp.week_start).first()
+    if row is None:
+        return None
+    polidos = row.polished_items or {}  # chaves JSON viram str
+    comp._polido_gravado = bool(row.polished and polidos)
+    grupos = []
+    for content_id, refs in row.groups or []:
+        itens = materializar([{'ref': r} for r in refs])
+        if len(itens) != len(refs):  # item removido do banco: seleção não vale mais
+            return None
+        grupos.append((content_id, [do_banco(q['ref'], polidos[str(q['ref'])]) if str(q['ref']) in polidos else q
+                                    for q in itens]))
+    return grupos
+
+
+def _incrementar(comp: Compartilhamento, coluna) -> None:
+    db.session.query(WeeklyQuizFingerprint).filter_by(
+        fingerprint=comp.fingerprint, week_start=comp.week_start,
+    ).update({coluna: coluna + 1}, synchronize_session=False)
+
+
+def contar_hit(comp: Compartilhamento) -> None:
+    comp.hit = True
+    comp.polished = comp._polido_gravado
+    _incrementar(comp, WeeklyQuizFingerprint.hits)
+
+
+def contar_miss_historico(comp: Compartilhamento) -> None:
+    _incrementar(comp, WeeklyQuizFingerprint.history_misses)
+
+
+def registrar(comp: Compartilhamento) -> None:
+    """Grava a seleção montada em `comp.grupos` (na transação corrente)."""
+    if not comp.grupos:
+        return
+    comp.gravado = True
+    db.session.execute(insert_upsert(WeeklyQuizFingerprint).values(
+        fingerprint=comp.fingerprint, week_start=comp.week_start, groups=comp.grupos,
+        polished=False, hits=0, history_misses=0,
+    ).on_conflict_do_nothing(index_elements=['fingerprint', 'week_start']))
+
+
+def marcar_polido(comp: Compartilhamento, quiz: List[Dict[str, Any]]) -> None:
+    """Grava na seleção o texto polido de `quiz` (ordem canônica): próximos usuários não chamam o Gemini.
+
+    `polished` só fica verdadeiro junto com `polished_items`; o primeiro polimento vence.
+    """
+    if not comp.compartilhada:
+        return
+    polidos = {str(q['ref']): canonico(q) for q in quiz if 'ref' in q}
+    if not polidos:
+        return
+    comp.polished = True
+    db.session.query(WeeklyQuizFingerprint).filter_by(
+        fingerprint=comp.fingerprint, week_start=comp.week_start, polished=False,
+    ).update({WeeklyQuizFingerprint.polished: True, WeeklyQuizFingerprint.polished_items: polidos},
+             synchronize_session=False)
+
+
+def estatisticas(semanas: int = 8) -> List[Dict[str, Any]]:
+    """Por semana: gerações (fingerprints distintos), hits, misses por histórico e hit rate."""
+    linhas = (
+        db.session.query(
+            WeeklyQuizFingerprint.week_start,
+            func.count(WeeklyQuizFingerprint.id),
+            func.coalesce(func.sum(WeeklyQuizFingerprint.hits), 0),
+            func.coalesce(func.sum(WeeklyQuizFingerprint.history_misses), 0),
+        )
+        .group_by(WeeklyQuizFingerprint.week_start)
+        .order_by(WeeklyQuizFingerprint.week_start.desc())
+        .limit(semanas)
+        .all()
+    )
+    saida = []
+    for week_start, geracoes, hits, misses_historico in linhas:
+        total = int(geracoes) + int(hits) + int(misses_historico)
+        saida.append({
+            'week_start': week_start.isoformat(),
+            'generations': int(geracoes),
+            'hits': int(hits),
+            'history_misses': int(misses_historico),
+            'hit_rate': round(int(hits) / total, 4) if total else 0.0,
+        })
+    return saida
@@ -0,0 +1,122 @@
+"""Chave, custo e pré-checagem local para o Flask-Limiter.
+
+- Chave: `user:<id>` quando autenticado (JWT ou sessão), senão `ip:<addr>`.
+  O IP real vem do ProxyFix (X-Forwarded-For do nginx), não do proxy.
+- Custo: rotas de IA e YouTube consomem mais do que leituras simples
+  (padrões em PESOS_PADRAO; sobrescreva com RATE_LIMIT_COSTS="ai=10,videos=5").
+- Pré-checagem: token buckets em memória por chave só *rejeitam* cedo (429 sem
+  ida ao Redis) quem já estourou o limite vendo apenas as requisições deste
+  worker; nunca dispensam a contagem no Redis, então o limite global não vaza.
+"""
+import math
+import os
+import threading
+import time
+from typing import Optional
+
+from flask import jsonify, request
+from flask_login import current_user
+
+from servicos.ttl_cache import TTLCache
+
+try:
+    from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request  # type: ignore
+except Exception:  # pragma: no cover
+    get_jwt_identity = verify_jwt_in_request = None  # type: ignore
+
+try:
+    from limits import parse_many  # type: ignore
+except Exception:  # pragma: no cover
+    parse_many = None  # type: ignore
+
+PESOS_PADRAO = {
+    'ai': 10,
+    'ia_quiz': 10,
+    'ia_sugestao': 10,
+    'videos': 5,
+    'quiz_gen': 3,
+}
+
+
+def _pesos() -> dict:
+    pesos = dict(PESOS_PADRAO)
+    for par in (os.getenv('RATE_LIMIT_COSTS') or '').split(','):
+        nome, _, valor = par.partition('=')
+        if nome.strip() and valor.strip().isdigit():
+            pesos[nome.strip()] = int(valor)
+    return pesos
+
+
+PESOS = _pesos()
+
+
+def _ip() -> str:
+    return request.remote_addr or '127.0.0.1'
+
+
+def chave_limite() -> str:
+    uid = None
+    if verify_jwt_in_request is not None:
+        try:
+            verify_jwt_in_request(optional=True)
+            uid = get_jwt_identity()
+        except Exception:
+            uid = None
+    if uid is None:
+        try:
+            if current_user.is_authenticated:
+                uid = current_user.id
+        except Exception:
+            uid = None
+    return f'user:{uid}' if uid is not None else f'ip:{_ip()}'
+
+
+def custo_requisicao() -> int:
+    return PESOS.get(request.blueprint or '', 1)
+
+
+class PreChecagemLocal:
+    """Token buckets por chave (um por limite); `rejeitar` roda antes do Flask-Limiter.
+
+    Cada balde tem o dobro da quantidade do limite e recarrega à taxa dele: uma
+    janela fixa nunca admite mais do que isso em intervalo algum (no máximo duas
+    janelas cheias coladas), então o balde local só esvazia quando o contador global
+    com certeza estourou, e aí responde 429 sem ida ao Redis. Tudo o que passa
+    segue para o Limiter e é contado no Redis normalmente.
+    """
+
+    def __init__(self, limites: str, maxsize: int = 10000):
+        # [(capacidade, tokens por segundo)]
+        self.baldes = []
+        if parse_many is not None:
+            self.baldes = [(2.0 * i.amount, i.amount / i.get_expiry()) for i in parse_many(limites)]
+        self.taxa = min((taxa for _, taxa in self.baldes), default=0.0)
+        ttl = max([60.0] + [cap / taxa for cap, taxa in self.baldes])
+        self._buckets = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def consumir(self, chave: str, custo: int, agora: Optional[float] = None) -> bool:
+        """False quando algum balde desta chave não cobre `custo` (limite já estourado)."""
+        if not self.baldes:
+            return True
+        agora = time.monotonic() if agora is None else agora
+        with self._lock:
+            tokens, visto = self._buckets.get(chave) or ([cap for cap, _ in self.baldes], agora)
+            tokens = [min(cap, t + (agora - visto) * taxa) for t, (cap, taxa) in zip(tokens, self.baldes)]
+            if any(t < custo for t in tokens):
+                self._buckets.set(chave, (tokens, agora))
+                return False
+            self._buckets.set(chave, ([t - custo for t in tokens], agora))
+            return True
+
+    def rejeitar(self):
+        """`before_request`: 429 local ou None (segue para o Limiter/Redis)."""
+        if not request.endpoint or request.endpoint.split('.')[-1] == 'static':
+            return None
+        custo = custo_requisicao()
+        if self.consumir(chave_limite(), custo):
+            return None
+        resp = jsonify({'error': 'Limite de requisições excedido. Tente novamente em instantes.'})
+        resp.status_code = 429
+        resp.headers['Retry-After'] = str(max(1, math.ceil(custo / self.taxa)))
+        return resp
@@ -0,0 +1,149 @@
+"""Revisões espaçadas (SM-2) com fila de prioridade por usuário.
+
+- Cada (usuário, conteúdo) é uma linha de `review_items` com `due_at`; o índice
+  (user_id, due_at) é a fila persistida: "o que vence até T" é um range scan,
+  sem percorrer o JSON do plano dia a dia.
+- O resultado de uma revisão (`ok` / `dificuldade`) atualiza intervalo e
+  facilidade no estilo SM-2 (qualidade 4 / 2): acertos seguidos rendem 1, 6 e
+  depois intervalo * facilidade dias; dificuldade volta para 1 dia e reduz a
+  facilidade (mínimo 1.3).
+- Listas diárias: um único scan de `review_items` ordenado por (user_id, due_at);
+  por usuário um heap (dia devido, -lapsos, facilidade) escolhe até
+  REVISOES_POR_DIA itens e o excedente fica como `overflow` para o dia seguinte.
+"""
+import heapq
+import os
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from itertools import groupby
+from typing import Dict, List, Optional
+
+from models.models import db, ReviewDueDaily, ReviewItem
+from servicos.upsert import insert_upsert
+
+QUALIDADE = {'ok': 4, 'dificuldade': 2}
+EASE_INICIAL = 2.5
+EASE_MIN = 1.3
+POR_DIA = int(os.getenv('REVISOES_POR_DIA', '10'))
+
+
+@dataclass
+class EstadoSM2:
+    interval_days: int = 0
+    ease: float = EASE_INICIAL
+    repetitions: int = 0
+    lapses: int = 0
+
+
+def sm2(estado: EstadoSM2, resultado: str) -> EstadoSM2:
+    """Novo estado após uma revisão com resultado `ok` ou `dificuldade`."""
+    q = QUALIDADE[resultado]
+    ease = max(EASE_MIN, estado.ease + 0.1 - (5 - q) * (0.08 + (5 - q) * 0.02))
+    if q < 3:
+        return EstadoSM2(1, ease, 0, estado.lapses + 1)
+    repeticoes = estado.repetitions + 1
+    if repeticoes == 1:
+        intervalo = 1
+    elif repeticoes == 2:
+        intervalo = 6
+    else:
+        intervalo = max(1, round(estado.interval_days * ease))
+    return EstadoSM2(intervalo, ease, repeticoes, estado.lapses)
+
+
+def _inicio_do_dia(dia: date) -> datetime:
+    return datetime.combine(dia, time.min)
+
+
+def _garantir(user_id: int, content_id: int, quando: datetime, subject: Optional[str], topic: Optional[str]) -> None:
+    db.session.execute(
+        insert_upsert(ReviewItem)
+        .values(user_id=user_id, content_id=content_id, subject=subject, topic=topic, due_at=quando,
+                interval_days=0, ease=EASE_INICIAL, repetitions=0, lapses=0, created_at=datetime.utcnow())
+        .on_conflict_do_nothing(index_elements=['user_id', 'content_id'])
+    )
+
+
+def agendar(user_id: int, content_id: int, quando: datetime,
+            subject: Optional[str] = None, topic: Optional[str] = None) -> None:
+    """Garante o item na fila vencendo até `quando` (antecipa se já existir; sem commit)."""
+    _garantir(user_id, content_id, quando, subject, topic)
+    db.session.query(ReviewItem).filter(
+        ReviewItem.user_id == user_id, ReviewItem.content_id == content_id, ReviewItem.due_at > quando,
+    ).update({ReviewItem.due_at: quando}, synchronize_session=False)
+
+
+def registrar_resultado(user_id: int, content_id: int, resultado: str, quando: datetime,
+                        subject: Optional[str] = None, topic: Optional[str] = None) -> Optional[ReviewItem]:
+    """Aplica o SM-2 e reagenda (sem commit). Resultado igual ou anterior ao último já aplicado é ignorado."""
+    if resultado not in QUALIDADE:
+        return None
+    _garantir(user_id, content_id, quando, subject, topic)
+    row = (
+        db.session.query(ReviewItem)
+        .filter_by(user_id=user_id, content_id=content_id)
+        .with_for_update()
+        .one()
+    )
+    if row.last_reviewed_at is not None and row.last_reviewed_at >= quando:
+        return row  # evento repetido (entrega ao-menos-uma-vez / replay)
+    novo = sm2(EstadoSM2(row.interval_days or 0, row.ease or EASE_INICIAL, row.repetitions or 0, row.lapses or 0), resultado)
+    row.interval_days = novo.interval_days
+    row.ease = round(novo.ease, 4)
+    row.repetitions = novo.repetitions
+    row.lapses = novo.lapses
+    row.last_outcome = resultado
+    row.last_reviewed_at = quando
+    row.due_at = _inicio_do_dia(quando.date() + timedelta(days=novo.interval_days))
+    return row
+
+
+def devidas(user_id: int, ate: datetime, limite: int = 50) -> List[ReviewItem]:
+    """Revisões vencidas até `ate`, mais antigas primeiro (range scan em ix_review_items_user_due)."""
+    return (
+        db.session.query(ReviewItem)
+        .filter(ReviewItem.user_id == user_id, ReviewItem.due_at <= ate)
+        .order_by(ReviewItem.due_at, ReviewItem.id)
+        .limit(limite)
+        .all()
+    )
+
+
+def serializar(row: ReviewItem) -> Dict:
+    return {
+        'content_id': row.content_id,
+        'subject': row.subject,
+        'topic': row.topic,
+        'due_at': row.due_at.isoformat(),
+        'interval_days': row.interval_days,
+        'ease': row.ease,
+        'repetitions': row.repetitions,
+        'lapses': row.lapses,
+        'last_outcome': row.last_outcome,
+    }
+
+
+def calcular_listas_diarias(dia: date, por_dia: int = POR_DIA, lote: int = 1000) -> Dict[str, int]:
+    """Recalcula `review_due_daily` de `dia` para todos os usuários numa só passada (com commit)."""
+    fim = _inicio_do_dia(dia + timedelta(days=1))
+    linhas = (
+        db.session.query(ReviewItem.user_id, ReviewItem.content_id, ReviewItem.due_at, ReviewItem.lapses, ReviewItem.ease)
+        .filter(ReviewItem.due_at < fim)
+        .order_by(ReviewItem.user_id, ReviewItem.due_at)
+        .yield_per(lote)
+    )
+    valores = []
+    itens = 0
+    for user_id, grupo in groupby(linhas, key=lambda r: r.user_id):
+        heap = [(r.due_at.date(), -(r.lapses or 0), r.ease or EASE_INICIAL, r.content_id) for r in grupo]
+        heapq.heapify(heap)
+        escolhidos = [heapq.heappop(heap)[3] for _ in range(min(por_dia, len(heap)))]
+        itens += len(escolhidos)
+        valores.append({'user_id': user_id, 'day': dia, 'content_ids': escolhidos,
+                        'overflow': len(heap), 'computed_at': datetime.utcnow()})
+
+    db.session.query(ReviewDueDaily).filter(ReviewDueDaily.day == dia).delete(synchronize_session=False)
+    for i in range(0, len(valores), lote):
+        db.session.execute(ReviewDueDaily.__table__.insert(), valores[i:i + lote])
+    db.session.commit()
+    return {'users': len(valores), 'items': itens, 'overflow': sum(v['overflow'] for v in valores)}
@@ -0,0 +1,262 @@
+"""Motor incremental de streaks e estatísticas de hábitos.
+
+Cada par (user_id, habit) guarda em `habito_stats`:
+  - current_streak / longest_streak
+  - last_date: último dia com atividade
+  - activity_mask: bitmask dos últimos 30 dias (bit 0 = last_date)
+
+Registrar uma atividade custa O(1): desloca a máscara pelos dias decorridos e
+liga o bit do dia. As contagens móveis de 7/30 dias saem de um popcount da
+máscara realinhada para "hoje", sem varrer o histórico.
+
+Além do hábito em si, toda atividade alimenta o hábito agregado `geral`, cujo
+streak é espelhado em `XPStreak.streak` (lido por /api/progress/user/<id>/xp).
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from itertools import groupby
+from typing import Callable, Optional
+
+from sqlalchemy import String, func, literal, select, union, union_all
+
+from models.models import db, HabitoCheckin, HabitoStats, PomodoroSession, XPStreak
+from servicos.upsert import insert_upsert
+
+JANELA_DIAS = 30
+MASCARA_JANELA = (1 << JANELA_DIAS) - 1
+MASCARA_7D = (1 << 7) - 1
+
+HABITO_GERAL = 'geral'
+HABITO_POMODORO = 'pomodoro'
+TIPOS_POMODORO_PAUSA = {'break', 'pausa', 'pausa longa', 'long_break'}
+
+
+@dataclass
+class EstadoStreak:
+    current_streak: int = 0
+    longest_streak: int = 0
+    last_date: Optional[date] = None
+    activity_mask: int = 0
+    total_days: int = 0
+
+    @classmethod
+    def de_linha(cls, row) -> 'EstadoStreak':
+        return cls(
+            current_streak=row.current_streak or 0,
+            longest_streak=row.longest_streak or 0,
+            last_date=row.last_date,
+            activity_mask=row.activity_mask or 0,
+            total_days=row.total_days or 0,
+        )
+
+
+def _sequencia_inicial(mask: int) -> int:
+    """Quantidade de bits 1 consecutivos a partir do bit 0."""
+    return ((~mask) & (mask + 1)).bit_length() - 1
+
+
+def avancar(estado: EstadoStreak, dia: date, dia_novo: Optional[Callable[[], bool]] = None) -> EstadoStreak:
+    """Aplica uma atividade em `dia` e retorna o novo estado (O(1)).
+
+    `dia_novo` só é consultado para dias retroativos fora da janela, que a máscara
+    não cobre: o dia entra em total_days apenas se ele confirmar que é inédito.
+    """
+    if estado.last_date is None:
+        return EstadoStreak(1, max(1, estado.longest_streak), dia, 1, estado.total_days + 1)
+
+    delta = (dia - estado.last_date).days
+    if delta == 0:
+        return estado
+    if delta > 0:
+        mask = ((estado.activity_mask << delta) | 1) & MASCARA_JANELA if delta < JANELA_DIAS else 1
+        atual = estado.current_streak + 1 if delta == 1 else 1
+        return EstadoStreak(atual, max(estado.longest_streak, atual), dia, mask, estado.total_days + 1)
+
+    # Atividade retroativa (dia anterior a last_date)
+    atraso = -delta
+    if atraso >= JANELA_DIAS:
+        # Fora da janela: só o backfill reconstrói o streak; o total só conta dia inédito.
+        if dia_novo is None or not dia_novo():
+            return estado
+        return EstadoStreak(estado.current_streak, estado.longest_streak, estado.last_date,
+                            estado.activity_mask, estado.total_days + 1)
+    bit = 1 << atraso
+    if estado.activity_mask & bit:
+        return estado
+    mask = estado.activity_mask | bit
+    atual = max(estado.current_streak, _sequencia_inicial(mask))
+    return EstadoStreak(atual, max(estado.longest_streak, atual), estado.last_date, mask, estado.total_days + 1)
+
+
+def resumo(estado: EstadoStreak, hoje: Optional[date] = None) -> dict:
+    """Visão do estado relativa a `hoje` (streak zera se o último dia ficou para trás)."""
+    hoje = hoje or datetime.utcnow().date()
+    if estado.last_date is None:
+        return {'current_streak': 0, 'longest_streak': estado.longest_streak, 'count_7d': 0,
+                'count_30d': 0, 'total_days': estado.total_days, 'last_date': None}
+    atraso = max(0, (hoje - estado.last_date).days)
+    mask = (estado.activity_mask << atraso) & MASCARA_JANELA if atraso < JANELA_DIAS else 0
+    return {
+        'current_streak': estado.current_streak if atraso <= 1 else 0,
+        'longest_streak': estado.longest_streak,
+        'count_7d': (mask & MASCARA_7D).bit_count(),
+        'count_30d': mask.bit_count(),
+        'total_days': estado.total_days,
+        'last_date': estado.last_date.isoformat(),
+    }
+
+
+def _eventos_no_dia(user_id: int, dia: date, habit: Optional[str] = None) -> int:
+    """Check-ins + sessões de foco do usuário em `dia` (de `habit`, ou de todos os hábitos)."""
+    checkins = db.session.query(func.count(HabitoCheckin.id)).filter(
+        HabitoCheckin.user_id == user_id, HabitoCheckin.date == dia)
+    if habit is not None:
+        checkins = checkins.filter(HabitoCheckin.habit == habit)
+    total = checkins.scalar() or 0
+    if habit in (None, HABITO_POMODORO):
+        inicio = datetime.combine(dia, time.min)
+        total += db.session.query(func.count(PomodoroSession.id)).filter(
+            PomodoroSession.user_id == user_id,
+            PomodoroSession.inicio >= inicio, PomodoroSession.inicio < inicio + timedelta(days=1),
+            func.lower(PomodoroSession.tipo).notin_(sorted(TIPOS_POMODORO_PAUSA)),
+        ).scalar() or 0
+    return total
+
+
+def _aplicar(user_id: int, habit: str, dia: date, registrado: bool = True) -> EstadoStreak:
+    # Garante a linha com upsert atômico e trava para leitura-modificação-escrita.
+    db.session.execute(
+        insert_upsert(HabitoStats)
+        .values(user_id=user_id, habit=habit, current_streak=0, longest_streak=0,
+                activity_mask=0, total_days=0)
+        .on_conflict_do_nothing(index_elements=['user_id', 'habit'])
+    )
+    row = (
+        db.session.query(HabitoStats)
+        .filter_by(user_id=user_id, habit=habit)
+        .with_for_update()
+        .one()
+    )
+    # o próprio evento já está no histórico quando `registrado`: o dia é inédito se for o único
+    proprios = 1 if registrado else 0
+    filtro = None if habit == HABITO_GERAL else habit
+    novo = avancar(EstadoStreak.de_linha(row), dia,
+                   dia_novo=lambda: _eventos_no_dia(user_id, dia, filtro) <= proprios)
+    row.current_streak = novo.current_streak
+    row.longest_streak = novo.longest_streak
+    row.last_date = novo.last_date
+    row.activity_mask = novo.activity_mask
+    row.total_days = novo.total_days
+    return novo
+
+
+def espelhar_xp_streak(user_id: int, streak: int) -> None:
+    db.session.execute(
+        insert_upsert(XPStreak)
+        .values(user_id=user_id, xp=0, streak=streak)
+        .on_conflict_do_update(index_elements=['user_id'], set_={'streak': streak})
+    )
+
+
+def registrar_atividade(user_id: int, habit: str, dia: date, registrado: bool = True) -> EstadoStreak:
+    """Atualiza o hábito e o agregado `geral` na transação corrente (sem commit).
+
+    `registrado`: o evento já foi gravado em habito_checkins/pomodoro_sessions (flush
+    feito); atividades que não ficam nessas tabelas (eventos de domínio) passam False.
+    """
+    if habit != HABITO_GERAL:
+        _aplicar(user_id, habit, dia, registrado)
+    geral = _aplicar(user_id, HABITO_GERAL, dia, registrado)
+    espelhar_xp_streak(user_id, geral.current_streak)
+    return geral
+
+
+def registrar_pomodoro(user_id: int, tipo: str, inicio: datetime) -> Optional[EstadoStreak]:
+    """Sessões de foco contam como atividade do dia; pausas não."""
+    if (tipo or '').strip().lower() in TIPOS_POMODORO_PAUSA:
+        return None
+    return registrar_atividade(user_id, HABITO_POMODORO, inicio.date())
+
+
+def estatisticas_usuario(user_id: int, habit: Optional[str] = None, hoje: Optional[date] = None) -> dict:
+    q = db.session.query(HabitoStats).filter_by(user_id=user_id)
+    if habit:
+        q = q.filter_by(habit=habit)
+    return {row.habit: resumo(EstadoStreak.de_linha(row), hoje) for row in q.all()}
+
+
+# ---------------------------------------------------------------------------
+# Backfill: reconstrói todas as estatísticas a partir do histórico
+# ---------------------------------------------------------------------------
+
+def _usuarios_com_historico(apos: Optional[int], limite: int) -> list:
+    """Próxima página (keyset) de user_ids com check-ins ou sessões de foco."""
+    ids = union(select(HabitoCheckin.user_id.label('user_id')), select(PomodoroSession.user_id)).subquery()
+    q = select(ids.c.user_id).where(ids.c.user_id.isnot(None))
+    if apos is not None:
+        q = q.where(ids.c.user_id > apos)
+    return db.session.execute(q.order_by(ids.c.user_id).limit(limite)).scalars().all()
+
+
+def _eventos_historico(primeiro: int, ultimo: int):
+    """Check-ins + sessões de foco dos usuários em [primeiro, ultimo] como (user_id, habit, dia), ordenados."""
+    checkins = select(
+        HabitoCheckin.user_id.label('user_id'),
+        HabitoCheckin.habit.label('habit'),
+        HabitoCheckin.date.label('dia'),
+    ).where(HabitoCheckin.user_id.between(primeiro, ultimo))
+    pomodoros = select(
+        PomodoroSession.user_id,
+        literal(HABITO_POMODORO, String),
+        func.date(PomodoroSession.inicio, type_=db.Date),
+    ).where(
+        PomodoroSession.user_id.between(primeiro, ultimo),
+        func.lower(PomodoroSession.tipo).notin_(sorted(TIPOS_POMODORO_PAUSA)),
+    )
+    eventos = union_all(checkins, pomodoros).subquery()
+    return select(eventos.c.user_id, eventos.c.habit, eventos.c.dia).order_by(eventos.c.user_id, eventos.c.dia)
+
+
+def _gravar_usuario(user_id: int, estados: dict) -> None:
+    for habit, e in estados.items():
+        valores = {
+            'current_streak': e.current_streak, 'longest_streak': e.longest_streak,
+            'last_date': e.last_date, 'activity_mask': e.activity_mask, 'total_days': e.total_days,
+        }
+        db.session.execute(
+            insert_upsert(HabitoStats)
+            .values(user_id=user_id, habit=habit, **valores)
+            .on_conflict_do_update(index_elements=['user_id', 'habit'], set_=valores)
+        )
+    geral = estados.get(HABITO_GERAL)
+    if geral:
+        espelhar_xp_streak(user_id, geral.current_streak)
+
+
+def reconstruir_todos(lote_usuarios: int = 200) -> dict:
+    """Reconstrói em páginas de `lote_usuarios` (keyset por user_id), com commit por página.
+
+    Cada página é lida inteira antes do commit: um cursor de servidor (yield_per) não
+    sobrevive ao commit no Postgres.
+    """
+    usuarios = eventos = 0
+    ultimo = None
+    while True:
+        ids = _usuarios_com_historico(ultimo, lote_usuarios)
+        if not ids:
+            break
+        linhas = db.session.execute(_eventos_historico(ids[0], ids[-1])).all()
+        for user_id, grupo in groupby(linhas, key=lambda linha: linha[0]):
+            estados: dict = {}
+            for _, habit, dia in grupo:
+                if dia is None:
+                    continue
+                eventos += 1
+                for h in {habit, HABITO_GERAL}:
+                    estados[h] = avancar(estados.get(h, EstadoStreak()), dia)
+            if estados:
+                _gravar_usuario(user_id, estados)
+                usuarios += 1
+        db.session.commit()
+        ultimo = ids[-1]
+    return {'usuarios': usuarios, 'eventos': eventos}
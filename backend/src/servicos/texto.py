@@ -0,0 +1,194 @@
+"""Normalização de texto compartilhada (quiz, busca) e extração na escrita do conteúdo.
+
+`normalize` define a comparação sem acento/caixa usada em todo o backend:
+minúsculas, sem marcas combinantes (NFD) e espaços colapsados.
+`extrair` roda uma vez por conteúdo (servicos/conteudos.py); leitores usam as
+colunas já calculadas em vez de `strip_html` a cada requisição.
+"""
+import re
+import unicodedata
+from html.parser import HTMLParser
+from typing import Any, Dict, Iterable, List, NamedTuple, Union
+
+
+def strip_html(s: str) -> str:
+    return re.sub(r"<[^>]*>", " ", s or " ")
+
+def normalize(s: str) -> str:
+    s = s or ""
+    s = s.lower()
+    s = unicodedata.normalize("NFD", s)
+    s = "".join(ch for ch in s if unicodedata.category(ch) != 'Mn')
+    s = re.sub(r"\s+", " ", s).strip()
+    return s
+
+def tokenize(s: str) -> List[str]:
+    s = normalize(s)
+    s = re.sub(r"[^a-z0-9\s-]", " ", s)
+    return [w for w in s.split() if w]
+
+
+# ---- Extração de texto na escrita do conteúdo ----
+
+BLOCOS = {
+    'p', 'div', 'section', 'article', 'header', 'footer', 'main', 'aside', 'nav', 'li', 'ul', 'ol', 'dl', 'dt', 'dd',
+    'table', 'thead', 'tbody', 'tr', 'td', 'th', 'blockquote', 'pre', 'figure', 'figcaption', 'br', 'hr',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+}
+TITULOS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+IGNORADOS = {'script', 'style', 'noscript', 'template', 'head', 'iframe', 'svg'}
+VAZIOS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param', 'source', 'track', 'wbr'}
+# fechamento implícito (subconjunto das regras do HTML): a tag nova fecha estas se estiverem no topo
+FECHA_IMPLICITO = {
+    'li': {'li'}, 'dt': {'dt', 'dd'}, 'dd': {'dt', 'dd'}, 'tr': {'tr', 'td', 'th'},
+    'td': {'td', 'th'}, 'th': {'td', 'th'}, 'option': {'option'},
+}
+_NOME_TAG = re.compile(r'<\s*([^\s/>]+)')
+
+
+class TextoExtraido(NamedTuple):
+    texto: str                  # texto puro: palavras separadas por espaço, blocos por '\n'
+    secoes: List[Dict[str, Any]]  # [{level, title, offset, html_offset, html_open}]: bytes UTF-8 em `texto` / no HTML
+    palavras: int
+
+
+class _Extrator(HTMLParser):
+    """Parser incremental (html.parser): uma passada, sem montar árvore."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.partes: List[str] = []
+        self.bytes = 0
+        self.bytes_html = 0  # bytes do HTML já consumidos (início da tag no handle_starttag)
+        self.palavras = 0
+        self.secoes: List[Dict[str, Any]] = []
+        self._sep = ''
+        self._ignorar = 0
+        self._titulo = None  # (nível, offset, palavras, offset no HTML, tags abertas)
+        self._abertos: List[tuple] = []  # (tag, texto da tag de abertura) ainda não fechadas
+
+    def updatepos(self, i, j):
+        # o parser avança por aqui, em ordem, sobre cada trecho consumido de rawdata
+        if i < j:
+            self.bytes_html += len(self.rawdata[i:j].encode('utf-8'))
+        return super().updatepos(i, j)
+
+    def _quebra(self):
+        if self.partes:
+            self._sep = '\n'
+
+    def _escrever(self, palavra: str):
+        # sem separador pendente o pedaço continua a palavra anterior ('a<b>b</b>c' = uma palavra)
+        colada = bool(self.partes) and not self._sep
+        if self.partes and self._sep:
+            self.partes.append(self._sep)
+            self.bytes += 1
+        self._sep = ''
+        if self._titulo is not None:
+            nivel, offset, palavras, inicio, abertos = self._titulo
+            if offset is None:
+                self._titulo = (nivel, self.bytes, palavras, inicio, abertos)
+            if colada and palavras:
+                palavras[-1] += palavra
+            else:
+                palavras.append(palavra)
+        self.partes.append(palavra)
+        self.bytes += len(palavra.encode('utf-8'))
+        if not colada:
+            self.palavras += 1
+
+    def _empilhar(self, tag):
+        if tag in BLOCOS and self._abertos and self._abertos[-1][0] == 'p':
+            self._abertos.pop()
+        while self._abertos and self._abertos[-1][0] in FECHA_IMPLICITO.get(tag, ()):
+            self._abertos.pop()
+        if tag in TITULOS and self._titulo is None:
+            self._titulo = (int(tag[1]), None, [], self.bytes_html, [t for _, t in self._abertos])
+        if tag not in VAZIOS:
+            self._abertos.append((tag, self.get_starttag_text()))
+
+    def handle_starttag(self, tag, attrs):
+        self._empilhar(tag)
+        if tag in IGNORADOS:
+            self._ignorar += 1
+            return
+        if tag in BLOCOS:
+            self._quebra()
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in BLOCOS:
+            self._quebra()
+
+    def handle_endtag(self, tag):
+        for i in range(len(self._abertos) - 1, -1, -1):
+            if self._abertos[i][0] == tag:
+                del self._abertos[i:]
+                break
+        if tag in IGNORADOS:
+            self._ignorar = max(0, self._ignorar - 1)
+            return
+        if tag in TITULOS and self._titulo is not None:
+            nivel, offset, palavras, inicio, abertos = self._titulo
+            if palavras:
+                self.secoes.append({'level': nivel, 'title': ' '.join(palavras), 'offset': offset,
+                                    'html_offset': inicio, 'html_open': abertos})
+            self._titulo = None
+        if tag in BLOCOS:
+            self._quebra()
+
+    def handle_data(self, data):
+        if self._ignorar or not data:
+            return
+        if data[0].isspace() and not self._sep:
+            self._sep = ' '
+        palavras = data.split()
+        for i, palavra in enumerate(palavras):
+            if i:
+                self._sep = self._sep or ' '
+            self._escrever(palavra)
+        if palavras and data[-1].isspace():
+            self._sep = ' '
+
+
+def extrair(html: Union[str, Iterable[str], None]) -> TextoExtraido:
+    """Texto puro, sumário de títulos (h1–h6) e contagem de palavras de um HTML (str ou pedaços)."""
+    p = _Extrator()
+    for pedaco in ([html or ''] if isinstance(html, str) or html is None else html):
+        p.feed(pedaco)
+    p.close()
+    return TextoExtraido(''.join(p.partes), p.secoes, p.palavras)
+
+
+def secao(texto: str, secoes: List[Dict[str, Any]], indice: int) -> str:
+    """Texto da seção `indice` (do título até a próxima seção)."""
+    bruto = texto.encode('utf-8')
+    fim = secoes[indice + 1]['offset'] if indice + 1 < len(secoes) else len(bruto)
+    return bruto[secoes[indice]['offset']:fim].decode('utf-8').strip()
+
+
+def partes_html(html: str, secoes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Divide o HTML nos títulos do nível mais alto presente: [{level, title, start, end, prefix, suffix}].
+
+    start/end são bytes do HTML. O corte pode cair dentro de elementos abertos
+    (`<article><h2>A</h2>…<h2>B</h2>…</article>`): `prefix` reabre os que estão abertos
+    no início da parte e `suffix` fecha os que continuam abertos no fim, de modo que
+    prefix + trecho + suffix seja HTML balanceado. O que vem antes do primeiro título
+    entra na primeira parte; sem títulos, uma parte só.
+    """
+    total = len(html.encode('utf-8'))
+    if not secoes:
+        return [{'level': None, 'title': None, 'start': 0, 'end': total, 'prefix': '', 'suffix': ''}]
+    topo = min(s['level'] for s in secoes)
+    cortes = [s for s in secoes if s['level'] == topo]
+    partes = []
+    for i, s in enumerate(cortes):
+        proximo = cortes[i + 1] if i + 1 < len(cortes) else None
+        fechar = [_NOME_TAG.match(t).group(1).lower() for t in (proximo or {}).get('html_open') or []]
+        partes.append({
+            'level': s['level'], 'title': s['title'],
+            'start': 0 if i == 0 else s['html_offset'],
+            'end': proximo['html_offset'] if proximo else total,
+            'prefix': '' if i == 0 else ''.join(s.get('html_open') or []),
+            'suffix': ''.join(f'</{t}>' for t in reversed(fechar)),
+        })
+    return partes
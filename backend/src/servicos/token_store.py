@@ -0,0 +1,133 @@
+"""Revogação e rotação de refresh tokens com chaves por jti e TTL.
+
+Redis (quando disponível):
+  jwt:refresh:block:<jti>  -> '1'        revogado explicitamente (logout)
+  jwt:refresh:rot:<jti>    -> <novo jti> já rotacionado (reuso = replay)
+Ambas expiram junto com o token (`exp`; sem `exp`, após o prazo de refresh), então
+nada cresce indefinidamente.
+A rotação roda num único script Lua (checa bloqueio + SET NX EX), atômico entre
+workers. Os sets legados `jwt:refresh:rotated` / `jwt:refresh:revoked` só são
+lidos, para tokens emitidos antes desta mudança; podem ser apagados depois que
+o maior prazo de refresh tiver passado.
+
+Localmente:
+  - `_validos`: LRU curto de jtis já confirmados como não revogados (pula Redis).
+    TTL pequeno limita quanto tempo uma revogação feita em outro worker demora
+    a valer aqui; a rotação em si sempre passa pelo script atômico.
+  - `_mortos`: jtis revogados/rotacionados conhecidos por este processo, com
+    expiração = `exp` do token. Sem Redis é o próprio armazenamento (limitado).
+"""
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+from servicos.ttl_cache import TTLCache
+
+BLOCK_PREFIX = 'jwt:refresh:block:'
+ROTATE_PREFIX = 'jwt:refresh:rot:'
+LEGACY_ROTATED_SET = 'jwt:refresh:rotated'
+LEGACY_REVOKED_SET = 'jwt:refresh:revoked'
+
+ROTACIONADO, REPLAY, REVOGADO = 1, 0, -1
+
+_LUA_ROTATE = """
+if redis.call('EXISTS', KEYS[2]) == 1 or redis.call('SISMEMBER', KEYS[4], ARGV[1]) == 1 then
+  return -1
+end
+if redis.call('SISMEMBER', KEYS[3], ARGV[1]) == 1 then
+  return 0
+end
+if redis.call('SET', KEYS[1], ARGV[2], 'NX', 'EX', tonumber(ARGV[3])) then
+  return 1
+end
+return 0
+"""
+
+
+# Prazo padrão do flask_jwt_extended para refresh tokens (JWT_REFRESH_TOKEN_EXPIRES)
+TTL_REFRESH_PADRAO = 30 * 24 * 3600
+
+
+def _ttl_ate(exp: Optional[float], padrao: int = TTL_REFRESH_PADRAO) -> int:
+    """Segundos até `exp`; token sem `exp` vale pelo prazo de refresh inteiro."""
+    if not exp:
+        return max(1, int(padrao))
+    return max(1, int(float(exp) - time.time()))
+
+
+class TokenStore:
+    def __init__(self, redis_client=None, maxsize: Optional[int] = None, validos_ttl: Optional[float] = None,
+                 ttl_sem_exp: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.redis = redis_client
+        self.ttl_sem_exp = int(ttl_sem_exp or TTL_REFRESH_PADRAO)
+        maxsize = maxsize or int(os.getenv('JWT_REVOCATION_LOCAL_MAX', '10000'))
+        validos_ttl = validos_ttl if validos_ttl is not None else float(os.getenv('JWT_REVOCATION_LOCAL_TTL', '10'))
+        self._validos = TTLCache(maxsize=maxsize, ttl=validos_ttl, clock=clock)
+        self._mortos = TTLCache(maxsize=maxsize, ttl=3600, clock=clock)
+        self._lock = threading.Lock()
+        self._rotate = None
+        if redis_client is not None:
+            try:
+                self._rotate = redis_client.register_script(_LUA_ROTATE)
+            except Exception:
+                self._rotate = None
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        """Usado pelo blocklist loader: só revogação explícita (rotação é tratada no /refresh)."""
+        if not jti:
+            return False
+        if self._mortos.get(jti) == 'revoked':
+            return True
+        if self.redis is None or jti in self._validos:
+            return False
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.exists(BLOCK_PREFIX + jti)
+            pipe.sismember(LEGACY_REVOKED_SET, jti)
+            bloqueado, legado = pipe.execute()
+        except Exception:
+            return False
+        if bloqueado or legado:
+            return True
+        self._validos.set(jti)
+        return False
+
+    def revoke(self, jti: Optional[str], exp: Optional[float] = None) -> None:
+        if not jti:
+            return
+        ttl = _ttl_ate(exp, self.ttl_sem_exp)
+        self._validos.pop(jti)
+        self._mortos.set(jti, 'revoked', ttl=ttl)
+        if self.redis is not None:
+            try:
+                self.redis.set(BLOCK_PREFIX + jti, '1', ex=ttl)
+            except Exception:
+                pass
+
+    def rotate(self, jti: str, novo_jti: str, exp: Optional[float] = None) -> int:
+        """Marca `jti` como usado. Retorna ROTACIONADO, REPLAY ou REVOGADO."""
+        local = self._mortos.get(jti)
+        if local is not None:
+            return REVOGADO if local == 'revoked' else REPLAY
+        ttl = _ttl_ate(exp, self.ttl_sem_exp)
+        self._validos.pop(jti)
+        if self._rotate is not None:
+            try:
+                res = int(self._rotate(
+                    keys=[ROTATE_PREFIX + jti, BLOCK_PREFIX + jti, LEGACY_ROTATED_SET, LEGACY_REVOKED_SET],
+                    args=[jti, novo_jti, ttl],
+                ))
+            except Exception:
+                res = None
+            if res is not None:
+                if res == ROTACIONADO:
+                    self._mortos.set(jti, 'rotated', ttl=ttl)
+                return res
+        # Sem Redis: o próprio processo é a fonte da verdade
+        with self._lock:
+            local = self._mortos.get(jti)
+            if local is not None:
+                return REVOGADO if local == 'revoked' else REPLAY
+            self._mortos.set(jti, 'rotated', ttl=ttl)
+        return ROTACIONADO
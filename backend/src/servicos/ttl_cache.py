@@ -0,0 +1,63 @@
+"""Cache LRU em memória com limite de tamanho e expiração por item.
+
+Thread-safe (gunicorn gthread). Itens expirados saem na leitura ou quando o
+limite força despejo; o mais antigo em uso é despejado primeiro.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+_AUSENTE = object()
+
+
+class TTLCache:
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = max(1, int(maxsize))
+        self.ttl = float(ttl)
+        self._clock = clock
+        self._dados: 'OrderedDict[Any, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, chave, default=None):
+        with self._lock:
+            item = self._dados.get(chave, _AUSENTE)
+            if item is _AUSENTE:
+                return default
+            valor, expira = item
+            if expira <= self._clock():
+                del self._dados[chave]
+                return default
+            self._dados.move_to_end(chave)
+            return valor
+
+    def __contains__(self, chave) -> bool:
+        return self.get(chave, _AUSENTE) is not _AUSENTE
+
+    def set(self, chave, valor=True, ttl: Optional[float] = None) -> None:
+        agora = self._clock()
+        with self._lock:
+            self._dados[chave] = (valor, agora + (self.ttl if ttl is None else float(ttl)))
+            self._dados.move_to_end(chave)
+            if len(self._dados) > self.maxsize:
+                self._despejar(agora)
+
+    def pop(self, chave, default=None):
+        with self._lock:
+            item = self._dados.pop(chave, _AUSENTE)
+        return default if item is _AUSENTE else item[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._dados.clear()
+
+    def __len__(self) -> int:
+        return len(self._dados)
+
+    def _despejar(self, agora: float) -> None:
+        # Remove pela ponta menos usada (onde os expirados se acumulam) até caber.
+        while self._dados:
+            chave, (_, exp) = next(iter(self._dados.items()))
+            if exp > agora and len(self._dados) <= self.maxsize:
+                break
+            del self._dados[chave]
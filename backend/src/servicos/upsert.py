@@ -0,0 +1,27 @@
+"""INSERT ... ON CONFLICT portátil entre Postgres e SQLite.
+
+Os dois dialetos expõem a mesma API (`on_conflict_do_nothing`, `on_conflict_do_update`,
+`excluded`), então basta escolher o construtor certo pelo bind da sessão. Outros
+bancos são recusados no boot (`exigir_dialeto`, chamado por create_app), não na
+primeira escrita.
+"""
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+
+from models.models import db
+
+_INSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+
+def exigir_dialeto(uri: str) -> None:
+    """Falha na configuração se o banco de `uri` não suporta INSERT ... ON CONFLICT."""
+    nome = make_url(uri).get_backend_name()
+    if nome not in _INSERTS:
+        raise RuntimeError(
+            f"SQLALCHEMY_DATABASE_URI usa o banco '{nome}', sem suporte a ON CONFLICT; "
+            f"use {' ou '.join(sorted(_INSERTS))}")
+
+
+def insert_upsert(model):
+    """Retorna um `insert()` do dialeto ativo com suporte a ON CONFLICT."""
+    return _INSERTS[db.session.get_bind().dialect.name](model)
@@ -0,0 +1,127 @@
+"""YouTube Data API falso local (só `GET /youtube/v3/search`) para testes e carga offline.
+
+Devolve `maxResults` vídeos determinísticos por consulta (mesmo formato de `items`
+da API real), depois de `atraso` (+ até `variacao`) segundos; `taxa_erro` é a fração
+de buscas respondidas com `status_erro` (403 de cota, 503...).
+
+Uso:
+    servidor = ServidorYouTubeFake(atraso=0.1).iniciar()
+    os.environ['YT_API_BASE'] = servidor.base_url
+    ...
+    servidor.parar()
+
+ou, fora dos testes: `python -m servicos.youtube_fake --porta 8090` (de backend/src).
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+
+def videos_fake(q: str, n: int) -> list:
+    itens = []
+    for i in range(max(0, min(n, 50))):
+        vid = hashlib.sha1(f'{q}|{i}'.encode('utf-8')).hexdigest()[:11]
+        itens.append({
+            "kind": "youtube#searchResult",
+            "id": {"kind": "youtube#video", "videoId": vid},
+            "snippet": {
+                "title": f"{q} — aula {i + 1}",
+                "channelTitle": "Canal Fake",
+                "thumbnails": {"medium": {"url": f"https://i.ytimg.com/vi/{vid}/mqdefault.jpg"}},
+            },
+        })
+    return itens
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    servidor_fake: 'ServidorYouTubeFake'
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, status: int, corpo: dict):
+        dados = json.dumps(corpo, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def do_GET(self):
+        fake = self.servidor_fake
+        partes = urlsplit(self.path)
+        if not partes.path.rstrip('/').endswith('/search'):
+            return self._json(404, {"error": {"code": 404, "message": "não encontrado"}})
+        params = parse_qs(partes.query)
+        fake.chamadas += 1
+        time.sleep(fake.atraso_total())
+        if fake.sortear_erro():
+            fake.erros += 1
+            return self._json(fake.status_erro, {"error": {"code": fake.status_erro, "message": "falha simulada (youtube_fake)"}})
+        q = (params.get('q') or [''])[0]
+        try:
+            n = int((params.get('maxResults') or ['5'])[0])
+        except ValueError:
+            n = 5
+        self._json(200, {"kind": "youtube#searchListResponse", "items": videos_fake(q, n)})
+
+
+class ServidorYouTubeFake:
+    def __init__(self, host: str = '127.0.0.1', porta: int = 0, atraso: float = 0.0, variacao: float = 0.0,
+                 taxa_erro: float = 0.0, status_erro: int = 503, semente: Optional[int] = None):
+        self.atraso = atraso
+        self.variacao = variacao
+        self.taxa_erro = taxa_erro
+        self.status_erro = status_erro
+        self.chamadas = 0
+        self.erros = 0
+        self._rng = random.Random(semente)
+        handler = type('Handler', (_Handler,), {'servidor_fake': self})
+        self._http = ThreadingHTTPServer((host, porta), handler)
+        self._http.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, porta = self._http.server_address[:2]
+        return f'http://{host}:{porta}/youtube/v3'
+
+    def atraso_total(self) -> float:
+        return self.atraso + (self._rng.uniform(0, self.variacao) if self.variacao else 0.0)
+
+    def sortear_erro(self) -> bool:
+        return bool(self.taxa_erro) and self._rng.random() < self.taxa_erro
+
+    def iniciar(self) -> 'ServidorYouTubeFake':
+        self._thread = threading.Thread(target=self._http.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def parar(self) -> None:
+        self._http.shutdown()
+        self._http.server_close()
+
+
+def main(argv=None):  # pragma: no cover - CLI
+    ap = argparse.ArgumentParser(description='YouTube falso local (use YT_API_BASE=<url impressa>)')
+    ap.add_argument('--host', default='127.0.0.1')
+    ap.add_argument('--porta', type=int, default=8090)
+    ap.add_argument('--atraso', type=float, default=0.1)
+    ap.add_argument('--variacao', type=float, default=0.0, help='Atraso extra aleatório (0..N s)')
+    ap.add_argument('--taxa-erro', type=float, default=0.0, help='Fração de respostas com erro (0..1)')
+    ap.add_argument('--status-erro', type=int, default=503)
+    args = ap.parse_args(argv)
+    servidor = ServidorYouTubeFake(args.host, args.porta, args.atraso, args.variacao, args.taxa_erro, args.status_erro)
+    print(f'YT_API_BASE={servidor.base_url}')
+    servidor._http.serve_forever()
+
+
+if __name__ == '__main__':  # pragma: no cover
+    main()
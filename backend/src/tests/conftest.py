@@ -0,0 +1,72 @@
+"""Configuração comum dos testes: backend/src no path, ambiente de dev (SQLite,
+senha mestra, usuário criado no login) e fixtures compartilhadas.
+
+Cada sessão de testes roda num SQLite temporário (ou em TEST_DATABASE_URI), nunca
+no dev.db: os testes não dependem de linhas deixadas por rodadas anteriores e
+podem rodar repetidas vezes ou isolados.
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # backend/src
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+os.environ.setdefault('USE_SQLITE', 'true')
+os.environ.setdefault('DEV_MASTER_PASSWORD', 'senhadev')
+os.environ.setdefault('DEV_AUTOCREATE_USER', 'true')
+
+_BANCO_DIR = tempfile.mkdtemp(prefix='evolutiva-testes-')
+# antes de qualquer import de config/main: a URI é lida na criação da app
+os.environ['SQLALCHEMY_DATABASE_URI'] = (
+    os.getenv('TEST_DATABASE_URI') or f"sqlite:///{os.path.join(_BANCO_DIR, 'testes.db')}"
+)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    eventos = sys.modules.get('servicos.eventos')
+    if eventos is not None:
+        eventos.despachante_local.parar(timeout=10)  # nada mais grava no banco que vai ser apagado
+    shutil.rmtree(_BANCO_DIR, ignore_errors=True)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def banco():
+    """Cria as tabelas no banco da sessão (uma vez)."""
+    from main import app
+    from models.models import db
+    with app.app_context():
+        db.create_all()
+
+
+@pytest.fixture(scope="session")
+def login():
+    """Fábrica de test clients já logados: `login(email)`; o usuário é criado no primeiro login."""
+    from main import app
+
+    def entrar(email):
+        c = app.test_client()
+        r = c.post('/api/auth/login', json={'email': email, 'password': os.environ['DEV_MASTER_PASSWORD']})
+        assert 200 <= r.status_code < 300, r.data
+        return c
+    return entrar
+
+
+@pytest.fixture()
+def client():
+    """Test client anônimo."""
+    from main import app
+    return app.test_client()
+
+
+@pytest.fixture(scope="module")
+def despacho_manual():
+    """Pausa o despachante local de eventos: o teste chama `eventos.despachar_local`."""
+    from servicos import eventos
+    eventos.despachante_local.pausado = True
+    yield eventos
+    eventos.despachante_local.pausado = False
@@ -0,0 +1,37 @@
+import pytest
+
+
+@pytest.fixture(scope="module")
+def client(login):
+    return login('agenda_user@example.com')
+
+
+def test_blocos_sorted_by_real_date_and_range(client):
+    blocks = [
+        {'date': '02/02/2030', 'start_time': '09:00', 'end_time': '09:50'},
+        {'date': '10/01/2030', 'start_time': '14:00', 'end_time': '14:50'},
+        {'date': '2030-01-10', 'start_time': '08:00', 'end_time': '08:50'},
+    ]
+    r = client.post('/api/agendas/blocos', json={'blocks': blocks})
+    assert r.status_code == 200, r.data
+
+    # Lexicographic order would put 02/02 before 10/01; real dates must not.
+    r_all = client.get('/api/agendas/blocos?from=01/01/2030&to=31/12/2030')
+    got = [(b['date'], b['start_time']) for b in r_all.get_json()['blocks']]
+    assert got == [('10/01/2030', '08:00'), ('10/01/2030', '14:00'), ('02/02/2030', '09:00')]
+
+    r_jan = client.get('/api/agendas/blocos?from=2030-01-01&to=2030-01-31')
+    assert [b['date'] for b in r_jan.get_json()['blocks']] == ['10/01/2030', '10/01/2030']
+
+    assert client.get('/api/agendas/blocos?from=31/02/2030').status_code == 400
+
+
+def test_checkins_legacy_format_and_range(client):
+    for d in ('01/03/2030', '05/03/2030', '01/04/2030'):
+        r = client.post('/api/habitos/checkin', json={'habit': 'leitura', 'date': d})
+        assert r.status_code == 200, r.data
+    dup = client.post('/api/habitos/checkin', json={'habit': 'leitura', 'date': '2030-03-01'})
+    assert dup.get_json().get('message') == 'Já registrado'
+
+    r = client.get('/api/habitos/checkin?habit=leitura&from=01/03/2030&to=31/03/2030')
+    assert [c['date'] for c in r.get_json()['checkins']] == ['05/03/2030', '01/03/2030']
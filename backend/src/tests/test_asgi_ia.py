@@ -0,0 +1,83 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from main import app
+from servicos.asgi_ia import AppIAAsync
+from servicos.gemini_fake import ServidorGeminiFake
+
+ATRASO = 0.4
+
+
+@pytest.fixture()
+def fake_gemini(monkeypatch):
+    servidor = ServidorGeminiFake(atraso_inicial=ATRASO, responder=lambda p: 'eco: ' + p[:20]).iniciar()
+    monkeypatch.setenv('GEMINI_API_BASE', servidor.base_url)
+    monkeypatch.setenv('GOOGLE_API_KEY', 'chave-teste')
+    yield servidor
+    servidor.parar()
+
+
+async def _requisitar(asgi, metodo, caminho, corpo=None, ip='10.0.0.1', query=b''):
+    dados = json.dumps(corpo).encode() if corpo is not None else b''
+    scope = {
+        'type': 'http', 'method': metodo, 'path': caminho, 'query_string': query,
+        'headers': [(b'content-type', b'application/json'), (b'origin', b'http://localhost:5173')],
+        'client': (ip, 1234), 'server': ('testserver', 80), 'scheme': 'http',
+    }
+
+    async def receive():
+        return {'type': 'http.request', 'body': dados, 'more_body': False}
+
+    mensagens = []
+
+    async def send(msg):
+        mensagens.append(msg)
+
+    await asgi(scope, receive, send)
+    inicio = mensagens[0]
+    headers = {k.decode().lower(): v.decode() for k, v in inicio['headers']}
+    return inicio['status'], headers, b''.join(m.get('body', b'') for m in mensagens[1:])
+
+
+def test_waits_on_model_do_not_hold_threads(fake_gemini):
+    asgi = AppIAAsync(app, threads=2)
+    n = 12
+
+    async def rodada():
+        return await asyncio.gather(*[
+            _requisitar(asgi, 'POST', '/api/gemini_feynman', {'texto': f't{i}', 'conteudo': 'c'}, ip=f'10.1.0.{i}')
+            for i in range(n)
+        ])
+
+    inicio = time.perf_counter()
+    respostas = asyncio.run(rodada())
+    decorrido = time.perf_counter() - inicio
+
+    assert all(status == 200 for status, _, _ in respostas)
+    status, headers, corpo = respostas[0]
+    assert json.loads(corpo)['feedback'].startswith('eco: O estudante')
+    assert headers['content-type'] == 'application/json'
+    assert headers.get('access-control-allow-origin') == 'http://localhost:5173'  # after_request do Flask
+    # com 2 threads presas por chamada seriam >= 6 * ATRASO
+    assert decorrido < n / 2 * ATRASO
+
+
+def test_validation_and_other_routes_stay_synchronous(fake_gemini):
+    asgi = AppIAAsync(app, threads=2)
+    status, _, corpo = asyncio.run(_requisitar(asgi, 'POST', '/api/generate_mindmap', {'topic': 'x'}, ip='10.2.0.1'))
+    assert status == 400 and 'obrigatórios' in json.loads(corpo)['error']
+    status, _, corpo = asyncio.run(_requisitar(asgi, 'GET', '/api/v1/health', ip='10.2.0.2'))
+    assert status == 200 and json.loads(corpo)['status'] == 'online'
+
+
+def test_wsgi_path_unchanged(monkeypatch):
+    monkeypatch.delenv('GOOGLE_API_KEY', raising=False)
+    with app.test_client() as c:
+        r = c.post('/api/gemini_feynman', json={'texto': 'a'}, environ_base={'REMOTE_ADDR': '10.3.0.1'})
+        assert r.status_code == 502
+        assert r.get_json()['error'] == 'GOOGLE_API_KEY ausente.'
+        r = c.post('/api/ia/sugestao-estudo', json={'progresso': ['x']}, environ_base={'REMOTE_ADDR': '10.3.0.2'})
+        assert r.status_code == 503
@@ -0,0 +1,93 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from main import app
+from models.models import db, User, SubjectContent, CompletedContent, QuestionBankItem, WeeklyQuiz
+from servicos.banco_questoes import materializar, referencias
+
+EMAILS = ['bank_user_a@example.com', 'bank_user_b@example.com']
+HTML = ("<p>A Revolução Industrial começou na Inglaterra no século XVIII e transformou a produção de mercadorias. "
+        "A máquina a vapor foi a principal inovação tecnológica do período e acelerou a mecanização das fábricas. "
+        "Os operários enfrentavam jornadas longas, salários baixos e condições insalubres nas cidades industriais. "
+        "O carvão mineral era a fonte de energia que movimentava as máquinas a vapor.</p>")
+
+
+@pytest.fixture(scope="module")
+def clientes(login):
+    clientes = [login(e) for e in EMAILS]
+    with app.app_context():
+        sc = SubjectContent(subject='História', topic='Revolução Industrial', content_html=HTML, created_at=datetime.now())
+        db.session.add(sc)
+        db.session.flush()
+        for email in EMAILS:
+            uid = User.query.filter_by(email=email).first().id
+            db.session.add(CompletedContent(user_id=uid, content_id=sc.id, completed_at=datetime.now()))
+        db.session.commit()
+        content_id = sc.id
+    yield clientes, content_id
+
+
+def _banco(content_id):
+    return QuestionBankItem.query.filter_by(content_id=content_id).order_by(QuestionBankItem.id).all()
+
+
+def test_users_share_bank_items_and_store_only_references(clientes):
+    (a, b), content_id = clientes
+    itens_a = a.post('/api/quizzes/weekly', json={'regenerate': True, 'per_content': 4}).get_json()['items']
+    with app.app_context():
+        gerados = len(_banco(content_id))
+    itens_b = b.post('/api/quizzes/weekly', json={'regenerate': True, 'per_content': 4}).get_json()['items']
+
+    with app.app_context():
+        assert len(_banco(content_id)) == gerados  # segundo usuário não gerou nada
+        canonico = {r.id: r.item for r in _banco(content_id)}
+        for email in EMAILS:
+            uid = User.query.filter_by(email=email).first().id
+            row = WeeklyQuiz.query.filter_by(user_id=uid).first()
+            assert all(set(e) <= {'ref', 'perm'} for e in row.data)
+            assert len(json.dumps(row.data)) * 5 < len(json.dumps(materializar(row.data)))
+
+    assert itens_a and {q['ref'] for q in itens_a} == {q['ref'] for q in itens_b}
+    for q in itens_a + itens_b:
+        base = canonico[q['ref']]
+        if isinstance(base.get('options'), list):
+            # alternativas na ordem do usuário, mas a resposta continua a mesma
+            assert sorted(q['options']) == sorted(base['options'])
+            assert q['options'][q['answer']] == base['options'][base['answer']]
+
+    # GET devolve o quiz materializado igual ao gerado
+    latest = a.get('/api/quizzes/weekly/latest').get_json()['items']
+    assert [(q['id'], q['options'] if 'options' in q else None) for q in latest] == \
+        [(q['id'], q['options'] if 'options' in q else None) for q in itens_a]
+
+
+def test_polished_text_stays_with_user_and_bank_is_unchanged(clientes):
+    (a, _), content_id = clientes
+    with app.app_context():
+        uid = User.query.filter_by(email=EMAILS[0]).first().id
+        itens = materializar(WeeklyQuiz.query.filter_by(user_id=uid).first().data)
+        alvo = next(q for q in itens if q.get('perm'))
+        original = dict(db.session.get(QuestionBankItem, alvo['ref']).item)
+        polido = dict(alvo, question='Enunciado revisado?')
+        intacto = next(q for q in itens if q is not alvo)
+        entradas = referencias([polido, intacto])
+        db.session.commit()
+        # só o item polido fica inteiro (com ref para o histórico); o outro continua referência
+        assert entradas[0]['question'] == 'Enunciado revisado?' and entradas[0]['ref'] == alvo['ref']
+        assert set(entradas[1]) <= {'ref', 'perm'}
+        assert db.session.get(QuestionBankItem, alvo['ref']).item == original
+        assert materializar(entradas) == [polido, intacto]
+
+
+def test_new_content_revision_generates_new_entries(clientes):
+    (a, _), content_id = clientes
+    with app.app_context():
+        antes = {r.content_hash for r in _banco(content_id)}
+        sc = db.session.get(SubjectContent, content_id)
+        sc.content_html = HTML.replace('jornadas longas', 'jornadas muito longas')
+        db.session.commit()
+    assert a.post('/api/quizzes/weekly', json={'regenerate': True, 'per_content': 4}).status_code == 200
+    with app.app_context():
+        assert len({r.content_hash for r in _banco(content_id)} - antes) == 1
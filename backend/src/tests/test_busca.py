@@ -0,0 +1,62 @@
+from datetime import datetime
+
+import pytest
+
+from main import app
+from servicos.busca import destacar
+from models.models import db, SubjectContent
+
+
+@pytest.fixture(scope="module")
+def ctx():
+    with app.app_context():
+        linhas = [
+            SubjectContent(subject='Biologia', topic='Quelônios amazônicos',
+                           content_html='<h2>Quelônios</h2><p>Os quelônios da várzea desovam nas praias.</p>'),
+            SubjectContent(subject='Biologia', topic='Répteis',
+                           content_html='<p>Entre os répteis estão serpentes, lagartos e quelônios.</p>'),
+            SubjectContent(subject='Biologia', topic='Conservação',
+                           content_html='<p>Projetos de manejo protegem ninhos de quelônios.</p>'),
+        ]
+        for sc in linhas:
+            sc.created_at = datetime.now()
+        db.session.add_all(linhas)
+        db.session.commit()
+        ids = [sc.id for sc in linhas]
+    return app.test_client(), ids
+
+
+def test_search_is_accent_insensitive_ranked_and_paginated(ctx):
+    c, ids = ctx
+    r = c.get('/api/conteudos/search?q=QUELONIOS&per_page=2').get_json()
+    assert r['total'] == 3 and len(r['results']) == 2
+    assert r['results'][0]['id'] == ids[0]  # termo no tópico e repetido no texto
+    # destaque no texto original, com acento e caixa
+    assert r['results'][0]['highlight'].startswith('<mark>Quelônios</mark> Os <mark>quelônios</mark> da várzea')
+    pagina2 = c.get('/api/conteudos/search?q=quelônios&per_page=2&page=2').get_json()
+    assert sorted(x['id'] for x in r['results'] + pagina2['results']) == ids
+
+    # prefixo + AND entre termos
+    r = c.get('/api/conteudos/search?q=quelon varzea').get_json()
+    assert [x['id'] for x in r['results']] == [ids[0]]
+    assert c.get('/api/conteudos/search?q=').status_code == 400
+    assert c.get('/api/conteudos/search?q=abc&page=x').status_code == 400
+
+
+def test_index_follows_writes(ctx):
+    c, ids = ctx
+    with app.app_context():
+        sc = db.session.get(SubjectContent, ids[2])
+        sc.content_html = '<p>Tartarugas-da-amazônia no tabuleiro.</p>'
+        db.session.delete(db.session.get(SubjectContent, ids[1]))
+        db.session.commit()
+    assert [x['id'] for x in c.get('/api/conteudos/search?q=quelonios').get_json()['results']] == [ids[0]]
+    assert [x['id'] for x in c.get('/api/conteudos/search?q=tartarugas tabuleiro').get_json()['results']] == [ids[2]]
+
+
+def test_highlight_window_is_escaped_and_marks_prefix_matches():
+    texto = ' '.join(f'p{i}' for i in range(40)) + ' <Pós-guerra> ' + ' '.join(f'q{i}' for i in range(40))
+    trecho = destacar(texto, ['pos', 'guer'], palavras=6)
+    assert trecho == '…p39 &lt;<mark>Pós</mark>-<mark>guerra</mark>&gt; q0 q1 q2…'
+    assert destacar('Só no tópico', ['xyz'], palavras=2) == 'Só no…'
+
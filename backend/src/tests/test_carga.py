@@ -0,0 +1,59 @@
+import threading
+
+import pytest
+
+from werkzeug.serving import make_server
+
+from main import app
+from servicos import carga
+from servicos.gemini_fake import ServidorGeminiFake
+from servicos.youtube_fake import ServidorYouTubeFake
+
+
+@pytest.fixture()
+def fakes(monkeypatch):
+    gemini = ServidorGeminiFake(atraso_pedaco=0.001).iniciar()
+    youtube = ServidorYouTubeFake().iniciar()
+    monkeypatch.setenv('GEMINI_API_BASE', gemini.base_url)
+    monkeypatch.setenv('GOOGLE_API_KEY', 'chave-teste')
+    monkeypatch.setenv('YT_API_BASE', youtube.base_url)
+    monkeypatch.setenv('YT_API_KEY', 'chave-teste')
+    yield gemini, youtube
+    gemini.parar()
+    youtube.parar()
+
+
+def test_percentiles_nearest_rank():
+    valores = sorted(float(v) for v in range(1, 101))
+    assert [carga.percentil(valores, p) for p in (50, 95, 99, 100)] == [50.0, 95.0, 99.0, 100.0]
+    assert carga.percentil([7.0], 99) == 7.0 and carga.percentil([], 50) is None
+
+
+def test_video_route_uses_local_youtube_and_its_error_rate(fakes):
+    _, youtube = fakes
+    c = app.test_client()
+    videos = c.get('/api/videos?q=fotossíntese carga&maxResults=3').get_json()['videos']
+    assert [v['title'] for v in videos] == [f'fotossíntese carga — aula {i}' for i in (1, 2, 3)]
+    assert youtube.chamadas == 1
+    youtube.taxa_erro = 1.0
+    r = c.get('/api/videos?q=outra consulta de carga').get_json()
+    assert r['videos'] == [] and '503' in r['error'] and youtube.erros == 1
+
+
+def test_user_journeys_report_per_route_percentiles(fakes):
+    with app.app_context():
+        # senha própria (não a DEV_MASTER_PASSWORD): o login depende dos usuários semeados
+        carga.semear(materias=1, conteudos_por_materia=3, usuarios=2, senha='senha-da-carga', prefixo_email='carga_teste')
+    servidor = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    try:
+        r = carga.executar(f'http://127.0.0.1:{servidor.server_port}', usuarios=2, iteracoes=1,
+                           senha='senha-da-carga', prefixo_email='carga_teste', stream=True)
+    finally:
+        servidor.shutdown()
+    rotas = r['rotas']
+    assert {'POST /api/auth/login', 'POST /api/plano-estudo/gerar', 'GET /api/conteudo_html/<id>?section',
+            'POST /api/quizzes/weekly', 'GET /api/videos', 'GET /api/generate_quiz/<id>?stream'} <= set(rotas)
+    assert all(x['n'] == 2 for x in rotas.values()) and r['erros'] == 0
+    assert all(x['p50_ms'] <= x['p95_ms'] <= x['p99_ms'] <= x['max_ms'] for x in rotas.values())
+    assert fakes[0].chamadas >= 2 and 'p99' in carga.formatar(r)
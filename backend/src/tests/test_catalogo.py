@@ -0,0 +1,67 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event, text
+
+from main import app
+from models.models import db, CatalogVersion, CompletedContent, Curso, CursoMateria, HorariosEscolares, SubjectContent, User
+from servicos import catalogo
+
+EMAIL = 'catalogo_user@example.com'
+
+
+@pytest.fixture(scope="module")
+def ctx(login):
+    c = login(EMAIL)
+    with app.app_context():
+        versao = db.session.query(CatalogVersion.version).filter_by(id=1).scalar() or 0
+        curso = Curso(nome='Curso do snapshot')
+        materia = HorariosEscolares(materia='Astronomia', horario='10:00')
+        db.session.add_all([curso, materia])
+        db.session.flush()
+        db.session.add(CursoMateria(curso_id=curso.id, materia_id=materia.id))
+        conteudos = [SubjectContent(subject='Astronomia', topic=t, materia_id=materia.id, content_html='<p>x</p>',
+                                    created_at=datetime.now()) for t in ('Órbitas', 'Eclipses')]
+        db.session.add_all(conteudos)
+        db.session.commit()
+        # uma transação, um incremento
+        assert db.session.get(CatalogVersion, 1).version == versao + 1
+        uid = User.query.filter_by(email=EMAIL).first().id
+        db.session.add(CompletedContent(user_id=uid, content_id=conteudos[0].id, completed_at=datetime.utcnow()))
+        curso_id, materia_id = curso.id, materia.id
+        db.session.commit()
+        assert db.session.get(CatalogVersion, 1).version == versao + 1  # conclusão não mexe no catálogo
+    return c, curso_id, materia_id, uid
+
+
+def test_catalog_endpoints_served_from_snapshot(ctx):
+    c, curso_id, materia_id, uid = ctx
+    assert {'id': curso_id, 'nome': 'Curso do snapshot'} in c.get('/api/cursos').get_json()
+    comandos = []
+    escuta = lambda *a, **k: comandos.append(a[2])  # noqa: E731
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', escuta)
+    try:
+        assert c.get(f'/api/materias?course_id={curso_id}').get_json() == {'materias': [{'id': materia_id, 'nome': 'Astronomia'}]}
+        assert [x['topic'] for x in c.get(f'/api/materias/{materia_id}/conteudos').get_json()['conteudos']] == ['Órbitas', 'Eclipses']
+        assert c.get(f'/api/cursos/{curso_id}').get_json()['course']['nome'] == 'Curso do snapshot'
+    finally:
+        with app.app_context():
+            event.remove(db.engine, 'before_cursor_execute', escuta)
+    assert comandos == []
+
+    progresso = c.get(f'/api/progress/materias/{uid}/{curso_id}').get_json()['progresso']
+    assert progresso == [{'materia': 'Astronomia', 'percent': 50, 'total_lessons': 2, 'completed_lessons': 1}]
+
+
+def test_other_worker_writes_are_seen_after_version_poll(ctx, monkeypatch):
+    c, *_ = ctx
+    with app.app_context():
+        catalogo.atual()
+        # outro worker: SQL direto + incremento do carimbo, sem passar por este processo
+        db.session.execute(text("INSERT INTO cursos (nome) VALUES ('Curso de outro worker')"))
+        db.session.execute(text("UPDATE catalog_version SET version = version + 1 WHERE id = 1"))
+        db.session.commit()
+    assert 'Curso de outro worker' not in {x['nome'] for x in c.get('/api/cursos').get_json()}
+    monkeypatch.setattr(catalogo, '_verificado_em', 0.0)
+    assert 'Curso de outro worker' in {x['nome'] for x in c.get('/api/cursos').get_json()}
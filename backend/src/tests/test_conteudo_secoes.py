@@ -0,0 +1,107 @@
+import re
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+
+from main import app
+from models.models import db, HorariosEscolares, SubjectContent
+from servicos.texto import extrair
+
+PARTES = [
+    '<p>Introdução à célula.</p>\n',
+    '<h2>Membrana</h2><p>Bicamada lipídica.</p><h3>Transporte</h3><p>Osmose.</p>\n',
+    '<h2>Núcleo</h2><p>Guarda o DNA.</p>',
+]
+
+
+@pytest.fixture(scope="module")
+def ctx():
+    with app.app_context():
+        materia = HorariosEscolares(materia='Biologia', horario='11:00')
+        db.session.add(materia)
+        db.session.flush()
+        sc = SubjectContent(subject='Biologia', topic='Célula', content_html=''.join(PARTES),
+                            materia_id=materia.id, created_at=datetime.now())
+        db.session.add(sc)
+        db.session.commit()
+        cid = sc.id
+    return app.test_client(), cid
+
+
+def test_outline_and_sections_rebuild_the_document(ctx):
+    c, cid = ctx
+    r = c.get(f'/api/conteudo_html/{cid}/outline')
+    assert r.status_code == 200 and r.headers['ETag'] and 'max-age' in r.headers['Cache-Control']
+    dados = r.get_json()
+    assert [(s['index'], s['title']) for s in dados['sections']] == [(0, 'Membrana'), (1, 'Núcleo')]
+    assert [o['title'] for o in dados['outline']] == ['Membrana', 'Transporte', 'Núcleo']
+    assert c.get(f'/api/conteudo_html/{cid}/outline', headers={'If-None-Match': r.headers['ETag']}).status_code == 304
+
+    corpos = [c.get(f'/api/conteudo_html/{cid}?section={i}').get_json() for i in range(2)]
+    assert ''.join(x['content_html'] for x in corpos) == ''.join(PARTES)  # prefácio entra na primeira seção
+    assert corpos[1]['content_html'] == PARTES[2] and corpos[1]['total_sections'] == 2
+    assert [s['bytes'] for s in dados['sections']] == [len(x['content_html'].encode('utf-8')) for x in corpos]
+    # modo documento inteiro continua igual
+    assert c.get(f'/api/conteudo_html/{cid}').get_json()['content_html'] == ''.join(PARTES)
+
+    assert c.get(f'/api/conteudo_html/{cid}?section=2').status_code == 404
+    assert c.get(f'/api/conteudo_html/{cid}?section=x').status_code == 400
+
+
+def test_section_etags_are_independent(ctx):
+    c, cid = ctx
+    antes = [c.get(f'/api/conteudo_html/{cid}?section={i}').headers['ETag'] for i in range(2)]
+    r = c.get(f'/api/conteudo_html/{cid}?section=1', headers={'If-None-Match': antes[1]})
+    assert r.status_code == 304 and r.headers['ETag'] == antes[1]
+
+    with app.app_context():
+        sc = db.session.get(SubjectContent, cid)
+        sc.content_html = ''.join(PARTES).replace('Osmose', 'Difusão')
+        db.session.commit()
+    depois = [c.get(f'/api/conteudo_html/{cid}?section={i}').headers['ETag'] for i in range(2)]
+    assert depois[0] != antes[0] and depois[1] == antes[1]
+
+
+def test_rows_written_outside_the_orm_are_split_on_read(ctx):
+    c, cid = ctx
+    with app.app_context():
+        db.session.execute(text("UPDATE subject_contents SET content_sections = NULL, "
+                                "content_html = '<h1>A</h1>a<h1>B</h1>b' WHERE id = :id"), {'id': cid})
+        db.session.commit()
+    assert c.get(f'/api/conteudo_html/{cid}?section=1').get_json()['content_html'] == '<h1>B</h1>b'
+    assert [s['title'] for s in c.get(f'/api/conteudo_html/{cid}/outline').get_json()['sections']] == ['A', 'B']
+
+
+def _balanceado(html):
+    pilha = []
+    for fecha, tag in re.findall(r'<(/?)([a-z0-9]+)[^>]*>', html):
+        if tag in ('br', 'img', 'hr'):
+            continue
+        if fecha:
+            if not pilha or pilha.pop() != tag:
+                return False
+        else:
+            pilha.append(tag)
+    return not pilha
+
+
+def test_wrapped_sections_are_balanced(ctx):
+    c, cid = ctx
+    html = ('<article class="aula"><p>Intro<br>geral</p><section><h2>A</h2><p>x</p></section>'
+            '<section id="s2"><h2>B</h2><ul><li>y</li><li>z</li></ul></section></article>')
+    assert [s['html_open'] for s in extrair(html).secoes] == [
+        ['<article class="aula">', '<section>'], ['<article class="aula">', '<section id="s2">']]
+    with app.app_context():
+        sc = db.session.get(SubjectContent, cid)
+        sc.content_html = html
+        db.session.commit()
+    corpos = [c.get(f'/api/conteudo_html/{cid}?section={i}').get_json()['content_html'] for i in range(2)]
+    assert corpos == [
+        '<article class="aula"><p>Intro<br>geral</p><section><h2>A</h2><p>x</p></section>'
+        '<section id="s2"></section></article>',
+        '<article class="aula"><section id="s2"><h2>B</h2><ul><li>y</li><li>z</li></ul></section></article>',
+    ]
+    assert all(_balanceado(x) for x in corpos)
+    secoes = c.get(f'/api/conteudo_html/{cid}/outline').get_json()['sections']
+    assert [s['bytes'] for s in secoes] == [len(x.encode('utf-8')) for x in corpos]
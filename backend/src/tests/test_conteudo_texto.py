@@ -0,0 +1,68 @@
+from datetime import datetime
+
+import pytest
+
+from main import app
+from models.models import db, HorariosEscolares, SubjectContent
+from servicos.gemini_fake import ServidorGeminiFake, texto_padrao
+from servicos.texto import extrair, secao
+
+HTML = (
+    '<style>p{color:red}</style><h1>Ciclo da água</h1>'
+    '<p>A água <b>evapora</b>&nbsp;e&nbsp;condensa.</p><script>alert("x")</script>'
+    '<h2>Precipitação</h2><ul><li>Chuva</li><li>Granizo &amp; neve</li></ul>'
+)
+
+
+def test_extract_text_outline_and_words():
+    ex = extrair(HTML)
+    assert ex.texto == 'Ciclo da água\nA água evapora e condensa.\nPrecipitação\nChuva\nGranizo & neve'
+    assert [(s['level'], s['title']) for s in ex.secoes] == [(1, 'Ciclo da água'), (2, 'Precipitação')]
+    # offsets em bytes: 'á' e 'ç' ocupam dois bytes
+    assert ex.secoes[1]['offset'] == len('Ciclo da água\nA água evapora e condensa.\n'.encode('utf-8'))
+    assert secao(ex.texto, ex.secoes, 1) == 'Precipitação\nChuva\nGranizo & neve'
+    assert ex.palavras == 13
+    # alimentação incremental dá o mesmo resultado, mesmo cortando tags e palavras
+    assert extrair(HTML[i:i + 7] for i in range(0, len(HTML), 7)) == ex
+    assert extrair('a<b>b</b>c d').palavras == 2
+
+
+@pytest.fixture(scope="module")
+def conteudo_id():
+    with app.app_context():
+        materia = HorariosEscolares(materia='Ciências', horario='09:00')
+        db.session.add(materia)
+        db.session.flush()
+        sc = SubjectContent(subject='Ciências', topic='Ciclo da água', content_html=HTML,
+                            materia_id=materia.id, created_at=datetime.now())
+        db.session.add(sc)
+        db.session.commit()
+        return sc.id
+
+
+def test_fields_computed_on_write_and_served(conteudo_id):
+    with app.app_context():
+        sc = db.session.get(SubjectContent, conteudo_id)
+        assert sc.content_text.startswith('Ciclo da água\n') and sc.word_count == 13
+        assert 'alert' not in sc.content_text and 'ciclo da agua' in sc.search_text
+        sc.content_html = '<h3>Resumo</h3><p>Só isso.</p>'
+        db.session.commit()
+        assert (sc.content_text, sc.word_count) == ('Resumo\nSó isso.', 3)
+    r = app.test_client().get(f'/api/conteudo_html/{conteudo_id}').get_json()
+    assert r['outline'] == [{'level': 3, 'title': 'Resumo', 'offset': 0}] and r['word_count'] == 3
+
+
+def test_prompts_use_precomputed_text(conteudo_id, monkeypatch):
+    prompts = []
+    servidor = ServidorGeminiFake(responder=lambda p: prompts.append(p) or texto_padrao(p)).iniciar()
+    monkeypatch.setenv('GEMINI_API_BASE', servidor.base_url)
+    monkeypatch.setenv('GOOGLE_API_KEY', 'chave-teste')
+    try:
+        c = app.test_client()
+        assert c.get(f'/api/generate_quiz/{conteudo_id}').status_code == 200
+        assert c.post('/api/generate_mindmap', json={'conteudo_id': conteudo_id}).status_code == 200
+        assert c.post('/api/generate_mindmap', json={'conteudo_id': 10 ** 9}).status_code == 404
+    finally:
+        servidor.parar()
+    assert len(prompts) == 2
+    assert all('Resumo\nSó isso.' in p and '<h3>' not in p for p in prompts)
@@ -0,0 +1,109 @@
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from main import app
+from models.models import (
+    db, Achievement, HabitoStats, OutboxCheckpoint, OutboxEvent, ProgressoMateria, SubjectContent, User, WeeklyQuiz,
+)
+from servicos import eventos
+
+EMAIL = 'eventos_user@example.com'
+HTML = ("<p>A Revolução Industrial começou na Inglaterra no século XVIII e transformou a produção de mercadorias. "
+        "A máquina a vapor foi a principal inovação tecnológica do período e acelerou a mecanização das fábricas. "
+        "Os operários enfrentavam jornadas longas, salários baixos e condições insalubres nas cidades industriais.</p>")
+
+
+@pytest.fixture(scope="module")
+def ctx(despacho_manual, login):
+    c = login(EMAIL)
+    with app.app_context():
+        uid = User.query.filter_by(email=EMAIL).first().id
+        ids = []
+        for topico in ('Revolução Industrial', 'Revolução Francesa'):
+            sc = SubjectContent(subject='História dos eventos', topic=topico, content_html=HTML, created_at=datetime.now())
+            db.session.add(sc)
+            db.session.flush()
+            ids.append(sc.id)
+        db.session.commit()
+    yield c, uid, ids
+
+
+def _eventos(uid, tipo):
+    return OutboxEvent.query.filter_by(user_id=uid, event_type=tipo).order_by(OutboxEvent.id).all()
+
+
+def test_events_are_written_in_the_same_transaction(ctx):
+    c, uid, _ = ctx
+    assert c.post('/api/habitos/checkin', json={'habit': 'leitura', 'date': '2031-05-05'}).status_code == 200
+    # repetido: nada muda, nem a outbox
+    assert c.post('/api/habitos/checkin', json={'habit': 'leitura', 'date': '2031-05-05'}).status_code == 200
+    assert c.post('/api/progress/pomodoro', json={'tipo': 'work', 'duracao': 1500}).status_code == 201
+    with app.app_context():
+        checkins = _eventos(uid, 'habito.checkin')
+        assert len(checkins) == 1 and checkins[0].payload['date'] == '2031-05-05'
+        assert checkins[0].relayed_at is None
+        assert _eventos(uid, 'pomodoro.registrado')[0].payload['tipo'] == 'work'
+
+
+def test_local_dispatch_runs_consumers_from_checkpoint(ctx):
+    c, uid, ids = ctx
+    assert app.test_client().post('/api/conteudos/concluir', json={'user_id': uid, 'content_id': ids[0]}).status_code == 401
+    assert c.post('/api/conteudos/concluir', json={'user_id': uid + 1, 'content_id': ids[0]}).status_code == 403
+    assert c.post('/api/conteudos/concluir', json={'content_id': 'abc'}).status_code == 400
+    for cid in ids[:1]:
+        assert c.post('/api/conteudos/concluir', json={'user_id': uid, 'content_id': cid}).status_code == 200
+    with app.app_context():
+        feitos = eventos.despachar_local()
+        assert set(feitos) == {'progresso', 'streaks', 'quiz', 'revisoes', 'conquistas'}
+        assert ProgressoMateria.query.filter_by(user_id=uid, subject='História dos eventos').one().percent == 50.0
+        assert HabitoStats.query.filter_by(user_id=uid, habit='conteudos').one().total_days == 1
+        quiz = WeeklyQuiz.query.filter_by(user_id=uid).one()
+        assert quiz.data and quiz.version == 1
+        assert {a.title for a in Achievement.query.filter_by(user_id=uid)} == {'Primeiro foco'}
+        ultimo = _eventos(uid, 'conteudo.concluido')[-1].id
+        assert all(cp.last_event_id >= ultimo for cp in OutboxCheckpoint.query)
+        # checkpoint salvo: nada a refazer
+        assert set(eventos.despachar_local().values()) == {0}
+
+
+def test_replay_from_outbox_is_idempotent(ctx):
+    _, uid, _ = ctx
+    with app.app_context():
+        Achievement.query.filter_by(user_id=uid).delete()
+        db.session.commit()
+        desde = _eventos(uid, 'pomodoro.registrado')[0].id
+        assert eventos.reprocessar('conquistas', desde) >= 1
+        assert eventos.reprocessar('conquistas', desde) >= 1
+        assert [a.title for a in Achievement.query.filter_by(user_id=uid)] == ['Primeiro foco']
+
+
+def test_stream_entry_roundtrip():
+    ev = eventos.Evento(7, 'bloco.status', 3, {'status': 'ok', 'date': '05/05/2031'}, datetime(2031, 5, 5, 10, 0))
+    assert eventos.Evento.de_campos(ev.campos()) == ev
+    assert eventos.Evento.de_campos(dict(ev.campos(), user_id='')).user_id is None
+
+
+def test_local_dispatcher_is_one_thread_and_coalesces_wakeups(monkeypatch):
+    comecou, liberar, passadas = threading.Event(), threading.Event(), []
+
+    def despachar_lento():
+        passadas.append(threading.current_thread())
+        comecou.set()
+        liberar.wait(5)
+    monkeypatch.setattr(eventos, 'despachar_local', despachar_lento)
+    d = eventos.DespachanteLocal()
+    d.acordar(app)
+    assert comecou.wait(5)
+    for _ in range(20):  # rajada durante uma passada: vira uma única passada extra
+        d.acordar(app)
+    liberar.set()
+    for _ in range(500):
+        if len(passadas) >= 2 and not d._sinal.is_set():
+            break
+        time.sleep(0.01)
+    assert len(passadas) == 2 and passadas[0] is passadas[1] is d._thread
+    d.parar(5)
+    assert not d._thread.is_alive()
@@ -36,3 +36,10 @@ def test_health_v1(client):
     assert 'version' in data
     assert 'environment' in data
     assert data.get('meta', {}).get('service') == 'evolutiva-api'
+
+def test_unsupported_database_fails_at_startup():
+    from servicos.upsert import exigir_dialeto
+    exigir_dialeto('sqlite:///:memory:')
+    exigir_dialeto('postgresql+psycopg2://u:p@localhost/db')
+    with pytest.raises(RuntimeError, match='ON CONFLICT'):
+        exigir_dialeto('mysql+pymysql://u:p@localhost/db')
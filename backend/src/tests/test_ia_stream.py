@@ -0,0 +1,96 @@
+import asyncio
+import json
+
+import pytest
+
+from main import app
+from servicos.asgi_ia import AppIAAsync
+from servicos.gemini_fake import MINDMAP_FAKE, QUIZ_FAKE, ServidorGeminiFake
+from servicos.ia_stream import MontadorJSON, resumo_ttfb
+from tests.test_asgi_ia import _requisitar
+
+
+@pytest.fixture()
+def fake_stream(monkeypatch):
+    servidor = ServidorGeminiFake(atraso_pedaco=0.01, tamanho_pedaco=7).iniciar()
+    monkeypatch.setenv('GEMINI_API_BASE', servidor.base_url)
+    monkeypatch.setenv('GOOGLE_API_KEY', 'chave-teste')
+    yield servidor
+    servidor.parar()
+
+
+def _eventos(corpo: bytes):
+    eventos = []
+    for bloco in corpo.decode('utf-8').split('\n\n'):
+        if not bloco.strip():
+            continue
+        linhas = dict(linha.split(': ', 1) for linha in bloco.split('\n'))
+        eventos.append((linhas['event'], json.loads(linhas['data'])))
+    return eventos
+
+
+def _pedacos(texto, n):
+    return [texto[i:i + n] for i in range(0, len(texto), n)]
+
+
+def test_montador_emits_values_as_soon_as_they_close():
+    texto = json.dumps(MINDMAP_FAKE, ensure_ascii=False, indent=2)
+    montador = MontadorJSON([('topic',), ('related_topics',), ('subtopics', '*')])
+    itens = [item for p in _pedacos(texto, 5) for item in montador.alimentar(p)]
+    assert itens == [
+        (['topic'], 'Conjuntos'),
+        (['related_topics'], ['Operações', 'Propriedades']),
+        (['subtopics', 'Operações'], ['União', 'Interseção', 'Diferença']),
+        (['subtopics', 'Propriedades'], ['Comutativa', 'Associativa']),
+    ]
+    assert montador.final == MINDMAP_FAKE
+
+    quiz = MontadorJSON([('*',)])
+    texto = 'Claro! ```json\n[{"question": "a \\"b\\" [c]", "n": 1}, {"question": "d", "ok": true}]\n```'
+    itens = [item for p in _pedacos(texto, 3) for item in quiz.alimentar(p)]
+    assert itens == [([0], {"question": 'a "b" [c]', "n": 1}), ([1], {"question": "d", "ok": True})]
+
+
+def test_wsgi_stream_mindmap_relays_items_and_final(fake_stream):
+    with app.test_client() as c:
+        r = c.post('/api/generate_mindmap?stream=1', json={'content': 'conjuntos', 'topic': 'Conjuntos'},
+                   environ_base={'REMOTE_ADDR': '10.4.0.1'})
+        assert r.status_code == 200
+        assert r.mimetype == 'text/event-stream'
+        assert r.headers['X-Accel-Buffering'] == 'no'
+        eventos = _eventos(r.data)
+    nomes = [n for n, _ in eventos]
+    assert nomes[0] == 'delta' and nomes[-1] == 'fim'
+    assert ''.join(d['texto'] for n, d in eventos if n == 'delta') == json.dumps(MINDMAP_FAKE, ensure_ascii=False, indent=2)
+    grupos = {tuple(d['caminho']): d['valor'] for n, d in eventos if n == 'item'}
+    assert grupos[('subtopics', 'Operações')] == ['União', 'Interseção', 'Diferença']
+    fim = eventos[-1][1]
+    assert fim['status'] == 200 and fim['resultado']['subtopics'] == MINDMAP_FAKE['subtopics']
+    assert resumo_ttfb()['ai.generate_mindmap']['n'] >= 1
+
+
+def test_wsgi_stream_upstream_error_keeps_http_status(monkeypatch):
+    monkeypatch.setenv('GOOGLE_API_KEY', 'chave-teste')
+    monkeypatch.setenv('GEMINI_API_BASE', 'http://127.0.0.1:9/v1beta')  # porta fechada
+    with app.test_client() as c:
+        r = c.post('/api/gemini_feynman?stream=1', json={'texto': 'a'}, environ_base={'REMOTE_ADDR': '10.4.0.2'})
+    assert r.status_code == 502 and r.get_json()['error'] == 'Falha na chamada Gemini'
+
+
+def test_asgi_stream_sends_chunks_before_the_end(fake_stream):
+    asgi = AppIAAsync(app, threads=2)
+    status, headers, corpo = asyncio.run(_requisitar(
+        asgi, 'POST', '/api/ia/quiz-feedback', {'questions': QUIZ_FAKE, 'answers': ['4', 'Rio']},
+        ip='10.4.0.3', query=b'stream=1'))
+    assert status == 200 and headers['content-type'].startswith('text/event-stream')
+    eventos = _eventos(corpo)
+    assert sum(1 for n, _ in eventos if n == 'delta') > 3
+    assert eventos[-1][0] == 'fim' and eventos[-1][1]['resultado']['feedback'].startswith('Bom trabalho!')
+
+
+def test_metrics_endpoint_reports_ttfb(fake_stream, client, login):
+    client.post('/api/gemini_feynman?stream=1', json={'texto': 'a'}, environ_base={'REMOTE_ADDR': '10.4.0.4'}).get_data()
+    assert client.get('/api/ia/stream/metricas').status_code == 401
+    r = login('ttfb_user@example.com').get('/api/ia/stream/metricas')
+    ttfb = r.get_json()['ttfb']['ai.gemini_feynman']
+    assert ttfb['n'] >= 1 and ttfb['p95_ms'] >= ttfb['p50_ms'] >= 0
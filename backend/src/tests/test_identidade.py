@@ -0,0 +1,34 @@
+import pytest
+
+from main import app
+from models.models import db, Curso
+from servicos import identidade
+
+
+@pytest.fixture(scope="module")
+def client(login):
+    return login('ident_user@example.com')
+
+
+def test_snapshot_cached_and_invalidated_on_onboarding(client, monkeypatch):
+    me = client.get('/api/user/me').get_json()
+    uid = me['id']
+
+    calls = []
+    original_get = db.session.get
+    monkeypatch.setattr(db.session, 'get', lambda *a, **k: calls.append(a) or original_get(*a, **k))
+    with app.test_request_context():
+        assert identidade.carregar_identidade(uid).email == 'ident_user@example.com'
+        identidade.carregar_identidade(uid)
+    assert calls == []  # servido do cache local, sem ir ao banco
+    monkeypatch.undo()
+
+    with app.app_context():
+        curso = Curso(nome='Curso Identidade')
+        db.session.add(curso)
+        db.session.commit()
+        curso_id = curso.id
+    r = client.post('/api/onboarding', json={'curso_id': curso_id, 'idade': 15})
+    assert r.status_code == 200, r.data
+    me2 = client.get('/api/user/me').get_json()
+    assert me2['curso_id'] == curso_id and me2['has_onboarding'] is True
@@ -0,0 +1,47 @@
+"""Orçamento de import do boot: importar `main` (STARTUP_PROFILE=fast) não pode
+passar de IMPORT_BUDGET_MS nem carregar libs que só poucas rotas usam."""
+import os
+import sys
+import textwrap
+
+SCRIPTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'scripts'))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+import _import_scan_project as scan  # noqa: E402
+
+IMPORT_BUDGET_MS = float(os.getenv('IMPORT_BUDGET_MS', '3000'))
+# Importadas sob demanda pelas rotas (ver gunicorn.conf.py: aquecidas só no master)
+NAO_EAGER = ('requests', 'pydantic', 'google.generativeai', 'servicos.plano_estudo_avancado')
+
+
+def test_parse_and_lazy_candidates(tmp_path):
+    saida = textwrap.dedent("""\
+        import time: self [us] | cumulative | imported package
+        import time:      100 |        100 |     heavy.sub
+        import time:    40000 |      40100 |   heavy
+        import time:      500 |      40600 | routes.pesada
+    """)
+    regs = scan.parse_importtime(saida)
+    assert [(r.modulo, r.pai) for r in regs] == [('heavy.sub', 'heavy'), ('heavy', 'routes.pesada'), ('routes.pesada', None)]
+    (tmp_path / 'pesada.py').write_text(textwrap.dedent("""\
+        import heavy
+        from flask import Blueprint
+        bp = Blueprint('x', __name__)
+
+        def rara():
+            return heavy.run()
+    """), encoding='utf-8')
+    cands = scan.candidatos_lazy(regs, min_ms=20, max_funcoes=2, pasta=tmp_path)
+    assert [(c['modulo'], c['funcoes']) for c in cands] == [('heavy', ['pesada.rara'])]
+
+
+def test_boot_import_budget():
+    regs = scan.medir_imports('main')
+    total = scan.total_ms(regs)
+    eager = sorted({r.modulo for r in regs} & set(NAO_EAGER))
+    assert not eager, f"imports pesados no boot: {eager}"
+    assert total <= IMPORT_BUDGET_MS, (
+        f"boot importou em {total:.0f} ms (> {IMPORT_BUDGET_MS:.0f} ms); "
+        "veja `python backend/scripts/check_imports.py --profile`"
+    )
@@ -0,0 +1,68 @@
+import json
+
+from main import app
+from models.models import db, CatalogVersion, Curso, CursoMateria, HorariosEscolares, SubjectContent
+from servicos import catalogo, ingestao
+
+MATERIA = 'Paleontologia (ingestão)'
+CURSO = 'Curso de ingestão'
+
+
+def _registros(topicos, html='<h2>{t}</h2><p>Fósseis de {t}.</p>'):
+    linhas = [json.dumps({'materia': MATERIA, 'curso': CURSO, 'topic': t, 'content_html': html.format(t=t)})
+              for t in topicos]
+    linhas += [json.dumps({'materia': MATERIA, 'topic': 'Sem HTML'}), '{quebrado']
+    return ingestao.ler(linhas, 'jsonl')
+
+
+def _versao():
+    return db.session.query(CatalogVersion.version).filter_by(id=1).scalar() or 0
+
+
+def test_bulk_ingest_is_idempotent_and_only_touches_changed_rows():
+    topicos = ['Trilobitas', 'Amonites', 'Dinossauros']
+    with app.app_context():
+        r = ingestao.ingerir(_registros(topicos), lote=2, processos=2)
+        assert (r['lidas'], r['inseridas'], r['atualizadas'], r['invalidas']) == (5, 3, 0, 2)
+        assert [e['linha'] for e in r['erros']] == [4, 5] and r['linhas_por_segundo'] > 0
+        assert r['criados'] == {'materias': 1, 'cursos': 1, 'vinculos': 1}
+
+        materia_id = db.session.query(HorariosEscolares.id).filter_by(materia=MATERIA).scalar()
+        curso_id = db.session.query(Curso.id).filter_by(nome=CURSO).scalar()
+        assert CursoMateria.query.filter_by(curso_id=curso_id, materia_id=materia_id).count() == 1
+        assert db.session.get(HorariosEscolares, materia_id).horario is None  # sem horário fictício
+        sc = SubjectContent.query.filter_by(materia_id=materia_id, topic='Amonites').one()
+        assert sc.subject == MATERIA and sc.content_text == 'Amonites\nFósseis de Amonites.' and sc.word_count == 4
+        assert sc.content_sections[0]['title'] == 'Amonites' and 'fosseis' in sc.search_text and sc.content_hash
+        assert {c.topic for c in catalogo.atual().conteudos_de([materia_id])} == set(topicos)
+        criado_em, versao = sc.created_at, _versao()
+
+        # mesma carga: nada regravado, catálogo intacto
+        r = ingestao.ingerir(_registros(topicos), lote=2)
+        assert (r['inseridas'], r['atualizadas'], r['inalteradas']) == (0, 0, 3) and _versao() == versao
+
+        alterado = '<h2>{t}</h2><p>Revisado: {t}.</p>'
+        linhas = [json.dumps({'materia': MATERIA, 'topic': 'Amonites', 'content_html': alterado.format(t='Amonites')}),
+                  json.dumps({'materia': MATERIA, 'topic': 'Trilobitas', 'content_html': '<h2>Trilobitas</h2><p>Fósseis de Trilobitas.</p>'})]
+        r = ingestao.ingerir(ingestao.ler(linhas, 'jsonl'))
+        assert (r['inseridas'], r['atualizadas'], r['inalteradas']) == (0, 1, 1) and _versao() == versao + 1
+        db.session.expire_all()
+        sc = db.session.get(SubjectContent, sc.id)
+        assert sc.content_text == 'Amonites\nRevisado: Amonites.' and sc.created_at == criado_em
+        assert SubjectContent.query.filter_by(materia_id=materia_id).count() == 3
+
+
+def test_csv_input_and_same_hash_as_orm_writes():
+    csv = ['materia,topic,content_html', f'{MATERIA},Icnofósseis,"<p>Pegadas, tocas.</p>"']
+    with app.app_context():
+        r = ingestao.ingerir(ingestao.ler(csv, 'csv'))
+        assert (r['lidas'], r['inseridas']) == (1, 1)
+        sc = SubjectContent.query.filter_by(topic='Icnofósseis').one()
+        assert sc.content_text == 'Pegadas, tocas.'
+        hash_ingestao = sc.content_hash
+        sc.content_html = '<p>Pegadas, tocas.</p> '
+        db.session.commit()
+        assert sc.content_hash != hash_ingestao
+        sc.content_html = '<p>Pegadas, tocas.</p>'
+        db.session.commit()
+        assert sc.content_hash == hash_ingestao
@@ -0,0 +1,69 @@
+from datetime import datetime
+
+import pytest
+
+from main import app
+from models.models import db, User, SubjectContent, CompletedContent, WeeklyQuiz
+import routes.quiz_gen_routes as quiz_gen
+from servicos import micro_quiz
+
+EMAIL = 'micro_quiz_user@example.com'
+TEXTOS = [
+    ("História", "Revolução Industrial",
+     "<p>A Revolução Industrial começou na Inglaterra no século XVIII e transformou a produção de mercadorias. "
+     "A máquina a vapor foi a principal inovação tecnológica do período e acelerou a mecanização das fábricas. "
+     "Os operários enfrentavam jornadas longas, salários baixos e condições insalubres nas cidades industriais.</p>"),
+    ("Biologia", "Fotossíntese",
+     "<p>A fotossíntese foi descrita como o processo pelo qual as plantas produzem glicose a partir de gás carbônico e água. "
+     "A clorofila pode absorver a energia luminosa usada nas reações que ocorrem dentro dos cloroplastos. "
+     "O oxigênio liberado pelas plantas era essencial para a respiração da maioria dos seres vivos do planeta.</p>"),
+]
+
+
+@pytest.fixture(scope="module")
+def ctx(login):
+    c = login(EMAIL)
+    with app.app_context():
+        uid = User.query.filter_by(email=EMAIL).first().id
+        ids = []
+        for subject, topic, html in TEXTOS:
+            sc = SubjectContent(subject=subject, topic=topic, content_html=html, created_at=datetime.now())
+            db.session.add(sc)
+            db.session.flush()
+            ids.append(sc.id)
+        db.session.add(CompletedContent(user_id=uid, content_id=ids[0], completed_at=datetime.now()))
+        db.session.commit()
+    yield c, uid, ids
+
+
+def test_event_is_queued_off_the_request_path(ctx, monkeypatch):
+    c, uid, ids = ctx
+    chamadas = []
+    monkeypatch.setattr(micro_quiz, 'enfileirar', lambda *a: chamadas.append(a) or 'thread')
+
+    r = c.post('/api/events/content-completed', json={'content_id': ids[1]})
+    assert r.status_code == 202 and r.get_json()['status'] == 'queued'
+    assert chamadas == [(uid, ids[1], quiz_gen.get_week_start_date())]
+    assert c.post('/api/events/content-completed', json={'content_id': 'x'}).status_code == 400
+    assert c.post('/api/events/content-completed', json={'content_id': 10 ** 9}).status_code == 404
+
+
+def test_completed_content_bucket_is_appended_with_version_bump(ctx):
+    c, uid, ids = ctx
+    inicial = c.post('/api/quizzes/weekly', json={'regenerate': True, 'per_content': 3}).get_json()
+    assert inicial['items'] and {q['source'] for q in inicial['items']} == {ids[0]}
+
+    wk = quiz_gen.get_week_start_date()
+    with app.app_context():
+        resultado = micro_quiz.executar(uid, ids[1], wk.isoformat())
+        assert resultado['status'] == 'appended' and 1 <= resultado['added'] <= micro_quiz.POR_CONTEUDO
+        assert resultado['version'] == inicial['version'] + 1
+        # repetir o evento não duplica o bucket
+        assert micro_quiz.executar(uid, ids[1], wk.isoformat())['status'] == 'already_present'
+        assert WeeklyQuiz.query.filter_by(user_id=uid, week_start=wk).one().version == resultado['version']
+
+    atual = c.get('/api/quizzes/weekly/latest').get_json()
+    assert atual['version'] == resultado['version']
+    assert [q['id'] for q in atual['items'][:len(inicial['items'])]] == [q['id'] for q in inicial['items']]
+    novos = atual['items'][len(inicial['items']):]
+    assert len(novos) == resultado['added'] and {q['source'] for q in novos} == {ids[1]}
@@ -0,0 +1,73 @@
+from collections import Counter
+from datetime import datetime
+
+import pytest
+
+from main import app
+from models.models import db, Curso, CursoMateria, HorariosEscolares, PlanoEstudo, SubjectContent
+
+EMAILS = ['plano_tpl_a@example.com', 'plano_tpl_b@example.com']
+ONBOARDING = {'dias_disponiveis': ['Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado', 'Domingo'],
+              'tempo_diario': 90, 'ritmo': 'moderado', 'estilo_aprendizagem': 'visual', 'horario_inicio': '07:30'}
+
+
+def _conteudo(materia_id, i):
+    return SubjectContent(subject='Geografia', topic=f'Clima {i}', content_html='<p>x</p>',
+                          materia_id=materia_id, created_at=datetime.now())
+
+
+@pytest.fixture(scope="module")
+def ctx(login):
+    with app.app_context():
+        curso = Curso(nome='Curso templates de plano')
+        materia = HorariosEscolares(materia='Geografia', horario='08:00')
+        db.session.add_all([curso, materia])
+        db.session.flush()
+        db.session.add(CursoMateria(curso_id=curso.id, materia_id=materia.id))
+        db.session.add_all([_conteudo(materia.id, i) for i in range(12)])
+        db.session.commit()
+        curso_id, materia_id = curso.id, materia.id
+    clientes = []
+    for email in EMAILS:
+        c = login(email)
+        assert c.post('/api/onboarding', json=dict(ONBOARDING, curso_id=curso_id)).status_code == 200
+        clientes.append(c)
+    return clientes, materia_id
+
+
+def _slots(plano):
+    return [(d['date'], b['start_time'], b['activity_type']) for d in plano['days'] for b in d['blocks']]
+
+
+def _conteudos(plano):
+    return Counter(b['id'] for d in plano['days'] for b in d['blocks'])
+
+
+def test_same_preferences_share_template_with_per_user_order(ctx):
+    (a, b), _ = ctx
+    ra, rb = a.post('/api/plano-estudo/gerar').get_json(), b.post('/api/plano-estudo/gerar').get_json()
+    assert (ra['template'], rb['template']) == ('miss', 'hit')
+    pa, pb = ra['plano_estudo'], rb['plano_estudo']
+    assert _slots(pa) == _slots(pb) and _conteudos(pa) == _conteudos(pb)
+    assert sum(_conteudos(pa).values()) >= 12
+    assert [x['id'] for d in pa['days'] for x in d['blocks']] != [x['id'] for d in pb['days'] for x in d['blocks']]
+    assert rb['plano_cards']['tarefas_da_semana'] and rb['plano_cards']['tarefas_pendentes'] == []
+    # derivação determinística por usuário
+    assert b.post('/api/plano-estudo/gerar').get_json()['plano_estudo'] == pb
+
+
+def test_catalog_change_and_pending_blocks_skip_template(ctx):
+    (a, _), materia_id = ctx
+    with app.app_context():
+        db.session.add(_conteudo(materia_id, 99))
+        db.session.commit()
+    r = a.post('/api/plano-estudo/gerar').get_json()
+    assert r['template'] == 'miss' and sum(_conteudos(r['plano_estudo']).values()) >= 13
+
+    with app.app_context():
+        plano = PlanoEstudo.query.filter_by(email=EMAILS[0]).order_by(PlanoEstudo.id.desc()).first()
+        dados = dict(plano.dados)
+        dados['days'] = [dict(dados['days'][0], blocks=[dict(dados['days'][0]['blocks'][0], status='dificuldade')])]
+        plano.dados = dados
+        db.session.commit()
+    assert a.post('/api/plano-estudo/gerar').get_json()['template'] == 'bypass'
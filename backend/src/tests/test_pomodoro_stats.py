@@ -0,0 +1,38 @@
+import pytest
+
+from main import app
+from models.models import User
+from servicos.pomodoro_rollups import recalcular
+
+
+@pytest.fixture(scope="module")
+def client(login):
+    return login('pomodoro_user@example.com')
+
+
+def test_rollups_day_and_week_and_recompute(client):
+    sessoes = [
+        ('2031-03-03T09:00:00', 'work', 1500),   # segunda
+        ('2031-03-03T10:00:00', 'work', 1500),
+        ('2031-03-03T10:30:00', 'break', 300),   # pausa não conta
+        ('2031-03-05T09:00:00', 'work', 600),
+        ('2031-03-10T09:00:00', 'work', 1200),   # semana seguinte
+    ]
+    for inicio, tipo, dur in sessoes:
+        r = client.post('/api/progress/pomodoro', json={'inicio': inicio, 'fim': inicio, 'tipo': tipo, 'duracao': dur})
+        assert r.status_code == 201, r.data
+
+    dia = client.get('/api/progress/pomodoro/stats?from=01/03/2031&to=31/03/2031').get_json()
+    assert [(b['start'], b['focus_minutes'], b['sessions']) for b in dia['buckets']] == [
+        ('03/03/2031', 50.0, 2), ('05/03/2031', 10.0, 1), ('10/03/2031', 20.0, 1),
+    ]
+    semana = client.get('/api/progress/pomodoro/stats?granularity=week&from=2031-03-04&to=2031-03-31').get_json()
+    assert [(b['start'], b['focus_minutes']) for b in semana['buckets']] == [('03/03/2031', 60.0), ('10/03/2031', 20.0)]
+
+    assert client.get('/api/progress/pomodoro/stats?granularity=month').status_code == 400
+
+    with app.app_context():
+        uid = User.query.filter_by(email='pomodoro_user@example.com').first().id
+        recalcular(uid)
+    again = client.get('/api/progress/pomodoro/stats?from=01/03/2031&to=31/03/2031').get_json()
+    assert again['buckets'] == dia['buckets']
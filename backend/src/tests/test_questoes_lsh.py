@@ -0,0 +1,83 @@
+from datetime import date
+
+import pytest
+
+from main import app
+from models.models import db, User, QuestionLSHBand, QuestionSignature, WeeklyQuiz
+from routes.quiz_gen_routes import iter_weekly_quiz_buckets
+from servicos.questoes_lsh import (
+    BANDAS, HistoricoQuestoes, IndiceLSH, assinatura, registrar_questoes, reindexar, similaridade,
+)
+
+EMAIL = 'lsh_user@example.com'
+PERGUNTA = 'A máquina a vapor foi a principal inovação tecnológica do período e acelerou a mecanização das fábricas?'
+TEXTO = ("A Revolução Industrial começou na Inglaterra no século XVIII e transformou a produção de mercadorias. "
+         "A máquina a vapor foi a principal inovação tecnológica do período e acelerou a mecanização das fábricas. "
+         "Os operários enfrentavam jornadas longas, salários baixos e condições insalubres nas cidades industriais. "
+         "O carvão mineral era a fonte de energia que movimentava as máquinas a vapor.")
+
+
+@pytest.fixture(scope="module")
+def user_id(login):
+    login(EMAIL)
+    with app.app_context():
+        return User.query.filter_by(email=EMAIL).first().id
+
+
+def test_near_duplicates_are_found_by_band_lookup():
+    variante = '<b>A maquina a VAPOR</b> foi a principal inovacao tecnologica do periodo e acelerou a mecanizacao das fabricas inglesas'
+    assert similaridade(assinatura(PERGUNTA), assinatura(variante)) >= 0.8
+    indice = IndiceLSH()
+    assert indice.adicionar_se_nova('q1', PERGUNTA)
+    assert not indice.adicionar_se_nova('q2', variante)
+    assert indice.adicionar_se_nova('q3', 'O carvão mineral era a fonte de energia que movimentava as máquinas?')
+    assert not indice.adicionar_se_nova('q4', '   ')
+    assert len(indice) == 2
+
+
+def test_history_is_persisted_per_week(user_id):
+    semana1, semana2 = date(2031, 3, 3), date(2031, 3, 10)
+    nova = 'Qual pigmento absorve a luz nos cloroplastos das células vegetais?'
+    with app.app_context():
+        assert registrar_questoes(user_id, semana1, [PERGUNTA, PERGUNTA.upper()]) == 1
+        db.session.commit()
+        assert QuestionLSHBand.query.filter_by(user_id=user_id).count() == BANDAS
+
+        assert HistoricoQuestoes(user_id, excluir_semana=semana2).repetidas([PERGUNTA + ' ', nova]) == [True, False]
+        # regenerar a própria semana não conta como repetição
+        assert HistoricoQuestoes(user_id, excluir_semana=semana1).repetidas([PERGUNTA]) == [False]
+
+        # novas semanas só acrescentam; regravar a semana substitui as assinaturas dela
+        registrar_questoes(user_id, semana1, [nova])
+        db.session.commit()
+        assert QuestionSignature.query.filter_by(user_id=user_id).count() == 1
+        assert HistoricoQuestoes(user_id, excluir_semana=semana2).repetidas([PERGUNTA, nova]) == [False, True]
+
+
+def test_weekly_buckets_prefer_questions_not_seen_before(user_id):
+    conteudo = [{'id': 1, 'title': 'Revolução Industrial', 'subject': 'História', 'text': TEXTO}]
+    with app.app_context():
+        semana1, semana2 = date(2031, 4, 7), date(2031, 4, 14)
+        historico = HistoricoQuestoes(user_id, excluir_semana=semana1)
+        primeira = [q for _, b in iter_weekly_quiz_buckets(conteudo, 2, historico) for q in b]
+        registrar_questoes(user_id, semana1, [q['question'] for q in primeira])
+        db.session.commit()
+
+        historico = HistoricoQuestoes(user_id, excluir_semana=semana2)
+        segunda = [q for _, b in iter_weekly_quiz_buckets(conteudo, 2, historico) for q in b]
+        assert segunda
+        assert not any(historico.repetidas([q['question'] for q in segunda]))
+
+
+def test_reindex_pages_through_weeks_with_commit_between_pages(user_id):
+    semanas = [date(2032, 1, 5), date(2032, 1, 12), date(2032, 1, 19)]
+    with app.app_context():
+        for n, semana in enumerate(semanas):
+            db.session.add(WeeklyQuiz(user_id=user_id, week_start=semana, data=[{'question': f'{PERGUNTA} ({n})'}]))
+        db.session.commit()
+        QuestionLSHBand.query.filter_by(user_id=user_id).delete()
+        QuestionSignature.query.filter_by(user_id=user_id).delete()
+        db.session.commit()
+        resultado = reindexar(user_id, lote=2)
+        assert resultado == {'semanas': 3, 'questoes': 3}
+        assert {s.week_start for s in QuestionSignature.query.filter_by(user_id=user_id)} == set(semanas)
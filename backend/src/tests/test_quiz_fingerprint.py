@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from main import app
+from models.models import db, User, SubjectContent, CompletedContent, QuestionBankItem, WeeklyQuizFingerprint
+import routes.quiz_gen_routes as quiz_gen
+from servicos.questoes_lsh import registrar_questoes
+from servicos.quiz_fingerprint import fingerprint
+
+EMAILS = ['cohort_a@example.com', 'cohort_b@example.com', 'cohort_c@example.com']
+TEXTOS = [
+    ("História", "Revolução Industrial",
+     "<p>A Revolução Industrial começou na Inglaterra no século XVIII e transformou a produção de mercadorias. "
+     "A máquina a vapor foi a principal inovação tecnológica do período e acelerou a mecanização das fábricas. "
+     "Os operários enfrentavam jornadas longas, salários baixos e condições insalubres nas cidades industriais.</p>"),
+    ("Geografia", "Urbanização",
+     "<p>A urbanização brasileira se intensificou na segunda metade do século XX com a industrialização do Sudeste. "
+     "O êxodo rural levou milhões de trabalhadores do campo para as grandes cidades em busca de emprego. "
+     "O crescimento acelerado das metrópoles gerou favelas, trânsito intenso e falta de saneamento básico.</p>"),
+]
+
+
+@pytest.fixture(scope="module")
+def clientes(login):
+    clientes = [login(e) for e in EMAILS]
+    with app.app_context():
+        ids = []
+        for subject, topic, html in TEXTOS:
+            sc = SubjectContent(subject=subject, topic=topic, content_html=html, created_at=datetime.now())
+            db.session.add(sc)
+            db.session.flush()
+            ids.append(sc.id)
+        agora = datetime.now()
+        for n, email in enumerate(EMAILS):
+            uid = User.query.filter_by(email=email).first().id
+            # mesma turma, ordem de conclusão diferente
+            ordem = ids if n % 2 == 0 else ids[::-1]
+            for i, cid in enumerate(ordem):
+                db.session.add(CompletedContent(user_id=uid, content_id=cid, completed_at=agora - timedelta(seconds=i)))
+        db.session.commit()
+    fp = fingerprint([(cid, quiz_gen.clean_text(quiz_gen.strip_html(html))) for cid, (_, _, html) in zip(ids, TEXTOS)],
+                     quiz_gen.WEEKLY_GENERATOR, 3)
+    yield clientes, fp
+
+
+def _linha(fp):
+    return WeeklyQuizFingerprint.query.filter_by(fingerprint=fp).one()
+
+
+def _semana(cliente):
+    semana = quiz_gen.get_week_start_date().isoformat()
+    return next(w for w in cliente.get('/api/quizzes/weekly/cache-stats').get_json()['weeks'] if w['week_start'] == semana)
+
+
+def test_same_content_set_shares_one_selection_and_one_polish(clientes, monkeypatch):
+    polidos = []
+
+    def fake_polish(items):
+        polidos.append(len(items))
+        return [dict(q, question=q['question'] + ' (revisado)') for q in items]
+
+    monkeypatch.setattr(quiz_gen, 'is_polish_enabled', lambda: True)
+    monkeypatch.setattr(quiz_gen, 'polish_quiz_with_gemini', fake_polish)
+    (a, b, _), fp = clientes
+    itens_a = a.post('/api/quizzes/weekly', json={'regenerate': True, 'per_content': 3}).get_json()['items']
+    itens_b = b.post('/api/quizzes/weekly', json={'regenerate': True, 'per_content': 3}).get_json()['items']
+
+    assert itens_a and sorted(q['ref'] for q in itens_a) == sorted(q['ref'] for q in itens_b)
+    assert len(polidos) == 1
+    # quem reaproveita recebe o texto polido da seleção; o banco compartilhado não muda
+    assert all(q['question'].endswith('(revisado)') for q in itens_b)
+    with app.app_context():
+        row = _linha(fp)
+        assert row.hits == 1 and row.polished
+        assert set(row.polished_items) == {str(q['ref']) for q in itens_a}
+        bancos = QuestionBankItem.query.filter(QuestionBankItem.id.in_([q['ref'] for q in itens_a])).all()
+        assert not any(r.item['question'].endswith('(revisado)') for r in bancos)
+
+    semana = _semana(a)
+    assert semana['generations'] >= 1 and semana['hits'] >= 1
+    assert semana['hit_rate'] == round(semana['hits'] / (semana['generations'] + semana['hits'] + semana['history_misses']), 4)
+
+
+def test_user_who_saw_questions_before_gets_personal_selection(clientes):
+    (a, _, c), fp = clientes
+    with app.app_context():
+        uid = User.query.filter_by(email=EMAILS[2]).first().id
+        compartilhada = a.get('/api/quizzes/weekly/latest').get_json()['items']
+        semana_passada = quiz_gen.get_week_start_date() - timedelta(days=7)
+        registrar_questoes(uid, semana_passada, [compartilhada[0]['question']])
+        db.session.commit()
+
+    itens_c = c.post('/api/quizzes/weekly', json={'regenerate': True, 'per_content': 3}).get_json()['items']
+    assert compartilhada[0]['ref'] not in {q['ref'] for q in itens_c}
+    with app.app_context():
+        row = _linha(fp)
+        assert row.hits == 1 and row.history_misses == 1
+    assert c.get('/api/quizzes/weekly/cache-stats?weeks=x').status_code == 400
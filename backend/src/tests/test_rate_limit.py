@@ -0,0 +1,42 @@
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+from main import app
+from servicos.rate_limit import PreChecagemLocal, chave_limite, custo_requisicao
+
+
+def test_local_bucket_only_rejects_callers_certainly_over_the_limit():
+    # 60/min: balde de 120 (duas janelas fixas cheias coladas), 1 token por segundo
+    pre = PreChecagemLocal('60 per minute;1000 per hour')
+    assert all(pre.consumir('ip:x', 1, agora=0) for _ in range(120))
+    assert not pre.consumir('ip:x', 1, agora=0)
+    assert pre.consumir('ip:x', 1, agora=1.5)
+    assert not pre.consumir('ip:y', 121, agora=0)  # custo acima de qualquer janela nunca passaria no Redis
+    # o limite por hora também tem balde próprio
+    pre = PreChecagemLocal('100 per minute;10 per hour')
+    assert sum(pre.consumir('ip:z', 1, agora=0) for _ in range(30)) == 20
+
+
+def test_precheck_runs_before_limiter_and_never_exempts_from_counting():
+    pre = PreChecagemLocal('1 per minute')
+    hits = []
+    teste = type(app)(__name__)
+
+    @teste.route('/x')
+    def x():
+        return 'ok'
+
+    teste.before_request(lambda: hits.append(1))  # faz o papel do Limiter (contagem no Redis)
+    teste.before_request_funcs[None].insert(0, pre.rejeitar)
+    c = teste.test_client()
+    assert [c.get('/x').status_code for _ in range(3)] == [200, 200, 429]
+    assert len(hits) == 2  # as liberadas foram contadas; só a rejeitada não chegou ao Limiter
+
+
+def test_key_uses_client_ip_behind_proxy_and_cost_by_blueprint():
+    assert isinstance(app.wsgi_app, ProxyFix)  # REMOTE_ADDR = cliente, não o nginx
+    with app.test_request_context('/api/ping', environ_base={'REMOTE_ADDR': '200.1.2.3'}):
+        assert chave_limite() == 'ip:200.1.2.3'
+        assert custo_requisicao() == 1
+    rota_video = next(r.rule for r in app.url_map.iter_rules() if r.endpoint.startswith('videos.'))
+    with app.test_request_context(rota_video):
+        assert custo_requisicao() == 5
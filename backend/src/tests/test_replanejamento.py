@@ -0,0 +1,90 @@
+from datetime import date
+
+import pytest
+
+from main import app
+from models.models import db, PlanoEstudo, User
+from servicos.plano_estudo_avancado import UserPreferences, replanejar_incremental
+
+EMAIL = 'replanejamento_user@example.com'
+HOJE = date(2031, 9, 1)  # segunda-feira
+PREFS = UserPreferences(daily_study_time=120, pace='slow', start_time='08:00')
+SLOTS = [('08:00', '08:40'), ('08:50', '09:30')]
+
+
+def _bloco(cid, slot, status='ok', tipo='leitura'):
+    ini, fim = SLOTS[slot]
+    return {'id': cid, 'start_time': ini, 'end_time': fim, 'activity_type': tipo, 'subject': 'Física',
+            'topic': f'Tópico {cid}', 'duration': 40, 'priority': 1, 'status': status}
+
+
+def _plano():
+    return {
+        'week_number': 36,
+        'days': [
+            {'date': '29/08/2031', 'blocks': [_bloco(7, 0, 'pendente'), _bloco(8, 1, 'pendente')], 'total_study_time': 80},
+            {'date': '01/09/2031', 'blocks': [_bloco(1, 0, 'pendente'), _bloco(2, 1)], 'total_study_time': 80},
+            {'date': '02/09/2031', 'blocks': [_bloco(3, 0), _bloco(4, 1)], 'total_study_time': 80},
+            {'date': '03/09/2031', 'blocks': [_bloco(5, 0), _bloco(6, 1)], 'total_study_time': 80},
+            {'date': '06/09/2031', 'blocks': [dict(_bloco(99, 0, 'pendente', 'revisão'), start_time='19:00')],
+             'total_study_time': 40},
+        ],
+        'weekly_goals': [],
+        'total_hours': 6,
+    }
+
+
+def _ids(plano, data):
+    return [b['id'] for d in plano['days'] if d['date'] == data for b in d['blocks']]
+
+
+def test_completing_today_only_touches_today():
+    novo, diff = replanejar_incremental(_plano(), PREFS, concluidos=[1], hoje=HOJE)
+    assert diff == {'from': None, 'added': [], 'removed': [], 'changed': ['01/09/2031']}
+    assert novo['days'][1]['blocks'][0]['status'] == 'ok'
+
+
+def test_future_completion_repacks_from_that_day():
+    novo, diff = replanejar_incremental(_plano(), PREFS, concluidos=[{'id': 3, 'date': '02/09/2031'}], hoje=HOJE)
+    assert diff['from'] == '02/09/2031' and diff['changed'] == ['02/09/2031', '03/09/2031']
+    assert _ids(novo, '02/09/2031') == [4, 5] and _ids(novo, '03/09/2031') == [6]
+    assert novo['days'][2]['blocks'][0]['start_time'] == '08:00'
+
+
+def test_missed_day_moves_blocks_forward_and_keeps_reviews():
+    novo, diff = replanejar_incremental(_plano(), PREFS, dias_perdidos=['29/08/2031'], hoje=HOJE)
+    assert _ids(novo, '29/08/2031') == []
+    assert [_ids(novo, f'0{i}/09/2031') for i in (1, 2, 3, 4)] == [[7, 8], [1, 2], [3, 4], [5, 6]]
+    assert _ids(novo, '06/09/2031') == [99]
+    assert diff['added'] == ['04/09/2031'] and '06/09/2031' not in diff['changed']
+    assert novo['total_hours'] == (4 * 80 + 40) // 60
+
+
+@pytest.fixture(scope="module")
+def client(login):
+    c = login(EMAIL)
+    return c
+
+
+def test_replan_route_updates_plan_in_place(client):
+    assert client.post('/api/plano-estudo/replanejar', json={}).status_code == 404
+    with app.app_context():
+        db.session.add(PlanoEstudo(email=EMAIL, dados=_plano()))
+        db.session.commit()
+    assert client.post('/api/plano-estudo/replanejar', json={'missed_days': ['amanhã']}).status_code == 400
+    assert client.post('/api/plano-estudo/replanejar', json={'preferences': {'start_time': '8h'}}).status_code == 400
+    # erro num campo posterior não deixa os anteriores aplicados no usuário
+    r = client.post('/api/plano-estudo/replanejar', json={'preferences': {'daily_study_time': 30, 'pace': 'turbo'}})
+    assert r.status_code == 400 and 'pace' in r.get_json()['error']
+    with app.app_context():
+        assert User.query.filter_by(email=EMAIL).first().tempo_diario != 30
+
+    r = client.post('/api/plano-estudo/replanejar', json={'preferences': {'start_time': '14:00', 'pace': 'Leve'}})
+    assert r.status_code == 200, r.data
+    futuros = [d for d in r.get_json()['plano_estudo']['days'] if d['date'] != '29/08/2031']
+    assert all(b['start_time'] in ('14:00', '14:50', '19:00') for d in futuros for b in d['blocks'])
+    assert r.get_json()['diff']['from'] is not None
+    with app.app_context():
+        planos = PlanoEstudo.query.filter_by(email=EMAIL).all()
+        assert len(planos) == 1 and planos[0].dados['days'] == r.get_json()['plano_estudo']['days']
+        assert User.query.filter_by(email=EMAIL).first().ritmo == 'leve'
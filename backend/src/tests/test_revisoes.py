@@ -0,0 +1,77 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from main import app
+from models.models import db, ReviewItem, SubjectContent, User
+from servicos import eventos, revisoes
+from servicos.revisoes import EstadoSM2, sm2
+
+EMAILS = ['revisoes_a@example.com', 'revisoes_b@example.com']
+
+
+@pytest.fixture(scope="module")
+def ctx(despacho_manual, login):
+    clientes = [login(e) for e in EMAILS]
+    with app.app_context():
+        uids = [User.query.filter_by(email=e).first().id for e in EMAILS]
+        sc = SubjectContent(subject='Química', topic='Ligações iônicas', content_html='<p>x</p>', created_at=datetime.now())
+        db.session.add(sc)
+        db.session.commit()
+        content_id = sc.id
+    yield clientes, uids, content_id
+
+
+def test_sm2_intervals():
+    e = EstadoSM2()
+    intervalos = []
+    for _ in range(3):
+        e = sm2(e, 'ok')
+        intervalos.append(e.interval_days)
+    assert intervalos == [1, 6, 15] and e.ease == pytest.approx(2.5)
+    e = sm2(e, 'dificuldade')
+    assert (e.interval_days, e.repetitions, e.lapses) == (1, 0, 1) and e.ease == pytest.approx(2.18)
+    assert sm2(EstadoSM2(ease=1.3), 'dificuldade').ease == 1.3
+
+
+def test_completion_schedules_review_and_outcomes_reschedule(ctx):
+    (a, _), (uid, _), content_id = ctx
+    assert a.post('/api/conteudos/concluir', json={'user_id': uid, 'content_id': content_id}).status_code == 200
+    with app.app_context():
+        eventos.despachar_local()
+
+    assert a.get('/api/reviews/due').get_json()['reviews'] == []
+    amanha = datetime.combine(date.today() + timedelta(days=1), datetime.min.time())
+    devidas = a.get(f'/api/reviews/due?until={amanha.isoformat()}').get_json()['reviews']
+    assert [(r['content_id'], r['topic'], r['due_at']) for r in devidas] == [(content_id, 'Ligações iônicas', amanha.isoformat())]
+    assert a.get('/api/reviews/due?until=ontem').status_code == 400
+
+    with app.app_context():
+        quando = amanha + timedelta(hours=9)
+        revisoes.registrar_resultado(uid, content_id, 'ok', quando)
+        revisoes.registrar_resultado(uid, content_id, 'ok', quando)  # evento repetido não conta duas vezes
+        db.session.commit()
+        row = ReviewItem.query.filter_by(user_id=uid, content_id=content_id).one()
+        assert (row.repetitions, row.interval_days) == (1, 1)
+        assert row.due_at == amanha + timedelta(days=1)
+        revisoes.registrar_resultado(uid, content_id, 'dificuldade', quando + timedelta(days=1))
+        db.session.commit()
+        assert (row.repetitions, row.lapses, row.last_outcome) == (0, 1, 'dificuldade')
+
+
+def test_daily_lists_are_computed_in_one_pass(ctx):
+    (_, b), (_, uid_b), _ = ctx
+    dia = date(2031, 9, 1)
+    with app.app_context():
+        base = datetime.combine(dia, datetime.min.time())
+        for i, (atraso, lapsos) in enumerate([(2, 0), (0, 3), (0, 0), (-1, 5)]):
+            revisoes.agendar(uid_b, 90000 + i, base - timedelta(days=atraso))
+            db.session.query(ReviewItem).filter_by(user_id=uid_b, content_id=90000 + i).update({'lapses': lapsos})
+        db.session.commit()
+        resultado = revisoes.calcular_listas_diarias(dia, por_dia=2)
+        assert resultado['users'] >= 1
+
+    diaria = b.get('/api/reviews/daily?date=2031-09-01').get_json()
+    # mais atrasada primeiro; no mesmo dia, mais lapsos primeiro; a de amanhã fica de fora
+    assert diaria['status'] == 'ready' and diaria['content_ids'] == [90000, 90001] and diaria['overflow'] == 1
+    assert b.get('/api/reviews/daily?date=2031-09-02').get_json()['status'] == 'missing'
@@ -0,0 +1,37 @@
+import time
+
+from servicos.ttl_cache import TTLCache
+from servicos.token_store import TokenStore, ROTACIONADO, REPLAY, REVOGADO
+
+
+def test_ttl_cache_is_bounded_and_time_evicting():
+    agora = [0.0]
+    c = TTLCache(maxsize=3, ttl=10, clock=lambda: agora[0])
+    for k in 'abcd':
+        c.set(k)
+    assert len(c) == 3 and 'a' not in c  # LRU despejado
+    agora[0] = 11
+    assert 'b' not in c and len(c) == 2
+
+
+def test_rotation_and_revocation_without_redis():
+    store = TokenStore(None, maxsize=100)
+    exp = time.time() + 60
+    assert store.rotate('jti-1', 'jti-2', exp) == ROTACIONADO
+    assert store.rotate('jti-1', 'jti-3', exp) == REPLAY
+    store.revoke('jti-2', exp)
+    assert store.is_revoked('jti-2') and not store.is_revoked('jti-9')
+    assert store.rotate('jti-2', 'jti-4', exp) == REVOGADO
+
+
+def test_token_without_exp_stays_dead_for_refresh_lifetime():
+    agora = [0.0]
+    store = TokenStore(None, maxsize=100, ttl_sem_exp=3600, clock=lambda: agora[0])
+    store.revoke('jti-sem-exp')
+    assert store.rotate('jti-rot', 'jti-novo') == ROTACIONADO
+    agora[0] = 2
+    assert store.is_revoked('jti-sem-exp')
+    assert store.rotate('jti-rot', 'jti-outro') == REPLAY
+    agora[0] = 3601  # passado o prazo de refresh a marca local expira
+    assert not store.is_revoked('jti-sem-exp')
+
@@ -0,0 +1,77 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from main import app
+from models.models import db, User, SubjectContent, CompletedContent, WeeklyQuiz
+import routes.quiz_gen_routes as quiz_gen
+from servicos.banco_questoes import materializar
+
+EMAIL = 'weekly_stream_user@example.com'
+
+TEXTOS = [
+    ("Biologia", "Fotossíntese",
+     "<p>A fotossíntese é o processo pelo qual as plantas produzem glicose a partir de luz, água e gás carbônico. "
+     "A clorofila é o pigmento que absorve a luz nos cloroplastos das células vegetais. "
+     "As etapas da fotossíntese são absorção de luz, fotólise da água, produção de ATP e fixação do carbono. "
+     "O oxigênio liberado na fotossíntese vem da quebra das moléculas de água.</p>"),
+    ("História", "Revolução Industrial",
+     "<p>A Revolução Industrial começou na Inglaterra no século XVIII e transformou a produção de mercadorias. "
+     "A máquina a vapor foi a principal inovação tecnológica do período e acelerou a mecanização das fábricas. "
+     "Os operários enfrentavam jornadas longas, salários baixos e condições insalubres nas cidades industriais. "
+     "O carvão mineral era a fonte de energia que movimentava as máquinas a vapor.</p>"),
+]
+
+
+@pytest.fixture(scope="module")
+def client(login):
+    c = login(EMAIL)
+    with app.app_context():
+        uid = User.query.filter_by(email=EMAIL).first().id
+        for subject, topic, html in TEXTOS:
+            sc = SubjectContent(subject=subject, topic=topic, content_html=html, created_at=datetime.now())
+            db.session.add(sc)
+            db.session.flush()
+            db.session.add(CompletedContent(user_id=uid, content_id=sc.id, completed_at=datetime.now()))
+        db.session.commit()
+    return c
+
+
+def _linhas(resp):
+    return [json.loads(linha) for linha in resp.get_data(as_text=True).splitlines() if linha.strip()]
+
+
+def test_stream_emits_buckets_then_persists(client):
+    r = client.post('/api/quizzes/weekly?stream=1', json={'regenerate': True, 'per_content': 3})
+    assert r.status_code == 200 and r.mimetype == 'application/x-ndjson'
+    eventos = _linhas(r)
+    tipos = [e['type'] for e in eventos]
+    assert tipos[0] == 'meta' and tipos[-1] == 'done'
+    buckets = [e for e in eventos if e['type'] == 'bucket']
+    assert buckets and all(b['items'] for b in buckets)
+    assert tipos.index('order') > max(i for i, t in enumerate(tipos) if t == 'bucket')
+
+    ids_stream = {q['id'] for b in buckets for q in b['items']}
+    ordem = next(e['ids'] for e in eventos if e['type'] == 'order')
+    assert set(ordem) == ids_stream and eventos[-1]['count'] == len(ordem)
+
+    # modo normal devolve o que o stream persistiu, na ordem anunciada
+    normal = client.post('/api/quizzes/weekly', json={}).get_json()
+    assert [q['id'] for q in normal['items']] == ordem
+
+
+def test_stream_sends_polish_patches(client, monkeypatch):
+    def fake_patches(items):
+        yield 0, dict(items[0], question='Pergunta revisada pelo modelo?')
+
+    monkeypatch.setattr(quiz_gen, 'is_polish_enabled', lambda: True)
+    monkeypatch.setattr(quiz_gen, 'iter_polish_patches', fake_patches)
+    eventos = _linhas(client.post('/api/quizzes/weekly?stream=1', json={'regenerate': True, 'per_content': 3}))
+    ordem = next(e['ids'] for e in eventos if e['type'] == 'order')
+    patch = next(e for e in eventos if e['type'] == 'patch')
+    assert patch['id'] == ordem[0] and patch['item']['question'] == 'Pergunta revisada pelo modelo?'
+    with app.app_context():
+        uid = User.query.filter_by(email=EMAIL).first().id
+        row = WeeklyQuiz.query.filter_by(user_id=uid).first()
+        assert materializar(row.data)[0]['question'] == 'Pergunta revisada pelo modelo?'